@@ -8,12 +8,28 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
 import numpy as np
-from datetime import datetime
+import time
 from dotenv import load_dotenv
-from supabase import create_client, Client
 
 # Import our custom modules
-from tf_model import ListingMatchingModel, EmbeddingIndexBuilder
+from model_artifacts import BOOT_PROFILE
+
+# TensorFlow import is the first (and often largest) boot stage
+with BOOT_PROFILE.stage('tf_import'):
+    from tf_model import ListingMatchingModel, open_text_cache
+from embedding_index import EmbeddingIndexBuilder
+from vector_index import IVFFlatIndex
+import index_store
+import index_versions
+from index_versions import IndexWatcher
+from metrics import METRICS
+from micro_batcher import MicroBatcher
+from rebuild_jobs import RebuildJobRunner, RebuildInProgress, encoding_batch_size
+from query_cache import QueryCache
+from data_access import create_store
+from ranking import WORKSPACE, HybridReranker, top_k as select_top_k
+from listing_metadata import decode_metadata
+from attribute_filters import ATTRIBUTE_ARRAYS, AttributeFilter, FilterError, combine_filters
 from query_processor import QueryProcessor
 from temporal_encoder import TemporalEncoder
 
@@ -23,11 +39,8 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-# Initialize Supabase
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+# Listing/borough reads: live Supabase, or fixtures / a synthetic corpus (DATA_BACKEND)
+store = create_store()
 
 # Global variables for model and embeddings
 model = None
@@ -37,6 +50,71 @@ embedding_index = None
 # INITIALIZATION
 # ============================================================
 
+# Absolute paths (same directory as this script), independent of the WSGI cwd
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(SCRIPT_DIR, 'listing_embeddings')
+LEGACY_INDEX_FILE = os.path.join(SCRIPT_DIR, 'listing_embeddings.npz')
+
+# Persistent USE text-embedding cache shared by /rebuild, /index/upsert and build_embeddings.py
+TEXT_CACHE_PATH = os.getenv('TEXT_EMBEDDING_CACHE', os.path.join(SCRIPT_DIR, 'text_embedding_cache.sqlite'))
+
+# Exported two-tower model (USE + tower weights) written by build_embeddings.py
+MODEL_DIR = os.getenv('LISTING_MODEL_DIR', os.path.join(SCRIPT_DIR, 'listing_model'))
+
+# User-tower inference: eager, compiled (tf.function) or xla (compiled + XLA dense layers)
+USER_TOWER_MODE = os.getenv('USER_TOWER_MODE', 'compiled')
+
+
+# How often each worker checks listing_embeddings/CURRENT for a new index (0 = never)
+INDEX_WATCH_INTERVAL_SECONDS = float(os.getenv('INDEX_WATCH_INTERVAL_SECONDS', 5))
+# Old index versions kept on disk besides the current one
+INDEX_KEEP_VERSIONS = int(os.getenv('INDEX_KEEP_VERSIONS', index_versions.KEEP_VERSIONS))
+
+# Background /rebuild jobs: state files readable by every worker + the cross-process lock
+REBUILD_JOBS_DIR = os.getenv('REBUILD_JOBS_DIR', os.path.join(SCRIPT_DIR, 'rebuild_status'))
+# Listings per encoder call during /rebuild (0 = sized from available memory)
+REBUILD_BATCH_SIZE = int(os.getenv('REBUILD_BATCH_SIZE', 0))
+# Share of available memory one encoding batch may use when REBUILD_BATCH_SIZE=0
+REBUILD_MEMORY_FRACTION = float(os.getenv('REBUILD_MEMORY_FRACTION', 0.25))
+
+
+def resolve_index_path():
+    """Current index version (or pre-versioning index directory) if it exists, else the legacy .npz file"""
+    if index_versions.is_versioned_root(INDEX_DIR) or index_store.is_index_dir(INDEX_DIR):
+        return index_versions.resolve(INDEX_DIR)
+    return LEGACY_INDEX_FILE
+
+
+def load_serving_index(path):
+    """Load the index the watcher resolved (the legacy .npz until INDEX_DIR exists)"""
+    return EmbeddingIndexBuilder.load_index(path if os.path.exists(path) else LEGACY_INDEX_FILE)
+
+
+def swap_index(new_index):
+    """Serve new_index from now on (single reference assignment, no lock needed)"""
+    global embedding_index, model_ready
+    embedding_index = new_index
+    # A worker that booted before the first build starts serving once an index appears
+    if model is not None:
+        model_ready = True
+
+
+def publish_index(builder, index):
+    """Write index as a new version, make it current and serve it in this worker"""
+    swap_index(builder.publish_version(INDEX_DIR, index, keep=INDEX_KEEP_VERSIONS))
+    INDEX_WATCHER.mark_current()
+
+
+# Picks up indexes published by /rebuild, /index/upsert or build_embeddings.py in any process
+INDEX_WATCHER = IndexWatcher(
+    INDEX_DIR, load_serving_index, swap_index,
+    interval_seconds=INDEX_WATCH_INTERVAL_SECONDS
+)
+
+
+REBUILD_RUNNER = RebuildJobRunner(REBUILD_JOBS_DIR)
+
+
 def initialize_model():
     """
     Load TensorFlow model and embedding index (called once at startup)
@@ -57,20 +135,43 @@ def initialize_model():
     try:
         # Load TensorFlow model
         logger.info("📦 Loading TensorFlow model...")
-        model = ListingMatchingModel()
+        # From the exported SavedModel: same weights that encoded the index, no TF Hub download
+        if ListingMatchingModel.is_saved_model_dir(MODEL_DIR):
+            model = ListingMatchingModel(text_cache=open_text_cache(TEXT_CACHE_PATH), saved_model_dir=MODEL_DIR)
+        else:
+            logger.error(f"⚠️  No exported model at {MODEL_DIR} - building fresh tower weights from TF Hub.")
+            logger.error("   User embeddings will not match the index; run: python build_embeddings.py")
+            model = ListingMatchingModel(text_cache=open_text_cache(TEXT_CACHE_PATH))
         logger.info("✅ Model loaded successfully\n")
 
+        # Trace/compile the user tower now instead of on the first /match
+        warmup_batch_size = max(MATCH_BATCH_MAX_SIZE, MAX_BATCH_QUERIES)
+        with BOOT_PROFILE.stage('warmup'):
+            try:
+                model.compile_user_tower(USER_TOWER_MODE)
+                warmup_ms = model.warmup(warmup_batch_size)
+            except Exception as e:
+                logger.error(f"⚠️  User tower mode '{USER_TOWER_MODE}' failed ({e}), using eager mode")
+                model.compile_user_tower('eager')
+                warmup_ms = model.warmup(warmup_batch_size)
+        logger.info(f"🔥 User tower warmed up ({model.user_tower_mode}): {warmup_ms} ms per batch size\n")
+
         # Load pre-computed embeddings
         logger.info("📂 Loading embedding index...")
         logger.info(f"Current working directory: {os.getcwd()}")
 
-        # Use absolute path to embedding file (same directory as this script)
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        embedding_path = os.path.join(script_dir, 'listing_embeddings.npz')
+        # Prefer the memory-mapped index directory; fall back to the legacy .npz
+        embedding_path = resolve_index_path()
         logger.info(f"Looking for: {embedding_path}")
 
-        embedding_index = EmbeddingIndexBuilder.load_index(embedding_path)
-        logger.info(f"✅ Loaded {len(embedding_index['listing_ids'])} listing embeddings\n")
+        with BOOT_PROFILE.stage('index_load'):
+            embedding_index = INDEX_WATCHER.load()
+        INDEX_WATCHER.start()
+        logger.info(f"✅ Loaded {EmbeddingIndexBuilder.n_listings(embedding_index)} listing embeddings")
+        if embedding_index.get('vector_index') is not None:
+            logger.info(f"✅ Vector index: {embedding_index['vector_index'].stats()}\n")
+        else:
+            logger.info("ℹ️  No vector index found - using exact search\n")
 
         logger.info("=" * 70)
         logger.info(" 🚀 API READY FOR REQUESTS")
@@ -83,7 +184,9 @@ def initialize_model():
         logger.error(f"   Error: {e}")
         logger.error(f"   Current directory: {os.getcwd()}")
         logger.error("   Please run: python build_embeddings.py")
-        logger.error("   API will start but /match endpoint will not work.\n")
+        logger.error("   API will start; /match works once an index is published.\n")
+        INDEX_WATCHER.mark_current()
+        INDEX_WATCHER.start()
         return False
 
     except Exception as e:
@@ -94,6 +197,388 @@ def initialize_model():
         return False
 
 
+# ============================================================
+# SEARCH
+# ============================================================
+
+# Lists scanned per query by the IVF vector index (recall/latency knob)
+VECTOR_INDEX_NPROBE = int(os.getenv('VECTOR_INDEX_NPROBE', IVFFlatIndex.DEFAULT_N_PROBE))
+
+# Quantized scoring: re-score the best top_k * factor candidates in float32 (0 = off)
+QUANTIZED_RESCORE_FACTOR = int(os.getenv('QUANTIZED_RESCORE_FACTOR', 4))
+
+# Quantization applied by /rebuild ('float16', 'int8' or empty for none)
+EMBEDDING_QUANTIZATION = os.getenv('EMBEDDING_QUANTIZATION') or None
+
+# Listings fetched per page by /rebuild (None = ListingPreprocessor.DEFAULT_PAGE_SIZE)
+LISTING_PAGE_SIZE = int(os.getenv('LISTING_PAGE_SIZE', 0)) or None
+
+# Restrict /match to listings within the radius of a recognised location
+# (e.g. "williamsburg" → 2 km) unless the request sets geo_filter
+GEO_FILTER_DEFAULT = os.getenv('GEO_FILTER_DEFAULT', 'false').lower() == 'true'
+
+# Drop listings priced above the query's parsed budget ("under $150")
+# unless the request sets budget_filter; otherwise budget only affects ranking
+BUDGET_FILTER_DEFAULT = os.getenv('BUDGET_FILTER_DEFAULT', 'false').lower() == 'true'
+
+
+def search_embeddings(index, user_embedding, top_k, candidate_mask=None,
+                      n_probe=None, exact=False, similarities=None, timings=None):
+    """
+    Find the top-k listing rows for a user embedding
+
+    Uses the IVF vector index when one was loaded with the embeddings,
+    otherwise (or when exact=True) scores every candidate row - on the
+    quantized matrix with float32 re-scoring when the index has one.
+
+    Args:
+        index: Embedding index dict from EmbeddingIndexBuilder.load_index()
+        user_embedding: (128,) normalized user embedding
+        top_k: Number of results
+        candidate_mask: Optional boolean mask over index rows (e.g. borough filter)
+        n_probe: IVF lists to scan (defaults to VECTOR_INDEX_NPROBE)
+        exact: Force brute-force scoring
+        similarities: Optional precomputed float32 scores for every base row
+                      (from a batched matmul) - skips the exact-path matmul
+        timings: Optional per-request dict that receives stage durations (ms)
+
+    Returns:
+        Tuple of (row indices, similarity scores) sorted by descending score
+    """
+    overlay = index.get('overlay')
+    if overlay is None:
+        return search_base(index, user_embedding, top_k, candidate_mask,
+                           n_probe, exact, similarities, timings)
+
+    # Upserted rows: search the base without the rows they replaced, then
+    # score the small overlay segment exactly and merge the two top-k lists
+    candidate_mask = overlay.live_mask(candidate_mask)
+    base_rows, base_scores = search_base(
+        index, user_embedding, top_k, candidate_mask[:overlay.n_base],
+        n_probe, exact, similarities, timings
+    )
+    with METRICS.stage('overlay_search', timings):
+        return overlay.search(user_embedding, top_k, candidate_mask, base_rows, base_scores)
+
+
+def search_base(index, user_embedding, top_k, candidate_mask=None,
+                n_probe=None, exact=False, similarities=None, timings=None):
+    """search_embeddings() over the base rows only (candidate_mask has n_base entries)"""
+    vector_index = index.get('vector_index')
+
+    # IVF and quantized search score and select in one call
+    if vector_index is not None and not exact:
+        with METRICS.stage('ann_search', timings):
+            return vector_index.search(
+                user_embedding, top_k,
+                candidate_mask=candidate_mask,
+                n_probe=n_probe or VECTOR_INDEX_NPROBE
+            )
+
+    rows = np.flatnonzero(candidate_mask) if candidate_mask is not None else np.arange(len(index['embeddings']))
+
+    if similarities is not None:
+        with METRICS.stage('top_k', timings):
+            return select_top_k(similarities[rows], top_k, rows)
+
+    quantized = index.get('quantized')
+    if quantized is not None:
+        with METRICS.stage('quantized_search', timings):
+            return quantized.search(
+                user_embedding, top_k, rows=rows,
+                rescore_embeddings=index['embeddings'] if QUANTIZED_RESCORE_FACTOR else None,
+                rescore_factor=max(QUANTIZED_RESCORE_FACTOR, 1)
+            )
+
+    with METRICS.stage('similarity', timings):
+        scores = WORKSPACE.score(
+            index['embeddings'], user_embedding,
+            rows=rows if candidate_mask is not None else None
+        )
+    with METRICS.stage('top_k', timings):
+        return select_top_k(scores, top_k, rows if candidate_mask is not None else None)
+
+
+# ============================================================
+# MATCH PIPELINE
+# ============================================================
+
+# Micro-batching of concurrent /match calls (user tower + exact-path matmul)
+MATCH_BATCH_MAX_SIZE = int(os.getenv('MATCH_BATCH_MAX_SIZE', 16))
+MATCH_BATCH_MAX_WAIT_MS = float(os.getenv('MATCH_BATCH_MAX_WAIT_MS', 2))
+
+# Upper bound on queries accepted by /match/batch
+MAX_BATCH_QUERIES = int(os.getenv('MAX_BATCH_QUERIES', 64))
+
+# Parsed queries + user embeddings of recent searches (skips parsing and TF inference)
+QUERY_CACHE = QueryCache(
+    max_entries=int(os.getenv('QUERY_CACHE_SIZE', 1024)),
+    ttl_seconds=float(os.getenv('QUERY_CACHE_TTL_SECONDS', 600))
+)
+
+
+def encode_query_batch(items):
+    """
+    Encode a batch of queries with one user-tower forward pass
+
+    When the index is searched exactly in float32 (no vector index, no
+    quantized copy), the whole batch is also scored with a single
+    (B×128)·(128×N) matmul.
+
+    Args:
+        items: List of (index, query_text, structured_features, schedule_features)
+
+    Returns:
+        List of (user_embedding, similarities or None, batch timings in ms)
+        in input order
+    """
+    batch_timings = {}
+    tower_seconds = {}
+    user_embeddings = model.encode_queries(
+        [item[1] for item in items],
+        np.stack([item[2] for item in items]),
+        np.stack([item[3] for item in items]),
+        timings=tower_seconds
+    )
+    for stage, seconds in tower_seconds.items():
+        METRICS.observe(stage, seconds, batch_timings)
+
+    similarities = [None] * len(items)
+    index = items[0][0]
+    if index.get('vector_index') is None and index.get('quantized') is None:
+        with METRICS.stage('similarity', batch_timings):
+            same_index = [i for i, item in enumerate(items) if item[0] is index]
+            scores = user_embeddings[same_index] @ np.asarray(index['embeddings'], dtype=np.float32).T
+        for row, i in enumerate(same_index):
+            similarities[i] = scores[row]
+
+    return [(embedding, sims, batch_timings) for embedding, sims in zip(user_embeddings, similarities)]
+
+
+# Second-stage ranking of the top RERANK_CANDIDATES search results
+# (schedule/budget weights of 0 turn re-ranking off)
+RERANKER = HybridReranker(
+    similarity_weight=float(os.getenv('RERANK_SIMILARITY_WEIGHT', 0.8)),
+    schedule_weight=float(os.getenv('RERANK_SCHEDULE_WEIGHT', 0.1)),
+    budget_weight=float(os.getenv('RERANK_BUDGET_WEIGHT', 0.1)),
+    candidates=int(os.getenv('RERANK_CANDIDATES', 100))
+)
+
+
+def rerank_candidates(index, query_data, rows, similarities, top_k):
+    """
+    Re-order search candidates by similarity, schedule fit and budget fit
+
+    Uses the temporal features and prices stored with the index; an index
+    built without them is ranked on the components it has.
+
+    Returns:
+        Tuple of (row indices, similarity scores, blended scores or None)
+    """
+    if not RERANKER.enabled or len(rows) == 0:
+        return rows[:top_k], similarities[:top_k], None
+
+    schedules = index.get('temporal_features')
+    prices = index.get('prices')
+    return RERANKER.rerank(
+        rows, similarities, top_k,
+        listing_schedules=schedules[rows] if schedules is not None else None,
+        user_schedule=query_data['schedule_features'],
+        prices=prices[rows] if prices is not None else None,
+        budget=query_data.get('parsed', {}).get('budget')
+    )
+
+
+QUERY_BATCHER = MicroBatcher(
+    encode_query_batch,
+    max_batch_size=MATCH_BATCH_MAX_SIZE,
+    max_wait_ms=MATCH_BATCH_MAX_WAIT_MS,
+    name='match-query-batcher'
+)
+
+
+def borough_candidate_mask(index, query_data):
+    """
+    Boolean mask of index rows in the query's borough, or None if no borough
+
+    Includes ALL listings of the borough (active and inactive). Uses the
+    borough IDs stored with the index; only indexes built before those were
+    stored fall back to a database query.
+    """
+    borough = query_data.get('parsed', {}).get('borough')
+    if not borough:
+        return None
+
+    masks = EmbeddingIndexBuilder.borough_masks(index)
+    if masks is not None:
+        mask = masks.get(borough['id'])
+        return mask if mask is not None else np.zeros(len(index['listing_ids']), dtype=bool)
+
+    borough_listing_ids = set(store.borough_listing_ids(borough['id']))
+    return np.array(
+        [lid in borough_listing_ids for lid in index['listing_ids']],
+        dtype=bool
+    )
+
+
+def geo_candidate_mask(index, query_data, radius_km=None):
+    """
+    Boolean mask of index rows within the query location's radius, or None
+
+    None when the query names no known location or the index has no
+    coordinates (built before they were stored). Rows without coordinates
+    are excluded.
+
+    Args:
+        radius_km: Overrides the radius of the location keyword
+    """
+    location = query_data.get('parsed', {}).get('location')
+    if not location:
+        return None
+
+    geo = EmbeddingIndexBuilder.geo_index(index)
+    if geo is None:
+        return None
+
+    return geo.mask_within(location['lat'], location['lng'], float(radius_km or location['radius']))
+
+
+def attribute_candidate_mask(index, query_data, attribute_filter=None, budget_filter=False):
+    """
+    Boolean mask of index rows passing the request's hard attribute filters, or None
+
+    None when there is nothing to filter on or the index predates the
+    attribute arrays.
+
+    Args:
+        attribute_filter: AttributeFilter compiled from the request's "filters"
+        budget_filter: Also cap prices at the query's parsed budget max
+    """
+    budget = query_data.get('parsed', {}).get('budget') if budget_filter else None
+    combined = combine_filters(attribute_filter, AttributeFilter.budget(budget))
+    return combined.mask(index) if combined is not None else None
+
+
+def intersect_masks(*masks):
+    """Logical AND of the given candidate masks, ignoring None (None if all are None)"""
+    masks = [m for m in masks if m is not None]
+    if not masks:
+        return None
+    combined = masks[0]
+    for mask in masks[1:]:
+        combined = combined & mask
+    return combined
+
+
+# Listing details served from the index vs fetched from the database
+LISTING_DETAIL_STATS = {'local': 0, 'fetched': 0}
+
+
+def fetch_listing_details(index, rows):
+    """
+    Listing rows for the given index rows, keyed by _id
+
+    Served from the metadata stored with the index; only rows without
+    stored metadata (indexes built before it existed) hit the database.
+    """
+    if not len(rows):
+        return {}
+
+    rows = np.unique(np.asarray(rows, dtype=np.int64))
+
+    listing_map = {}
+    if index.get('listing_metadata') is not None:
+        for record in decode_metadata(index['listing_metadata'], rows):
+            if record:
+                listing_map[record['_id']] = record
+
+    missing = [index['listing_ids'][row] for row in rows if index['listing_ids'][row] not in listing_map]
+    if missing:
+        listing_map.update({l['_id']: l for l in store.get_listings(missing)})
+
+    LISTING_DETAIL_STATS['local'] += len(rows) - len(missing)
+    LISTING_DETAIL_STATS['fetched'] += len(missing)
+
+    return listing_map
+
+
+def format_matches(query_data, top_listing_ids, top_scores, listing_map, rank_scores=None):
+    """Build the API match objects for ranked listing IDs"""
+    results = []
+    for position, (listing_id, score) in enumerate(zip(top_listing_ids, top_scores)):
+        listing = listing_map.get(listing_id)
+        if not listing:
+            continue
+
+        # Calculate price for display - use "Price number (for map)" field
+        # This is the standardized per-night price shown on the map
+        # Convert to float since it's stored as string in database
+        price_raw = listing.get('Price number (for map)') or 0
+        try:
+            price = float(price_raw)
+        except (ValueError, TypeError):
+            price = 0
+
+        # Extract location
+        location_addr = listing.get('Location - Address', {})
+        lat, lng = None, None
+        if isinstance(location_addr, dict):
+            lat = location_addr.get('lat')
+            lng = location_addr.get('lng')
+
+        # Generate match reasons
+        match_reasons = QueryProcessor.format_match_reasons(
+            query_data, listing, score
+        )
+
+        # Safe extraction with None checks
+        description = listing.get('Description') or ''
+        description_preview = str(description)[:200] if description else ''
+
+        match = {
+            'listing_id': listing_id,
+            'similarity_score': score,
+            'title': listing.get('Name') or 'Untitled',
+            'description': description_preview,
+            'city': listing.get('Location - City'),
+            'neighborhood': listing.get('Location - Hood'),
+            'price_per_night': float(price) if price else None,
+            'bedrooms': listing.get('Features - Qty Bedrooms'),
+            'bathrooms': listing.get('Features - Qty Bathrooms'),
+            'days_available': listing.get('Days Available (List of Days)') or [],
+            'coordinates': {'lat': lat, 'lng': lng} if lat and lng else None,
+            'match_reasons': match_reasons,
+            'url': f"https://split-lease.com/listings/{listing_id}"
+        }
+        if rank_scores is not None:
+            match['rank_score'] = float(rank_scores[position])
+        results.append(match)
+
+    return results
+
+
+def serialize_parsed_query(query_data):
+    """Convert the parsed query to a JSON-serializable dict"""
+    parsed_query_serializable = {}
+    for key, value in query_data.get('parsed', {}).items():
+        if value is None:
+            parsed_query_serializable[key] = None
+        elif isinstance(value, dict):
+            # Convert any numpy values in nested dicts
+            parsed_query_serializable[key] = {
+                k: (v.tolist() if hasattr(v, 'tolist') else v)
+                for k, v in value.items()
+                if v is not None
+            }
+        elif hasattr(value, 'tolist'):
+            # Convert numpy arrays to lists
+            parsed_query_serializable[key] = value.tolist()
+        else:
+            parsed_query_serializable[key] = value
+
+    return parsed_query_serializable
+
+
 # Initialize on startup (lazy loading for WSGI compatibility)
 model_ready = False
 _initialization_attempted = False
@@ -111,6 +596,18 @@ def ensure_model_loaded():
 # API ENDPOINTS
 # ============================================================
 
+@app.after_request
+def count_request(response):
+    """Count every response by route template and status (mysite3_http_requests_total)"""
+    METRICS.inc(
+        'http_requests_total',
+        endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+        method=request.method,
+        status=str(response.status_code)
+    )
+    return response
+
+
 @app.route('/', methods=['GET'])
 def home():
     """Health check and API info"""
@@ -119,12 +616,16 @@ def home():
         'service': 'TensorFlow Semantic Listing Matching API',
         'version': '2.0.0-tf',
         'model_ready': model_ready,
-        'total_listings': len(embedding_index['listing_ids']) if embedding_index else 0,
+        'total_listings': EmbeddingIndexBuilder.n_listings(embedding_index) if embedding_index else 0,
         'endpoints': {
             '/': 'GET - API info',
             '/health': 'GET - Health check',
             '/match': 'POST - Semantic listing matching (TensorFlow)',
-            '/rebuild': 'POST - Rebuild embedding index'
+            '/match/batch': 'POST - Match many queries in one request',
+            '/rebuild': 'POST - Start a background rebuild of the embedding index',
+            '/rebuild/<job_id>': 'GET - Rebuild job stage and progress',
+            '/metrics': 'GET - Prometheus metrics (per-stage latency histograms, counters)',
+            '/index/upsert': 'POST - Incrementally upsert/delete listings in the index'
         }
     })
 
@@ -137,20 +638,65 @@ def health():
 
     try:
         # Test database connection
-        response = supabase.table('listing').select('_id').limit(1).execute()
-        db_status = 'connected' if response.data else 'empty'
+        db_status = store.ping()
     except Exception as e:
         db_status = f'error: {str(e)}'
 
     return jsonify({
         'status': 'ok',
         'database': db_status,
+        'data_store': store.stats(),
         'tensorflow_model': 'loaded' if model else 'not loaded',
-        'embedding_index': f'{len(embedding_index["listing_ids"])} listings' if embedding_index else 'not loaded',
+        'model_dir': model.saved_model_dir if model else None,
+        'boot': BOOT_PROFILE.as_dict(),
+        'embedding_index': f'{EmbeddingIndexBuilder.n_listings(embedding_index)} listings' if embedding_index else 'not loaded',
+        'index_overlay': embedding_index['overlay'].stats() if embedding_index and embedding_index.get('overlay') is not None else None,
+        'vector_index': embedding_index['vector_index'].stats() if embedding_index and embedding_index.get('vector_index') is not None else None,
+        'text_cache': model.text_cache.stats() if model and model.text_cache else None,
+        'user_tower': {'mode': model.user_tower_mode, 'warmup_ms': model.warmup_ms} if model else None,
+        'query_batcher': QUERY_BATCHER.stats(),
+        'query_cache': QUERY_CACHE.stats(),
+        'listing_details': dict(LISTING_DETAIL_STATS),
+        'index_watcher': INDEX_WATCHER.stats(),
+        'rebuild': REBUILD_RUNNER.stats(),
+        'geo_index': {**embedding_index['geo_index'].stats(), 'filter_default': GEO_FILTER_DEFAULT}
+                     if embedding_index and embedding_index.get('geo_index') is not None else None,
+        'attribute_filters': {
+            'columns': [name for name in ATTRIBUTE_ARRAYS if embedding_index.get(name) is not None],
+            'budget_filter_default': BUDGET_FILTER_DEFAULT
+        } if embedding_index else None,
+        'reranker': RERANKER.config(),
+        'latency': METRICS.snapshot()['stages'],
         'ready': model_ready
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of this worker's stage latencies and counters"""
+    cache = QUERY_CACHE.stats()
+    batcher = QUERY_BATCHER.stats()
+    index = embedding_index
+
+    text = METRICS.prometheus_text(
+        gauges={
+            'index_listings': EmbeddingIndexBuilder.n_listings(index) if index else 0,
+            'query_cache_entries': cache['size'],
+            'model_ready': int(bool(model_ready))
+        },
+        counters={
+            'query_cache_hits_total': cache['hits'],
+            'query_cache_misses_total': cache['misses'],
+            'query_batches_total': batcher['batches'],
+            'query_batch_items_total': batcher['items'],
+            'listing_details_local_total': LISTING_DETAIL_STATS['local'],
+            'listing_details_fetched_total': LISTING_DETAIL_STATS['fetched'],
+            'index_swaps_total': INDEX_WATCHER.swaps
+        }
+    )
+    return app.response_class(text, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/match', methods=['POST'])
 def match_semantic():
     """
@@ -159,7 +705,21 @@ def match_semantic():
     Request body:
     {
         "query": "Need Mon-Thu in Brooklyn under $150/night for 3 months",
-        "top_k": 20
+        "top_k": 20,
+        "n_probe": 8,       # optional - IVF lists to scan (higher = better recall)
+        "exact": false,     # optional - bypass the vector index
+        "geo_filter": true, # optional - only listings within the location's radius
+                            #            (default GEO_FILTER_DEFAULT)
+        "radius_km": 3,     # optional - radius override for geo_filter
+        "filters": {        # optional - hard attribute filters (see attribute_filters.py)
+            "price": {"min": 100, "max": 150},
+            "bedrooms": {"gte": 2},
+            "active": true,
+            "days": ["monday", "tuesday"]
+        },
+        "budget_filter": true,  # optional - drop listings above the parsed budget
+                                #            (default BUDGET_FILTER_DEFAULT)
+        "debug": false      # optional - include per-stage timings_ms
     }
 
     Response:
@@ -176,10 +736,12 @@ def match_semantic():
                 "match_reasons": [...]
             }
         ],
-        "processing_time_ms": 45
+        "processing_time_ms": 45,
+        "timings_ms": {"query_parse": 0.4, "use_encode": 12.1, ...}   # debug only
     }
     """
-    start_time = datetime.now()
+    start_time = time.perf_counter()
+    timings = {}
 
     # Trigger lazy loading
     ensure_model_loaded()
@@ -189,6 +751,9 @@ def match_semantic():
             'error': 'Model not ready. Please run build_embeddings.py first.'
         }), 503
 
+    # One consistent index for the whole request, even if /rebuild swaps it meanwhile
+    index = embedding_index
+
     try:
         # Parse request
         data = request.get_json()
@@ -198,201 +763,482 @@ def match_semantic():
         if not query_text:
             return jsonify({'error': 'query field is required'}), 400
 
+        attribute_filter = AttributeFilter.parse(data.get('filters'))
+
+        n_probe = data.get('n_probe')
+        if n_probe is not None and (not isinstance(n_probe, int) or isinstance(n_probe, bool) or n_probe < 1):
+            return jsonify({'error': 'n_probe must be a positive integer'}), 400
+
         # Validate and cap top_k to available listings
-        max_listings = len(embedding_index['listing_ids']) if embedding_index else 0
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+            return jsonify({'error': 'top_k must be a positive integer'}), 400
+        max_listings = EmbeddingIndexBuilder.n_listings(index) if index else 0
         if top_k > max_listings:
             top_k = max_listings
 
+        # Repeat queries reuse the parsed features and user embedding
+        cached = QUERY_CACHE.get(query_text)
+
         # Step 1: Process user query
-        try:
-            query_data = QueryProcessor.process_query(query_text, supabase)
-        except Exception as e:
-            import traceback
-            return jsonify({
-                'error': f'Query processing failed: {str(e)}',
-                'type': type(e).__name__,
-                'traceback': traceback.format_exc()
-            }), 400
-
-        # Step 1.5: Filter by borough if specified (STRICT - no fallback, no active filter)
-        borough = query_data.get('parsed', {}).get('borough')
-
-        if borough:
-            borough_id = borough['id']
-
-            # Get ALL listings from requested borough (active and inactive)
-            borough_listings = supabase.table('listing')\
-                .select('_id')\
-                .eq('"Location - Borough"', borough_id)\
-                .execute()
-
-            # Filter embedding index to only include borough listings
-            borough_listing_ids = {l['_id'] for l in borough_listings.data}
-            borough_mask = [lid in borough_listing_ids for lid in embedding_index['listing_ids']]
-            filtered_embeddings = embedding_index['embeddings'][borough_mask]
-            filtered_ids = [lid for lid, m in zip(embedding_index['listing_ids'], borough_mask) if m]
-
-            # Step 2: Compute similarity scores on filtered embeddings
-            similarities = model.match(
-                query_text,
-                query_data['structured_features'],
-                query_data['schedule_features'],
-                filtered_embeddings
+        if cached is not None:
+            query_data, user_embedding = cached
+        else:
+            try:
+                with METRICS.stage('query_parse', timings):
+                    query_data = QueryProcessor.process_query(query_text, store)
+            except Exception as e:
+                import traceback
+                return jsonify({
+                    'error': f'Query processing failed: {str(e)}',
+                    'type': type(e).__name__,
+                    'traceback': traceback.format_exc()
+                }), 400
+
+        # Step 1.5: Restrict candidates to borough if specified (STRICT - no fallback, no active filter)
+        with METRICS.stage('borough_lookup', timings):
+            candidate_mask = borough_candidate_mask(index, query_data)
+
+        # Step 1.6: ...and to the location's radius when geo filtering is on
+        if data.get('geo_filter', GEO_FILTER_DEFAULT):
+            with METRICS.stage('geo_lookup', timings):
+                candidate_mask = intersect_masks(
+                    candidate_mask, geo_candidate_mask(index, query_data, data.get('radius_km'))
+                )
+
+        # Step 1.7: ...and to the hard attribute filters (price, bedrooms, days, ...)
+        with METRICS.stage('attribute_filter', timings):
+            candidate_mask = intersect_masks(candidate_mask, attribute_candidate_mask(
+                index, query_data, attribute_filter,
+                data.get('budget_filter', BUDGET_FILTER_DEFAULT)
+            ))
+
+        # Step 2: Encode user query with the TensorFlow user tower
+        # (coalesced with concurrent /match calls by the micro-batcher)
+        # (query_encode includes the wait for the batch; use_encode and
+        # tower_forward are the batch's own USE / dense-layer time)
+        similarities = None
+        if cached is None:
+            with METRICS.stage('query_encode', timings):
+                user_embedding, similarities, batch_timings = QUERY_BATCHER.submit((
+                    index,
+                    query_text,
+                    query_data['structured_features'],
+                    query_data['schedule_features']
+                ))
+            timings.update(batch_timings)
+            QUERY_CACHE.put(query_text, (query_data, user_embedding))
+
+        # Step 3: Get top candidates (approximate search when a vector index is available)
+        candidate_indices, candidate_similarities = search_embeddings(
+            index,
+            user_embedding,
+            RERANKER.candidate_count(top_k),
+            candidate_mask=candidate_mask,
+            n_probe=n_probe,
+            exact=bool(data.get('exact', False)),
+            similarities=similarities,
+            timings=timings
+        )
+
+        # Step 3.5: Re-rank candidates by schedule and budget fit
+        with METRICS.stage('rerank', timings):
+            top_indices, top_similarities, rank_scores = rerank_candidates(
+                index, query_data, candidate_indices, candidate_similarities, top_k
             )
+        top_listing_ids = [index['listing_ids'][i] for i in top_indices]
+        top_scores = [float(s) for s in top_similarities]
 
-            # Step 3: Get top-k results from filtered set
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            top_listing_ids = [filtered_ids[i] for i in top_indices]
-            top_scores = [float(similarities[i]) for i in top_indices]
+        # Step 4: Listing details (from the index, database only for misses)
+        with METRICS.stage('metadata_fetch', timings):
+            listing_map = fetch_listing_details(index, top_indices)
 
-        else:
-            # No borough specified - use all listings
-            # Step 2: Compute similarity scores using TensorFlow
-            similarities = model.match(
-                query_text,
-                query_data['structured_features'],
-                query_data['schedule_features'],
-                embedding_index['embeddings']
-            )
+        # Step 5: Format results
+        with METRICS.stage('format', timings):
+            results = format_matches(query_data, top_listing_ids, top_scores, listing_map, rank_scores)
+            parsed_query = serialize_parsed_query(query_data)
 
-            # Step 3: Get top-k results
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            top_listing_ids = [embedding_index['listing_ids'][i] for i in top_indices]
-            top_scores = [float(similarities[i]) for i in top_indices]
+        # Calculate processing time
+        processing_time = time.perf_counter() - start_time
+        METRICS.observe('match_total', processing_time)
 
-        # Step 4: Fetch full listing details from database
-        listings_response = supabase.table('listing').select('*').in_('_id', top_listing_ids).execute()
+        response = {
+            'query': query_text,
+            'parsed_query': parsed_query,
+            'matches': results,
+            'count': len(results),
+            'processing_time_ms': round(processing_time * 1000, 2),
+            'model': 'TensorFlow Two-Tower Semantic Matching'
+        }
+        if data.get('debug'):
+            response['timings_ms'] = timings
+        return jsonify(response)
 
-        # Create lookup map
-        listing_map = {l['_id']: l for l in listings_response.data}
+    except FilterError as e:
+        return jsonify({'error': f'Invalid filters: {e}'}), 400
+    except Exception as e:
+        return _match_error_response('/match', e)
 
-        # Step 5: Format results
-        results = []
-        for listing_id, score in zip(top_listing_ids, top_scores):
-            listing = listing_map.get(listing_id)
-            if not listing:
-                continue
 
-            # Calculate price for display - use "Price number (for map)" field
-            # This is the standardized per-night price shown on the map
-            # Convert to float since it's stored as string in database
-            price_raw = listing.get('Price number (for map)') or 0
-            try:
-                price = float(price_raw)
-            except (ValueError, TypeError):
-                price = 0
-
-            # Extract location
-            location_addr = listing.get('Location - Address', {})
-            lat, lng = None, None
-            if isinstance(location_addr, dict):
-                lat = location_addr.get('lat')
-                lng = location_addr.get('lng')
-
-            # Generate match reasons
-            match_reasons = QueryProcessor.format_match_reasons(
-                query_data, listing, score
-            )
+@app.route('/match/batch', methods=['POST'])
+def match_semantic_batch():
+    """
+    Match many queries in one request
 
-            # Safe extraction with None checks
-            description = listing.get('Description') or ''
-            description_preview = str(description)[:200] if description else ''
+    All queries go through the user tower in a single forward pass and, on
+    the exact-search path, are scored with one (B×128)·(128×N) matmul.
+    Listing details for every query are fetched with one database call.
 
-            results.append({
-                'listing_id': listing_id,
-                'similarity_score': score,
-                'title': listing.get('Name') or 'Untitled',
-                'description': description_preview,
-                'city': listing.get('Location - City'),
-                'neighborhood': listing.get('Location - Hood'),
-                'price_per_night': float(price) if price else None,
-                'bedrooms': listing.get('Features - Qty Bedrooms'),
-                'bathrooms': listing.get('Features - Qty Bathrooms'),
-                'days_available': listing.get('Days Available (List of Days)') or [],
-                'coordinates': {'lat': lat, 'lng': lng} if lat and lng else None,
-                'match_reasons': match_reasons,
-                'url': f"https://split-lease.com/listings/{listing_id}"
-            })
+    Request body:
+    {
+        "queries": [
+            "Need Mon-Thu in Brooklyn under $150/night",
+            {"query": "Weekend place in Manhattan", "top_k": 5}
+        ],
+        "top_k": 20,        # default for string entries
+        "geo_filter": true, # optional - default for entries (see /match)
+        "filters": {...},   # optional - default for entries (see /match)
+        "budget_filter": true,  # optional - default for entries (see /match)
+        "debug": false      # optional - include per-stage timings_ms (summed over queries)
+    }
 
-        # Calculate processing time
-        processing_time_ms = (datetime.now() - start_time).total_seconds() * 1000
-
-        # Convert parsed query to JSON-serializable format
-        parsed_query_serializable = {}
-        for key, value in query_data.get('parsed', {}).items():
-            if value is None:
-                parsed_query_serializable[key] = None
-            elif isinstance(value, dict):
-                # Convert any numpy values in nested dicts
-                parsed_query_serializable[key] = {
-                    k: (v.tolist() if hasattr(v, 'tolist') else v)
-                    for k, v in value.items()
-                    if v is not None
-                }
-            elif hasattr(value, 'tolist'):
-                # Convert numpy arrays to lists
-                parsed_query_serializable[key] = value.tolist()
-            else:
-                parsed_query_serializable[key] = value
+    Response:
+    {
+        "results": [ {same fields as /match without processing_time_ms}, ... ],
+        "count": 2,
+        "processing_time_ms": 120
+    }
+    """
+    start_time = time.perf_counter()
+    timings = {}
+
+    ensure_model_loaded()
 
+    if not model_ready:
         return jsonify({
-            'query': query_text,
-            'parsed_query': parsed_query_serializable,
-            'matches': results,
+            'error': 'Model not ready. Please run build_embeddings.py first.'
+        }), 503
+
+    index = embedding_index
+
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'request body must be a JSON object'}), 400
+        entries = data.get('queries') or []
+        default_top_k = data.get('top_k', 20)
+
+        if not entries:
+            return jsonify({'error': 'queries field is required'}), 400
+        if not isinstance(entries, list):
+            return jsonify({'error': 'queries must be a list'}), 400
+        if len(entries) > MAX_BATCH_QUERIES:
+            return jsonify({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}), 400
+        n_probe = data.get('n_probe')
+        if n_probe is not None and (not isinstance(n_probe, int) or isinstance(n_probe, bool) or n_probe < 1):
+            return jsonify({'error': 'n_probe must be a positive integer'}), 400
+
+        requests_ = []
+        for position, entry in enumerate(entries):
+            if isinstance(entry, str):
+                entry = {'query': entry}
+            if not isinstance(entry, dict):
+                return jsonify({'error': f'queries[{position}] must be a string or an object'}), 400
+            if not isinstance(entry.get('query'), str) or not entry['query']:
+                return jsonify({'error': f'queries[{position}] needs a non-empty query string'}), 400
+            top_k = entry.get('top_k', default_top_k)
+            if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+                return jsonify({'error': f'queries[{position}] top_k must be a positive integer'}), 400
+            requests_.append({
+                'query': entry['query'],
+                'top_k': min(top_k, EmbeddingIndexBuilder.n_listings(index)),
+                'geo_filter': entry.get('geo_filter', data.get('geo_filter', GEO_FILTER_DEFAULT)),
+                'radius_km': entry.get('radius_km', data.get('radius_km')),
+                'attribute_filter': AttributeFilter.parse(entry.get('filters', data.get('filters'))),
+                'budget_filter': entry.get('budget_filter', data.get('budget_filter', BUDGET_FILTER_DEFAULT))
+            })
+
+        # Step 1: Process all queries (cache hits skip parsing and encoding)
+        cached = [QUERY_CACHE.get(r['query']) for r in requests_]
+        query_datas = []
+        for r, c in zip(requests_, cached):
+            if c is not None:
+                query_datas.append(c[0])
+                continue
+            with METRICS.stage('query_parse', timings):
+                query_datas.append(QueryProcessor.process_query(r['query'], store))
+
+        # Step 2: One user-tower pass (+ one matmul on the exact path) for all misses
+        misses = [i for i, c in enumerate(cached) if c is None]
+        encoded = [(c[1], None) if c is not None else None for c in cached]
+        if misses:
+            batch = encode_query_batch([
+                (index, requests_[i]['query'],
+                 query_datas[i]['structured_features'], query_datas[i]['schedule_features'])
+                for i in misses
+            ])
+            timings.update(batch[0][2])
+            for i, (user_embedding, similarities, _) in zip(misses, batch):
+                encoded[i] = (user_embedding, similarities)
+                QUERY_CACHE.put(requests_[i]['query'], (query_datas[i], user_embedding))
+
+        # Step 3: Per-query candidate filtering, top candidates and re-ranking
+        per_query = []
+        for r, query_data, (user_embedding, similarities) in zip(requests_, query_datas, encoded):
+            with METRICS.stage('borough_lookup', timings):
+                candidate_mask = borough_candidate_mask(index, query_data)
+            if r['geo_filter']:
+                with METRICS.stage('geo_lookup', timings):
+                    candidate_mask = intersect_masks(
+                        candidate_mask, geo_candidate_mask(index, query_data, r['radius_km'])
+                    )
+            with METRICS.stage('attribute_filter', timings):
+                candidate_mask = intersect_masks(candidate_mask, attribute_candidate_mask(
+                    index, query_data, r['attribute_filter'], r['budget_filter']
+                ))
+            candidate_indices, candidate_similarities = search_embeddings(
+                index,
+                user_embedding,
+                RERANKER.candidate_count(r['top_k']),
+                candidate_mask=candidate_mask,
+                n_probe=n_probe,
+                exact=bool(data.get('exact', False)),
+                similarities=similarities,
+                timings=timings
+            )
+            with METRICS.stage('rerank', timings):
+                top_indices, top_similarities, rank_scores = rerank_candidates(
+                    index, query_data, candidate_indices, candidate_similarities, r['top_k']
+                )
+            per_query.append((
+                top_indices,
+                [index['listing_ids'][i] for i in top_indices],
+                [float(s) for s in top_similarities],
+                rank_scores
+            ))
+
+        # Step 4: Listing details for every query (at most one database round-trip)
+        with METRICS.stage('metadata_fetch', timings):
+            listing_map = fetch_listing_details(
+                index, np.concatenate([q[0] for q in per_query])
+            )
+
+        # Step 5: Format results
+        results = []
+        with METRICS.stage('format', timings):
+            for r, query_data, (_, top_listing_ids, top_scores, rank_scores) in zip(requests_, query_datas, per_query):
+                matches = format_matches(query_data, top_listing_ids, top_scores, listing_map, rank_scores)
+                results.append({
+                    'query': r['query'],
+                    'parsed_query': serialize_parsed_query(query_data),
+                    'matches': matches,
+                    'count': len(matches)
+                })
+
+        processing_time = time.perf_counter() - start_time
+        METRICS.observe('match_batch_total', processing_time)
+
+        response = {
+            'results': results,
             'count': len(results),
-            'processing_time_ms': round(processing_time_ms, 2),
+            'processing_time_ms': round(processing_time * 1000, 2),
             'model': 'TensorFlow Two-Tower Semantic Matching'
-        })
+        }
+        if data.get('debug'):
+            response['timings_ms'] = timings
+        return jsonify(response)
 
+    except FilterError as e:
+        return jsonify({'error': f'Invalid filters: {e}'}), 400
     except Exception as e:
-        import traceback
-        import sys
+        return _match_error_response('/match/batch', e)
 
-        # Log detailed error for debugging
-        error_trace = traceback.format_exc()
-        print(f"ERROR in /match endpoint:", file=sys.stderr)
-        print(f"Error type: {type(e).__name__}", file=sys.stderr)
-        print(f"Error message: {str(e)}", file=sys.stderr)
-        print(f"Traceback:\n{error_trace}", file=sys.stderr)
 
-        return jsonify({
-            'error': str(e),
-            'type': type(e).__name__,
-            'traceback': error_trace if app.debug else None
-        }), 500
+def _match_error_response(endpoint, e):
+    """Log a matching failure to stderr and build the 500 response"""
+    import traceback
+    import sys
+
+    # Log detailed error for debugging
+    error_trace = traceback.format_exc()
+    print(f"ERROR in {endpoint} endpoint:", file=sys.stderr)
+    print(f"Error type: {type(e).__name__}", file=sys.stderr)
+    print(f"Error message: {str(e)}", file=sys.stderr)
+    print(f"Traceback:\n{error_trace}", file=sys.stderr)
+
+    return jsonify({
+        'error': str(e),
+        'type': type(e).__name__,
+        'traceback': error_trace if app.debug else None
+    }), 500
+
+
+def run_rebuild(job):
+    """
+    Full rebuild pipeline, run by REBUILD_RUNNER in a background thread
+
+    Listings are fetched, preprocessed and encoded page by page (the
+    'encode' stage), then the index is published as a new version; other
+    workers swap it in within INDEX_WATCH_INTERVAL_SECONDS.
+    """
+    from listing_preprocessor import ListingPreprocessor
+
+    job.stage('count')
+    preprocessor = ListingPreprocessor(store=store)
+    total = preprocessor.count_listings()
+
+    batch_size = REBUILD_BATCH_SIZE or encoding_batch_size(memory_fraction=REBUILD_MEMORY_FRACTION)
+    job.stage('encode', total=total, batch_size=batch_size)
+
+    builder = EmbeddingIndexBuilder(model)
+    new_index = builder.build_index_streaming(
+        preprocessor.iter_preprocessed_chunks(LISTING_PAGE_SIZE),
+        batch_size=batch_size,
+        quantization=EMBEDDING_QUANTIZATION,
+        total=total,
+        progress_fn=lambda stage, processed, of_total: job.progress(
+            stage, processed, of_total, fetch=dict(preprocessor.fetch_progress)
+        )
+    )
+
+    job.stage('publish')
+    publish_index(builder, new_index)
+
+    return {
+        'listings_indexed': EmbeddingIndexBuilder.n_listings(new_index),
+        'fetch': preprocessor.fetch_progress,
+        'text_cache': model.text_cache.stats() if model.text_cache else None,
+        'version': index_versions.current_version(INDEX_DIR)
+    }
 
 
 @app.route('/rebuild', methods=['POST'])
 def rebuild_embeddings():
     """
-    Rebuild embedding index (call after adding new listings)
+    Start a background rebuild of the embedding index (call after adding new listings)
+
+    Returns 202 with a job id right away; poll GET /rebuild/<job_id> for
+    its stage, progress and throughput. Only one rebuild runs at a time
+    across all workers - a second request gets 409 with the running job id.
+
+    Requires admin authentication in production!
+    """
+    ensure_model_loaded()
+
+    if model is None:
+        return jsonify({'error': 'Model not loaded. Check the error log.'}), 503
+
+    try:
+        job = REBUILD_RUNNER.submit(run_rebuild)
+    except RebuildInProgress as e:
+        return jsonify({
+            'error': str(e),
+            'job_id': e.job_id,
+            'status_url': f'/rebuild/{e.job_id}' if e.job_id else None
+        }), 409
+
+    return jsonify({
+        'status': 'accepted',
+        'job_id': job['job_id'],
+        'status_url': f"/rebuild/{job['job_id']}",
+        'job': job
+    }), 202
+
+
+@app.route('/rebuild/<job_id>', methods=['GET'])
+def rebuild_status(job_id):
+    """Stage, progress and throughput of a rebuild job (answered by any worker)"""
+    job = REBUILD_RUNNER.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown rebuild job: {job_id}'}), 404
+    return jsonify(job)
+
+
+@app.route('/index/upsert', methods=['POST'])
+def upsert_index():
+    """
+    Incrementally update the embedding index (no full rebuild)
+
+    Only new listings and listings whose text/features changed are
+    re-encoded; listings whose borough changed are refreshed in place. Changes are written to a delta segment that is compacted
+    into the base index once it grows large enough.
+
+    Request body (any combination):
+    {
+        "listing_ids": ["...", "..."],     # re-check these listings
+        "modified_since": "2026-01-01",   # re-check listings modified since
+        "delete": ["...", "..."]           # remove these listings
+    }
+
+    Listings requested via listing_ids that no longer exist are removed.
+
+    The update holds the rebuild lock (REBUILD_RUNNER.hold()) from reading
+    the on-disk index to persisting it, so concurrent upserts in any worker
+    apply on top of each other; during a rebuild it returns 409.
 
     Requires admin authentication in production!
     """
-    global embedding_index
+    ensure_model_loaded()
+
+    if not model_ready:
+        return jsonify({'error': 'Model not ready. Please run build_embeddings.py first.'}), 503
 
     try:
         from listing_preprocessor import ListingPreprocessor
 
-        # Fetch and preprocess
-        preprocessor = ListingPreprocessor()
-        listings_df = preprocessor.fetch_all_listings()
-        processed = preprocessor.preprocess_all(listings_df)
+        data = request.get_json() or {}
+        listing_ids = data.get('listing_ids')
+        modified_since = data.get('modified_since')
+        to_delete = set(data.get('delete') or [])
 
-        # Rebuild embeddings
-        builder = EmbeddingIndexBuilder(model)
-        new_index = builder.build_index(processed)
-        builder.save_index(new_index, 'listing_embeddings.npz')
+        if listing_ids is None and not modified_since and not to_delete:
+            return jsonify({'error': 'listing_ids, modified_since or delete is required'}), 400
 
-        # Update global index
-        embedding_index = new_index
+        builder = EmbeddingIndexBuilder(model)
+        processed = None
+        changes = {'stats': {'inserted': 0, 'updated': 0, 'refreshed': 0, 'unchanged': 0}, 'deleted': 0}
+
+        if listing_ids is not None or modified_since:
+            preprocessor = ListingPreprocessor(store=store)
+            listings_df = preprocessor.fetch_listings(listing_ids, modified_since)
+            processed = preprocessor.columns_to_listings(
+                preprocessor.preprocess_columnar(listings_df)
+            ) if len(listings_df) else []
+
+            # Listings that were asked for but no longer exist get removed
+            found_ids = {l['listing_id'] for l in processed}
+            to_delete |= {lid for lid in (listing_ids or []) if lid not in found_ids}
+
+        def apply_changes(index):
+            if processed is not None:
+                index, changes['stats'] = builder.upsert(index, processed)
+            index, changes['deleted'] = builder.delete(index, list(to_delete))
+            return index
+
+        # Small changes: delta segment of the current version; large ones
+        # (or a pre-versioning index): compacted into a new version
+        with REBUILD_RUNNER.hold():
+            new_index, persisted = builder.update_persisted(
+                INDEX_DIR, embedding_index, apply_changes, keep=INDEX_KEEP_VERSIONS
+            )
+            if new_index is not embedding_index:
+                swap_index(new_index)
+                INDEX_WATCHER.mark_current()
 
         return jsonify({
             'status': 'success',
-            'listings_indexed': len(new_index['listing_ids']),
-            'message': 'Embedding index rebuilt successfully'
+            **changes['stats'],
+            'deleted': changes['deleted'],
+            'persisted': persisted,
+            'total_listings': EmbeddingIndexBuilder.n_listings(embedding_index)
         })
 
+    except RebuildInProgress as e:
+        return jsonify({
+            'error': f"{e}; retry the upsert once it has finished",
+            'job_id': e.job_id,
+            'status_url': f'/rebuild/{e.job_id}' if e.job_id else None
+        }), 409
+
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -461,21 +1307,21 @@ def debug_listing(listing_id):
             return jsonify({'error': 'Embedding index not loaded'}), 503
 
         # Find listing in index
-        if listing_id in embedding_index['listing_ids']:
-            idx = embedding_index['listing_ids'].index(listing_id)
-            embedding = embedding_index['embeddings'][idx]
+        idx = EmbeddingIndexBuilder.live_rows(embedding_index).get(listing_id)
+        if idx is not None:
+            embedding = EmbeddingIndexBuilder.row_embeddings(embedding_index, [idx])[0]
 
             # Fetch from database
-            listing = supabase.table('listing').select('*').eq('_id', listing_id).single().execute()
+            listing = store.get_listing(listing_id) or {}
 
             return jsonify({
                 'listing_id': listing_id,
-                'title': listing.data.get('Name'),
+                'title': listing.get('Name'),
                 'embedding_shape': embedding.shape,
                 'embedding_norm': float(np.linalg.norm(embedding)),
                 'embedding_preview': embedding[:10].tolist(),  # First 10 dims
-                'days_available': listing.data.get('Days Available (List of Days)'),
-                'price': listing.data.get('💰Nightly Host Rate for 7 nights')
+                'days_available': listing.get('Days Available (List of Days)'),
+                'price': listing.get('💰Nightly Host Rate for 7 nights')
             })
         else:
             return jsonify({'error': 'Listing not found in index'}), 404
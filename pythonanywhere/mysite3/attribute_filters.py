@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Attribute Filters
+Columnar listing attributes and hard filters over them
+
+Each index row carries its price, bedrooms, bathrooms, guests, active flag
+and available-days bitmask as plain arrays. A filter expression from the
+request is compiled once and evaluated as vectorized comparisons over
+those columns, giving a boolean candidate mask that shrinks the scoring set
+before the similarity matmul (like the borough and geo masks).
+
+Filter expression (JSON object; all keys must hold):
+    {
+        "price": {"min": 100, "max": 150},     # also gt/gte/lt/lte/eq/ne/in
+        "bedrooms": {"gte": 2},
+        "guests": 3,                           # bare number = equality
+        "active": true,
+        "days": ["monday", "tuesday"],         # available on all of these
+        "or": [{"bedrooms": 1}, {"price": {"max": 90}}],
+        "not": {"bathrooms": {"lt": 1}}
+    }
+
+Unknown values (missing bedrooms, price 0, active -1) never satisfy a comparison,
+and never satisfy its negation either: {"not": {"bedrooms": 2}} keeps only
+listings whose bedroom count is known and not 2.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from temporal_encoder import TemporalEncoder
+
+
+# Filter name → index row array it compares against
+ATTRIBUTE_COLUMNS = {
+    'price': 'prices',
+    'bedrooms': 'bedrooms',
+    'bathrooms': 'bathrooms',
+    'guests': 'guests',
+    'active': 'active',
+    'days': 'days_mask'
+}
+
+# Row arrays added by attribute_columns() ('prices' is built with the re-ranking inputs)
+ATTRIBUTE_ARRAYS = ('bedrooms', 'bathrooms', 'guests', 'active', 'days_mask')
+
+# Listing columns the attribute arrays read (on top of METADATA_FIELDS)
+ATTRIBUTE_FIELDS = ['Features - Qty Guests', 'Active']
+
+_NUMERIC_COLUMNS = {
+    'bedrooms': 'Features - Qty Bedrooms',
+    'bathrooms': 'Features - Qty Bathrooms',
+    'guests': 'Features - Qty Guests'
+}
+
+# Comparison operators; min/max are the inclusive aliases used by parsed budgets
+_OPERATORS = {
+    'eq': np.equal, 'ne': np.not_equal,
+    'gt': np.greater, 'gte': np.greater_equal, 'min': np.greater_equal,
+    'lt': np.less, 'lte': np.less_equal, 'max': np.less_equal
+}
+
+# Bit i of days_mask = day i of TemporalEncoder.DAY_NAMES (bit 0 = Monday)
+_DAY_NUMBERS = {
+    **{day: i for i, day in enumerate(TemporalEncoder.DAY_NAMES)},
+    **{day[:3]: i for i, day in enumerate(TemporalEncoder.DAY_NAMES)}
+}
+
+# Row arrays that store unknown values as 0 rather than NaN...
+_ZERO_IS_UNKNOWN = {'prices'}
+# ...and as -1 (integer columns)
+_NEGATIVE_IS_UNKNOWN = {'active'}
+
+
+class FilterError(ValueError):
+    """Malformed filter expression (reported to the client as a 400)"""
+
+
+def _number(raw_listing: Optional[Dict], field: str) -> float:
+    """Numeric listing field as float (NaN when missing/unparseable)"""
+    value = (raw_listing or {}).get(field)
+    if value is None or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def days_bitmask(raw_listing: Optional[Dict]) -> int:
+    """
+    Available days of a listing row as a bitmask
+
+    Reads "Days Available (List of Days)"; unknown day names are ignored.
+
+    Returns:
+        Mask with bit 0 = Monday ... bit 6 = Sunday (0 when no days are listed)
+    """
+    days = (raw_listing or {}).get('Days Available (List of Days)')
+    if not isinstance(days, (list, tuple, np.ndarray)):
+        return 0
+
+    bits = 0
+    for day in days:
+        day_number = _DAY_NUMBERS.get(str(day).lower().strip())
+        if day_number is not None:
+            bits |= 1 << day_number
+    return bits
+
+
+def attribute_columns(processed_listings: list) -> Dict[str, np.ndarray]:
+    """
+    Build the ATTRIBUTE_ARRAYS of a list of preprocessed listings
+
+    Returns:
+        Dict of (n,) arrays: float32 bedrooms/bathrooms/guests (NaN if
+        unknown), int8 active (-1 if unknown) and uint8 days_mask
+    """
+    columns = {
+        name: np.array([_number(l.get('raw_data'), field) for l in processed_listings], dtype=np.float32)
+        for name, field in _NUMERIC_COLUMNS.items()
+    }
+
+    active = [(l.get('raw_data') or {}).get('Active') for l in processed_listings]
+    columns['active'] = np.array(
+        [-1 if a is None else int(bool(a)) for a in active], dtype=np.int8
+    )
+    columns['days_mask'] = np.array(
+        [days_bitmask(l.get('raw_data')) for l in processed_listings], dtype=np.uint8
+    )
+
+    return columns
+
+
+def _day_bits(days) -> int:
+    """Bitmask of a list of day names (full or 3-letter)"""
+    if isinstance(days, str):
+        days = [days]
+    if not isinstance(days, (list, tuple)) or not days:
+        raise FilterError("days expects a non-empty list of day names")
+
+    bits = 0
+    for day in days:
+        day_clean = str(day).lower().strip()
+        if day_clean not in _DAY_NUMBERS:
+            raise FilterError(f"Unknown day '{day}'")
+        bits |= 1 << _DAY_NUMBERS[day_clean]
+    return bits
+
+
+def _as_number(field: str, value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise FilterError(f"{field} expects numbers, got {value!r}")
+    return float(value)
+
+
+class AttributeFilter:
+    """
+    Compiled filter expression
+
+    Nodes are tuples:
+        ('and' | 'or', [nodes]), ('not', node),
+        ('cmp', row array, operator, value), ('in', row array, values),
+        ('days_all' | 'days_any', bitmask)
+    """
+
+    def __init__(self, node: tuple):
+        self.node = node
+
+    @classmethod
+    def parse(cls, spec: Optional[Dict]) -> Optional['AttributeFilter']:
+        """
+        Validate and compile a filter expression
+
+        Args:
+            spec: Filter expression from the request (see module docstring), or None
+
+        Returns:
+            AttributeFilter, or None for no/empty filters
+
+        Raises:
+            FilterError: Unknown attribute, operator or value type
+        """
+        if not spec:
+            return None
+        return cls(cls._compile(spec))
+
+    @classmethod
+    def budget(cls, budget: Optional[Dict]) -> Optional['AttributeFilter']:
+        """
+        Hard price cap from a parsed budget ({'min', 'max'})
+
+        Only the max is enforced - cheaper listings are fine, as in
+        ranking.budget_fit(). Listings without a price are excluded.
+        """
+        if not budget or not budget.get('max'):
+            return None
+        return cls(('cmp', 'prices', 'max', float(budget['max'])))
+
+    @classmethod
+    def _compile(cls, spec) -> tuple:
+        if not isinstance(spec, dict) or not spec:
+            raise FilterError(f"Filter expression must be a non-empty object, got {spec!r}")
+
+        nodes = []
+        for key, condition in spec.items():
+            if key == 'or':
+                if not isinstance(condition, list) or not condition:
+                    raise FilterError("or expects a non-empty list of filter expressions")
+                nodes.append(('or', [cls._compile(c) for c in condition]))
+            elif key == 'not':
+                nodes.append(('not', cls._compile(condition)))
+            elif key == 'days':
+                nodes.append(cls._compile_days(condition))
+            elif key == 'active':
+                if not isinstance(condition, bool):
+                    raise FilterError("active expects true or false")
+                nodes.append(('cmp', 'active', 'eq', int(condition)))
+            elif key in ATTRIBUTE_COLUMNS:
+                nodes.extend(cls._compile_numeric(key, condition))
+            else:
+                raise FilterError(
+                    f"Unknown filter '{key}' (expected one of {sorted(ATTRIBUTE_COLUMNS) + ['not', 'or']})"
+                )
+
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    @staticmethod
+    def _compile_numeric(field: str, condition) -> List[tuple]:
+        column = ATTRIBUTE_COLUMNS[field]
+        if not isinstance(condition, dict):
+            return [('cmp', column, 'eq', _as_number(field, condition))]
+        if not condition:
+            raise FilterError(f"{field} needs at least one operator")
+
+        nodes = []
+        for op, value in condition.items():
+            if op == 'in':
+                if not isinstance(value, list) or not value:
+                    raise FilterError(f"{field}.in expects a non-empty list")
+                nodes.append(('in', column, [_as_number(field, v) for v in value]))
+            elif op in _OPERATORS:
+                nodes.append(('cmp', column, op, _as_number(field, value)))
+            else:
+                raise FilterError(f"Unknown operator '{op}' for {field} (expected one of "
+                                  f"{sorted(_OPERATORS) + ['in']})")
+        return nodes
+
+    @staticmethod
+    def _compile_days(condition) -> tuple:
+        if not isinstance(condition, dict):
+            return ('days_all', _day_bits(condition))
+
+        nodes = []
+        for op, days in condition.items():
+            if op not in ('all', 'any'):
+                raise FilterError(f"Unknown operator '{op}' for days (expected all or any)")
+            nodes.append((f'days_{op}', _day_bits(days)))
+        if not nodes:
+            raise FilterError("days needs all or any")
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def columns(self) -> set:
+        """Row arrays the expression reads"""
+        found, stack = set(), [self.node]
+        while stack:
+            node = stack.pop()
+            if node[0] in ('and', 'or'):
+                stack.extend(node[1])
+            elif node[0] == 'not':
+                stack.append(node[1])
+            elif node[0] in ('cmp', 'in'):
+                found.add(node[1])
+            else:
+                found.add('days_mask')
+        return found
+
+    def mask(self, index: Dict) -> Optional[np.ndarray]:
+        """
+        Boolean (n_listings,) mask of the index rows passing the filter
+
+        Returns:
+            Mask, or None for indexes built before the attribute arrays
+            were stored (the filter is not applied)
+        """
+        if any(index.get(name) is None for name in self.columns()):
+            return None
+        return self._evaluate(self.node, index)[0]
+
+    @classmethod
+    def _evaluate(cls, node: tuple, index: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Three-valued evaluation: (rows where node holds, rows where it fails)
+
+        Rows with an unknown value are in neither mask, so they stay
+        excluded under 'not' as well (Kleene logic, as SQL treats NULL).
+        """
+        kind = node[0]
+        if kind == 'and' or kind == 'or':
+            passes, fails = cls._evaluate(node[1][0], index)
+            for child in node[1][1:]:
+                child_passes, child_fails = cls._evaluate(child, index)
+                if kind == 'and':
+                    passes, fails = passes & child_passes, fails | child_fails
+                else:
+                    passes, fails = passes | child_passes, fails & child_fails
+            return passes, fails
+        if kind == 'not':
+            passes, fails = cls._evaluate(node[1], index)
+            return fails, passes
+        if kind == 'cmp' or kind == 'in':
+            column = node[1]
+            values = np.asarray(index[column])
+            if kind == 'in':
+                result = np.isin(values, node[2])
+            else:
+                result = _OPERATORS[node[2]](values, node[3])
+
+            # NaN, 0 for _ZERO_IS_UNKNOWN and -1 for _NEGATIVE_IS_UNKNOWN columns
+            # is unknown: neither passes nor fails
+            known = ~np.isnan(values) if values.dtype.kind == 'f' else np.ones(len(values), dtype=bool)
+            if column in _ZERO_IS_UNKNOWN:
+                known &= values > 0
+            elif column in _NEGATIVE_IS_UNKNOWN:
+                known &= values >= 0
+            return result & known, ~result & known
+
+        bits = np.uint8(node[1])
+        days = np.asarray(index['days_mask']) & bits
+        result = days == bits if kind == 'days_all' else days != 0
+        return result, ~result
+
+
+def combine_filters(*filters: Optional[AttributeFilter]) -> Optional[AttributeFilter]:
+    """AND of the given filters, ignoring None (None if all are None)"""
+    filters = [f for f in filters if f is not None]
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return filters[0]
+    return AttributeFilter(('and', [f.node for f in filters]))
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    import time
+
+    print("=== Attribute Filter Testing ===\n")
+
+    rng = np.random.default_rng(0)
+    n = 200000
+    index = {
+        'prices': rng.integers(40, 400, n).astype(np.float32),
+        'bedrooms': rng.integers(0, 4, n).astype(np.float32),
+        'bathrooms': rng.integers(1, 3, n).astype(np.float32),
+        'guests': rng.integers(1, 6, n).astype(np.float32),
+        'active': (rng.random(n) < 0.8).astype(np.int8),
+        'days_mask': rng.integers(0, 128, n).astype(np.uint8)
+    }
+    index['prices'][::20] = 0
+    index['bedrooms'][::13] = np.nan
+
+    spec = {
+        'price': {'min': 100, 'max': 150},
+        'bedrooms': {'gte': 2},
+        'active': True,
+        'days': ['monday', 'tue'],
+        'not': {'guests': {'in': [1]}}
+    }
+    attribute_filter = AttributeFilter.parse(spec)
+
+    start = time.perf_counter()
+    mask = attribute_filter.mask(index)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    expected = ((index['prices'] >= 100) & (index['prices'] <= 150) & (index['bedrooms'] >= 2)
+                & (index['active'] == 1) & ((index['days_mask'] & 3) == 3) & (index['guests'] != 1))
+    assert np.array_equal(mask, expected)
+    print(f"{spec}\n  → {int(mask.sum())} of {n} listings in {elapsed_ms:.2f} ms")
+
+    budget_mask = AttributeFilter.budget({'min': 75, 'max': 150}).mask(index)
+    assert np.array_equal(budget_mask, (index['prices'] > 0) & (index['prices'] <= 150))
+    print(f"Budget ≤ $150 → {int(budget_mask.sum())} listings")
+
+    for bad in [{'sqft': 3}, {'price': {'around': 100}}, {'days': ['someday']}, {'active': 'yes'}]:
+        try:
+            AttributeFilter.parse(bad)
+            raise AssertionError(f"{bad} should be rejected")
+        except FilterError as e:
+            print(f"  rejected {bad}: {e}")
+
+    print("\n✅ Attribute filter tests passed!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+/match Load Benchmark
+Fires concurrent queries at a running server and reports throughput and latency
+percentiles for single /match calls versus one POST /match/batch
+
+Usage:
+    python benchmark_match_load.py
+    python benchmark_match_load.py --url http://localhost:5000 --concurrency 16 --requests 200
+"""
+
+import argparse
+import time
+import threading
+import requests
+import numpy as np
+from benchmark_vector_index import percentile_ms
+
+
+SAMPLE_QUERIES = [
+    "Need Mon-Thu in Brooklyn under $150/night for 3 months",
+    "Weekend place in Manhattan",
+    "Quiet room near the subway, weekdays only",
+    "2 bedroom in Queens under $200",
+    "Furnished studio Monday to Friday",
+    "Pet friendly apartment in Brooklyn",
+    "Short stay Tuesday through Thursday",
+    "Cheap room in the Bronx for weekends"
+]
+
+
+def run_single(url: str, n_requests: int, concurrency: int, top_k: int):
+    """n_requests /match calls spread over `concurrency` threads"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(n_requests))
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            response = session.post(f"{url}/match", json={
+                'query': SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)],
+                'top_k': top_k
+            })
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies, errors[0]
+
+
+def run_batch(url: str, n_requests: int, batch_size: int, top_k: int):
+    """The same queries sent as sequential /match/batch calls"""
+    latencies = []
+    errors = 0
+    session = requests.Session()
+
+    start = time.perf_counter()
+    for offset in range(0, n_requests, batch_size):
+        queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+                   for i in range(offset, min(offset + batch_size, n_requests))]
+        call_start = time.perf_counter()
+        response = session.post(f"{url}/match/batch", json={'queries': queries, 'top_k': top_k})
+        elapsed = time.perf_counter() - call_start
+        if response.status_code == 200:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+    return time.perf_counter() - start, latencies, errors
+
+
+def report(label: str, n_queries: int, wall: float, latencies, errors: int):
+    if not latencies:
+        print(f"{label:<26} all requests failed ({errors} errors)")
+        return
+    print(f"{label:<26} {n_queries / wall:>8.1f} {percentile_ms(latencies, 50):>9.1f} "
+          f"{percentile_ms(latencies, 95):>9.1f} {percentile_ms(latencies, 99):>9.1f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/match throughput and latency benchmark')
+    parser.add_argument('--url', default='http://localhost:5000', help='Server base URL')
+    parser.add_argument('--requests', type=int, default=200, help='Total queries per scenario')
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads for /match')
+    parser.add_argument('--batch-size', type=int, default=16, help='Queries per /match/batch call')
+    parser.add_argument('--top-k', type=int, default=20, help='Results per query')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(" /match LOAD BENCHMARK")
+    print("=" * 70)
+
+    health = requests.get(f"{args.url}/health").json()
+    if not health.get('ready'):
+        print(f"\n❌ Model not loaded on {args.url}: {health}")
+        return
+
+    # Warm up (lazy model load, first tf.function trace)
+    requests.post(f"{args.url}/match", json={'query': SAMPLE_QUERIES[0], 'top_k': args.top_k})
+
+    print(f"\n{'scenario':<26} {'q/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    print("-" * 72)
+
+    report('/match sequential', args.requests, *run_single(args.url, args.requests, 1, args.top_k))
+    report(f'/match x{args.concurrency} threads', args.requests,
+           *run_single(args.url, args.requests, args.concurrency, args.top_k))
+    report(f'/match/batch size {args.batch_size}', args.requests,
+           *run_batch(args.url, args.requests, args.batch_size, args.top_k))
+
+    print(f"\nServer batcher stats: {requests.get(f'{args.url}/health').json().get('query_batcher')}")
+    print("(latencies for /match/batch are per batch call, not per query)")
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Offline /match Benchmark
+Builds an index over a synthetic listing corpus (DATA_BACKEND=synthetic),
+then drives /match in-process (Flask test client) or through a local
+threaded server and reports throughput, latency and per-stage percentiles,
+index build time and memory
+
+No network access is needed: listings come from fake_supabase.py (or
+fixture files with --fixtures) through data_access.py, and with the
+default --model hash the two-tower model is replaced by a feature-hashing
+text encoder (same interface, no USE). --model saved / hub run the real
+user tower for queries; listing vectors still come from the hashing
+encoder unless --encode-listings is given (runs USE over the whole corpus).
+
+Usage:
+    python benchmark_match_offline.py
+    python benchmark_match_offline.py --listings 1000000 --concurrency 1 8 32 --requests 2000
+    python benchmark_match_offline.py --mode server --quantization int8
+    python benchmark_match_offline.py --fixtures fixtures
+    python benchmark_match_offline.py --json results.json
+    python benchmark_match_offline.py --baseline results.json   # exit 1 on regression
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+
+from fake_supabase import BOROUGHS, HOODS
+from fake_model import HashingTextModel, make_index_builder
+from benchmark_vector_index import percentile_ms
+
+
+# ============================================================
+# QUERIES
+# ============================================================
+
+SCHEDULES = ['Mon-Thu', 'weekends', 'Monday to Friday', 'Tuesday through Thursday',
+             '3 nights per week', 'weekdays only', 'flexible dates', '']
+STAYS = ['for 3 months', 'for 2 weeks', 'for 7 nights', '', 'for 1 month']
+PLACES = [b['Display Borough'] for b in BOROUGHS] + \
+         [hood for hoods in HOODS.values() for hood, _, _ in hoods]
+KINDS = ['Private room', 'Entire place', 'Quiet room', 'Furnished studio', 'Room', 'Pet friendly place']
+
+
+def make_queries(n_queries: int, seed: int = 0) -> List[str]:
+    """Distinct natural-language queries mixing schedule, place, budget and stay length"""
+    rng = np.random.default_rng(seed)
+    queries, seen = [], set()
+    while len(queries) < n_queries:
+        parts = [
+            KINDS[rng.integers(len(KINDS))],
+            f"in {PLACES[rng.integers(len(PLACES))]}",
+            SCHEDULES[rng.integers(len(SCHEDULES))],
+            f"under ${int(rng.integers(60, 400))}/night" if rng.random() < 0.7 else '',
+            STAYS[rng.integers(len(STAYS))]
+        ]
+        query = ' '.join(p for p in parts if p)
+        # Past the number of distinct combinations, repeats are fine
+        if query not in seen or len(seen) > 50 * n_queries:
+            seen.add(query)
+            queries.append(query)
+    return queries
+
+
+# ============================================================
+# MEMORY
+# ============================================================
+
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def index_nbytes(index: Dict) -> Dict[str, float]:
+    """MB per index array (memory-mapped arrays count at full size)"""
+    sizes = {}
+    for name, value in index.items():
+        if isinstance(value, np.ndarray):
+            sizes[name] = value.nbytes
+        elif hasattr(value, 'nbytes'):
+            sizes[name] = value.nbytes
+        elif name == 'vector_index' and value is not None:
+            # Centroids and inverted lists (the embeddings are shared with the index)
+            sizes[name] = value.centroids.nbytes + value.list_offsets.nbytes + value.list_rows.nbytes
+        elif name == 'geo_index' and value is not None:
+            sizes[name] = (value.cell_keys.nbytes + value.cell_offsets.nbytes +
+                           value.cell_rows.nbytes + value.cell_points.nbytes)
+    return {name: round(n / 2 ** 20, 1) for name, n in sorted(sizes.items(), key=lambda kv: -kv[1])}
+
+
+# ============================================================
+# LOAD GENERATION
+# ============================================================
+
+def drive(send, queries: List[str], n_requests: int, concurrency: int, top_k: int,
+          options: Optional[Dict] = None) -> Dict:
+    """
+    n_requests /match calls spread over `concurrency` threads
+
+    Args:
+        send: send(thread_state, body) → HTTP status code
+        options: Extra request body fields (e.g. geo_filter)
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(n_requests))
+
+    def worker():
+        state = {}
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            status = send(state, {'query': queries[i % len(queries)], 'top_k': top_k, **(options or {})})
+            elapsed = time.perf_counter() - start
+            with lock:
+                (latencies if status == 200 else errors).append(elapsed if status == 200 else status)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'requests': n_requests,
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'throughput_qps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile_ms(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile_ms(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile_ms(latencies, 99), 2) if latencies else None
+    }
+
+
+def test_client_sender(flask_app):
+    """In-process requests through one Flask test client per thread"""
+    def send(state, body):
+        client = state.get('client')
+        if client is None:
+            client = state['client'] = flask_app.test_client()
+        return client.post('/match', json=body).status_code
+    return send
+
+
+def server_sender(flask_app):
+    """Requests over HTTP to a threaded werkzeug server on a free local port"""
+    import http.client
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    def send(state, body):
+        conn = state.get('conn')
+        if conn is None:
+            conn = state['conn'] = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        conn.request('POST', '/match', json.dumps(body), {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+
+    send.server = server
+    return send
+
+
+# ============================================================
+# REGRESSION CHECK
+# ============================================================
+
+def compare_with_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Regressions of p95 latency / throughput per concurrency level
+
+    Returns:
+        Human-readable regression messages (empty when within tolerance)
+    """
+    if baseline.get('config', {}).get('listings') != results['config']['listings']:
+        print(f"⚠️  Baseline corpus size {baseline.get('config', {}).get('listings')} "
+              f"differs from {results['config']['listings']} - comparing anyway")
+
+    previous = {run['concurrency']: run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in results['runs']:
+        before = previous.get(run['concurrency'])
+        if not before or not before.get('p95_ms') or not run.get('p95_ms'):
+            continue
+        if run['p95_ms'] > before['p95_ms'] * tolerance:
+            regressions.append(f"x{run['concurrency']}: p95 {before['p95_ms']} → {run['p95_ms']} ms")
+        if run['throughput_qps'] < before['throughput_qps'] / tolerance:
+            regressions.append(f"x{run['concurrency']}: throughput {before['throughput_qps']} → "
+                               f"{run['throughput_qps']} q/s")
+    return regressions
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline /match throughput, latency and memory benchmark')
+    parser.add_argument('--listings', type=int, default=10000, help='Synthetic corpus size (10k-1M)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus and query seed')
+    parser.add_argument('--fixtures', help='Serve listings from this fixture directory instead (memory backend)')
+    parser.add_argument('--page-size', type=int, default=1000, help='Listings per fetched page')
+    parser.add_argument('--model', choices=['hash', 'saved', 'hub'], default='hash',
+                        help='Query encoder: feature hashing, exported SavedModel or TF Hub')
+    parser.add_argument('--model-dir', default=os.getenv('LISTING_MODEL_DIR', 'listing_model'),
+                        help='SavedModel directory for --model saved')
+    parser.add_argument('--encode-listings', action='store_true',
+                        help='Encode the corpus with the real listing tower (slow)')
+    parser.add_argument('--quantization', choices=['float16', 'int8'], help='Quantized scoring copy')
+    parser.add_argument('--no-vector-index', action='store_true', help='Exact search only')
+    parser.add_argument('--mode', choices=['client', 'server'], default='client',
+                        help='Flask test client or local threaded HTTP server')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8], help='Client threads per run')
+    parser.add_argument('--requests', type=int, default=500, help='/match calls per run')
+    parser.add_argument('--distinct-queries', type=int, help='Distinct queries (default: one per request)')
+    parser.add_argument('--top-k', type=int, default=20, help='Results per query')
+    parser.add_argument('--geo-filter', action='store_true',
+                        help='Restrict candidates to the radius of the query location')
+    parser.add_argument('--filters', type=json.loads,
+                        help='Hard attribute filters sent with every request, e.g. \'{"price": {"max": 150}}\'')
+    parser.add_argument('--budget-filter', action='store_true',
+                        help='Drop listings priced above the parsed budget')
+    parser.add_argument('--supabase-latency-ms', type=float, default=0.0,
+                        help='Simulated round trip per fake Supabase call')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--baseline', help='Results file of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='Allowed p95 / throughput ratio versus the baseline')
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(" OFFLINE /match BENCHMARK")
+    print("=" * 78)
+
+    # The app creates its listing store at import
+    if args.fixtures:
+        os.environ['DATA_BACKEND'] = 'memory'
+        os.environ['DATA_FIXTURES_DIR'] = args.fixtures
+    else:
+        os.environ['DATA_BACKEND'] = 'synthetic'
+        os.environ['SYNTHETIC_LISTINGS'] = str(args.listings)
+        os.environ['SYNTHETIC_SEED'] = str(args.seed)
+        os.environ['SYNTHETIC_LATENCY_MS'] = str(args.supabase_latency_ms)
+    os.environ['INDEX_WATCH_INTERVAL_SECONDS'] = '0'
+
+    import app as api
+    from listing_preprocessor import ListingPreprocessor
+    from tf_model import ListingMatchingModel
+    from embedding_index import EmbeddingIndexBuilder
+
+    # Model
+    hashing = HashingTextModel()
+    if args.model == 'hash':
+        model = hashing
+    elif args.model == 'saved':
+        model = ListingMatchingModel(saved_model_dir=args.model_dir)
+    else:
+        model = ListingMatchingModel()
+    if model is not hashing:
+        model.compile_user_tower(api.USER_TOWER_MODE)
+        model.warmup(api.MATCH_BATCH_MAX_SIZE)
+
+    # Corpus → index (fetch, preprocess and encode page by page, as /rebuild does)
+    n_listings = api.store.count_listings()
+    print(f"\n🏗️  Building index over {n_listings} {api.store.backend} listings ({args.model} encoder)...")
+    rss_before = current_rss_mb()
+    builder = make_index_builder(model, None if args.encode_listings and model is not hashing else hashing)
+    preprocessor = ListingPreprocessor(store=api.store)
+    start = time.perf_counter()
+    index = builder.build_index_streaming(
+        preprocessor.iter_preprocessed_chunks(args.page_size),
+        batch_size=256,
+        build_vector_index=not args.no_vector_index,
+        quantization=args.quantization,
+        total=n_listings
+    )
+    build_seconds = time.perf_counter() - start
+
+    # Serve it the way workers do: saved to disk, memory-mapped back
+    index_dir = tempfile.mkdtemp(prefix='bench-index-')
+    try:
+        start = time.perf_counter()
+        builder.save_index(index, os.path.join(index_dir, 'index'))
+        save_seconds = time.perf_counter() - start
+        del index
+
+        start = time.perf_counter()
+        index = EmbeddingIndexBuilder.load_index(os.path.join(index_dir, 'index'))
+        load_seconds = time.perf_counter() - start
+
+        api.model = model
+        api.swap_index(index)
+        api.model_ready = True
+        api._initialization_attempted = True
+
+        send = test_client_sender(api.app) if args.mode == 'client' else server_sender(api.app)
+        queries = make_queries(args.distinct_queries or args.requests * len(args.concurrency), args.seed)
+        options = {'geo_filter': True} if args.geo_filter else {}
+        if args.filters:
+            options['filters'] = args.filters
+        if args.budget_filter:
+            options['budget_filter'] = True
+
+        # Warm up (first parse, borough table load, batcher thread)
+        for query in queries[:5]:
+            send({}, {'query': query, 'top_k': args.top_k, **options})
+
+        print(f"\n{'threads':>7} {'q/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        print("-" * 54)
+
+        runs, offset = [], 0
+        for concurrency in args.concurrency:
+            api.METRICS.reset()
+            # Fresh queries per run, so the query cache only helps with --distinct-queries
+            run_queries = queries[offset:] + queries[:offset]
+            offset = (offset + args.requests) % len(queries)
+
+            run = drive(send, run_queries, args.requests, concurrency, args.top_k, options)
+            run['stages'] = api.METRICS.snapshot()['stages']
+            runs.append(run)
+            print(f"{concurrency:>7} {run['throughput_qps']:>8.1f} {run['p50_ms'] or 0:>9.2f} "
+                  f"{run['p95_ms'] or 0:>9.2f} {run['p99_ms'] or 0:>9.2f} {run['errors']:>7}")
+
+        if hasattr(send, 'server'):
+            send.server.shutdown()
+
+        for run in runs:
+            print(f"\nPer-stage latency, {run['concurrency']} thread(s) (ms):")
+            print(f"  {'stage':<18} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+            for stage, s in sorted(run['stages'].items(), key=lambda kv: -kv[1].get('p50_ms', 0)):
+                print(f"  {stage:<18} {s['count']:>7} {s.get('p50_ms', 0):>9.3f} "
+                      f"{s.get('p95_ms', 0):>9.3f} {s.get('p99_ms', 0):>9.3f}")
+
+        memory = {
+            'rss_before_build_mb': round(rss_before, 1) if rss_before else None,
+            'rss_mb': round(current_rss_mb() or 0, 1),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'index_mb': index_nbytes(index)
+        }
+        build = {
+            'build_seconds': round(build_seconds, 2),
+            'listings_per_second': round(n_listings / build_seconds, 1) if build_seconds else None,
+            'save_seconds': round(save_seconds, 2),
+            'load_seconds': round(load_seconds, 3),
+            'store_requests': getattr(getattr(api.store, 'client', None), 'requests', None)
+        }
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+    print(f"\nIndex build: {build}")
+    print(f"Memory: {memory}")
+
+    results = {
+        'config': {**{k: v for k, v in vars(args).items() if k not in ('json', 'baseline')},
+                   'listings': n_listings},
+        'build': build,
+        'memory': memory,
+        'runs': runs
+    }
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressions versus {args.baseline} (tolerance x{args.tolerance}):")
+            for message in regressions:
+                print(f"   {message}")
+            sys.exit(1)
+        print(f"\n✅ Within x{args.tolerance} of {args.baseline}")
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Quantization Benchmark
+Reports memory saved and ranking agreement of float16/int8 scoring vs float32
+
+Usage:
+    python benchmark_quantization.py
+    python benchmark_quantization.py --listings 200000 --top-k 20
+    python benchmark_quantization.py --index listing_embeddings.npz
+"""
+
+import argparse
+import time
+import numpy as np
+from quantization import QuantizedEmbeddings
+from benchmark_vector_index import make_synthetic_embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantized scoring benchmark')
+    parser.add_argument('--listings', type=int, default=100000, help='Synthetic corpus size')
+    parser.add_argument('--index', help='Benchmark a real .npz embedding index instead')
+    parser.add_argument('--queries', type=int, default=100, help='Number of queries')
+    parser.add_argument('--top-k', type=int, default=20, help='Results per query')
+    parser.add_argument('--rescore-factor', type=int, default=4, help='float32 re-score multiplier')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(" EMBEDDING QUANTIZATION BENCHMARK")
+    print("=" * 70)
+
+    if args.index:
+        embeddings = np.load(args.index, allow_pickle=True)['embeddings'].astype(np.float32)
+        print(f"\n📂 Loaded {len(embeddings)} embeddings from {args.index}")
+    else:
+        embeddings = make_synthetic_embeddings(args.listings)
+        print(f"\n🧪 Generated {len(embeddings)} synthetic embeddings")
+
+    rng = np.random.default_rng(1)
+    queries = embeddings[rng.integers(0, len(embeddings), args.queries)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    k = min(args.top_k, len(embeddings))
+
+    # float32 baseline
+    truth = []
+    baseline_times = []
+    for query in queries:
+        start = time.perf_counter()
+        scores = embeddings @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        baseline_times.append(time.perf_counter() - start)
+        truth.append((set(top.tolist()), int(top[np.argmax(scores[top])])))
+
+    print(f"\n{'mode':<18} {'MB':>8} {'saved':>7} {'overlap@k':>10} {'top-1':>7} {'p50 ms':>8}")
+    print("-" * 64)
+    print(f"{'float32':<18} {embeddings.nbytes / 2**20:>8.2f} {'-':>7} {1.0:>10.4f} {1.0:>7.3f} "
+          f"{np.median(baseline_times) * 1000:>8.3f}")
+
+    for mode in QuantizedEmbeddings.MODES:
+        quantized = QuantizedEmbeddings.quantize(embeddings, mode)
+        saved = 1 - quantized.nbytes / embeddings.nbytes
+
+        for rescore in (False, True):
+            overlap = 0
+            top1 = 0
+            times = []
+            for query, (expected, expected_top1) in zip(queries, truth):
+                start = time.perf_counter()
+                rows, _ = quantized.search(
+                    query, k,
+                    rescore_embeddings=embeddings if rescore else None,
+                    rescore_factor=args.rescore_factor
+                )
+                times.append(time.perf_counter() - start)
+                overlap += len(expected.intersection(rows.tolist()))
+                top1 += int(rows[0] == expected_top1)
+
+            label = f"{mode}+rescore" if rescore else mode
+            print(f"{label:<18} {quantized.nbytes / 2**20:>8.2f} {saved:>6.0%} "
+                  f"{overlap / (len(queries) * k):>10.4f} {top1 / len(queries):>7.3f} "
+                  f"{np.median(times) * 1000:>8.3f}")
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Top-k Selection Benchmark
+Compares the old full argsort against argpartition top-k, and per-query
+allocation against the reusable scoring workspace
+
+Usage:
+    python benchmark_topk.py
+    python benchmark_topk.py --sizes 10000 100000 --top-k 50
+"""
+
+import argparse
+import time
+import numpy as np
+from ranking import ScoringWorkspace, top_k
+from benchmark_vector_index import percentile_ms
+
+
+def time_calls(fn, repeats: int) -> list:
+    fn()  # warm up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Top-k selection micro-benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Listing counts to benchmark')
+    parser.add_argument('--top-k', type=int, default=20, help='Results per query')
+    parser.add_argument('--repeats', type=int, default=30, help='Timed calls per case')
+    parser.add_argument('--filter-ratio', type=float, default=0.2,
+                        help='Share of rows kept by the filtered (borough-style) case')
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(" TOP-K SELECTION BENCHMARK")
+    print("=" * 78)
+
+    rng = np.random.default_rng(0)
+    workspace = ScoringWorkspace()
+
+    print(f"\n{'listings':>10} {'case':<34} {'p50 ms':>9} {'p95 ms':>9} {'speedup':>8}")
+    print("-" * 78)
+
+    for n in args.sizes:
+        embeddings = rng.standard_normal((n, 128), dtype=np.float32)
+        query = rng.standard_normal(128, dtype=np.float32)
+        rows = np.flatnonzero(rng.random(n) < args.filter_ratio)
+        k = args.top_k
+
+        scores = embeddings @ query
+        expected = np.argsort(scores)[::-1][:k]
+        assert np.array_equal(np.sort(top_k(scores, k)[0]), np.sort(expected))
+
+        cases = [
+            ('select: argsort[::-1][:k]', lambda: np.argsort(scores)[::-1][:k], None),
+            ('select: argpartition top_k', lambda: top_k(scores, k), 0),
+            ('all rows: matmul + argsort', lambda: np.argsort(embeddings @ query)[::-1][:k], None),
+            ('all rows: workspace.search', lambda: workspace.search(embeddings, query, k), 2),
+            ('filtered: gather + argsort',
+             lambda: rows[np.argsort(embeddings[rows] @ query)[::-1][:k]], None),
+            ('filtered: workspace.search', lambda: workspace.search(embeddings, query, k, rows), 4),
+        ]
+
+        medians = []
+        for label, fn, baseline in cases:
+            samples = time_calls(fn, args.repeats)
+            medians.append(np.median(samples))
+            speedup = f"{medians[baseline] / medians[-1]:.1f}x" if baseline is not None else '-'
+            print(f"{n:>10} {label:<34} {percentile_ms(samples, 50):>9.3f} "
+                  f"{percentile_ms(samples, 95):>9.3f} {speedup:>8}")
+        print()
+
+        del embeddings, scores
+
+    print("✅ Benchmark complete")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+User Tower Latency Benchmark
+Compares eager, tf.function-compiled and XLA user-query encoding:
+first-call latency (tracing/compilation) and steady-state percentiles
+
+Usage:
+    python benchmark_user_tower.py
+    python benchmark_user_tower.py --batch-sizes 1 8 16 --repeats 200
+
+"first ms" is what warmup() pays at startup instead of the first request;
+eager rows are the latency before compiling. USE_MODEL_DIR (see
+model_artifacts.py) selects the text encoder without network access.
+"""
+
+import argparse
+import time
+import numpy as np
+from tf_model import ListingMatchingModel
+from query_processor import QueryProcessor
+from benchmark_match_load import SAMPLE_QUERIES
+from benchmark_vector_index import percentile_ms
+
+
+def query_batch(batch_size: int):
+    """Parsed sample queries as encode_queries() inputs"""
+    texts = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(batch_size)]
+    parsed = [QueryProcessor.process_query(t) for t in texts]
+    return (texts,
+            np.stack([p['structured_features'] for p in parsed]),
+            np.stack([p['schedule_features'] for p in parsed]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='User tower inference latency benchmark')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8],
+                        help='Batch sizes to time')
+    parser.add_argument('--repeats', type=int, default=100, help='Timed calls per case')
+    parser.add_argument('--modes', nargs='+', default=list(ListingMatchingModel.USER_TOWER_MODES),
+                        choices=ListingMatchingModel.USER_TOWER_MODES)
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(" USER TOWER LATENCY BENCHMARK")
+    print("=" * 78)
+
+    model = ListingMatchingModel()
+    batches = {b: query_batch(b) for b in args.batch_sizes}
+
+    # Reference embeddings: every mode must produce the same vectors
+    reference = {b: model.encode_queries(*batch) for b, batch in batches.items()}
+
+    print(f"\n{'mode':<10} {'batch':>6} {'first ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 78)
+
+    for mode in args.modes:
+        model.compile_user_tower(mode)
+
+        for batch_size, batch in batches.items():
+            # First call after compile: tracing (+ XLA compilation for this shape)
+            start = time.perf_counter()
+            embeddings = model.encode_queries(*batch)
+            first_ms = (time.perf_counter() - start) * 1000
+
+            max_diff = float(np.abs(embeddings - reference[batch_size]).max())
+            assert max_diff < 1e-4, f"{mode} batch {batch_size}: max |diff| {max_diff}"
+
+            samples = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                model.encode_queries(*batch)
+                samples.append(time.perf_counter() - start)
+
+            print(f"{mode:<10} {batch_size:>6} {first_ms:>10.1f} {percentile_ms(samples, 50):>9.2f} "
+                  f"{percentile_ms(samples, 95):>9.2f} {percentile_ms(samples, 99):>9.2f}")
+        print()
+
+    print("✅ Benchmark complete (all modes produce the same embeddings)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark
+Measures recall@k and latency of the IVF index against exact brute-force search
+
+Usage:
+    python benchmark_vector_index.py
+    python benchmark_vector_index.py --listings 100000 --queries 200 --top-k 20
+    python benchmark_vector_index.py --index listing_embeddings.npz
+"""
+
+import argparse
+import time
+import numpy as np
+from vector_index import IVFFlatIndex
+
+
+def make_synthetic_embeddings(n_listings: int, dim: int = 128,
+                              n_clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Clustered, L2-normalized embeddings (closer to real data than pure noise)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n_listings)
+    embeddings = centers[labels] + 0.5 * rng.standard_normal((n_listings, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings
+
+
+def exact_top_k(embeddings: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """Reference result: full matmul + full argsort (the old /match path)"""
+    similarities = embeddings @ query
+    return np.argsort(similarities)[::-1][:k]
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IVF vector index recall/latency benchmark')
+    parser.add_argument('--listings', type=int, default=50000, help='Synthetic corpus size')
+    parser.add_argument('--index', help='Benchmark a real .npz embedding index instead')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('--top-k', type=int, default=20, help='Results per query')
+    parser.add_argument('--n-lists', type=int, default=None, help='IVF lists (default ~sqrt(N))')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(" IVF VECTOR INDEX BENCHMARK")
+    print("=" * 70)
+
+    if args.index:
+        embeddings = np.load(args.index, allow_pickle=True)['embeddings'].astype(np.float32)
+        print(f"\n📂 Loaded {len(embeddings)} embeddings from {args.index}")
+    else:
+        embeddings = make_synthetic_embeddings(args.listings)
+        print(f"\n🧪 Generated {len(embeddings)} synthetic embeddings")
+
+    # Queries: perturbed listing embeddings, like a user query close to some listings
+    rng = np.random.default_rng(1)
+    queries = embeddings[rng.integers(0, len(embeddings), args.queries)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    index = IVFFlatIndex.train(embeddings, n_lists=args.n_lists)
+    print(f"⏱️  Index build: {time.perf_counter() - start:.2f}s  {index.stats()}\n")
+
+    exact_times = []
+    truth = []
+    for query in queries:
+        start = time.perf_counter()
+        truth.append(set(exact_top_k(embeddings, query, args.top_k).tolist()))
+        exact_times.append(time.perf_counter() - start)
+
+    print(f"{'n_probe':>8} {'recall@k':>10} {'p50 ms':>10} {'p99 ms':>10} {'speedup':>9}")
+    print("-" * 52)
+    print(f"{'exact':>8} {1.0:>10.4f} {percentile_ms(exact_times, 50):>10.3f} "
+          f"{percentile_ms(exact_times, 99):>10.3f} {1.0:>8.1f}x")
+
+    n_probe = 1
+    while True:
+        n_probe = min(n_probe, index.n_lists)
+        times = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            rows, _ = index.search(query, args.top_k, n_probe=n_probe)
+            times.append(time.perf_counter() - start)
+            hits += len(expected.intersection(rows.tolist()))
+
+        recall = hits / (len(queries) * args.top_k)
+        speedup = np.median(exact_times) / np.median(times)
+        print(f"{n_probe:>8} {recall:>10.4f} {percentile_ms(times, 50):>10.3f} "
+              f"{percentile_ms(times, 99):>10.3f} {speedup:>8.1f}x")
+
+        if n_probe == index.n_lists:
+            break
+        n_probe *= 2
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,17 +7,42 @@ Usage:
     python build_embeddings.py
 
 Output:
-    listing_embeddings.npz - Compressed numpy file with all embeddings
+    listing_model/ - Exported two-tower model (SavedModel), created on the first run
+                     and reused afterwards so the index always matches the API's weights
+                     (delete it to start over with fresh tower weights)
+    listing_embeddings/ - Versioned index root: the new index is written to
+                          versions/<version>/ (see index_store.py) and published
+                          through CURRENT; running API workers swap it in
+
+To convert an existing listing_embeddings.npz without re-encoding:
+    python index_store.py listing_embeddings.npz listing_embeddings
 """
 
 import os
 import sys
 from datetime import datetime
 from listing_preprocessor import ListingPreprocessor
-from tf_model import ListingMatchingModel, EmbeddingIndexBuilder
+from tf_model import ListingMatchingModel, open_text_cache
+from embedding_index import EmbeddingIndexBuilder
+from rebuild_jobs import RebuildJobRunner, RebuildInProgress
+import index_versions
 
 
 def main():
+    # Same lock as the API's /rebuild and /index/upsert, so no other writer
+    # publishes (or prunes this build's staging directory) while it runs
+    jobs_dir = os.getenv('REBUILD_JOBS_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'rebuild_status'
+    )
+    try:
+        with RebuildJobRunner(jobs_dir).hold():
+            return build()
+    except RebuildInProgress as e:
+        print(f"❌ {e} - run this again once it has finished")
+        return 1
+
+
+def build():
     print("=" * 70)
     print(" TENSORFLOW LISTING EMBEDDING GENERATOR")
     print("=" * 70)
@@ -29,57 +54,79 @@ def main():
         print("-" * 70)
         preprocessor = ListingPreprocessor()
 
-        # Step 2: Fetch all listings
-        print("\nSTEP 2: Fetch Listings from Supabase")
+        # Step 2: Initialize TensorFlow model
+        print("\nSTEP 2: Initialize TensorFlow Model")
         print("-" * 70)
-        listings_df = preprocessor.fetch_all_listings()
-
-        if len(listings_df) == 0:
-            print("❌ No listings found! Exiting.")
-            return 1
-
-        # Step 3: Preprocess all listings
-        print("\nSTEP 3: Preprocess Listing Data")
+        cache_path = os.getenv('TEXT_EMBEDDING_CACHE') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'text_embedding_cache.sqlite'
+        )
+        text_cache = open_text_cache(cache_path)
+        model_dir = os.getenv('LISTING_MODEL_DIR') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'listing_model'
+        )
+        if ListingMatchingModel.is_saved_model_dir(model_dir):
+            model = ListingMatchingModel(text_cache=text_cache, saved_model_dir=model_dir)
+        else:
+            # Export before encoding: the API loads these exact weights
+            model = ListingMatchingModel(text_cache=text_cache)
+            model.export(model_dir)
+
+        # Steps 3-5: Fetch, preprocess and encode one page at a time
+        # (peak memory is bounded by the page size, not the table size)
+        print("\nSTEPS 3-5: Fetch, Preprocess and Encode Listings (streaming)")
         print("-" * 70)
-        processed_listings = preprocessor.preprocess_all(listings_df)
+        page_size = int(os.getenv('LISTING_PAGE_SIZE') or ListingPreprocessor.DEFAULT_PAGE_SIZE)
+        summary = {'total_listings': 0, 'text_chars': 0, 'days_per_week': 0.0, 'flexible': 0}
 
-        if len(processed_listings) == 0:
-            print("❌ Preprocessing failed! Exiting.")
+        def summarized(chunks):
+            for chunk in chunks:
+                summary['total_listings'] += len(chunk)
+                summary['text_chars'] += sum(len(l['text']) for l in chunk)
+                summary['days_per_week'] += sum(float(l['temporal_features'][7]) for l in chunk)
+                summary['flexible'] += sum(int(l['temporal_features'][10]) for l in chunk)
+                yield chunk
+
+        index_builder = EmbeddingIndexBuilder(model)
+        embedding_index = index_builder.build_index_streaming(
+            summarized(preprocessor.iter_preprocessed_chunks(page_size)),
+            batch_size=32,
+            quantization=os.getenv('EMBEDDING_QUANTIZATION') or None,
+            total=preprocessor.count_listings()
+        )
+
+        if summary['total_listings'] == 0:
+            print("❌ No listings found! Exiting.")
             return 1
 
         # Show summary
-        summary = preprocessor.get_feature_summary(processed_listings)
+        n = summary['total_listings']
         print("\n📊 Dataset Summary:")
-        print(f"  Total listings: {summary['total_listings']}")
-        print(f"  Avg text length: {summary['text_lengths']['mean']:.0f} chars")
-        print(f"  Avg days/week available: {summary['temporal_features']['avg_days_per_week']:.1f}")
-        print(f"  Flexible schedules: {summary['temporal_features']['pct_flexible']:.1f}%")
-
-        # Step 4: Initialize TensorFlow model
-        print("\nSTEP 4: Initialize TensorFlow Model")
-        print("-" * 70)
-        model = ListingMatchingModel()
-
-        # Step 5: Generate embeddings
-        print("\nSTEP 5: Generate Embeddings")
-        print("-" * 70)
-        index_builder = EmbeddingIndexBuilder(model)
-        embedding_index = index_builder.build_index(processed_listings, batch_size=32)
+        print(f"  Total listings: {n}")
+        print(f"  Avg text length: {summary['text_chars'] / n:.0f} chars")
+        print(f"  Avg days/week available: {summary['days_per_week'] / n:.1f}")
+        print(f"  Flexible schedules: {summary['flexible'] / n * 100:.1f}%")
+        print(f"  Fetch: {preprocessor.fetch_progress}")
 
         # Step 6: Save to disk
         print("\nSTEP 6: Save Embedding Index")
         print("-" * 70)
-        output_file = 'listing_embeddings.npz'
-        index_builder.save_index(embedding_index, output_file)
+        index_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'listing_embeddings')
+        output_dir = index_versions.write_version(
+            index_root, lambda path: index_builder.save_index(embedding_index, path)
+        )
 
         # Final summary
         print("\n" + "=" * 70)
         print(" EMBEDDING GENERATION COMPLETE ✅")
         print("=" * 70)
-        print(f"\nOutput file: {output_file}")
+        index_size = sum(
+            os.path.getsize(os.path.join(output_dir, f)) for f in os.listdir(output_dir)
+        )
+        print(f"\nModel directory: {model.saved_model_dir}")
+        print(f"Output directory: {output_dir}")
         print(f"Total listings indexed: {len(embedding_index['listing_ids'])}")
         print(f"Embedding dimensions: {embedding_index['embeddings'].shape[1]}")
-        print(f"File size: {os.path.getsize(output_file) / (1024*1024):.2f} MB")
+        print(f"Index size: {index_size / (1024*1024):.2f} MB")
         print(f"\nCompleted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("\n🎉 You can now use the Flask API for semantic search!")
 
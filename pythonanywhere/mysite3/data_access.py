@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Listing Data Access
+The listing / zat_geo_borough_toplevel reads used by the app, behind one
+interface with interchangeable backends
+
+    supabase   - the live database (default)
+    memory     - rows loaded from JSON fixture files, served from memory
+    synthetic  - a generated corpus of any size (fake_supabase.py)
+
+DATA_BACKEND selects the backend for app.py, ListingPreprocessor and
+build_embeddings.py, so the whole pipeline (/rebuild, /match, /health)
+runs locally and deterministically without the production database:
+
+    DATA_BACKEND=memory DATA_FIXTURES_DIR=fixtures python app.py
+    DATA_BACKEND=synthetic SYNTHETIC_LISTINGS=100000 python build_embeddings.py
+"""
+
+import abc
+import os
+import json
+import bisect
+from typing import Dict, List, Optional
+
+
+BACKENDS = ('supabase', 'memory', 'synthetic')
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES_DIR = os.path.join(SCRIPT_DIR, 'fixtures')
+
+LISTING_TABLE = 'listing'
+BOROUGH_TABLE = 'zat_geo_borough_toplevel'
+
+
+def _columns(select: str) -> Optional[List[str]]:
+    """Column names of a PostgREST select list (None for '*')"""
+    if select.strip() == '*':
+        return None
+    return [c.strip().strip('"') for c in select.split(',') if c.strip()]
+
+
+class ListingStore(abc.ABC):
+    """
+    Read access to listings and boroughs
+
+    Column lists use PostgREST select syntax ('_id, "Location - Borough"');
+    rows come back as dicts keyed by the unquoted column names. Backends
+    implement the abstract reads; get_listing, ping and stats build on them.
+    """
+
+    backend = None
+
+    @abc.abstractmethod
+    def listing_page(self, select: str, page_size: int, after_id: Optional[str] = None,
+                     listing_ids: Optional[List[str]] = None,
+                     modified_since: Optional[str] = None) -> List[Dict]:
+        """
+        One page of listings ordered by _id (keyset pagination)
+
+        Args:
+            select: Columns to return
+            page_size: Maximum rows
+            after_id: Only listings with _id > after_id
+            listing_ids: Only these listing IDs
+            modified_since: Only listings with "Modified Date" >= this ISO timestamp
+
+        Returns:
+            List of listing rows
+        """
+
+    @abc.abstractmethod
+    def count_listings(self, modified_since: Optional[str] = None) -> Optional[int]:
+        """Exact number of listings (optionally modified since a timestamp)"""
+
+    @abc.abstractmethod
+    def get_listings(self, listing_ids: List[str]) -> List[Dict]:
+        """Full rows of the given listings (unknown IDs are skipped)"""
+
+    def get_listing(self, listing_id: str) -> Optional[Dict]:
+        """Full row of one listing, or None"""
+        rows = self.get_listings([listing_id])
+        return rows[0] if rows else None
+
+    @abc.abstractmethod
+    def borough_listing_ids(self, borough_id: str) -> List[str]:
+        """IDs of every listing (active or not) in a borough"""
+
+    @abc.abstractmethod
+    def boroughs(self) -> List[Dict]:
+        """Borough rows (_id, "Display Borough")"""
+
+    def ping(self) -> str:
+        """'connected' if a listing can be read, 'empty' if the table is empty"""
+        return 'connected' if self.listing_page('_id', 1) else 'empty'
+
+    def stats(self) -> Dict:
+        return {'backend': self.backend}
+
+
+# ============================================================
+# SUPABASE
+# ============================================================
+
+class SupabaseListingStore(ListingStore):
+    """
+    The live database through supabase-py (or any client with the same
+    query builder, e.g. fake_supabase.FakeSupabaseClient)
+
+    The client is created on first use, so importing the app does not
+    open a connection.
+    """
+
+    backend = 'supabase'
+
+    def __init__(self, client=None, url: Optional[str] = None, key: Optional[str] = None):
+        """
+        Args:
+            client: Existing client (default: create_client(url, key) on first use)
+            url: Supabase project URL (defaults to SUPABASE_URL)
+            key: Supabase anon/service key (defaults to SUPABASE_KEY)
+        """
+        self._client = client
+        self.url = url
+        self.key = key
+
+    @property
+    def client(self):
+        if self._client is None:
+            from supabase import create_client
+            self._client = create_client(self.url or os.getenv("SUPABASE_URL"),
+                                         self.key or os.getenv("SUPABASE_KEY"))
+        return self._client
+
+    def listing_page(self, select, page_size, after_id=None, listing_ids=None, modified_since=None):
+        query = self.client.table(LISTING_TABLE).select(select)
+        if listing_ids is not None:
+            query = query.in_('_id', listing_ids)
+        if modified_since:
+            query = query.gte('"Modified Date"', modified_since)
+        if after_id is not None:
+            query = query.gt('_id', after_id)
+        return query.order('_id').limit(page_size).execute().data or []
+
+    def count_listings(self, modified_since=None):
+        query = self.client.table(LISTING_TABLE).select('_id', count='exact')
+        if modified_since:
+            query = query.gte('"Modified Date"', modified_since)
+        return query.limit(1).execute().count
+
+    def get_listings(self, listing_ids):
+        if not listing_ids:
+            return []
+        return self.client.table(LISTING_TABLE).select('*').in_('_id', list(listing_ids)).execute().data or []
+
+    def get_listing(self, listing_id):
+        # Not .single(): it raises instead of returning nothing for an unknown ID
+        rows = self.client.table(LISTING_TABLE).select('*').eq('_id', listing_id).limit(1).execute().data or []
+        return rows[0] if rows else None
+
+    def borough_listing_ids(self, borough_id):
+        rows = self.client.table(LISTING_TABLE)\
+            .select('_id')\
+            .eq('"Location - Borough"', borough_id)\
+            .execute().data or []
+        return [row['_id'] for row in rows]
+
+    def boroughs(self):
+        return self.client.table(BOROUGH_TABLE)\
+            .select('_id, "Display Borough"')\
+            .execute().data or []
+
+
+# ============================================================
+# IN-MEMORY (FIXTURES)
+# ============================================================
+
+class InMemoryListingStore(ListingStore):
+    """
+    Listings and boroughs held in memory, sorted by _id
+
+    Answers the same reads as the database with the same row shapes, so
+    results are reproducible run to run. Loaded from fixture files with
+    from_fixtures().
+    """
+
+    backend = 'memory'
+
+    def __init__(self, listings: List[Dict], boroughs: Optional[List[Dict]] = None):
+        """
+        Args:
+            listings: listing rows (unquoted column names, '_id' required)
+            boroughs: zat_geo_borough_toplevel rows
+        """
+        self._listings = sorted(listings, key=lambda row: row['_id'])
+        self._ids = [row['_id'] for row in self._listings]
+        self._positions = {listing_id: i for i, listing_id in enumerate(self._ids)}
+        self._boroughs = list(boroughs or [])
+
+    @classmethod
+    def from_fixtures(cls, directory: str = DEFAULT_FIXTURES_DIR) -> 'InMemoryListingStore':
+        """
+        Load <directory>/listing.json and <directory>/zat_geo_borough_toplevel.json
+        (JSON arrays of rows, as returned by select('*'))
+        """
+        with open(os.path.join(directory, f'{LISTING_TABLE}.json')) as f:
+            listings = json.load(f)
+
+        borough_path = os.path.join(directory, f'{BOROUGH_TABLE}.json')
+        boroughs = []
+        if os.path.exists(borough_path):
+            with open(borough_path) as f:
+                boroughs = json.load(f)
+
+        print(f"📂 Loaded {len(listings)} listings and {len(boroughs)} boroughs from {directory}")
+        return cls(listings, boroughs)
+
+    @staticmethod
+    def _project(row: Dict, columns: Optional[List[str]]) -> Dict:
+        if columns is None:
+            return dict(row)
+        return {c: row.get(c) for c in columns}
+
+    def listing_page(self, select, page_size, after_id=None, listing_ids=None, modified_since=None):
+        columns = _columns(select)
+        start = bisect.bisect_right(self._ids, after_id) if after_id is not None else 0
+        wanted = set(listing_ids) if listing_ids is not None else None
+
+        page = []
+        for row in self._listings[start:]:
+            if len(page) >= page_size:
+                break
+            if wanted is not None and row['_id'] not in wanted:
+                continue
+            if modified_since and not (row.get('Modified Date') or '') >= modified_since:
+                continue
+            page.append(self._project(row, columns))
+        return page
+
+    def count_listings(self, modified_since=None):
+        if not modified_since:
+            return len(self._listings)
+        return sum(1 for row in self._listings if (row.get('Modified Date') or '') >= modified_since)
+
+    def get_listings(self, listing_ids):
+        positions = sorted(self._positions[i] for i in set(listing_ids) if i in self._positions)
+        return [dict(self._listings[p]) for p in positions]
+
+    def borough_listing_ids(self, borough_id):
+        return [row['_id'] for row in self._listings if row.get('Location - Borough') == borough_id]
+
+    def boroughs(self):
+        return [{'_id': b['_id'], 'Display Borough': b.get('Display Borough')} for b in self._boroughs]
+
+    def stats(self):
+        return {'backend': self.backend, 'listings': len(self._listings), 'boroughs': len(self._boroughs)}
+
+
+def write_fixtures(store: ListingStore, directory: str, limit: Optional[int] = None,
+                   page_size: int = 1000) -> int:
+    """
+    Snapshot listings (full rows) and boroughs of any store into fixture files
+
+    Args:
+        store: Source, e.g. the synthetic corpus or a Supabase project
+        directory: Output directory
+        limit: Maximum listings to copy (default: all)
+        page_size: Listings per read
+
+    Returns:
+        Number of listings written
+    """
+    os.makedirs(directory, exist_ok=True)
+    listings, last_id = [], None
+    while limit is None or len(listings) < limit:
+        size = page_size if limit is None else min(page_size, limit - len(listings))
+        page = store.listing_page('*', size, after_id=last_id)
+        if not page:
+            break
+        listings.extend(page)
+        last_id = page[-1]['_id']
+
+    # One row per line keeps fixture diffs readable
+    for table, rows in ((LISTING_TABLE, listings), (BOROUGH_TABLE, store.boroughs())):
+        with open(os.path.join(directory, f'{table}.json'), 'w') as f:
+            f.write('[\n' + ',\n'.join(json.dumps(row, ensure_ascii=False, default=str) for row in rows) + '\n]\n')
+
+    print(f"💾 Wrote {len(listings)} listings to {directory}")
+    return len(listings)
+
+
+# ============================================================
+# BACKEND SELECTION
+# ============================================================
+
+def create_store(backend: Optional[str] = None, supabase_url: Optional[str] = None,
+                 supabase_key: Optional[str] = None) -> ListingStore:
+    """
+    Store for the configured backend
+
+    Args:
+        backend: 'supabase', 'memory' or 'synthetic' (default: DATA_BACKEND env var, else supabase)
+        supabase_url: Supabase project URL (supabase backend, defaults to SUPABASE_URL)
+        supabase_key: Supabase key (supabase backend, defaults to SUPABASE_KEY)
+
+    Environment:
+        DATA_FIXTURES_DIR: Fixture directory of the memory backend (default fixtures/)
+        SYNTHETIC_LISTINGS / SYNTHETIC_SEED: Size and seed of the synthetic corpus
+        SYNTHETIC_LATENCY_MS: Simulated round trip per synthetic query
+
+    Returns:
+        ListingStore
+    """
+    backend = (backend or os.getenv('DATA_BACKEND') or 'supabase').lower()
+
+    if backend == 'supabase':
+        return SupabaseListingStore(url=supabase_url, key=supabase_key)
+
+    if backend == 'memory':
+        return InMemoryListingStore.from_fixtures(os.getenv('DATA_FIXTURES_DIR') or DEFAULT_FIXTURES_DIR)
+
+    if backend == 'synthetic':
+        from fake_supabase import make_fake_supabase
+        store = SupabaseListingStore(make_fake_supabase(
+            int(os.getenv('SYNTHETIC_LISTINGS', 10000)),
+            seed=int(os.getenv('SYNTHETIC_SEED', 0)),
+            latency_ms=float(os.getenv('SYNTHETIC_LATENCY_MS', 0))
+        ))
+        store.backend = 'synthetic'
+        return store
+
+    raise ValueError(f"Unknown DATA_BACKEND {backend!r} (expected one of {', '.join(BACKENDS)})")
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+
+    # python data_access.py --write-fixtures DIR [N]: snapshot the configured backend
+    if len(sys.argv) > 2 and sys.argv[1] == '--write-fixtures':
+        limit = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        write_fixtures(create_store(), sys.argv[2], limit)
+        sys.exit(0)
+
+    print("=== Data Access Testing ===\n")
+
+    synthetic = create_store('synthetic')
+    print(f"Synthetic listings: {synthetic.count_listings()}")
+
+    fixtures_dir = tempfile.mkdtemp()
+    write_fixtures(synthetic, fixtures_dir, limit=250, page_size=100)
+    memory = InMemoryListingStore.from_fixtures(fixtures_dir)
+
+    page = memory.listing_page('_id, "Location - Borough"', 100)
+    same = synthetic.listing_page('_id, "Location - Borough"', 100)
+    print(f"First page matches the source: {page == same}")
+
+    borough = memory.boroughs()[0]
+    print(f"{borough['Display Borough']}: {len(memory.borough_listing_ids(borough['_id']))} listings")
+    print(f"ping: {memory.ping()}, stats: {memory.stats()}")
+
+    print("\n✅ Data access tests passed!")
@@ -0,0 +1,867 @@
+#!/usr/bin/env python3
+"""
+Embedding Index Builder
+Builds, updates, saves and loads the listing embedding index
+
+Only encoding listings needs TensorFlow (through the model's listing
+tower), so loading, searching and incrementally updating an index works
+without it - e.g. in tests with fake_model.HashingTextModel.
+"""
+
+import os
+import time
+import hashlib
+import numpy as np
+from typing import Callable, Dict, Iterable, Tuple, Optional
+
+import index_store
+import index_versions
+from quantization import QuantizedEmbeddings
+from vector_index import IVFFlatIndex
+from index_overlay import DeltaOverlay, StackedRows, concatenate_rows, empty_rows
+from geo_index import GeoGridIndex, listing_coordinates
+from attribute_filters import ATTRIBUTE_ARRAYS, attribute_columns
+from listing_metadata import MetadataTable, encode_metadata, listing_price, metadata_record
+
+
+# Default on-disk location of the embedding index (memory-mapped directory format)
+DEFAULT_INDEX_PATH = 'listing_embeddings'
+
+
+class EmbeddingIndexBuilder:
+    """
+    Builds and saves embedding index for all listings
+    """
+
+    def __init__(self, model):
+        """
+        Args:
+            model: ListingMatchingModel (or a stand-in with the same encode methods)
+        """
+        self.model = model
+
+    def build_index(self, processed_listings: list,
+                    batch_size: int = 32,
+                    build_vector_index: bool = True,
+                    quantization: Optional[str] = None) -> Dict:
+        """
+        Generate embeddings for all listings
+
+        Args:
+            processed_listings: List of dicts from ListingPreprocessor.preprocess_all()
+            batch_size: Batch size for processing (larger = faster but more memory)
+            build_vector_index: Also train the IVF approximate search index
+            quantization: Optional 'float16' or 'int8' quantized copy for scoring
+
+        Returns:
+            Dictionary containing:
+            - listing_ids: List of listing IDs
+            - embeddings: np.array of shape (n_listings, 128)
+            - metadata: Original processed listings
+            - vector_index: IVFFlatIndex (if build_vector_index)
+            - quantized: QuantizedEmbeddings (if quantization)
+            - geo_index: GeoGridIndex over the listing coordinates
+        """
+        print(f"\n🔮 Generating embeddings for {len(processed_listings)} listings...")
+
+        listing_ids = [l['listing_id'] for l in processed_listings]
+        all_embeddings = self._encode_listings(processed_listings, batch_size)
+
+        print(f"✅ Generated {len(all_embeddings)} embeddings (shape: {all_embeddings.shape})\n")
+
+        if self.model.text_cache is not None:
+            print(f"📊 Text embedding cache: {self.model.text_cache.stats()}\n")
+
+        index = {
+            'listing_ids': listing_ids,
+            'embeddings': all_embeddings,
+            'metadata': processed_listings,
+            **self._row_arrays(processed_listings)
+        }
+
+        if build_vector_index:
+            self.build_vector_index(index)
+
+        if quantization:
+            self.quantize_index(index, quantization)
+
+        self.geo_index(index)
+
+        return index
+
+    def build_index_streaming(self, listing_chunks: Iterable[list],
+                              batch_size: int = 32,
+                              build_vector_index: bool = True,
+                              quantization: Optional[str] = None,
+                              total: Optional[int] = None,
+                              progress_fn: Optional[Callable[[str, int, Optional[int]], None]] = None) -> Dict:
+        """
+        Generate embeddings chunk by chunk (e.g. one fetched page at a time)
+
+        Each chunk of preprocessed listings is encoded and then dropped, so
+        only the embeddings and row arrays accumulate - raw listing rows and
+        texts are never all in memory at once.
+
+        Args:
+            listing_chunks: Iterable of lists of dicts from ListingPreprocessor
+                            (e.g. ListingPreprocessor.iter_preprocessed_chunks())
+            batch_size: Batch size for processing
+            build_vector_index: Also train the IVF approximate search index
+            quantization: Optional 'float16' or 'int8' quantized copy for scoring
+            total: Expected number of listings (progress reporting only)
+            progress_fn: Called as progress_fn(stage, processed, total) after each
+                         chunk ('encode') and before the 'vector_index' and
+                         'quantize' steps (e.g. RebuildJob.progress)
+
+        Returns:
+            Same dictionary as build_index(), without 'metadata'
+        """
+        print(f"\n🔮 Generating embeddings chunk by chunk...")
+
+        listing_ids = []
+        embeddings = []
+        row_arrays = {name: [] for name in self.ROW_ARRAYS}
+        start = time.perf_counter()
+
+        for chunk in listing_chunks:
+            if not chunk:
+                continue
+
+            listing_ids.extend(l['listing_id'] for l in chunk)
+            embeddings.append(self._encode_listings(chunk, batch_size))
+            for name, values in self._row_arrays(chunk).items():
+                row_arrays[name].append(values)
+
+            elapsed = time.perf_counter() - start
+            of_total = f"/{total}" if total else ''
+            print(f"  🧩 Encoded {len(listing_ids)}{of_total} listings "
+                  f"({len(listing_ids) / elapsed:.0f} listings/s)")
+            if progress_fn:
+                progress_fn('encode', len(listing_ids), total)
+
+        index = {
+            'listing_ids': listing_ids,
+            'embeddings': np.vstack(embeddings) if embeddings else np.zeros((0, 128), dtype=np.float32),
+            **{name: concatenate_rows(parts) for name, parts in row_arrays.items() if parts}
+        }
+
+        print(f"✅ Generated {len(index['embeddings'])} embeddings (shape: {index['embeddings'].shape})\n")
+
+        if self.model.text_cache is not None:
+            print(f"📊 Text embedding cache: {self.model.text_cache.stats()}\n")
+
+        if build_vector_index and len(listing_ids):
+            if progress_fn:
+                progress_fn('vector_index', len(listing_ids), len(listing_ids))
+            self.build_vector_index(index)
+
+        if quantization:
+            if progress_fn:
+                progress_fn('quantize', len(listing_ids), len(listing_ids))
+            self.quantize_index(index, quantization)
+
+        self.geo_index(index)
+
+        return index
+
+    def _encode_listings(self, processed_listings: list,
+                         batch_size: int = 32) -> np.ndarray:
+        """
+        Run the listing tower over preprocessed listings in batches
+
+        Returns:
+            np.array of shape (n_listings, 128)
+        """
+        import tensorflow as tf
+
+        all_embeddings = []
+
+        # Process in batches for efficiency
+        for i in range(0, len(processed_listings), batch_size):
+            batch = processed_listings[i:i+batch_size]
+
+            # Extract batch data
+            texts = [l['text'] for l in batch]
+            structured = np.array([l['structured_features'] for l in batch])
+            temporal = np.array([l['temporal_features'] for l in batch])
+
+            # Convert to tensors (only the listing tower needs TensorFlow)
+            text_tensor = tf.constant(texts)
+            struct_tensor = tf.constant(structured, dtype=tf.float32)
+            temp_tensor = tf.constant(temporal, dtype=tf.float32)
+
+            # Generate embeddings
+            embeddings = self.model.encode_listing(
+                text_tensor, struct_tensor, temp_tensor
+            )
+
+            # Collect results
+            all_embeddings.append(embeddings.numpy())
+
+            if (i + batch_size) % 100 == 0:
+                print(f"  Processed {min(i + batch_size, len(processed_listings))}/{len(processed_listings)} listings...")
+
+        if not all_embeddings:
+            return np.zeros((0, 128), dtype=np.float32)
+
+        # Combine all batches
+        return np.vstack(all_embeddings)
+
+    # ------------------------------------------------------------
+    # PER-LISTING ARRAYS
+    # ------------------------------------------------------------
+
+    # Arrays stored alongside the embeddings with one row per listing.
+    # They are persisted with the index and carried through upsert/delete.
+    ROW_ARRAYS = ('content_hashes', 'borough_ids', 'listing_metadata', 'temporal_features', 'prices',
+                  'coordinates') + ATTRIBUTE_ARRAYS
+
+    # Row arrays derived from the embedding inputs; every other row array is
+    # metadata that can change without re-encoding the listing
+    ENCODED_ROW_ARRAYS = ('content_hashes',)
+
+    @staticmethod
+    def content_hash(processed_listing: Dict) -> str:
+        """
+        Hash of everything the listing tower sees (text + features)
+
+        A listing whose hash is unchanged does not need to be re-encoded.
+        """
+        digest = hashlib.sha1(processed_listing['text'].encode('utf-8'))
+        digest.update(np.asarray(processed_listing['structured_features'], dtype=np.float32).tobytes())
+        digest.update(np.asarray(processed_listing['temporal_features'], dtype=np.float32).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def _row_arrays(cls, processed_listings: list) -> Dict[str, np.ndarray]:
+        """Build every ROW_ARRAYS entry for a list of preprocessed listings"""
+        return {
+            'content_hashes': np.array(
+                [cls.content_hash(l) for l in processed_listings], dtype='S40'
+            ),
+            'borough_ids': index_store.encode_ids(
+                [l.get('borough_id') or '' for l in processed_listings]
+            ),
+            'listing_metadata': encode_metadata(
+                [metadata_record(l.get('raw_data')) for l in processed_listings]
+            ),
+            # Re-ranking inputs (schedule compatibility, budget fit)
+            'temporal_features': np.array(
+                [l['temporal_features'] for l in processed_listings], dtype=np.float32
+            ).reshape(-1, 11),
+            'prices': np.array(
+                [listing_price(l.get('raw_data')) for l in processed_listings], dtype=np.float32
+            ),
+            # Radius pre-filter (lat, lng; NaN where the address has none)
+            'coordinates': np.array(
+                [listing_coordinates(l.get('raw_data')) for l in processed_listings], dtype=np.float32
+            ).reshape(-1, 2),
+            # Hard attribute filters (bedrooms, bathrooms, guests, active, days_mask)
+            **attribute_columns(processed_listings)
+        }
+
+    @classmethod
+    def _metadata_changed(cls, index: Dict, row: int,
+                          row_arrays: Dict[str, np.ndarray], position: int) -> bool:
+        """True if any non-encoded row array differs between an index row and a new listing"""
+        for name in cls.ROW_ARRAYS:
+            if name in cls.ENCODED_ROW_ARRAYS:
+                continue
+            if index.get(name) is None:
+                return True
+            new = row_arrays[name][position]
+            if not np.array_equal(index[name][row], new, equal_nan=new.dtype.kind == 'f'):
+                return True
+        return False
+
+    @staticmethod
+    def borough_masks(index: Dict) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Boolean row mask per borough ID, computed once per index object
+
+        Returns:
+            borough ID → (n_listings,) bool mask, or None for indexes built
+            before borough IDs were stored
+        """
+        if index.get('borough_ids') is None:
+            return None
+
+        if index.get('borough_masks') is None:
+            codes, inverse = np.unique(np.asarray(index['borough_ids']), return_inverse=True)
+            index['borough_masks'] = {
+                code.decode('ascii'): inverse == i
+                for i, code in enumerate(codes) if code
+            }
+
+        return index['borough_masks']
+
+    @staticmethod
+    def geo_index(index: Dict) -> Optional[GeoGridIndex]:
+        """
+        Grid index over the listing coordinates, built once per index object
+
+        Returns:
+            GeoGridIndex, or None for indexes built before coordinates were stored
+        """
+        if index.get('coordinates') is None:
+            return None
+
+        if index.get('geo_index') is None:
+            index['geo_index'] = GeoGridIndex.build(index['coordinates'])
+
+        return index['geo_index']
+
+    # ------------------------------------------------------------
+    # INCREMENTAL UPDATES
+    # ------------------------------------------------------------
+
+    # Delta segment (upserts/deletes since the last full write) inside an index directory
+    DELTA_FILE = 'delta.npz'
+
+    # Compact (rewrite the full index) once the delta exceeds this share of the index...
+    COMPACTION_RATIO = 0.10
+    # ...but never for fewer changed listings than this
+    COMPACTION_MIN_ROWS = 500
+
+    def upsert(self, index: Dict, processed_listings: list,
+               batch_size: int = 32) -> Tuple[Dict, Dict]:
+        """
+        Insert new listings and re-encode changed ones
+
+        Only listings that are new or whose content hash changed go through
+        the Universal Sentence Encoder; unchanged listings are skipped.
+
+        Args:
+            index: Current index (from build_index() or load_index())
+            processed_listings: List of dicts from ListingPreprocessor.preprocess_all()
+            batch_size: Encoding batch size
+
+        Returns:
+            Tuple of (new index dict, stats dict with inserted/updated/unchanged counts).
+            The input index is not modified, so readers holding it stay consistent.
+        """
+        row_arrays = self._row_arrays(processed_listings)
+        id_to_row = self.live_rows(index)
+        current_hashes = index.get('content_hashes')
+
+        changed = []
+        refreshed = []  # same embedding inputs, only metadata (e.g. borough) changed
+        inserted = 0
+        for position, listing in enumerate(processed_listings):
+            row = id_to_row.get(listing['listing_id'])
+            if row is None:
+                inserted += 1
+            elif current_hashes is not None and current_hashes[row] == row_arrays['content_hashes'][position]:
+                if self._metadata_changed(index, row, row_arrays, position):
+                    refreshed.append(position)
+                continue
+            changed.append(position)
+
+        stats = {
+            'inserted': inserted,
+            'updated': len(changed) - inserted,
+            'refreshed': len(refreshed),
+            'unchanged': len(processed_listings) - len(changed) - len(refreshed)
+        }
+
+        if not changed and not refreshed:
+            return index, stats
+
+        # Metadata-only rows keep their current embedding
+        refreshed_rows = [id_to_row[processed_listings[i]['listing_id']] for i in refreshed]
+        embeddings = self.row_embeddings(index, refreshed_rows)
+
+        if changed:
+            changed_listings = [processed_listings[i] for i in changed]
+            print(f"🔁 Re-encoding {len(changed_listings)} of {len(processed_listings)} listings...")
+            embeddings = np.concatenate([self._encode_listings(changed_listings, batch_size), embeddings])
+
+        positions = changed + refreshed
+        new_index = self._merge_rows(
+            index,
+            [processed_listings[i]['listing_id'] for i in positions],
+            embeddings,
+            {name: values[positions] for name, values in row_arrays.items()}
+        )
+
+        return new_index, stats
+
+    def delete(self, index: Dict, listing_ids: list) -> Tuple[Dict, int]:
+        """
+        Remove listings from the index
+
+        Returns:
+            Tuple of (new index dict, number of listings removed)
+        """
+        return self._drop_rows(index, listing_ids)
+
+    @staticmethod
+    def live_rows(index: Dict) -> Dict[str, int]:
+        """Listing ID → row of its current version (masked-out base rows skipped)"""
+        overlay = index.get('overlay')
+        if overlay is None:
+            return {lid: row for row, lid in enumerate(index['listing_ids'])}
+        return {lid: row for row, lid in enumerate(index['listing_ids']) if overlay.live[row]}
+
+    @staticmethod
+    def n_listings(index: Dict) -> int:
+        """Number of listings served (rows masked out by the overlay not counted)"""
+        overlay = index.get('overlay')
+        return len(index['listing_ids']) - (overlay.n_dead if overlay is not None else 0)
+
+    @staticmethod
+    def row_embeddings(index: Dict, rows) -> np.ndarray:
+        """float32 embeddings of the given rows, from the base or the overlay segment"""
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        overlay = index.get('overlay')
+        n_base = overlay.n_base if overlay is not None else len(index['embeddings'])
+
+        embeddings = np.empty((len(rows), index['embeddings'].shape[1]), dtype=np.float32)
+        in_base = rows < n_base
+        embeddings[in_base] = index['embeddings'][rows[in_base]]
+        if overlay is not None:
+            embeddings[~in_base] = overlay.embeddings[rows[~in_base] - n_base]
+        return embeddings
+
+    @classmethod
+    def _merge_rows(cls, index: Dict, listing_ids: list,
+                    embeddings: np.ndarray, row_arrays: Dict[str, np.ndarray]) -> Dict:
+        """Copy of index with rows replaced (existing IDs) or appended (new IDs)"""
+        merged = cls._with_segment(index, listing_ids, embeddings, row_arrays, set(listing_ids))
+
+        delta = cls._delta_of(index)
+        merged['delta'] = {
+            'upserted': delta['upserted'] | set(listing_ids),
+            'deleted': delta['deleted'] - set(listing_ids)
+        }
+
+        return merged
+
+    @classmethod
+    def _drop_rows(cls, index: Dict, listing_ids: list) -> Tuple[Dict, int]:
+        """Copy of index without the given listing IDs"""
+        removed = set(listing_ids) & set(cls.live_rows(index))
+        if not removed:
+            return index, 0
+
+        dim = index['embeddings'].shape[1]
+        compacted = cls._with_segment(index, [], np.empty((0, dim), dtype=np.float32), {}, removed)
+
+        delta = cls._delta_of(index)
+        compacted['delta'] = {
+            'upserted': delta['upserted'] - removed,
+            'deleted': delta['deleted'] | removed
+        }
+
+        return compacted, len(removed)
+
+    @classmethod
+    def _with_segment(cls, index: Dict, listing_ids: list, embeddings: np.ndarray,
+                      row_arrays: Dict[str, np.ndarray], replaced: set) -> Dict:
+        """
+        Copy of index whose overlay segment gains the given rows
+
+        Base arrays are shared with the input index, never copied: base rows
+        of replaced IDs are only masked out. Earlier segment rows of replaced
+        IDs are dropped from the (small) segment.
+        """
+        overlay = index.get('overlay')
+        n_base = overlay.n_base if overlay is not None else len(index['listing_ids'])
+        old_ids = index['listing_ids']
+
+        # Segment rows that survive, in their current order
+        kept = np.array([lid not in replaced for lid in old_ids[n_base:]], dtype=bool)
+        kept_rows = n_base + np.flatnonzero(kept)
+
+        live = np.ones(n_base + len(kept_rows) + len(listing_ids), dtype=bool)
+        live[:n_base] = overlay.live[:n_base] if overlay is not None else True
+        for row, lid in enumerate(old_ids[:n_base]):
+            if lid in replaced:
+                live[row] = False
+
+        def segment(name, values):
+            rows = index.get(name)
+            if rows is None and values is None:
+                return None
+            if isinstance(rows, StackedRows):
+                base, old_segment = rows.base, rows.segment
+            elif rows is not None:
+                base, old_segment = rows, rows[n_base:]
+            else:
+                # Index built before this row array existed
+                base, old_segment = empty_rows(values, n_base), empty_rows(values, len(old_ids) - n_base)
+            if values is None:
+                values = empty_rows(base, len(listing_ids))
+            return StackedRows(base, concatenate_rows([old_segment[kept], values]))
+
+        base_geo = cls.geo_index(index)
+        merged = dict(index)
+        merged.pop('borough_masks', None)
+        merged.pop('geo_index', None)
+        # No longer what is on disk (see update_persisted())
+        merged.pop('source', None)
+        merged['listing_ids'] = list(old_ids[:n_base]) + [old_ids[r] for r in kept_rows] + list(listing_ids)
+        merged['overlay'] = DeltaOverlay(n_base, live, np.concatenate([
+            overlay.embeddings[kept] if overlay is not None else np.empty((0, embeddings.shape[1]), np.float32),
+            np.asarray(embeddings, dtype=np.float32)
+        ]))
+        for name in cls.ROW_ARRAYS:
+            merged[name] = segment(name, row_arrays.get(name))
+
+        # The grid keeps covering the base rows; segment rows are tested directly
+        if base_geo is not None:
+            merged['geo_index'] = base_geo.extended(merged['coordinates'])
+        cls.geo_index(merged)
+
+        return merged
+
+    @classmethod
+    def compact(cls, index: Dict) -> Dict:
+        """
+        Fold the overlay into plain base arrays (the index as save_index() writes it)
+
+        Copies every array and re-quantizes, so it only runs when an index
+        is written in full - never on the serving path.
+        """
+        overlay = index.get('overlay')
+        if overlay is None:
+            return index
+
+        live = overlay.live
+        embeddings = np.concatenate([np.asarray(index['embeddings'], dtype=np.float32), overlay.embeddings])
+
+        compacted = dict(index)
+        compacted.pop('overlay')
+        compacted.pop('borough_masks', None)
+        compacted.pop('geo_index', None)
+        compacted.pop('source', None)
+        compacted['listing_ids'] = [lid for lid, keep in zip(index['listing_ids'], live) if keep]
+        compacted['embeddings'] = embeddings[live]
+        for name in cls.ROW_ARRAYS:
+            if index.get(name) is not None:
+                compacted[name] = index[name][live]
+
+        if index.get('vector_index') is not None:
+            segment_rows = np.arange(overlay.n_base, len(live))
+            compacted['vector_index'] = index['vector_index'].updated(embeddings, segment_rows).compacted(
+                compacted['embeddings'], live
+            )
+        if index.get('quantized') is not None:
+            compacted['quantized'] = QuantizedEmbeddings.quantize(compacted['embeddings'], index['quantized'].mode)
+        cls.geo_index(compacted)
+
+        return compacted
+
+    @staticmethod
+    def _delta_of(index: Dict) -> Dict:
+        return index.get('delta') or {'upserted': set(), 'deleted': set()}
+
+    def needs_compaction(self, index: Dict) -> bool:
+        """True when the delta segment is large enough to fold into the base index"""
+        delta = self._delta_of(index)
+        n_changed = len(delta['upserted']) + len(delta['deleted'])
+        return n_changed >= max(self.COMPACTION_MIN_ROWS, self.COMPACTION_RATIO * self.n_listings(index))
+
+    def save_incremental(self, index: Dict, dirpath: str = DEFAULT_INDEX_PATH) -> str:
+        """
+        Persist an upserted/deleted index
+
+        Writes only the delta segment (changed rows + deleted IDs) next to the
+        base index, or compacts everything into a fresh base index when the
+        delta has grown past the compaction threshold.
+
+        Returns:
+            'delta' or 'compacted'
+        """
+        if not index_store.is_index_dir(dirpath) or self.needs_compaction(index):
+            self.save_index(index, dirpath)
+            index['delta'] = None
+            return 'compacted'
+
+        delta = self._delta_of(index)
+        id_to_row = self.live_rows(index)
+        rows = np.array([id_to_row[lid] for lid in sorted(delta['upserted'])], dtype=np.int64)
+
+        arrays = {
+            'listing_ids': index_store.encode_ids([index['listing_ids'][r] for r in rows]),
+            'embeddings': self.row_embeddings(index, rows),
+            'deleted_ids': index_store.encode_ids(sorted(delta['deleted']))
+        }
+        arrays.update(self._stored_row_arrays({name: index[name][rows] for name in self.ROW_ARRAYS
+                                               if index.get(name) is not None}))
+
+        # Write-then-rename so readers never see a partial delta
+        delta_path = os.path.join(dirpath, self.DELTA_FILE)
+        tmp_path = f"{delta_path}.tmp-{os.getpid()}.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, delta_path)
+
+        print(f"💾 Saved delta segment: {len(rows)} upserted, {len(delta['deleted'])} deleted")
+        return 'delta'
+
+    def update_persisted(self, root: str, index: Dict, update_fn: Callable[[Dict], Dict],
+                         keep: int = index_versions.KEEP_VERSIONS) -> Tuple[Dict, Optional[str]]:
+        """
+        Apply update_fn to the index persisted under root and write the result
+
+        The delta segment is rewritten from the in-memory index, so the index
+        passed in must be what root currently holds: when another worker saved
+        an upsert or published a version since it was loaded, the current
+        version (with its delta) is reloaded first and update_fn applied to
+        that. Callers serialize writers to root (RebuildJobRunner.hold()),
+        otherwise two updates can still overwrite each other.
+
+        Args:
+            root: Index root (see index_versions)
+            index: The caller's in-memory index (reused when it is still current)
+            update_fn: Returns the updated index (its input when nothing changed)
+            keep: Older versions kept when the update is compacted into a new version
+
+        Returns:
+            Tuple of (index to serve, 'delta' / 'compacted', or None when nothing changed)
+        """
+        path = index_versions.resolve(root)
+        if index_versions.is_versioned_root(root) and index.get('source') != index_versions.path_signature(path):
+            print("🔄 Index changed on disk since it was loaded, reloading before the update")
+            index = self.load_index(path)
+
+        new_index = update_fn(index)
+        if new_index is index:
+            return index, None
+
+        # Large changes (or a pre-versioning index): compacted into a new version
+        if self.needs_compaction(new_index) or not index_versions.is_versioned_root(root):
+            return self.publish_version(root, new_index, keep), 'compacted'
+
+        persisted = self.save_incremental(new_index, path)
+        new_index['source'] = index_versions.path_signature(path)
+        return new_index, persisted
+
+    def publish_version(self, root: str, index: Dict,
+                        keep: int = index_versions.KEEP_VERSIONS) -> Dict:
+        """
+        Write index as a new version of root and make it current
+
+        Returns:
+            The index as written (overlay folded in, no pending delta), ready to serve
+        """
+        # Serve exactly what was written: plain (memory-mappable) arrays, no overlay
+        index = self.compact(index)
+        path = index_versions.write_version(root, lambda version_dir: self.save_index(index, version_dir), keep=keep)
+        index['delta'] = None
+        index['source'] = index_versions.path_signature(path)
+        return index
+
+    @classmethod
+    def _apply_delta(cls, index: Dict, delta: Dict[str, np.ndarray]) -> Dict:
+        """Replay a delta segment (arrays of delta.npz) on top of a freshly loaded base index"""
+        listing_ids = index_store.decode_ids(delta['listing_ids'])
+
+        if len(listing_ids):
+            index = cls._merge_rows(index, listing_ids, delta['embeddings'], cls._loaded_row_arrays(delta))
+
+        index, _ = cls._drop_rows(index, index_store.decode_ids(delta['deleted_ids']))
+
+        print(f"🔁 Applied delta segment ({len(listing_ids)} upserted)")
+        return index
+
+    @staticmethod
+    def quantize_index(index: Dict, mode: str = 'int8') -> Dict:
+        """
+        Add a scalar-quantized copy of the embeddings for cheaper scans
+
+        Args:
+            index: Output from build_index() or load_index()
+            mode: 'float16' or 'int8' (per-dimension scale and offset)
+
+        Returns:
+            The same index dict with 'quantized' set
+        """
+        quantized = QuantizedEmbeddings.quantize(index['embeddings'], mode)
+        index['quantized'] = quantized
+
+        saved_mb = (np.asarray(index['embeddings']).nbytes - quantized.nbytes) / (1024 * 1024)
+        print(f"🗜️  Quantized embeddings to {mode} ({saved_mb:.2f} MB smaller than float32)\n")
+
+        return index
+
+    @staticmethod
+    def build_vector_index(index: Dict, n_lists: Optional[int] = None) -> Dict:
+        """
+        Train an IVF approximate nearest-neighbour index over the embeddings
+
+        Args:
+            index: Output from build_index() or load_index()
+            n_lists: Number of IVF lists (default: ~sqrt(n_listings))
+
+        Returns:
+            The same index dict with 'vector_index' set
+        """
+        print(f"🧭 Training IVF vector index over {len(index['listing_ids'])} embeddings...")
+
+        index['vector_index'] = IVFFlatIndex.train(index['embeddings'], n_lists=n_lists)
+
+        print(f"✅ Vector index ready ({index['vector_index'].n_lists} lists)\n")
+
+        return index
+
+    def save_index(self, index: Dict, filepath: str = DEFAULT_INDEX_PATH):
+        """
+        Save embedding index to disk
+
+        A path ending in .npz writes the legacy compressed file (plus a
+        .ivf.npz vector index sidecar); any other path writes the
+        memory-mappable index directory (see index_store.py).
+
+        Args:
+            index: Output from build_index()
+            filepath: Where to save (default: listing_embeddings/)
+        """
+        print(f"💾 Saving embedding index to {filepath}...")
+
+        index = self.compact(index)
+        arrays = self._index_arrays(index)
+
+        if filepath.endswith('.npz'):
+            vector_arrays = {k: arrays.pop(k) for k in list(arrays) if k.startswith('ivf_')}
+            np.savez_compressed(filepath, **arrays)
+
+            # Vector index lives next to the embeddings (e.g. listing_embeddings.ivf.npz)
+            if vector_arrays:
+                np.savez(IVFFlatIndex.sidecar_path(filepath), **vector_arrays)
+        else:
+            index_store.save_index_dir(filepath, arrays)
+
+        print(f"✅ Index saved successfully ({len(index['listing_ids'])} listings)\n")
+
+    @staticmethod
+    def load_index(filepath: str = DEFAULT_INDEX_PATH, mmap: bool = True) -> Dict:
+        """
+        Load embedding index from disk
+
+        Args:
+            filepath: Index directory or legacy .npz file
+            mmap: Memory-map the arrays of an index directory (zero-copy,
+                  shared between worker processes through the page cache)
+
+        Returns:
+            Dictionary with listing_ids, embeddings and vector_index
+            (None when no vector index was saved with the embeddings), plus
+            source: the index_versions.path_signature() of what was loaded
+        """
+        print(f"📂 Loading embedding index from {filepath}...")
+
+        # Taken before reading: a write during the load shows up as a change later
+        source = index_versions.path_signature(filepath)
+
+        delta = None
+        if index_store.is_index_dir(filepath):
+            # Base arrays and delta segment of the same directory, even if it is being replaced
+            arrays, delta = index_store.read_dir(filepath, lambda path: (
+                index_store.load_index_dir(path, mmap=mmap)[0], EmbeddingIndexBuilder._read_delta(path)
+            ))
+        else:
+            arrays = dict(np.load(filepath, allow_pickle=True))
+
+            vector_index_path = IVFFlatIndex.sidecar_path(filepath)
+            if os.path.exists(vector_index_path):
+                arrays.update(np.load(vector_index_path))
+
+        index = EmbeddingIndexBuilder._index_from_arrays(arrays)
+
+        if delta is not None:
+            index = EmbeddingIndexBuilder._apply_delta(index, delta)
+
+        # Grid buckets are cheap to rebuild, so they are not persisted
+        EmbeddingIndexBuilder.geo_index(index)
+        index['source'] = source
+
+        print(f"✅ Loaded {EmbeddingIndexBuilder.n_listings(index)} listings\n")
+
+        return index
+
+    @staticmethod
+    def _read_delta(dirpath: str) -> Optional[Dict[str, np.ndarray]]:
+        """Arrays of the directory's delta segment (None if it has none)"""
+        try:
+            with np.load(os.path.join(dirpath, EmbeddingIndexBuilder.DELTA_FILE)) as delta:
+                return dict(delta)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def convert_index(npz_path: str, dirpath: str = DEFAULT_INDEX_PATH) -> Dict:
+        """
+        Convert a legacy .npz index into the memory-mapped directory format
+
+        Returns:
+            Manifest of the written index
+        """
+        return index_store.convert_npz(npz_path, dirpath)
+
+    @staticmethod
+    def _index_arrays(index: Dict) -> Dict[str, np.ndarray]:
+        """Flatten an index dict into the named arrays that get persisted"""
+        arrays = {
+            'listing_ids': index_store.encode_ids(index['listing_ids']),
+            'embeddings': np.asarray(index['embeddings'], dtype=np.float32)
+        }
+
+        if index.get('vector_index') is not None:
+            arrays.update(index['vector_index'].to_arrays())
+
+        if index.get('quantized') is not None:
+            arrays.update(index['quantized'].to_arrays())
+
+        arrays.update(EmbeddingIndexBuilder._stored_row_arrays(index))
+
+        return arrays
+
+    @staticmethod
+    def _stored_row_arrays(row_arrays: Dict) -> Dict[str, np.ndarray]:
+        """Row arrays as named persisted arrays (the metadata table is stored as two)"""
+        arrays = {}
+        for name in EmbeddingIndexBuilder.ROW_ARRAYS:
+            values = row_arrays.get(name)
+            if isinstance(values, MetadataTable):
+                arrays.update(values.to_arrays())
+            elif values is not None:
+                arrays[name] = np.asarray(values)
+        return arrays
+
+    @staticmethod
+    def _loaded_row_arrays(arrays) -> Dict:
+        """Inverse of _stored_row_arrays() (None for row arrays that were not saved)"""
+        row_arrays = {name: arrays[name] if name in arrays else None for name in EmbeddingIndexBuilder.ROW_ARRAYS}
+
+        if MetadataTable.has_arrays(arrays):
+            row_arrays['listing_metadata'] = MetadataTable.from_arrays(arrays)
+        elif row_arrays['listing_metadata'] is not None:
+            # Fixed-width byte table written before MetadataTable
+            row_arrays['listing_metadata'] = MetadataTable.from_fixed_width(row_arrays['listing_metadata'])
+
+        return row_arrays
+
+    @staticmethod
+    def _index_from_arrays(arrays: Dict[str, np.ndarray]) -> Dict:
+        """Inverse of _index_arrays()"""
+        index = {
+            'listing_ids': index_store.decode_ids(arrays['listing_ids']),
+            'embeddings': arrays['embeddings'],
+            'vector_index': None,
+            'quantized': None
+        }
+
+        if QuantizedEmbeddings.has_arrays(arrays):
+            index['quantized'] = QuantizedEmbeddings.from_arrays(arrays)
+
+        index.update(EmbeddingIndexBuilder._loaded_row_arrays(arrays))
+
+        if IVFFlatIndex.has_arrays(arrays):
+            try:
+                index['vector_index'] = IVFFlatIndex.from_arrays(arrays, index['embeddings'])
+            except ValueError as e:
+                # Stale vector index from an older build - fall back to exact search
+                print(f"⚠️  Ignoring vector index: {e}")
+
+        return index
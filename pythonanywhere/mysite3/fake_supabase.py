@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Fake Supabase Client
+In-process stand-in for the supabase-py query builder, serving a synthetic
+listing table for offline benchmarks and tests
+
+Supports the subset of the PostgREST builder this app uses:
+    client.table(name).select(cols, count='exact')
+          .eq / .neq / .gt / .gte / .lt / .lte / .in_
+          .order(col, desc=False) .limit(n) .range(start, end) .single()
+          .execute()  → response with .data and .count
+
+Column names may be written with or without the double quotes PostgREST
+needs for names containing spaces; rows come back with unquoted keys,
+as from the real API.
+"""
+
+import time
+import bisect
+import numpy as np
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+# zat_geo_borough_toplevel rows
+BOROUGHS = [
+    {'_id': 'borough-manhattan', 'Display Borough': 'Manhattan'},
+    {'_id': 'borough-brooklyn', 'Display Borough': 'Brooklyn'},
+    {'_id': 'borough-queens', 'Display Borough': 'Queens'},
+    {'_id': 'borough-bronx', 'Display Borough': 'Bronx'},
+    {'_id': 'borough-staten-island', 'Display Borough': 'Staten Island'}
+]
+
+# Neighborhoods (with approximate center) per borough
+HOODS = {
+    'borough-manhattan': [('Harlem', 40.811, -73.946), ('Chelsea', 40.746, -74.001),
+                          ('East Village', 40.726, -73.982), ('Financial District', 40.707, -74.011)],
+    'borough-brooklyn': [('Williamsburg', 40.708, -73.957), ('Park Slope', 40.671, -73.981),
+                         ('Bushwick', 40.694, -73.921), ('Bed-Stuy', 40.687, -73.942)],
+    'borough-queens': [('Astoria', 40.764, -73.923), ('Long Island City', 40.745, -73.949),
+                       ('Flushing', 40.767, -73.833)],
+    'borough-bronx': [('Mott Haven', 40.809, -73.923), ('Fordham', 40.861, -73.890)],
+    'borough-staten-island': [('St. George', 40.643, -74.077)]
+}
+
+CITY = {
+    'borough-manhattan': 'New York', 'borough-brooklyn': 'Brooklyn', 'borough-queens': 'Queens',
+    'borough-bronx': 'Bronx', 'borough-staten-island': 'Staten Island'
+}
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Typical availability patterns (weekday stays, weekends, full week, ...)
+DAY_PATTERNS = [DAYS[:4], DAYS[:5], DAYS[4:], DAYS[5:], DAYS, DAYS[1:4], [DAYS[0], DAYS[2], DAYS[4]]]
+
+SPACE_TYPES = ['Private Room', 'Entire Place', 'Shared Room']
+KITCHEN_TYPES = ['Full Kitchen', 'Kitchenette', 'No Kitchen']
+RENTAL_TYPES = ['Nightly', 'Weekly', 'Monthly']
+
+PHRASES = [
+    'Bright furnished room with large windows.', 'Quiet block, two minutes from the subway.',
+    'Great for weekday commuters.', 'Fast wifi and a dedicated desk.', 'Laundry in the building.',
+    'Pet friendly, cats welcome.', 'Close to parks and cafes.', 'Newly renovated bathroom.',
+    'Rooftop access with skyline views.', 'Perfect for medical residents and students.',
+    'Flexible check-in times.', 'Walking distance to restaurants and nightlife.'
+]
+
+
+def _strip_quotes(column: str) -> str:
+    return column.strip().strip('"')
+
+
+class SyntheticListingTable:
+    """
+    Deterministic listing table of any size, generated on access
+
+    Rows are drawn in blocks of BLOCK_SIZE from a per-block seed, so a
+    1M-row table costs no memory until rows are read and every run sees
+    the same data. _ids sort in row order, which makes keyset pagination
+    (order by _id, _id > last) a direct jump instead of a scan.
+    """
+
+    BLOCK_SIZE = 1024
+
+    def __init__(self, n_listings: int, seed: int = 0):
+        self.n_listings = int(n_listings)
+        self.seed = int(seed)
+        self._block_cache = {}
+
+    def __len__(self) -> int:
+        return self.n_listings
+
+    def listing_id(self, i: int) -> str:
+        return f"bench{i:08d}x{self.seed}"
+
+    def position(self, listing_id: str) -> Optional[int]:
+        """Row number of a listing id (None if it is not in the table)"""
+        if not (listing_id.startswith('bench') and listing_id.endswith(f"x{self.seed}")):
+            return None
+        try:
+            i = int(listing_id[5:13])
+        except ValueError:
+            return None
+        return i if 0 <= i < self.n_listings and self.listing_id(i) == listing_id else None
+
+    def first_after(self, listing_id: str) -> int:
+        """First row whose _id sorts after listing_id"""
+        lo, hi = 0, self.n_listings
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.listing_id(mid) <= listing_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _block(self, block: int) -> Dict[str, np.ndarray]:
+        """Random attributes of rows block*BLOCK_SIZE … (block+1)*BLOCK_SIZE-1"""
+        cached = self._block_cache.get(block)
+        if cached is not None:
+            return cached
+
+        n = self.BLOCK_SIZE
+        rng = np.random.default_rng((self.seed, block))
+        attributes = {
+            'borough': rng.integers(len(BOROUGHS), size=n),
+            'hood': rng.integers(1 << 30, size=n),
+            'space': rng.integers(len(SPACE_TYPES), size=n),
+            'kitchen': rng.integers(len(KITCHEN_TYPES), size=n),
+            'rental': rng.integers(len(RENTAL_TYPES), size=n),
+            'bedrooms': rng.integers(0, 4, size=n),
+            'bathrooms': rng.integers(1, 3, size=n),
+            'guests': rng.integers(1, 5, size=n),
+            'sqft': rng.integers(150, 1400, size=n),
+            'price': rng.integers(55, 400, size=n),
+            'min_nights': rng.choice([1, 2, 3, 7, 30], size=n),
+            'max_nights': rng.choice([30, 90, 180, 365], size=n),
+            'days': rng.integers(len(DAY_PATTERNS), size=n),
+            'phrases': np.argsort(rng.random((n, len(PHRASES))), axis=1)[:, :5],
+            'n_phrases': rng.integers(2, 6, size=n),
+            'street': rng.integers(1, 999, size=n),
+            'jitter': rng.normal(0, 0.008, size=(n, 2)),
+            'active': rng.random(n) < 0.85
+        }
+
+        # One block per pagination page is enough to keep sequential reads cheap
+        if len(self._block_cache) >= 4:
+            self._block_cache.pop(next(iter(self._block_cache)))
+        self._block_cache[block] = attributes
+        return attributes
+
+    def row(self, i: int) -> Dict:
+        a = self._block(i // self.BLOCK_SIZE)
+        j = i % self.BLOCK_SIZE
+
+        borough = BOROUGHS[a['borough'][j]]['_id']
+        hoods = HOODS[borough]
+        hood, lat, lng = hoods[a['hood'][j] % len(hoods)]
+        city = CITY[borough]
+        space = SPACE_TYPES[a['space'][j]]
+        bedrooms = int(a['bedrooms'][j])
+        days = DAY_PATTERNS[a['days'][j]]
+
+        return {
+            '_id': self.listing_id(i),
+            'Name': f"{space} in {hood}" + (f", {bedrooms} bedrooms" if bedrooms > 1 else ''),
+            'Description': ' '.join(PHRASES[p] for p in a['phrases'][j][:a['n_phrases'][j]]),
+            'Description - Neighborhood': f"{hood} is a lively part of {city}.",
+            'Location - Hood': hood,
+            'Location - City': city,
+            'Features - Type of Space': space,
+            'Kitchen Type': KITCHEN_TYPES[a['kitchen'][j]],
+            'rental type': RENTAL_TYPES[a['rental'][j]],
+            'Location - Address': {
+                'lat': round(lat + float(a['jitter'][j, 0]), 6),
+                'lng': round(lng + float(a['jitter'][j, 1]), 6),
+                'address': f"{a['street'][j]} Example St, {city}, NY"
+            },
+            'Price number (for map)': int(a['price'][j]),
+            'Features - Qty Bedrooms': bedrooms,
+            'Features - Qty Bathrooms': int(a['bathrooms'][j]),
+            'Features - Qty Guests': int(a['guests'][j]),
+            'Features - SQFT Area': int(a['sqft'][j]),
+            'Minimum Nights': int(a['min_nights'][j]),
+            'Maximum Nights': int(a['max_nights'][j]),
+            'Days Available (List of Days)': list(days),
+            'Nights Available (numbers)': [DAYS.index(d) for d in days],
+            'Location - Borough': borough,
+            'Active': bool(a['active'][j]),
+            'Modified Date': f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:00"
+        }
+
+    def scan(self, start: int = 0) -> Iterator[Dict]:
+        for i in range(start, self.n_listings):
+            yield self.row(i)
+
+
+class StaticTable:
+    """A table backed by a list of row dicts (kept sorted by _id when rows have one)"""
+
+    def __init__(self, rows: List[Dict]):
+        self.rows = sorted(rows, key=lambda r: r.get('_id', '')) if rows and '_id' in rows[0] else list(rows)
+        self._ids = [r.get('_id') for r in self.rows]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def position(self, listing_id: str) -> Optional[int]:
+        i = bisect.bisect_left(self._ids, listing_id) if self._ids and self._ids[0] is not None else None
+        if i is not None and i < len(self._ids) and self._ids[i] == listing_id:
+            return i
+        return None
+
+    def first_after(self, listing_id: str) -> int:
+        return bisect.bisect_right(self._ids, listing_id)
+
+    def row(self, i: int) -> Dict:
+        return self.rows[i]
+
+    def scan(self, start: int = 0) -> Iterator[Dict]:
+        return iter(self.rows[start:])
+
+
+class FakeResponse:
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+_OPERATORS: Dict[str, Callable] = {
+    'eq': lambda value, arg: value == arg,
+    'neq': lambda value, arg: value != arg,
+    'gt': lambda value, arg: value is not None and value > arg,
+    'gte': lambda value, arg: value is not None and value >= arg,
+    'lt': lambda value, arg: value is not None and value < arg,
+    'lte': lambda value, arg: value is not None and value <= arg,
+    'in': lambda value, arg: value in arg
+}
+
+
+class FakeQuery:
+    """Chainable query over one table (mirrors the postgrest-py request builder)"""
+
+    def __init__(self, client: 'FakeSupabaseClient', table):
+        self.client = client
+        self.table = table
+        self.columns = None
+        self.count_mode = None
+        self.filters = []
+        self.order_column = None
+        self.descending = False
+        self.offset = 0
+        self.row_limit = None
+        self.single_row = False
+
+    def select(self, columns: str = '*', count: Optional[str] = None) -> 'FakeQuery':
+        if columns.strip() != '*':
+            self.columns = [_strip_quotes(c) for c in columns.split(',') if c.strip()]
+        self.count_mode = count
+        return self
+
+    def _filter(self, op: str, column: str, arg) -> 'FakeQuery':
+        self.filters.append((_strip_quotes(column), op, arg))
+        return self
+
+    def eq(self, column, value):
+        return self._filter('eq', column, value)
+
+    def neq(self, column, value):
+        return self._filter('neq', column, value)
+
+    def gt(self, column, value):
+        return self._filter('gt', column, value)
+
+    def gte(self, column, value):
+        return self._filter('gte', column, value)
+
+    def lt(self, column, value):
+        return self._filter('lt', column, value)
+
+    def lte(self, column, value):
+        return self._filter('lte', column, value)
+
+    def in_(self, column, values):
+        return self._filter('in', column, set(values))
+
+    def order(self, column: str, desc: bool = False) -> 'FakeQuery':
+        self.order_column = _strip_quotes(column)
+        self.descending = desc
+        return self
+
+    def limit(self, n: int) -> 'FakeQuery':
+        self.row_limit = int(n)
+        return self
+
+    def range(self, start: int, end: int) -> 'FakeQuery':
+        self.offset = int(start)
+        self.row_limit = int(end) - int(start) + 1
+        return self
+
+    def single(self) -> 'FakeQuery':
+        self.single_row = True
+        return self
+
+    def _candidates(self) -> Iterator[Dict]:
+        """Rows that can match, using the _id filters to avoid full scans"""
+        for column, op, arg in self.filters:
+            if column == '_id' and op in ('eq', 'in'):
+                ids = sorted([arg] if op == 'eq' else arg)
+                positions = (self.table.position(i) for i in ids)
+                return (self.table.row(p) for p in positions if p is not None)
+
+        start = 0
+        if self.order_column in (None, '_id') and not self.descending:
+            for column, op, arg in self.filters:
+                if column == '_id' and op == 'gt':
+                    start = max(start, self.table.first_after(arg))
+        return self.table.scan(start)
+
+    def _matches(self, row: Dict) -> bool:
+        return all(_OPERATORS[op](row.get(column), arg) for column, op, arg in self.filters)
+
+    def _project(self, row: Dict) -> Dict:
+        if self.columns is None:
+            return dict(row)
+        return {c: row.get(c) for c in self.columns}
+
+    def execute(self) -> FakeResponse:
+        self.client.requests += 1
+        if self.client.latency_ms:
+            time.sleep(self.client.latency_ms / 1000)
+
+        # Rows come out in _id order; only another order column needs a full sort
+        rows = (row for row in self._candidates() if self._matches(row))
+        if (self.order_column not in (None, '_id')) or self.descending:
+            rows = iter(sorted(rows, key=lambda r: r.get(self.order_column or '_id'),
+                               reverse=self.descending))
+
+        count = None
+        if self.count_mode:
+            rows = list(rows)
+            count = len(rows)
+
+        data = []
+        for i, row in enumerate(rows):
+            if i < self.offset:
+                continue
+            if self.row_limit is not None and len(data) >= self.row_limit:
+                break
+            data.append(self._project(row))
+
+        if self.single_row:
+            if len(data) != 1:
+                raise ValueError(f"single() expected 1 row, got {len(data)}")
+            data = data[0]
+
+        return FakeResponse(data, count)
+
+
+class FakeSupabaseClient:
+    """
+    Drop-in for supabase.Client in offline runs
+
+    Args:
+        tables: Table name → SyntheticListingTable, StaticTable or list of rows
+        latency_ms: Simulated network round trip added to every execute()
+    """
+
+    def __init__(self, tables: Optional[Dict] = None, latency_ms: float = 0.0):
+        self.tables = {}
+        for name, table in (tables or {}).items():
+            self.tables[name] = StaticTable(table) if isinstance(table, list) else table
+        self.latency_ms = latency_ms
+        self.requests = 0
+
+    def table(self, name: str) -> FakeQuery:
+        if name not in self.tables:
+            raise KeyError(f"Fake Supabase has no table {name!r}")
+        return FakeQuery(self, self.tables[name])
+
+
+def make_fake_supabase(n_listings: int, seed: int = 0, latency_ms: float = 0.0) -> FakeSupabaseClient:
+    """Fake client with a synthetic `listing` table and the borough table"""
+    return FakeSupabaseClient({
+        'listing': SyntheticListingTable(n_listings, seed),
+        'zat_geo_borough_toplevel': list(BOROUGHS)
+    }, latency_ms=latency_ms)
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    print("=== Fake Supabase Testing ===\n")
+
+    client = make_fake_supabase(2500)
+
+    count = client.table('listing').select('_id', count='exact').limit(1).execute().count
+    print(f"Listings: {count}")
+
+    # Keyset pagination, as ListingPreprocessor.iter_listing_pages does it
+    pages, last_id, seen = 0, None, 0
+    while True:
+        query = client.table('listing').select('_id, "Location - Borough"')
+        if last_id is not None:
+            query = query.gt('_id', last_id)
+        rows = query.order('_id').limit(1000).execute().data
+        if not rows:
+            break
+        pages, seen, last_id = pages + 1, seen + len(rows), rows[-1]['_id']
+        if len(rows) < 1000:
+            break
+    print(f"Paginated: {seen} rows in {pages} pages")
+
+    listing_id = client.tables['listing'].listing_id(42)
+    row = client.table('listing').select('*').eq('_id', listing_id).single().execute().data
+    print(f"Row 42: {row['Name']} ({row['Location - City']}, ${row['Price number (for map)']})")
+
+    brooklyn = client.table('listing').select('_id').eq('"Location - Borough"', 'borough-brooklyn').execute().data
+    print(f"Brooklyn listings: {len(brooklyn)}")
+    print(f"Boroughs: {[b['Display Borough'] for b in client.table('zat_geo_borough_toplevel').select('*').execute().data]}")
+
+    assert row == client.tables['listing'].row(42), 'rows must be deterministic'
+    print("\n✅ Fake Supabase tests passed!")
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Geospatial Grid Index
+Uniform lat/lng grid over listing coordinates for radius pre-filtering
+
+A radius query only looks at the listings in the grid cells overlapping
+the circle's bounding box, then keeps those within the radius with one
+vectorized great-circle test - instead of computing distances to every listing.
+"""
+
+import copy
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = np.pi * EARTH_RADIUS_KM / 180
+
+# Cell edge; query radii are 2-8 km, so a circle covers tens of cells
+DEFAULT_CELL_KM = 1.0
+
+# Cell (i, j) → one int64 key; indices are shifted to be non-negative
+_KEY_OFFSET = 1 << 24
+_KEY_STRIDE = 1 << 25
+
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distance (km) from one point to arrays of points"""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def unit_vectors(lats, lngs) -> np.ndarray:
+    """(n, 3) float64 points on the unit sphere (NaN rows stay NaN)"""
+    lat, lng = np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lngs, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+
+def listing_coordinates(raw_listing: Optional[Dict]) -> Tuple[float, float]:
+    """(lat, lng) of a listing row's "Location - Address", NaN when missing/unparseable"""
+    address = (raw_listing or {}).get('Location - Address')
+    if isinstance(address, dict):
+        try:
+            lat, lng = float(address['lat']), float(address['lng'])
+            if -90 <= lat <= 90 and -180 <= lng <= 180 and (lat, lng) != (0.0, 0.0):
+                return lat, lng
+        except (KeyError, TypeError, ValueError):
+            pass
+    return np.nan, np.nan
+
+
+class GeoGridIndex:
+    """
+    Index rows bucketed by grid cell (CSR layout, like IVFFlatIndex lists)
+
+    Rows are kept within the radius when the dot product of their unit
+    vectors with the query point is >= cos(radius / R): the same great-circle
+    criterion as haversine_km() <= radius, at three multiply-adds per row.
+
+    Cells are square in degrees (cell_km of latitude per side), so they are
+    narrower in km away from the equator. Rows without coordinates are in
+    no cell and never match. Longitudes do not wrap at ±180°.
+    """
+
+    # Above this share of listings in the candidate cells, scan every row instead
+    FULL_SCAN_FRACTION = 0.5
+
+    def __init__(self, coordinates: np.ndarray, cell_deg: float,
+                 cell_keys: np.ndarray, cell_offsets: np.ndarray, cell_rows: np.ndarray):
+        """
+        Args:
+            coordinates: (n_listings, 2) lat/lng per index row (NaN if unknown)
+            cell_deg: Cell edge in degrees
+            cell_keys: (n_cells,) sorted keys of the occupied cells
+            cell_offsets: (n_cells + 1,) start of each cell in cell_rows
+            cell_rows: (n_located,) index rows grouped by cell
+        """
+        self.coordinates = coordinates
+        self.cell_deg = float(cell_deg)
+        self.cell_keys = cell_keys
+        self.cell_offsets = cell_offsets
+        self.cell_rows = cell_rows
+        # Unit vectors in cell_rows order, so a cell's points are contiguous
+        located = coordinates[cell_rows]
+        self.cell_points = unit_vectors(located[:, 0], located[:, 1])
+
+        # Rows from n_gridded on were appended by extended() and are tested directly
+        self.n_gridded = len(coordinates)
+        self.tail_points = np.zeros((0, 3))
+
+    @classmethod
+    def build(cls, coordinates: np.ndarray, cell_km: float = DEFAULT_CELL_KM) -> 'GeoGridIndex':
+        """
+        Bucket every row with coordinates into its grid cell
+
+        Args:
+            coordinates: (n_listings, 2) lat/lng per index row (NaN if unknown)
+            cell_km: Cell edge in km
+
+        Returns:
+            GeoGridIndex
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float32).reshape(-1, 2)
+        cell_deg = cell_km / KM_PER_DEGREE_LAT
+
+        rows = np.flatnonzero(~np.isnan(coordinates).any(axis=1))
+        keys = cls._keys(*cls._cells(coordinates[rows, 0], coordinates[rows, 1], cell_deg))
+
+        order = np.argsort(keys, kind='stable')
+        cell_keys, starts = np.unique(keys[order], return_index=True)
+        cell_offsets = np.append(starts, len(rows)).astype(np.int64)
+
+        return cls(coordinates, cell_deg, cell_keys, cell_offsets, rows[order].astype(np.int64))
+
+    def extended(self, coordinates) -> 'GeoGridIndex':
+        """
+        Same grid over the first n_gridded rows, plus the rows appended after them
+
+        Used for the upserted rows of an index overlay: they are few, so
+        every query tests them directly instead of re-bucketing all rows.
+
+        Args:
+            coordinates: (n_gridded + n_appended, 2) lat/lng of every row
+        """
+        extended = copy.copy(self)
+        extended.coordinates = coordinates
+        appended = np.asarray(coordinates[self.n_gridded:], dtype=np.float32).reshape(-1, 2)
+        extended.tail_points = unit_vectors(appended[:, 0], appended[:, 1])
+        return extended
+
+    @staticmethod
+    def _cells(lats, lngs, cell_deg: float) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.floor(np.asarray(lats, dtype=np.float64) / cell_deg).astype(np.int64),
+                np.floor(np.asarray(lngs, dtype=np.float64) / cell_deg).astype(np.int64))
+
+    @staticmethod
+    def _keys(i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        return (i + _KEY_OFFSET) * _KEY_STRIDE + (j + _KEY_OFFSET)
+
+    @property
+    def n_listings(self) -> int:
+        return len(self.coordinates)
+
+    def _box_cells(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Positions (in cell_keys) of the occupied cells overlapping the circle's bounding box"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlng = dlat / max(np.cos(np.radians(lat)), 1e-6)
+        (i0, i1), (j0, j1) = self._cells([lat - dlat, lat + dlat], [lng - dlng, lng + dlng], self.cell_deg)
+
+        n_box = (i1 - i0 + 1) * (j1 - j0 + 1)
+        if n_box <= len(self.cell_keys):
+            # Small box: look up each of its cells
+            ii, jj = np.meshgrid(np.arange(i0, i1 + 1), np.arange(j0, j1 + 1), indexing='ij')
+            keys = self._keys(ii.ravel(), jj.ravel())
+            pos = np.searchsorted(self.cell_keys, keys)
+            in_range = pos < len(self.cell_keys)
+            pos, keys = pos[in_range], keys[in_range]
+            cells = pos[self.cell_keys[pos] == keys]
+        else:
+            # Huge radius: test the occupied cells instead
+            ci = self.cell_keys // _KEY_STRIDE - _KEY_OFFSET
+            cj = self.cell_keys % _KEY_STRIDE - _KEY_OFFSET
+            cells = np.flatnonzero((ci >= i0) & (ci <= i1) & (cj >= j0) & (cj <= j1))
+        return cells
+
+    def candidate_rows(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Rows in the cells overlapping the circle's bounding box, plus appended rows (unsorted)"""
+        gridded = self.cell_rows[self._positions(self._box_cells(lat, lng, radius_km))]
+        return np.concatenate([gridded, np.arange(self.n_gridded, self.n_gridded + len(self.tail_points))])
+
+    def _positions(self, cells: np.ndarray) -> np.ndarray:
+        """Positions in cell_rows of the given cells' rows (no Python loop over cells)"""
+        starts = self.cell_offsets[cells]
+        lengths = self.cell_offsets[cells + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(0, dtype=np.int64)
+        return np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+
+    def _within(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Rows within radius_km of (lat, lng), in cell order (appended rows last)"""
+        query = unit_vectors([lat], [lng])[0]
+        min_cos = np.cos(min(radius_km / EARTH_RADIUS_KM, np.pi))
+        rows = self._gridded_within(query, min_cos, lat, lng, radius_km)
+
+        if len(self.tail_points):
+            rows = np.concatenate([rows, self.n_gridded + np.flatnonzero(self.tail_points @ query >= min_cos)])
+        return rows
+
+    def _gridded_within(self, query: np.ndarray, min_cos: float,
+                        lat: float, lng: float, radius_km: float) -> np.ndarray:
+        cells = self._box_cells(lat, lng, radius_km)
+        n_candidates = int((self.cell_offsets[cells + 1] - self.cell_offsets[cells]).sum())
+
+        # Circle covering most listings: one pass over all of them is cheaper than gathering
+        if n_candidates > self.FULL_SCAN_FRACTION * len(self.cell_rows):
+            return self.cell_rows[self.cell_points @ query >= min_cos]
+
+        positions = self._positions(cells)
+        return self.cell_rows[positions[self.cell_points[positions] @ query >= min_cos]]
+
+    def rows_within(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """
+        Index rows within radius_km of (lat, lng)
+
+        Returns:
+            Sorted int64 row numbers
+        """
+        return np.sort(self._within(lat, lng, radius_km))
+
+    def mask_within(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Boolean (n_listings,) mask of the rows within radius_km of (lat, lng)"""
+        mask = np.zeros(self.n_listings, dtype=bool)
+        mask[self._within(lat, lng, radius_km)] = True
+        return mask
+
+    def stats(self) -> Dict:
+        return {
+            'listings': self.n_listings,
+            'located': int(len(self.cell_rows)),
+            'cells': int(len(self.cell_keys)),
+            'appended': int(len(self.tail_points)),
+            'cell_km': round(self.cell_deg * KM_PER_DEGREE_LAT, 3)
+        }
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    import time
+
+    print("=== Geo Grid Index Testing ===\n")
+
+    rng = np.random.default_rng(0)
+    n = 200000
+    coordinates = np.column_stack([
+        rng.normal(40.72, 0.08, n), rng.normal(-73.95, 0.1, n)
+    ]).astype(np.float32)
+    coordinates[::50] = np.nan
+
+    start = time.perf_counter()
+    geo = GeoGridIndex.build(coordinates)
+    print(f"Built over {n} listings in {(time.perf_counter() - start) * 1000:.1f} ms: {geo.stats()}")
+
+    for name, lat, lng, radius in [('williamsburg', 40.7081, -73.9571, 2.0),
+                                   ('brooklyn', 40.6782, -73.9442, 6.0),
+                                   ('everywhere', 40.72, -73.95, 500.0)]:
+        start = time.perf_counter()
+        rows = geo.rows_within(lat, lng, radius)
+        grid_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        brute = np.flatnonzero(haversine_km(lat, lng, coordinates[:, 0].astype(np.float64),
+                                            coordinates[:, 1].astype(np.float64)) <= radius)
+        brute_ms = (time.perf_counter() - start) * 1000
+
+        assert np.array_equal(rows, brute), name
+        print(f"  {name:<13} {radius:>5} km: {len(rows):>6} listings, "
+              f"grid {grid_ms:.2f} ms vs full scan {brute_ms:.2f} ms")
+
+    print("\n✅ Geo grid index tests passed!")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Index Delta Overlay
+Upserted/deleted listings served on top of an unchanged base index
+
+The base arrays (embeddings, quantized copy, IVF lists, row arrays) stay
+exactly as loaded - memory-mapped and shared between workers. Upserted
+rows live in a small in-memory segment appended after the base rows, and
+replaced/deleted base rows are masked out. Searches scan the base with the
+mask and the segment exactly, then merge the two top-k lists.
+
+Row numbers are global: 0..n_base-1 are base rows, n_base.. are segment rows.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+from listing_metadata import MetadataTable
+from ranking import top_k as select_top_k
+
+
+def concatenate_rows(parts: list):
+    """Row-wise concatenation of numpy arrays or MetadataTables"""
+    if isinstance(parts[0], MetadataTable):
+        return MetadataTable.concatenate(parts)
+    return np.concatenate(parts)
+
+
+def empty_rows(like, n_rows: int):
+    """n_rows placeholder rows shaped like `like` (zeros, or empty metadata records)"""
+    if isinstance(like, MetadataTable):
+        return MetadataTable.from_bytes([b''] * n_rows)
+    return np.zeros((n_rows,) + like.shape[1:], dtype=like.dtype)
+
+
+class StackedRows:
+    """
+    Read-only row-wise concatenation of a base array and a small segment
+
+    Gathers (`rows[...]`) read from the two parts without copying the base.
+    Full-column reads (`np.asarray(rows)`, used by the filter masks) build
+    the concatenated array once and keep it. The parts may also be
+    MetadataTables, which support gathers only.
+    """
+
+    def __init__(self, base, segment):
+        self.base = base
+        self.segment = segment
+        self.n_base = len(base)
+        self.shape = (self.n_base + len(segment),) + tuple(base.shape[1:])
+        self._full = None
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def dtype(self):
+        return np.result_type(self.base.dtype, self.segment.dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.base.nbytes + self.segment.nbytes)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, rows):
+        if isinstance(rows, (int, np.integer)):
+            row = int(rows) + (len(self) if rows < 0 else 0)
+            return self.base[row] if row < self.n_base else self.segment[row - self.n_base]
+
+        if isinstance(rows, slice):
+            rows = np.arange(len(self))[rows]
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        rows = rows.astype(np.int64, copy=False)
+        in_base = rows < self.n_base
+
+        if not isinstance(self.base, np.ndarray):
+            # Gather each part, then restore the requested row order
+            gathered = concatenate_rows([self.base[rows[in_base]], self.segment[rows[~in_base] - self.n_base]])
+            return gathered[np.argsort(np.concatenate([np.flatnonzero(in_base), np.flatnonzero(~in_base)]))]
+
+        gathered = np.empty((len(rows),) + self.shape[1:], dtype=self.dtype)
+        gathered[in_base] = self.base[rows[in_base]]
+        gathered[~in_base] = self.segment[rows[~in_base] - self.n_base]
+        return gathered
+
+    def __array__(self, dtype=None, copy=None):
+        if self._full is None:
+            self._full = np.concatenate([np.asarray(self.base, dtype=self.dtype),
+                                         np.asarray(self.segment, dtype=self.dtype)])
+        return self._full if dtype is None else self._full.astype(dtype, copy=False)
+
+
+class DeltaOverlay:
+    """
+    Rows upserted since the base index was written, plus the base-row mask
+
+    Attributes:
+        n_base: Number of base rows
+        live: (n_base + n_segment,) bool mask; False for base rows that were
+              replaced or deleted (segment rows are always live)
+        embeddings: (n_segment, dim) float32 embeddings of the segment rows
+    """
+
+    def __init__(self, n_base: int, live: np.ndarray, embeddings: np.ndarray):
+        self.n_base = int(n_base)
+        self.live = np.asarray(live, dtype=bool)
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+
+    @property
+    def n_segment(self) -> int:
+        return len(self.embeddings)
+
+    @property
+    def n_dead(self) -> int:
+        return int(self.n_base - self.live[:self.n_base].sum())
+
+    def live_mask(self, candidate_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Candidate mask (or all rows) restricted to live rows"""
+        if candidate_mask is None:
+            return self.live
+        return np.asarray(candidate_mask, dtype=bool) & self.live
+
+    def search(self, query_vec: np.ndarray, k: int, candidate_mask: np.ndarray,
+               base_rows: np.ndarray, base_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score the live segment rows exactly and merge them with a base top-k
+
+        Args:
+            query_vec: (dim,) normalized user embedding
+            k: Number of results
+            candidate_mask: (n_base + n_segment,) mask from live_mask()
+            base_rows: Top-k rows of the base search (base row numbers)
+            base_scores: Their scores
+
+        Returns:
+            Tuple of (global row indices, scores) sorted by descending score
+        """
+        segment_rows = np.flatnonzero(candidate_mask[self.n_base:])
+        segment_scores = self.embeddings[segment_rows] @ np.asarray(query_vec, dtype=np.float32).reshape(-1)
+
+        return select_top_k(
+            np.concatenate([np.asarray(base_scores, dtype=np.float32), segment_scores]),
+            k,
+            np.concatenate([np.asarray(base_rows, dtype=np.int64), self.n_base + segment_rows])
+        )
+
+    def stats(self) -> dict:
+        return {'base_rows': self.n_base, 'segment_rows': self.n_segment, 'masked_base_rows': self.n_dead}
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    print("=== Index Overlay Testing ===\n")
+
+    rng = np.random.default_rng(0)
+    base = rng.standard_normal((1000, 16)).astype(np.float32)
+    segment = rng.standard_normal((10, 16)).astype(np.float32)
+
+    stacked = StackedRows(base, segment)
+    rows = np.array([3, 1005, 999, 1000])
+    assert np.array_equal(stacked[rows], np.concatenate([base, segment])[rows])
+    assert np.array_equal(stacked[1009], segment[9])
+    print(f"✅ Gathers across base and segment: {stacked.shape}")
+
+    records = [{'_id': f"id{i}"} for i in range(1010)]
+    metadata = StackedRows(MetadataTable.from_bytes([b'{"_id":"id%d"}' % i for i in range(1000)]),
+                           MetadataTable.from_bytes([b'{"_id":"id%d"}' % i for i in range(1000, 1010)]))
+    assert metadata[rows].records() == [records[r] for r in rows]
+    print(f"✅ Metadata gathers: {metadata[rows].records()[:2]}...")
+
+    live = np.ones(1010, dtype=bool)
+    live[[0, 1, 2]] = False
+    overlay = DeltaOverlay(1000, live, segment)
+
+    query = rng.standard_normal(16).astype(np.float32)
+    base_scores = base @ query
+    base_rows, top_scores = select_top_k(base_scores[live[:1000]], 5, np.flatnonzero(live[:1000]))
+    rows, scores = overlay.search(query, 5, overlay.live_mask(), base_rows, top_scores)
+
+    full = np.concatenate([base, segment]) @ query
+    full[~live] = -np.inf
+    assert rows.tolist() == np.argsort(-full)[:5].tolist()
+    print(f"✅ Merged top-5 matches a full scan: {rows.tolist()}")
+    print(f"   {overlay.stats()}")
+
+    print("\n✅ Index overlay tests passed!")
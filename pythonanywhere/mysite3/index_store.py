@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Embedding Index Storage
+Uncompressed, memory-mappable on-disk format for the listing embedding index
+
+Layout of an index directory:
+    listing_embeddings/
+    ├── manifest.json     # format version, array table, attributes
+    ├── embeddings.npy    # raw float32 (n_listings, 128), C-contiguous
+    ├── listing_ids.npy   # fixed-width ASCII ID table (n_listings,)
+    └── ...               # optional per-index arrays (vector index, etc.)
+
+Every array is a plain .npy file opened with np.load(mmap_mode='r'), so all
+WSGI workers on a host share a single page-cache copy and a cold start only
+maps the files instead of decompressing them.
+
+Rewriting an existing directory takes two renames (replace_dir()), so a
+reader can find it missing, or open files of both the old and the new
+index. Readers go through read_dir(), which detects that and retries.
+Versioned roots (index_versions.py) never rewrite a directory in place.
+"""
+
+import os
+import json
+import time
+import shutil
+import numpy as np
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+# Reads that overlap a replace_dir() are retried (at most this many times)
+READ_RETRIES = 5
+READ_RETRY_SECONDS = 0.05
+
+T = TypeVar('T')
+
+
+def is_index_dir(path: str) -> bool:
+    """True if path is a directory written by save_index_dir()"""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def encode_ids(listing_ids) -> np.ndarray:
+    """Pack listing IDs into a fixed-width ASCII table"""
+    ids = [str(lid) for lid in listing_ids]
+    width = max((len(lid) for lid in ids), default=1)
+    return np.array(ids, dtype=f'S{width}')
+
+
+def decode_ids(id_table: np.ndarray) -> list:
+    """Unpack a fixed-width ID table (or a legacy unicode array) into a list of str"""
+    id_table = np.asarray(id_table)
+    if id_table.dtype.kind == 'U':
+        return id_table.tolist()
+    return np.char.decode(id_table, 'ascii').tolist()
+
+
+def replace_dir(tmp_dir: str, dirpath: str):
+    """
+    Move a completely written tmp_dir to dirpath, replacing what is there
+
+    A directory cannot be renamed over a non-empty one, so the old one is
+    moved aside first: between the two renames dirpath does not exist.
+    Readers use read_dir() to ride that out. Workers that still have the
+    previous files mapped keep reading them (the old inodes stay alive
+    until unmapped).
+    """
+    old_dir = None
+    if os.path.exists(dirpath):
+        old_dir = f"{dirpath}.old-{os.getpid()}"
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        os.rename(dirpath, old_dir)
+    os.rename(tmp_dir, dirpath)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _same_dir(fd: int, dirpath: str) -> bool:
+    """True if dirpath still is the directory opened as fd"""
+    try:
+        st = os.stat(dirpath)
+    except FileNotFoundError:
+        return False
+    before = os.fstat(fd)
+    return (st.st_dev, st.st_ino) == (before.st_dev, before.st_ino)
+
+
+def read_dir(dirpath: str, read_fn: Callable[[str], T]) -> T:
+    """
+    Run read_fn(dirpath) against one generation of a directory that
+    replace_dir() may be replacing concurrently
+
+    A read that overlapped a replacement (the directory was missing, or
+    was replaced while reading) may have failed or mixed old and new files,
+    so it is retried. Errors of a read that did not overlap one are raised
+    as they are.
+    """
+    for attempt in range(READ_RETRIES + 1):
+        last_attempt = attempt == READ_RETRIES
+        # The open descriptor keeps the inode alive, so a replacement can
+        # never reuse its number and pass for the directory we started with
+        try:
+            fd = os.open(dirpath, os.O_RDONLY)
+        except (FileNotFoundError, NotADirectoryError):
+            fd = None
+        try:
+            try:
+                result = read_fn(dirpath)
+            except Exception:
+                if last_attempt or (fd is not None and _same_dir(fd, dirpath)):
+                    raise
+            else:
+                if last_attempt or (fd is not None and _same_dir(fd, dirpath)):
+                    return result
+        finally:
+            if fd is not None:
+                os.close(fd)
+        time.sleep(READ_RETRY_SECONDS)
+
+
+def save_index_dir(dirpath: str, arrays: Dict[str, np.ndarray],
+                   attributes: Optional[Dict] = None):
+    """
+    Write arrays + manifest into an index directory
+
+    The directory is written under a temporary name and moved into place
+    with replace_dir(), so readers never see a half-written index.
+
+    Args:
+        dirpath: Target directory (e.g. listing_embeddings)
+        arrays: name → array; each becomes <name>.npy
+        attributes: Extra JSON-serializable manifest fields
+    """
+    dirpath = os.path.abspath(dirpath)
+    tmp_dir = f"{dirpath}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'n_listings': int(len(arrays['listing_ids'])),
+        'arrays': {},
+        'attributes': attributes or {}
+    }
+
+    for name, array in arrays.items():
+        array = np.asarray(array, order='C')
+        filename = f"{name}.npy"
+        np.save(os.path.join(tmp_dir, filename), array, allow_pickle=False)
+        manifest['arrays'][name] = {
+            'file': filename,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape)
+        }
+
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    replace_dir(tmp_dir, dirpath)
+
+
+def load_index_dir(dirpath: str, mmap: bool = True) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Open every array of an index directory
+
+    All arrays come from the same write, even while save_index_dir()
+    replaces the directory (see read_dir()).
+
+    Args:
+        dirpath: Directory written by save_index_dir()
+        mmap: Memory-map arrays read-only (default) instead of reading them
+
+    Returns:
+        Tuple of (name → array, manifest dict)
+
+    Raises:
+        FileNotFoundError: If the manifest is missing
+        ValueError: If the format version is unsupported
+    """
+    return read_dir(dirpath, lambda path: _load_index_dir(path, mmap))
+
+
+def _load_index_dir(dirpath: str, mmap: bool) -> Tuple[Dict[str, np.ndarray], Dict]:
+    with open(os.path.join(dirpath, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported index format version {manifest.get('format_version')} "
+            f"(expected {FORMAT_VERSION})"
+        )
+
+    arrays = {
+        name: np.load(
+            os.path.join(dirpath, entry['file']),
+            mmap_mode='r' if mmap else None,
+            allow_pickle=False
+        )
+        for name, entry in manifest['arrays'].items()
+    }
+
+    return arrays, manifest
+
+
+def convert_npz(npz_path: str, dirpath: str) -> Dict:
+    """
+    Convert a legacy listing_embeddings.npz into the memory-mapped format
+
+    Args:
+        npz_path: Existing compressed index (listing_ids + embeddings)
+        dirpath: Output index directory
+
+    Returns:
+        Manifest of the written index
+    """
+    from vector_index import IVFFlatIndex
+
+    data = np.load(npz_path, allow_pickle=True)
+
+    arrays = {
+        'listing_ids': encode_ids(data['listing_ids'].tolist()),
+        'embeddings': np.asarray(data['embeddings'], dtype=np.float32)
+    }
+
+    # Carry over the IVF sidecar (listing_embeddings.ivf.npz) if there is one
+    vector_index_path = IVFFlatIndex.sidecar_path(npz_path)
+    if os.path.exists(vector_index_path):
+        arrays.update(np.load(vector_index_path))
+
+    save_index_dir(dirpath, arrays, attributes={'converted_from': os.path.basename(npz_path)})
+
+    return load_index_dir(dirpath)[1]
+
+
+# ============================================================
+# CONVERTER CLI
+# ============================================================
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python index_store.py <listing_embeddings.npz> [output_dir]")
+        sys.exit(1)
+
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) == 3 else os.path.splitext(source)[0]
+
+    print(f"🔄 Converting {source} → {target}/ ...")
+    manifest = convert_npz(source, target)
+    print(f"✅ Wrote {manifest['n_listings']} listings:")
+    for name, entry in manifest['arrays'].items():
+        print(f"   {entry['file']:<20} {entry['dtype']:<6} {tuple(entry['shape'])}")
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Versioned Index Directories
+Immutable index versions behind an atomically replaced CURRENT pointer,
+plus a watcher that hot-swaps the in-memory index of every worker
+
+Layout:
+    listing_embeddings/
+    ├── CURRENT                       # name of the live version (one line)
+    └── versions/
+        ├── 20260301-120000-000000-4242/   # index directory (see index_store.py)
+        │   ├── manifest.json
+        │   ├── embeddings.npy
+        │   └── delta.npz                  # incremental upserts of this version
+        └── 20260302-120000-000000-4242/
+
+A rebuild writes a complete new version directory and then replaces
+CURRENT with os.replace(): readers see either the old or the new version,
+never a partial one, and a crash mid-write leaves an orphaned directory
+that the next prune removes. Old versions stay on disk (KEEP_VERSIONS) so
+workers still mapping their files are unaffected. Writers publish while
+holding the rebuild lock (see rebuild_jobs.py), and prune never touches
+the staging directory of a writer that is still running.
+"""
+
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+import index_store
+
+
+CURRENT_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+
+# Versions kept on disk besides the current one
+KEEP_VERSIONS = 2
+
+# Incremental upserts of a version (EmbeddingIndexBuilder.DELTA_FILE)
+DELTA_FILE = 'delta.npz'
+
+# Finished version directories (new_version_name()) ...
+VERSION_NAME = re.compile(r'^\d{8}-\d{6}-\d{6}-\d+$')
+# ... and a writer's staging directories next to them (<name>.tmp-<pid>, see index_store.py)
+STAGING_NAME = re.compile(r'\.(tmp|old)-(\d+)$')
+
+
+def is_versioned_root(root: str) -> bool:
+    """True if root has a CURRENT pointer"""
+    return os.path.isfile(os.path.join(root, CURRENT_FILE))
+
+
+def current_version(root: str) -> Optional[str]:
+    """Name of the live version, or None if root is not versioned"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_path(root: str, version: str) -> str:
+    return os.path.join(root, VERSIONS_DIR, version)
+
+
+def resolve(root: str) -> str:
+    """
+    Directory to load: the current version, else root itself
+    (a pre-versioning index directory or a legacy .npz path)
+    """
+    version = current_version(root)
+    return version_path(root, version) if version else root
+
+
+def signature(root: str) -> Tuple:
+    """
+    Cheap fingerprint of what resolve(root) would load
+
+    Changes when CURRENT points at another version or when the version's
+    manifest or delta segment is rewritten (incremental upserts).
+    """
+    return path_signature(resolve(root))
+
+
+def path_signature(path: str) -> Tuple:
+    """signature() of an index directory (or legacy .npz file) that is already resolved"""
+    stamps = []
+    for name in (index_store.MANIFEST_FILE, DELTA_FILE):
+        try:
+            st = os.stat(os.path.join(path, name))
+            stamps.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except (FileNotFoundError, NotADirectoryError):
+            stamps.append(None)
+    if not os.path.isdir(path):
+        try:
+            st = os.stat(path)
+            stamps.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except FileNotFoundError:
+            stamps.append(None)
+    return (path, *stamps)
+
+
+def new_version_name() -> str:
+    """Sortable, unique version name (timestamp + pid)"""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+
+
+def publish(root: str, version: str):
+    """Atomically point CURRENT at version"""
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.tmp-{os.getpid()}")
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def write_version(root: str, save_fn: Callable[[str], None],
+                  keep: int = KEEP_VERSIONS) -> str:
+    """
+    Write a new index version and make it current
+
+    Args:
+        root: Index root (e.g. listing_embeddings/)
+        save_fn: Writes a complete index directory at the given path
+                 (e.g. EmbeddingIndexBuilder.save_index)
+        keep: Older versions to keep on disk
+
+    Returns:
+        Path of the new version directory
+    """
+    version = new_version_name()
+    path = version_path(root, version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    save_fn(path)
+    publish(root, version)
+    prune(root, keep)
+
+    print(f"📌 Published index version {version}")
+    return path
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def prune(root: str, keep: int = KEEP_VERSIONS) -> list:
+    """
+    Remove all but the current and the `keep` newest other versions,
+    plus files of a pre-versioning index left directly in root
+
+    Only finished version directories count as versions. Staging
+    directories are removed once the process that wrote them is gone
+    (a crash mid-write), never while it may still be writing.
+
+    Workers that still map files of a removed version keep reading them
+    (unlinked inodes live until unmapped).
+
+    Returns:
+        Removed version names
+    """
+    current = current_version(root)
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    if current is None or not os.path.isdir(versions_dir):
+        return []
+
+    names = os.listdir(versions_dir)
+    others = sorted((v for v in names if VERSION_NAME.match(v) and v != current), reverse=True)
+    removed = others[keep:]
+    for version in removed:
+        shutil.rmtree(os.path.join(versions_dir, version), ignore_errors=True)
+
+    for name in names:
+        staging = STAGING_NAME.search(name)
+        if staging and not _process_alive(int(staging.group(2))):
+            shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+    # Index files written before the root was versioned
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isfile(path) and name != CURRENT_FILE and not name.startswith(f"{CURRENT_FILE}.tmp-"):
+            os.remove(path)
+
+    return removed
+
+
+# ============================================================
+# WATCHER
+# ============================================================
+
+class IndexWatcher:
+    """
+    Polls an index root and swaps in a freshly loaded index when it changes
+
+    The new index is loaded completely (memory-mapped) in the watcher
+    thread and handed to on_swap, which replaces the serving reference in
+    a single assignment. Requests hold on to the index they started with,
+    so reads need no lock and never see a half-swapped index.
+    """
+
+    def __init__(self, root: str, load_fn: Callable[[str], Dict],
+                 on_swap: Callable[[Dict], None],
+                 interval_seconds: float = 5.0,
+                 name: str = 'index-watcher'):
+        """
+        Args:
+            root: Index root directory (or legacy index path)
+            load_fn: Loads an index from a path (EmbeddingIndexBuilder.load_index)
+            on_swap: Receives each newly loaded index
+            interval_seconds: Poll interval
+            name: Thread name
+        """
+        self.root = root
+        self.load_fn = load_fn
+        self.on_swap = on_swap
+        self.interval_seconds = interval_seconds
+        self.name = name
+
+        self.loaded_signature = None
+        self.swaps = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_swap_at = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self) -> Dict:
+        """Load the current index and remember its signature"""
+        with self._lock:
+            sig = signature(self.root)
+            index = self.load_fn(sig[0])
+            self.loaded_signature = sig
+            return index
+
+    def mark_current(self):
+        """The caller already serves what is on disk (e.g. it just wrote it)"""
+        with self._lock:
+            self.loaded_signature = signature(self.root)
+
+    def check(self) -> bool:
+        """
+        Reload and swap if the on-disk index changed
+
+        Returns:
+            True if a new index was swapped in
+        """
+        with self._lock:
+            sig = signature(self.root)
+            if sig == self.loaded_signature:
+                return False
+
+            index = self.load_fn(sig[0])
+            self.loaded_signature = sig
+
+        self.on_swap(index)
+        self.swaps += 1
+        self.last_swap_at = datetime.now().isoformat()
+        print(f"🔄 Swapped in index {sig[0]} ({len(index['listing_ids'])} listings)")
+        return True
+
+    def start(self):
+        if self._thread is not None or self.interval_seconds <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep serving the previous index; retry on the next poll
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️  Index reload failed: {self.last_error}")
+
+    def stats(self) -> Dict:
+        return {
+            'path': self.loaded_signature[0] if self.loaded_signature else None,
+            'version': current_version(self.root),
+            'interval_seconds': self.interval_seconds,
+            'running': self._thread is not None,
+            'swaps': self.swaps,
+            'last_swap_at': self.last_swap_at,
+            'errors': self.errors,
+            'last_error': self.last_error
+        }
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    import tempfile
+    import numpy as np
+
+    print("=== Index Versions Testing ===\n")
+
+    root = tempfile.mkdtemp()
+
+    def save(n):
+        return lambda path: index_store.save_index_dir(path, {
+            'listing_ids': index_store.encode_ids([f"id{i}" for i in range(n)]),
+            'embeddings': np.zeros((n, 4), dtype=np.float32)
+        })
+
+    def load(path):
+        arrays, _ = index_store.load_index_dir(path)
+        return {'listing_ids': index_store.decode_ids(arrays['listing_ids'])}
+
+    served = {}
+    watcher = IndexWatcher(root, load, lambda index: served.update(index=index), interval_seconds=0)
+
+    write_version(root, save(3))
+    served['index'] = watcher.load()
+    print(f"Serving {len(served['index']['listing_ids'])} listings from {current_version(root)}")
+    print(f"Unchanged check swaps: {watcher.check()}")
+
+    for n in (5, 7, 9):
+        write_version(root, save(n))
+    print(f"Changed check swaps: {watcher.check()} → {len(served['index']['listing_ids'])} listings")
+    print(f"Versions on disk: {len(os.listdir(os.path.join(root, VERSIONS_DIR)))} (current + {KEEP_VERSIONS})")
+
+    print("\n✅ Index versions tests passed!")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Listing Metadata Store
+Compact per-listing display fields stored alongside the embedding index
+"""
+
+import json
+import math
+import numpy as np
+from typing import Dict, List, Optional
+
+
+# Columns /match needs to build a response (format_matches + format_match_reasons)
+METADATA_FIELDS = [
+    '_id',
+    'Name',
+    'Description',
+    'Location - City',
+    'Location - Hood',
+    'Price number (for map)',
+    'Features - Qty Bedrooms',
+    'Features - Qty Bathrooms',
+    'Days Available (List of Days)'
+]
+
+# Responses only show a preview of the description
+DESCRIPTION_PREVIEW_CHARS = 200
+
+
+def _json_value(value):
+    """Convert pandas/numpy values into plain JSON types (NaN → None)"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def metadata_record(raw_listing: Optional[Dict]) -> Dict:
+    """
+    Trim a listing row down to the fields the API responds with
+
+    Keys keep the database column names, so a record can be passed anywhere
+    a full `select('*')` row was used before.
+
+    Args:
+        raw_listing: Listing row (e.g. preprocess_all()'s raw_data), or None
+
+    Returns:
+        Dict with METADATA_FIELDS plus 'Location - Address' lat/lng
+        (empty dict when there is no row)
+    """
+    if not raw_listing:
+        return {}
+
+    record = {field: _json_value(raw_listing.get(field)) for field in METADATA_FIELDS}
+
+    description = record.get('Description')
+    if description:
+        record['Description'] = str(description)[:DESCRIPTION_PREVIEW_CHARS]
+
+    address = raw_listing.get('Location - Address')
+    if isinstance(address, dict):
+        record['Location - Address'] = {
+            'lat': _json_value(address.get('lat')),
+            'lng': _json_value(address.get('lng'))
+        }
+
+    return record
+
+
+def listing_price(raw_listing: Optional[Dict]) -> float:
+    """Nightly map price of a listing row as float (0.0 when missing/unparseable)"""
+    try:
+        return float((raw_listing or {}).get('Price number (for map)') or 0)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class MetadataTable:
+    """
+    Variable-length UTF-8 JSON records: one byte buffer plus row offsets
+
+    Row i is data[offsets[i]:offsets[i + 1]] (empty when no metadata was
+    stored). Unlike a fixed-width byte table, no row is padded to the
+    longest record, and both arrays memory-map like the embeddings.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        """
+        Args:
+            data: (total_bytes,) uint8 concatenated records
+            offsets: (n_rows + 1,) int64 start offset of each row, then the end
+        """
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def shape(self) -> tuple:
+        return (len(self),)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + self.offsets.nbytes)
+
+    @classmethod
+    def from_bytes(cls, encoded: List[bytes]) -> 'MetadataTable':
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    @classmethod
+    def concatenate(cls, tables: List['MetadataTable']) -> 'MetadataTable':
+        """Rows of all tables, in order"""
+        lengths = [np.diff(t.offsets) for t in tables]
+        offsets = np.zeros(sum(len(l) for l in lengths) + 1, dtype=np.int64)
+        np.cumsum(np.concatenate(lengths) if lengths else [], out=offsets[1:])
+        data = [np.asarray(t.data[t.offsets[0]:t.offsets[-1]]) for t in tables]
+        return cls(np.concatenate(data) if data else np.empty(0, dtype=np.uint8), offsets)
+
+    def raw(self, row: int) -> bytes:
+        return self.data[self.offsets[row]:self.offsets[row + 1]].tobytes()
+
+    def __getitem__(self, rows):
+        """
+        A single row's encoded record (np.bytes_, b'' when empty), or a new
+        table with the selected rows (index array, boolean mask or slice)
+        """
+        if isinstance(rows, (int, np.integer)):
+            return np.bytes_(self.raw(int(rows) + (len(self) if rows < 0 else 0)))
+
+        if isinstance(rows, slice):
+            rows = np.arange(len(self))[rows]
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        rows = rows.astype(np.int64, copy=False)
+
+        starts, lengths = self.offsets[rows], self.offsets[rows + 1] - self.offsets[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # Byte positions of every selected row, in one vectorized gather
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return MetadataTable(np.asarray(self.data[positions]), offsets)
+
+    def records(self) -> List[Optional[Dict]]:
+        """Decoded record of every row (None where no metadata was stored)"""
+        return [json.loads(raw.decode('utf-8')) if raw else None
+                for raw in (self.raw(row) for row in range(len(self)))]
+
+    # ------------------------------------------------------------
+    # PERSISTENCE
+    # ------------------------------------------------------------
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Named arrays for the embedding index store"""
+        return {'metadata_bytes': np.asarray(self.data), 'metadata_offsets': np.asarray(self.offsets)}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'MetadataTable':
+        return cls(arrays['metadata_bytes'], arrays['metadata_offsets'])
+
+    @staticmethod
+    def has_arrays(arrays: Dict[str, np.ndarray]) -> bool:
+        return 'metadata_offsets' in arrays
+
+    @classmethod
+    def from_fixed_width(cls, table: np.ndarray) -> 'MetadataTable':
+        """Convert the fixed-width byte table of indexes written before MetadataTable"""
+        return cls.from_bytes([bytes(raw) for raw in np.asarray(table)])
+
+
+def encode_metadata(records: List[Dict]) -> MetadataTable:
+    """Pack records into a MetadataTable (one UTF-8 JSON document per row)"""
+    return MetadataTable.from_bytes([
+        json.dumps(r, ensure_ascii=False, separators=(',', ':')).encode('utf-8') if r else b''
+        for r in records
+    ])
+
+
+def decode_metadata(table, rows) -> List[Optional[Dict]]:
+    """
+    Unpack the records of the given rows
+
+    Args:
+        table: MetadataTable (or index_overlay.StackedRows over one)
+        rows: Row indices
+
+    Returns:
+        One dict per row, or None where no metadata was stored
+        (e.g. rows of an index built before metadata was added)
+    """
+    return table[np.asarray(rows, dtype=np.int64)].records()
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    print("=== Listing Metadata Testing ===\n")
+
+    raw = {
+        '_id': 'abc123',
+        'Name': 'Sunny room in Williamsburg',
+        'Description': 'x' * 500,
+        'Location - City': 'Brooklyn',
+        'Price number (for map)': np.float64(140.0),
+        'Features - Qty Bedrooms': np.int64(1),
+        'Features - Qty Bathrooms': float('nan'),
+        'Days Available (List of Days)': ['Monday', 'Tuesday'],
+        'Location - Address': {'lat': 40.71, 'lng': -73.96, 'address': '...'},
+        'Kitchen Type': 'Full'
+    }
+
+    table = encode_metadata([metadata_record(raw), metadata_record(None)])
+    decoded = decode_metadata(table, [0, 1])
+
+    print(f"Table: {len(table)} rows, {table.nbytes} bytes")
+    print(f"Description preview length: {len(decoded[0]['Description'])}")
+    print(f"NaN → {decoded[0]['Features - Qty Bathrooms']}, missing row → {decoded[1]}")
+    print(f"Coordinates: {decoded[0]['Location - Address']}")
+
+    print("\n✅ Listing metadata tests passed!")
@@ -4,23 +4,27 @@ Listing Data Preprocessing Pipeline
 Fetches and prepares ALL listing data from Supabase for TensorFlow embedding
 """
 
-import os
+import time
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Tuple, Optional
-from supabase import create_client, Client
+from typing import Iterator, List, Dict, Tuple, Optional
 from dotenv import load_dotenv
 from temporal_encoder import TemporalEncoder
+from listing_metadata import METADATA_FIELDS
+from attribute_filters import ATTRIBUTE_FIELDS
+from data_access import ListingStore, create_store
 
 load_dotenv()
 
 
 class ListingPreprocessor:
     """
-    Fetches listings from Supabase and prepares them for embedding generation
+    Fetches listings from Supabase (or the DATA_BACKEND store) and prepares
+    them for embedding generation
     """
 
-    # Text fields to combine for semantic embedding
+    # Text fields to combine for semantic embedding. Names are quoted for the
+    # SELECT clause; rows come back keyed by the unquoted column names.
     TEXT_FIELDS = [
         'Name',
         'Description',
@@ -43,19 +47,24 @@ class ListingPreprocessor:
         '"Maximum Nights"'
     ]
 
+    # Rows per request (PostgREST caps responses at max-rows, 1000 by default)
+    DEFAULT_PAGE_SIZE = 1000
+
     def __init__(self, supabase_url: Optional[str] = None,
-                 supabase_key: Optional[str] = None):
+                 supabase_key: Optional[str] = None,
+                 store: Optional[ListingStore] = None):
         """
-        Initialize preprocessor with Supabase connection
+        Initialize preprocessor with a listing store
 
         Args:
             supabase_url: Supabase project URL (defaults to env var)
             supabase_key: Supabase anon/service key (defaults to env var)
+            store: Listing store to read from (default: create_store(), i.e. DATA_BACKEND)
         """
-        self.supabase: Client = create_client(
-            supabase_url or os.getenv("SUPABASE_URL"),
-            supabase_key or os.getenv("SUPABASE_KEY")
-        )
+        self.store = store or create_store(supabase_url=supabase_url, supabase_key=supabase_key)
+
+        # Progress of the current/last paginated fetch (see iter_listing_pages)
+        self.fetch_progress = {}
 
     def fetch_all_listings(self) -> pd.DataFrame:
         """
@@ -69,25 +78,14 @@ class ListingPreprocessor:
         """
         print("📥 Fetching ALL listings from Supabase (active + inactive)...")
 
-        # Build comprehensive SELECT query
-        select_fields = ', '.join([
-            '_id',
-            *self.TEXT_FIELDS,
-            '"Location - Address"',  # JSONB containing lat/lng
-            *self.NUMERIC_FIELDS,
-            '"Days Available (List of Days)"',
-            '"Nights Available (numbers)"',
-            'Active'
-        ])
-
         # Fetch from listing table - NO FILTER (includes active and inactive)
-        response = self.supabase.table('listing').select(select_fields).execute()
+        pages = list(self.iter_listing_pages())
 
-        if not response.data:
+        if not pages:
             print("⚠️  No listings found!")
             return pd.DataFrame()
 
-        df = pd.DataFrame(response.data)
+        df = pd.concat(pages, ignore_index=True)
 
         # Count active vs inactive
         active_count = df['Active'].sum() if 'Active' in df.columns else 0
@@ -98,6 +96,111 @@ class ListingPreprocessor:
 
         return df
 
+    def fetch_listings(self, listing_ids: Optional[List[str]] = None,
+                       modified_since: Optional[str] = None) -> pd.DataFrame:
+        """
+        Fetch a subset of listings for incremental index updates
+
+        Args:
+            listing_ids: Only these listing IDs
+            modified_since: Only listings with "Modified Date" >= this ISO timestamp
+
+        Returns:
+            DataFrame with the same columns as fetch_all_listings()
+        """
+        if listing_ids is not None and not listing_ids:
+            return pd.DataFrame()
+
+        pages = list(self.iter_listing_pages(listing_ids=listing_ids, modified_since=modified_since))
+        df = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+
+        print(f"📥 Fetched {len(df)} listings for incremental update")
+
+        return df
+
+    def iter_listing_pages(self, page_size: Optional[int] = None,
+                           listing_ids: Optional[List[str]] = None,
+                           modified_since: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream the listing table one page at a time
+
+        Uses keyset pagination on _id (ORDER BY _id, WHERE _id > last seen),
+        so every request is an index range scan, no page is skipped or
+        repeated when rows are inserted mid-scan, and no response exceeds
+        the PostgREST row limit. Only one page is held in memory.
+
+        Progress is kept in self.fetch_progress (pages, rows, total,
+        elapsed_seconds, rows_per_second) and printed per page.
+
+        Args:
+            page_size: Rows per request (default DEFAULT_PAGE_SIZE)
+            listing_ids: Only these listing IDs
+            modified_since: Only listings with "Modified Date" >= this ISO timestamp
+
+        Yields:
+            DataFrame per page, same columns as fetch_all_listings()
+        """
+        page_size = page_size or self.DEFAULT_PAGE_SIZE
+        total = self.count_listings(modified_since) if listing_ids is None else len(listing_ids)
+        start = time.perf_counter()
+        self.fetch_progress = {'pages': 0, 'rows': 0, 'total': total,
+                               'elapsed_seconds': 0.0, 'rows_per_second': 0.0}
+
+        last_id = None
+        while True:
+            rows = self.store.listing_page(self._select_fields(), page_size, after_id=last_id,
+                                           listing_ids=listing_ids, modified_since=modified_since)
+            if not rows:
+                break
+
+            elapsed = time.perf_counter() - start
+            progress = self.fetch_progress
+            progress['pages'] += 1
+            progress['rows'] += len(rows)
+            progress['elapsed_seconds'] = round(elapsed, 3)
+            progress['rows_per_second'] = round(progress['rows'] / elapsed, 1) if elapsed else 0.0
+
+            of_total = f"/{total}" if total else ''
+            print(f"  📄 Page {progress['pages']}: {progress['rows']}{of_total} listings "
+                  f"({progress['rows_per_second']:.0f} rows/s)")
+
+            yield pd.DataFrame(rows)
+
+            if len(rows) < page_size:
+                break
+            last_id = rows[-1]['_id']
+
+    def iter_preprocessed_chunks(self, page_size: Optional[int] = None) -> Iterator[List[Dict]]:
+        """
+        Fetch and preprocess the listing table page by page
+
+        Yields:
+            List of preprocessed listing dicts per page (see preprocess_all())
+        """
+        for page in self.iter_listing_pages(page_size):
+            yield self.columns_to_listings(self.preprocess_columnar(page))
+
+    def count_listings(self, modified_since: Optional[str] = None) -> Optional[int]:
+        """Exact listing count for progress reporting (None if the count fails)"""
+        try:
+            return self.store.count_listings(modified_since)
+        except Exception as e:
+            print(f"⚠️  Could not count listings: {e}")
+            return None
+
+    def _select_fields(self) -> str:
+        """Comprehensive SELECT clause shared by all listing fetches"""
+        return ', '.join([
+            '_id',
+            *self.TEXT_FIELDS,
+            '"Location - Address"',  # JSONB containing lat/lng
+            *self.NUMERIC_FIELDS,
+            '"Days Available (List of Days)"',
+            '"Nights Available (numbers)"',
+            '"Location - Borough"',  # zat_geo_borough_toplevel _id
+            'Active'
+        ])
+
     def extract_text_content(self, listing: pd.Series) -> str:
         """
         Combine multiple text fields into single string for embedding
@@ -121,30 +224,30 @@ class ListingPreprocessor:
             text_parts.append(str(description))
 
         # Add neighborhood description
-        hood_desc = listing.get('"Description - Neighborhood"', '')
+        hood_desc = listing.get('Description - Neighborhood', '')
         if hood_desc:
             text_parts.append(f"Neighborhood: {hood_desc}")
 
         # Add location info
-        city = listing.get('"Location - City"', '')
-        hood = listing.get('"Location - Hood"', '')
+        city = listing.get('Location - City', '')
+        hood = listing.get('Location - Hood', '')
         if hood and city:
             text_parts.append(f"Located in {hood}, {city}")
         elif city:
             text_parts.append(f"Located in {city}")
 
         # Add property type
-        space_type = listing.get('"Features - Type of Space"', '')
+        space_type = listing.get('Features - Type of Space', '')
         if space_type:
             text_parts.append(f"Property type: {space_type}")
 
         # Add kitchen type
-        kitchen = listing.get('"Kitchen Type"', '')
+        kitchen = listing.get('Kitchen Type', '')
         if kitchen:
             text_parts.append(f"Kitchen: {kitchen}")
 
         # Add rental type
-        rental_type = listing.get('"rental type"', '')
+        rental_type = listing.get('rental type', '')
         if rental_type:
             text_parts.append(f"Rental type: {rental_type}")
 
@@ -163,8 +266,11 @@ class ListingPreprocessor:
         Returns:
             Tuple of (latitude, longitude), or (0.0, 0.0) if not found
         """
-        address = listing.get('"Location - Address"', {})
+        return self._coordinates(listing.get('Location - Address', {}))
 
+    @staticmethod
+    def _coordinates(address) -> Tuple[float, float]:
+        """(lat, lng) of a "Location - Address" JSONB value, or (0.0, 0.0)"""
         if isinstance(address, dict):
             lat = address.get('lat')
             lng = address.get('lng')
@@ -177,6 +283,20 @@ class ListingPreprocessor:
 
         return (0.0, 0.0)
 
+    def extract_borough_id(self, listing: pd.Series) -> Optional[str]:
+        """
+        Borough foreign key of a listing (stored with the embedding index for filtering)
+
+        Args:
+            listing: Single row from listings DataFrame
+
+        Returns:
+            zat_geo_borough_toplevel _id, or None if not set
+        """
+        # Column names come back from PostgREST without the quotes used in SELECT
+        borough_id = listing.get('Location - Borough')
+        return str(borough_id) if isinstance(borough_id, str) and borough_id else None
+
     def extract_numeric_features(self, listing: pd.Series) -> np.ndarray:
         """
         Extract structured numeric features
@@ -196,7 +316,7 @@ class ListingPreprocessor:
 
         # Price (1 feature) + padding (3 features) = 4 total
         # Use "Price number (for map)" field for all price slots
-        price = listing.get('"Price number (for map)"', 0) or 0
+        price = listing.get('Price number (for map)', 0) or 0
         features.append(float(price))  # [0] Main price (map price)
         features.extend([0.0, 0.0, 0.0])  # [1:4] Padding (for model compatibility)
 
@@ -205,10 +325,10 @@ class ListingPreprocessor:
         features.extend([lat, lng])
 
         # Property features (4 features)
-        bedrooms = listing.get('"Features - Qty Bedrooms"', 1) or 1
-        bathrooms = listing.get('"Features - Qty Bathrooms"', 1) or 1
-        guests = listing.get('"Features - Qty Guests"', 2) or 2
-        sqft = listing.get('"Features - SQFT Area"', 500) or 500
+        bedrooms = listing.get('Features - Qty Bedrooms', 1) or 1
+        bathrooms = listing.get('Features - Qty Bathrooms', 1) or 1
+        guests = listing.get('Features - Qty Guests', 2) or 2
+        sqft = listing.get('Features - SQFT Area', 500) or 500
 
         features.extend([
             float(bedrooms),
@@ -218,8 +338,8 @@ class ListingPreprocessor:
         ])
 
         # Duration limits (2 features, normalized)
-        min_nights = listing.get('"Minimum Nights"', 1) or 1
-        max_nights = listing.get('"Maximum Nights"', 365) or 365
+        min_nights = listing.get('Minimum Nights', 1) or 1
+        max_nights = listing.get('Maximum Nights', 365) or 365
 
         features.extend([
             float(min_nights),
@@ -238,7 +358,7 @@ class ListingPreprocessor:
         Returns:
             numpy array of shape (11,) from TemporalEncoder
         """
-        days_available = listing.get('"Days Available (List of Days)"', [])
+        days_available = listing.get('Days Available (List of Days)', [])
 
         # Ensure it's a list
         if not isinstance(days_available, list):
@@ -259,6 +379,7 @@ class ListingPreprocessor:
             - text: str (combined text for embedding)
             - structured_features: np.ndarray (12 numeric features)
             - temporal_features: np.ndarray (11 temporal features)
+            - borough_id: str or None (zat_geo_borough_toplevel _id)
             - raw_data: original listing dict
         """
         print(f"\n🔄 Preprocessing {len(listings_df)} listings...")
@@ -277,6 +398,7 @@ class ListingPreprocessor:
                     'text': text,
                     'structured_features': numeric,
                     'temporal_features': temporal,
+                    'borough_id': self.extract_borough_id(listing),
                     'raw_data': listing.to_dict()
                 })
 
@@ -291,6 +413,193 @@ class ListingPreprocessor:
 
         return processed
 
+    # ------------------------------------------------------------
+    # COLUMNAR PREPROCESSING
+    # ------------------------------------------------------------
+
+    # Optional text fields appended after Name and Description, with their prefixes
+    # (same order and wording as extract_text_content)
+    PREFIXED_TEXT_FIELDS = [
+        ('Description - Neighborhood', 'Neighborhood: '),
+        ('Features - Type of Space', 'Property type: '),
+        ('Kitchen Type', 'Kitchen: '),
+        ('rental type', 'Rental type: ')
+    ]
+
+    # Element-wise str()/strip over object arrays without building fixed-width copies
+    _to_str = np.frompyfunc(str, 1, 1)
+    _strip = np.frompyfunc(str.strip, 1, 1)
+
+    def preprocess_columnar(self, listings_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Preprocess a whole DataFrame column by column
+
+        Produces exactly the same texts and features as preprocess_all(),
+        using array operations instead of one Python call chain per row.
+        Rows the per-row path would skip (unparseable numbers, missing _id)
+        are dropped here too.
+
+        Args:
+            listings_df: DataFrame of listings from fetch_all_listings()
+
+        Returns:
+            Dictionary of row-aligned arrays:
+            - listing_ids: (N,) object array of str
+            - texts: (N,) object array of str
+            - structured_features: (N, 12) float32
+            - temporal_features: (N, 11) float64
+            - borough_ids: (N,) object array (None where unset)
+            - raw_data: list of N dicts with only the columns the API responds with
+        """
+        n = len(listings_df)
+        print(f"\n🔄 Preprocessing {n} listings (columnar)...")
+
+        if '_id' not in listings_df.columns:
+            print("⚠️  No _id column - nothing to preprocess")
+            n = 0
+            listings_df = listings_df.iloc[:0]
+        valid = np.ones(n, dtype=bool)
+
+        # Structured features (same slots as extract_numeric_features)
+        def numeric(key, default):
+            values, ok = self._float_column(listings_df, key, default)
+            valid[~ok] = False
+            return values
+
+        structured = np.zeros((n, 12), dtype=np.float64)
+        structured[:, 0] = numeric('Price number (for map)', 0)
+        structured[:, 4:6] = [self._coordinates(a) for a in self._column(listings_df, 'Location - Address', {})]
+        structured[:, 6] = numeric('Features - Qty Bedrooms', 1)
+        structured[:, 7] = numeric('Features - Qty Bathrooms', 1)
+        structured[:, 8] = numeric('Features - Qty Guests', 2)
+        structured[:, 9] = numeric('Features - SQFT Area', 500) / 1000
+        structured[:, 10] = numeric('Minimum Nights', 1)
+        structured[:, 11] = numeric('Maximum Nights', 365) / 365
+
+        texts = self._texts_columnar(listings_df)
+
+        temporal = TemporalEncoder.encode_days_available_batch(
+            self._column(listings_df, 'Days Available (List of Days)', None)
+        )
+
+        boroughs = self._column(listings_df, 'Location - Borough', None)
+        is_borough = np.array([isinstance(b, str) and b != '' for b in boroughs], dtype=bool)
+        borough_ids = np.where(is_borough, boroughs, None)
+
+        metadata_columns = [c for c in dict.fromkeys(METADATA_FIELDS + ATTRIBUTE_FIELDS + ['Location - Address'])
+                            if c in listings_df.columns]
+        raw_data = listings_df[metadata_columns].to_dict('records')
+
+        listing_ids = self._column(listings_df, '_id', None)
+        if not valid.all():
+            for listing_id in listing_ids[~valid]:
+                print(f"⚠️  Error processing listing {listing_id}: unparseable numeric field")
+            raw_data = [r for r, keep in zip(raw_data, valid) if keep]
+
+        print(f"✅ Successfully preprocessed {int(valid.sum())} listings\n")
+
+        return {
+            'listing_ids': listing_ids[valid],
+            'texts': texts[valid],
+            'structured_features': structured[valid].astype(np.float32),
+            'temporal_features': temporal[valid],
+            'borough_ids': borough_ids[valid],
+            'raw_data': raw_data
+        }
+
+    @staticmethod
+    def _column(listings_df: pd.DataFrame, key: str, default) -> np.ndarray:
+        """Object array of a column, or default for every row (same lookup as Series.get(key, default))"""
+        if key in listings_df.columns:
+            return listings_df[key].to_numpy(dtype=object)
+        values = np.empty(len(listings_df), dtype=object)
+        for i in range(len(values)):
+            values[i] = default
+        return values
+
+    @classmethod
+    def _float_column(cls, listings_df: pd.DataFrame, key: str,
+                      default: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        float(value or default) for a whole column
+
+        Returns:
+            Tuple of (float64 values, mask of rows that parsed)
+        """
+        values = cls._column(listings_df, key, default)
+        values = np.where(values.astype(bool), values, default)
+
+        try:
+            return values.astype(np.float64), np.ones(len(values), dtype=bool)
+        except (ValueError, TypeError):
+            # Slow path only for columns containing bad values
+            parsed = np.zeros(len(values), dtype=np.float64)
+            ok = np.ones(len(values), dtype=bool)
+            for i, value in enumerate(values):
+                try:
+                    parsed[i] = float(value)
+                except (ValueError, TypeError):
+                    ok[i] = False
+            return parsed, ok
+
+    def _texts_columnar(self, listings_df: pd.DataFrame) -> np.ndarray:
+        """extract_text_content() for every row with element-wise string ops"""
+        n = len(listings_df)
+
+        def field(key):
+            values = self._column(listings_df, key, '')
+            return self._to_str(values), values.astype(bool)
+
+        def part(strings, present, prefix=''):
+            return np.where(present, prefix + strings + ' ', '')
+
+        text = np.full(n, '', dtype=object)
+        for key in ('Name', 'Description'):
+            text = text + part(*field(key))
+
+        neighborhood_key, neighborhood_prefix = self.PREFIXED_TEXT_FIELDS[0]
+        text = text + part(*field(neighborhood_key), neighborhood_prefix)
+
+        city, has_city = field('Location - City')
+        hood, has_hood = field('Location - Hood')
+        text = text + np.where(
+            has_hood & has_city,
+            'Located in ' + hood + ', ' + city + ' ',
+            part(city, has_city, 'Located in ')
+        )
+
+        for key, prefix in self.PREFIXED_TEXT_FIELDS[1:]:
+            text = text + part(*field(key), prefix)
+
+        text = self._strip(text)
+        return np.where(text.astype(bool), text, 'Listing').astype(object)
+
+    @staticmethod
+    def columns_to_listings(columns: Dict[str, np.ndarray]) -> List[Dict]:
+        """
+        Adapter: columnar output → preprocess_all()'s list of per-listing dicts
+
+        raw_data only holds the columns the API responds with, not the full row.
+        """
+        return [
+            {
+                'listing_id': listing_id,
+                'text': text,
+                'structured_features': structured,
+                'temporal_features': temporal,
+                'borough_id': borough_id,
+                'raw_data': raw
+            }
+            for listing_id, text, structured, temporal, borough_id, raw in zip(
+                columns['listing_ids'],
+                columns['texts'],
+                columns['structured_features'],
+                columns['temporal_features'],
+                columns['borough_ids'],
+                columns['raw_data']
+            )
+        ]
+
     def get_feature_summary(self, processed_listings: List[Dict]) -> Dict:
         """
         Get summary statistics of preprocessed data
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Request Metrics
+Per-stage latency histograms and counters, exported in Prometheus text format
+
+Each worker process keeps its own registry; /metrics reports the worker
+that answered the scrape (as with every other /health statistic).
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Histogram bucket upper bounds in seconds (0.1 ms … 10 s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Recent observations per stage used for p50/p95/p99
+DEFAULT_WINDOW = 1024
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class LatencyHistogram:
+    """
+    Cumulative bucket counts (for Prometheus) plus a sliding window of the
+    latest observations (for exact recent percentiles)
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = DEFAULT_WINDOW):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.sum += float(seconds)
+        self.recent.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        """q → seconds over the recent window (empty if nothing observed)"""
+        if not self.recent:
+            return {}
+        values = np.quantile(np.fromiter(self.recent, dtype=np.float64), QUANTILES)
+        return dict(zip(QUANTILES, values.tolist()))
+
+    def cumulative_counts(self) -> List[int]:
+        return np.cumsum(self.bucket_counts).tolist()
+
+
+class StageMetrics:
+    """
+    Registry of per-stage latency histograms and labelled counters
+
+    Stages are timed with the stage() context manager or recorded with
+    observe(); either can also write the duration (in ms) into a per-request
+    timings dict, which /match returns when called with debug=true.
+    """
+
+    def __init__(self, namespace: str = 'mysite3', buckets=DEFAULT_BUCKETS,
+                 window: int = DEFAULT_WINDOW):
+        """
+        Args:
+            namespace: Prefix of every exported metric name
+            buckets: Histogram bucket upper bounds in seconds
+            window: Recent observations kept per stage for percentiles
+        """
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._stages: Dict[str, LatencyHistogram] = {}
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str, timings: Optional[Dict[str, float]] = None):
+        """
+        Time the enclosed block as stage `name`
+
+        Args:
+            name: Stage name (e.g. 'query_parse')
+            timings: Optional per-request dict; receives the duration in ms
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, timings)
+
+    def observe(self, name: str, seconds: float,
+                timings: Optional[Dict[str, float]] = None):
+        """Record one duration of a stage measured elsewhere"""
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = LatencyHistogram(self.buckets, self.window)
+            histogram.observe(seconds)
+
+        if timings is not None:
+            timings[name] = round(timings.get(name, 0.0) + seconds * 1000, 3)
+
+    def reset(self):
+        """Drop every histogram and counter (e.g. between benchmark runs)"""
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Increase counter `name` (one series per label combination)"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def snapshot(self) -> Dict:
+        """
+        Per-stage count, mean and recent p50/p95/p99 in milliseconds, plus counters
+
+        Returns:
+            Dict with 'stages' and 'counters' (JSON-serializable)
+        """
+        with self._lock:
+            stages = {}
+            for name, histogram in self._stages.items():
+                quantiles = histogram.quantiles()
+                stages[name] = {
+                    'count': histogram.count,
+                    'mean_ms': round(histogram.sum / histogram.count * 1000, 3),
+                    **{f'p{int(q * 100)}_ms': round(v * 1000, 3) for q, v in quantiles.items()}
+                }
+            counters = {
+                name: {','.join(f'{k}={v}' for k, v in key) or 'total': value
+                       for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+        return {'stages': stages, 'counters': counters}
+
+    def prometheus_text(self, gauges: Optional[Dict[str, float]] = None,
+                        counters: Optional[Dict[str, float]] = None) -> str:
+        """
+        Prometheus text exposition (format 0.0.4)
+
+        Args:
+            gauges: Extra point-in-time values to export (name → value),
+                    e.g. index size
+            counters: Extra cumulative counts kept elsewhere (name → value),
+                      e.g. query cache hits
+
+        Returns:
+            Text for a /metrics response
+        """
+        ns = self.namespace
+        lines = []
+
+        with self._lock:
+            histogram_name = f'{ns}_stage_duration_seconds'
+            lines.append(f'# HELP {histogram_name} Latency of each request pipeline stage')
+            lines.append(f'# TYPE {histogram_name} histogram')
+            for stage, histogram in sorted(self._stages.items()):
+                for bound, count in zip(histogram.buckets, histogram.cumulative_counts()):
+                    lines.append(f'{histogram_name}_bucket{_labels({"stage": stage, "le": _number(bound)})} {count}')
+                lines.append(f'{histogram_name}_bucket{_labels({"stage": stage, "le": "+Inf"})} {histogram.count}')
+                lines.append(f'{histogram_name}_sum{_labels({"stage": stage})} {_number(histogram.sum)}')
+                lines.append(f'{histogram_name}_count{_labels({"stage": stage})} {histogram.count}')
+
+            recent_name = f'{ns}_stage_duration_recent_seconds'
+            lines.append(f'# HELP {recent_name} Percentiles of the last {self.window} durations of each stage')
+            lines.append(f'# TYPE {recent_name} gauge')
+            for stage, histogram in sorted(self._stages.items()):
+                for q, value in histogram.quantiles().items():
+                    lines.append(f'{recent_name}{_labels({"stage": stage, "quantile": q})} {_number(value)}')
+
+            for name, series in sorted(self._counters.items()):
+                counter_name = f'{ns}_{name}'
+                lines.append(f'# TYPE {counter_name} counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{counter_name}{_labels(dict(key))} {_number(value)}')
+
+        for kind, values in (('counter', counters), ('gauge', gauges)):
+            for name, value in sorted((values or {}).items()):
+                if value is None:
+                    continue
+                lines.append(f'# TYPE {ns}_{name} {kind}')
+                lines.append(f'{ns}_{name} {_number(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# Stage timings of this process (reported on /metrics and /health)
+METRICS = StageMetrics()
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    print("=== Stage Metrics Testing ===\n")
+
+    metrics = StageMetrics()
+    rng = np.random.default_rng(0)
+
+    for latency in rng.lognormal(-6, 0.5, 500):
+        metrics.observe('query_parse', latency)
+
+    timings = {}
+    with metrics.stage('format', timings):
+        time.sleep(0.002)
+    metrics.inc('requests_total', endpoint='/match', status='200')
+    metrics.inc('requests_total', endpoint='/match', status='200')
+
+    print(f"Per-request timings: {timings}")
+    print(f"Snapshot: {metrics.snapshot()}\n")
+    print('\n'.join(metrics.prometheus_text({'index_listings': 1234}).splitlines()[:4]))
+    print('...')
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        with metrics.stage('overhead'):
+            pass
+    print(f"\nstage() overhead: {(time.perf_counter() - start) / 10000 * 1e6:.1f} µs")
+
+    print("\n✅ Stage metrics tests passed!")
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Model Artifact Manager
+Local, checksummed model directories and boot-stage timings
+
+Usage:
+    # Download USE once into a local directory (used instead of tfhub.dev afterwards)
+    python model_artifacts.py fetch
+    python model_artifacts.py fetch --dir /home/me/models/use4
+
+    # Re-hash a directory and compare with its checksum file
+    python model_artifacts.py verify listing_model
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+
+# Written into every managed directory (never part of its own checksum)
+CHECKSUM_FILE = 'ARTIFACT_CHECKSUM.json'
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class ArtifactChecksumError(ValueError):
+    """A model directory does not match its recorded checksum"""
+
+
+# ============================================================
+# BOOT PROFILE
+# ============================================================
+
+class BootProfile:
+    """
+    Wall-clock time of each worker boot stage (TF import, model load, index load, ...)
+
+    Stages are recorded in the order they finish; a stage that runs more
+    than once (e.g. an index reload) keeps its latest duration.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages_ms: Dict[str, float] = {}
+        self.details: Dict[str, Dict] = {}
+        self.started_at = datetime.now().isoformat()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.stages_ms.pop(name, None)
+            self.stages_ms[name] = round(seconds * 1000, 1)
+
+    def note(self, name: str, **details):
+        """Attach details (artifact source, verification result, ...) to the report"""
+        with self._lock:
+            self.details[name] = details
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'stages_ms': dict(self.stages_ms),
+                'total_ms': round(sum(self.stages_ms.values()), 1),
+                **{name: dict(d) for name, d in self.details.items()}
+            }
+
+
+# Boot timings of this process (reported on /health)
+BOOT_PROFILE = BootProfile()
+
+
+# ============================================================
+# CHECKSUMS
+# ============================================================
+
+def _artifact_files(dirpath: str) -> list:
+    """Relative paths of every file under dirpath except the checksum file, sorted"""
+    files = []
+    for root, _, names in os.walk(dirpath):
+        for name in names:
+            rel = os.path.relpath(os.path.join(root, name), dirpath)
+            if rel != CHECKSUM_FILE:
+                files.append(rel)
+    return sorted(files)
+
+
+def _fingerprint(dirpath: str, files: list) -> Dict[str, list]:
+    """(size, mtime_ns) per file - cheap change detection without reading the data"""
+    fingerprint = {}
+    for rel in files:
+        st = os.stat(os.path.join(dirpath, rel))
+        fingerprint[rel] = [st.st_size, st.st_mtime_ns]
+    return fingerprint
+
+
+def directory_sha256(dirpath: str) -> str:
+    """SHA-256 over every file's relative path and contents"""
+    digest = hashlib.sha256()
+    for rel in _artifact_files(dirpath):
+        digest.update(rel.replace(os.sep, '/').encode('utf-8') + b'\0')
+        with open(os.path.join(dirpath, rel), 'rb') as f:
+            for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def write_checksum(dirpath: str, source: str = '') -> Dict:
+    """
+    Hash a model directory and record the result in its checksum file
+
+    Args:
+        dirpath: Model directory
+        source: Where the artifact came from (URL, export), for reference
+
+    Returns:
+        The checksum record
+    """
+    files = _artifact_files(dirpath)
+    record = {
+        'sha256': directory_sha256(dirpath),
+        'source': source,
+        'created_at': datetime.now().isoformat(),
+        'files': _fingerprint(dirpath, files)
+    }
+    with open(os.path.join(dirpath, CHECKSUM_FILE), 'w') as f:
+        json.dump(record, f, indent=2)
+    return record
+
+
+def verify_checksum(dirpath: str, expected_sha256: Optional[str] = None,
+                    full: bool = False) -> str:
+    """
+    Check a model directory against its recorded checksum
+
+    Hashing a ~1 GB encoder on every boot would cost seconds, so by default
+    the full SHA-256 is only recomputed when a file's size or mtime differs
+    from what was recorded (or when an explicit expected hash is given).
+
+    Args:
+        dirpath: Model directory
+        expected_sha256: Hash to require (e.g. pinned in the environment);
+                         defaults to the one in the checksum file
+        full: Always re-hash the contents
+
+    Returns:
+        How it was verified: 'fingerprint', 'sha256' or 'unverified'
+        (no checksum file and no expected hash)
+
+    Raises:
+        ArtifactChecksumError: If the contents do not match
+    """
+    record = None
+    path = os.path.join(dirpath, CHECKSUM_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            record = json.load(f)
+
+    expected = expected_sha256 or (record or {}).get('sha256')
+    if not expected:
+        return 'unverified'
+
+    files = _artifact_files(dirpath)
+    if (not full and record is not None and record.get('sha256') == expected
+            and record.get('files') == _fingerprint(dirpath, files)):
+        return 'fingerprint'
+
+    actual = directory_sha256(dirpath)
+    if actual != expected:
+        raise ArtifactChecksumError(
+            f"{dirpath}: checksum mismatch (expected {expected[:12]}…, got {actual[:12]}…)"
+        )
+    return 'sha256'
+
+
+# ============================================================
+# TEXT ENCODER RESOLUTION
+# ============================================================
+
+def resolve_text_encoder(url: str) -> str:
+    """
+    Handle for hub.KerasLayer: the local USE directory if configured, else the URL
+
+    USE_MODEL_DIR points at a directory populated by `python model_artifacts.py
+    fetch`; it is verified (USE_MODEL_SHA256 pins the hash, USE_MODEL_VERIFY=full
+    forces a re-hash) and loaded without network access. A missing or
+    corrupt local copy falls back to the URL with a warning.
+
+    Args:
+        url: TF Hub URL of the encoder
+
+    Returns:
+        Local directory or URL
+    """
+    local_dir = os.getenv('USE_MODEL_DIR')
+    if not local_dir:
+        BOOT_PROFILE.note('text_encoder', source='tfhub', handle=url)
+        return url
+
+    if not os.path.isfile(os.path.join(local_dir, 'saved_model.pb')):
+        print(f"⚠️  USE_MODEL_DIR={local_dir} has no saved_model.pb - loading from {url}")
+        BOOT_PROFILE.note('text_encoder', source='tfhub', handle=url, error='local copy missing')
+        return url
+
+    try:
+        start = time.perf_counter()
+        verified = verify_checksum(
+            local_dir,
+            expected_sha256=os.getenv('USE_MODEL_SHA256') or None,
+            full=os.getenv('USE_MODEL_VERIFY', '').lower() == 'full'
+        )
+        BOOT_PROFILE.record('text_encoder_verify', time.perf_counter() - start)
+    except ArtifactChecksumError as e:
+        print(f"⚠️  {e} - loading from {url}")
+        BOOT_PROFILE.note('text_encoder', source='tfhub', handle=url, error=str(e))
+        return url
+
+    BOOT_PROFILE.note('text_encoder', source='local', handle=local_dir, verified=verified)
+    return local_dir
+
+
+def fetch_text_encoder(url: str, target_dir: str) -> Dict:
+    """
+    Download (or take from the TF Hub cache) the encoder into target_dir
+
+    Args:
+        url: TF Hub URL
+        target_dir: Local directory to populate (replaced if it exists)
+
+    Returns:
+        The checksum record written into target_dir
+    """
+    import tensorflow_hub as hub
+
+    print(f"📥 Resolving {url}...")
+    resolved = hub.resolve(url)
+
+    target_dir = os.path.abspath(target_dir)
+    tmp_dir = f"{target_dir}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    shutil.copytree(resolved, tmp_dir)
+    record = write_checksum(tmp_dir, source=url)
+
+    if os.path.exists(target_dir):
+        shutil.rmtree(target_dir)
+    os.rename(tmp_dir, target_dir)
+
+    print(f"✅ {target_dir} (sha256 {record['sha256'][:12]}…)")
+    return record
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Model artifact manager')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fetch_parser = subparsers.add_parser('fetch', help='Copy USE into a local directory')
+    fetch_parser.add_argument('--url', help='TF Hub URL (default: ListingMatchingModel.USE_MODEL_URL)')
+    fetch_parser.add_argument('--dir', default=os.getenv('USE_MODEL_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'use_model'
+    ))
+
+    verify_parser = subparsers.add_parser('verify', help='Re-hash a model directory')
+    verify_parser.add_argument('dir')
+
+    args = parser.parse_args()
+
+    if args.command == 'fetch':
+        if not args.url:
+            from tf_model import ListingMatchingModel
+            args.url = ListingMatchingModel.USE_MODEL_URL
+        fetch_text_encoder(args.url, args.dir)
+        print(f"\nSet USE_MODEL_DIR={args.dir} to load the encoder from disk")
+    else:
+        print(f"✅ {args.dir}: {verify_checksum(args.dir, full=True)}")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Embedding Quantization
+Scalar float16 / int8 storage and scoring for the listing embedding matrix
+"""
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+from ranking import top_k
+
+
+class QuantizedEmbeddings:
+    """
+    Scalar-quantized copy of the (n_listings, 128) float32 embedding matrix
+
+    Modes:
+    - float16: half precision, 2 bytes/dim
+    - int8:    per-dimension affine quantization, 1 byte/dim
+               x ≈ (code + 128) * scale + offset
+
+    Scoring never materializes a full float32 copy of the matrix: rows are
+    upcast in fixed-size chunks, so the resident working set of a scan is the
+    quantized matrix (1/2 or 1/4 of float32) plus one chunk.
+    """
+
+    MODES = ('float16', 'int8')
+
+    # Rows upcast to float32 at a time while scoring
+    CHUNK_SIZE = 16384
+
+    def __init__(self, mode: str, codes: np.ndarray,
+                 scale: Optional[np.ndarray] = None,
+                 offset: Optional[np.ndarray] = None):
+        """
+        Args:
+            mode: 'float16' or 'int8'
+            codes: (n_listings, dim) quantized matrix
+            scale: (dim,) int8 step size per dimension
+            offset: (dim,) int8 minimum per dimension
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown quantization mode '{mode}' (expected one of {self.MODES})")
+
+        self.mode = mode
+        self.codes = codes
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+        self.offset = None if offset is None else np.asarray(offset, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes)
+
+    @classmethod
+    def quantize(cls, embeddings: np.ndarray, mode: str = 'int8') -> 'QuantizedEmbeddings':
+        """
+        Quantize a float32 embedding matrix
+
+        Args:
+            embeddings: (n_listings, dim) float32 matrix
+            mode: 'float16' or 'int8'
+
+        Returns:
+            QuantizedEmbeddings
+        """
+        data = np.asarray(embeddings, dtype=np.float32)
+
+        if mode == 'float16':
+            return cls(mode, data.astype(np.float16))
+
+        if mode != 'int8':
+            raise ValueError(f"Unknown quantization mode '{mode}' (expected one of {cls.MODES})")
+
+        offset = data.min(axis=0) if len(data) else np.zeros(data.shape[1], dtype=np.float32)
+        value_range = (data.max(axis=0) - offset) if len(data) else np.zeros_like(offset)
+        scale = np.where(value_range > 0, value_range / 255.0, 1.0).astype(np.float32)
+
+        codes = np.rint((data - offset) / scale) - 128
+        return cls(mode, np.clip(codes, -128, 127).astype(np.int8), scale, offset)
+
+    def dequantize(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate float32 embeddings (all rows, or the given rows)"""
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.mode == 'float16':
+            return codes.astype(np.float32)
+        return (codes.astype(np.float32) + 128.0) * self.scale + self.offset
+
+    def score(self, query_vec: np.ndarray,
+              rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Approximate inner products between the query and (selected) rows
+
+        Args:
+            query_vec: (dim,) float32 user embedding
+            rows: Optional row indices to score (default: all rows)
+
+        Returns:
+            float32 scores of shape (len(rows),) or (n_listings,)
+        """
+        query = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+
+        if self.mode == 'int8':
+            # x·q = code·(scale*q) + Σ(128*scale + offset)*q
+            weights = self.scale * query
+            bias = float(np.dot(128.0 * self.scale + self.offset, query))
+        else:
+            weights = query
+            bias = 0.0
+
+        n_rows = len(self.codes) if rows is None else len(rows)
+        scores = np.empty(n_rows, dtype=np.float32)
+
+        for start in range(0, n_rows, self.CHUNK_SIZE):
+            stop = min(start + self.CHUNK_SIZE, n_rows)
+            chunk = self.codes[start:stop] if rows is None else self.codes[rows[start:stop]]
+            scores[start:stop] = chunk.astype(np.float32) @ weights
+
+        if bias:
+            scores += bias
+
+        return scores
+
+    def search(self, query_vec: np.ndarray, k: int,
+               rows: Optional[np.ndarray] = None,
+               rescore_embeddings: Optional[np.ndarray] = None,
+               rescore_factor: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k search on the quantized matrix with optional float32 re-scoring
+
+        The best k * rescore_factor candidates by quantized score are
+        re-scored exactly against rescore_embeddings (only those rows are
+        touched, so a memory-mapped float32 matrix stays mostly cold).
+
+        Args:
+            query_vec: (dim,) float32 user embedding
+            k: Number of results
+            rows: Optional candidate row indices (default: all rows)
+            rescore_embeddings: Full-precision (n_listings, dim) matrix, or None
+            rescore_factor: Candidate multiplier for re-scoring
+
+        Returns:
+            Tuple of (row indices, scores) sorted by descending score
+        """
+        query = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+        rows = np.arange(len(self.codes)) if rows is None else np.asarray(rows)
+
+        scores = self.score(query, rows)
+        n_candidates = min(len(rows), k * rescore_factor if rescore_embeddings is not None else k)
+        if n_candidates <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        candidates, candidate_scores = top_k(scores, n_candidates, rows)
+
+        if rescore_embeddings is None:
+            return candidates, candidate_scores
+
+        return top_k(np.asarray(rescore_embeddings[candidates], dtype=np.float32) @ query, k, candidates)
+
+    # ------------------------------------------------------------
+    # PERSISTENCE
+    # ------------------------------------------------------------
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Named arrays for the embedding index store"""
+        arrays = {
+            'quantized_codes': self.codes,
+            'quantized_mode': np.array(self.mode)
+        }
+        if self.mode == 'int8':
+            arrays['quantized_scale'] = self.scale
+            arrays['quantized_offset'] = self.offset
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'QuantizedEmbeddings':
+        return cls(
+            str(arrays['quantized_mode']),
+            arrays['quantized_codes'],
+            arrays.get('quantized_scale'),
+            arrays.get('quantized_offset')
+        )
+
+    @staticmethod
+    def has_arrays(arrays: Dict[str, np.ndarray]) -> bool:
+        return 'quantized_codes' in arrays
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    print("=== Quantization Testing ===\n")
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((2000, 128)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    query = embeddings[7]
+    exact = embeddings @ query
+
+    for mode in QuantizedEmbeddings.MODES:
+        quantized = QuantizedEmbeddings.quantize(embeddings, mode)
+        error = np.abs(quantized.score(query) - exact).max()
+        rows, _ = quantized.search(query, 10, rescore_embeddings=embeddings)
+        print(f"{mode:>8}: {quantized.nbytes / embeddings.nbytes:.0%} of float32, "
+              f"max score error {error:.5f}, top-1 row {rows[0]} (expected 7)")
+
+    print("\n✅ Quantization tests passed!")
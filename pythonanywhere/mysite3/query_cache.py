@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Query Result Cache
+Bounded LRU/TTL cache of parsed queries and user-tower embeddings
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class QueryCache:
+    """
+    In-process LRU cache keyed on normalized query text
+
+    Repeat searches skip QueryProcessor.process_query (regexes + borough
+    lookup) and the USE/user-tower forward pass. Keys are case- and
+    whitespace-normalized, so "Brooklyn  Mon-Thu" and "brooklyn mon-thu"
+    share an entry; every parser in QueryProcessor lowercases its input, so
+    only the USE embedding sees the difference.
+
+    Entries expire after ttl_seconds, which bounds how long a changed borough
+    table can be served from cache.
+    """
+
+    _WHITESPACE = re.compile(r'\s+')
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600.0):
+        """
+        Args:
+            max_entries: LRU capacity (0 disables the cache)
+            ttl_seconds: Entry lifetime (0 = never expire)
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def normalize(cls, query_text: str) -> str:
+        return cls._WHITESPACE.sub(' ', query_text.strip().lower())
+
+    def get(self, query_text: str) -> Optional[Any]:
+        """Cached value for the query, or None on a miss"""
+        key = self.normalize(query_text)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and now - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, query_text: str, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        if not self.max_entries:
+            return
+
+        key = self.normalize(query_text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    print("=== Query Cache Testing ===\n")
+
+    cache = QueryCache(max_entries=2, ttl_seconds=0.05)
+
+    cache.put("Mon-Thu in  Brooklyn", 'a')
+    print(f"Normalized hit: {cache.get('mon-thu in brooklyn') == 'a'}")
+
+    cache.put("weekend in manhattan", 'b')
+    cache.put("queens under $100", 'c')
+    print(f"LRU eviction: {cache.get('mon-thu in brooklyn') is None}")
+
+    time.sleep(0.06)
+    print(f"TTL expiry: {cache.get('queens under $100') is None}")
+    print(f"Stats: {cache.stats()}")
+
+    print("\n✅ Query cache tests passed!")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Compiled Query Parser
+Extracts budget, duration, location and schedule from a query in one pass
+"""
+
+import re
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from temporal_encoder import TemporalEncoder
+
+
+def _keywords_overlap(keywords: List[str]) -> bool:
+    """True if two keyword occurrences can share characters (containment or suffix/prefix)"""
+    for a in keywords:
+        for b in keywords:
+            if a != b and (a in b or any(a.endswith(b[:n]) for n in range(1, min(len(a), len(b))))):
+                return True
+    return False
+
+
+class CompiledQueryParser:
+    """
+    Precompiled replacement for QueryProcessor.extract_budget/duration/location
+    and TemporalEncoder.parse_user_schedule/encode_user_schedule
+
+    The query is lowercased once and every component is extracted from it
+    in a single parse() call:
+    - ordered pattern lists (budget, duration, schedule) are compiled once
+      and tried in order, with the interpretation of each pattern resolved
+      at construction instead of per query
+    - location keywords are matched with one combined alternation, so the
+      query is scanned once however many keywords the table has
+    - the schedule is parsed once and encoded from that parse (process_query
+      used to parse it a second time inside encode_user_schedule)
+
+    Results are identical to the per-pattern extractors, which remain the
+    reference implementation.
+    """
+
+    def __init__(self, budget_patterns: List[str], duration_patterns: List[str],
+                 location_keywords: Dict[str, Dict]):
+        """
+        Args:
+            budget_patterns: QueryProcessor.BUDGET_PATTERNS (first match wins)
+            duration_patterns: QueryProcessor.DURATION_PATTERNS (first match wins)
+            location_keywords: QueryProcessor.LOCATION_KEYWORDS (first key in table order wins)
+        """
+        # Budget: pattern + how its groups become {'min', 'max'} (same tests as extract_budget)
+        self.budget_patterns = [
+            (re.compile(p),
+             'range' if ('to' in p or '-' in p or 'between' in p) else
+             'under' if 'under' in p else 'single')
+            for p in budget_patterns
+        ]
+
+        # Duration: pattern + unit
+        self.duration_patterns = [
+            (re.compile(p), 'week' if 'week' in p else 'month' if 'month' in p else 'night')
+            for p in duration_patterns
+        ]
+
+        # Location: one alternation over all keywords. findall() reports
+        # non-overlapping matches, so keywords that can overlap in a query
+        # switch to a zero-width lookahead that reports every start position.
+        self.location_keywords = list(location_keywords.items())
+        self.location_priority = {name: i for i, (name, _) in enumerate(self.location_keywords)}
+        alternation = '|'.join(re.escape(name) for name, _ in self.location_keywords)
+        if _keywords_overlap(list(location_keywords)):
+            alternation = f'(?=({alternation}))'
+        self.location_regex = re.compile(alternation)
+
+        # Schedule
+        self.schedule_patterns = [
+            (re.compile(pattern), [TemporalEncoder.WEEKDAY_MAP[d] for d in days], days)
+            for pattern, days in TemporalEncoder.SCHEDULE_PATTERNS
+        ]
+        self.nights_regex = re.compile(TemporalEncoder.NIGHTS_PER_WEEK_PATTERN)
+        # A day counts as mentioned when its 3-letter prefix occurs (the full name contains it)
+        self.day_prefixes = [(day[:3], TemporalEncoder.WEEKDAY_MAP[day], day)
+                             for day in TemporalEncoder.DAY_NAMES]
+        self.flexible_regex = re.compile('|'.join(map(re.escape, TemporalEncoder.FLEXIBLE_KEYWORDS)))
+
+    def parse_budget(self, query_lower: str) -> Optional[Dict]:
+        for regex, kind in self.budget_patterns:
+            match = regex.search(query_lower)
+            if match:
+                if kind == 'range':
+                    return {'min': float(match.group(1)), 'max': float(match.group(2))}
+                price = float(match.group(1))
+                if kind == 'under':
+                    return {'min': price * 0.5, 'max': price}
+                return {'min': price * 0.8, 'max': price * 1.2}
+        return None
+
+    def parse_duration(self, query_lower: str) -> Optional[Dict]:
+        for regex, unit in self.duration_patterns:
+            match = regex.search(query_lower)
+            if match:
+                num = int(match.group(1))
+                if unit == 'week':
+                    return {'nights': num * 7, 'weeks': num}
+                if unit == 'month':
+                    return {'nights': num * 30, 'weeks': num * 4}
+                return {'nights': num, 'weeks': max(1, num // 7)}
+        return None
+
+    def parse_location(self, query_lower: str) -> Optional[Dict]:
+        found = self.location_regex.findall(query_lower)
+        if not found:
+            return None
+        return self.location_keywords[min(map(self.location_priority.__getitem__, found))][1]
+
+    def parse_schedule(self, query_lower: str) -> Tuple[Dict, np.ndarray]:
+        """
+        Same result as TemporalEncoder.parse_user_schedule(), plus the
+        encode_user_schedule() vector
+
+        Returns:
+            Tuple of (schedule dict, (11,) schedule features)
+        """
+        mask = [0.0] * 7
+        nights_per_week = None
+        specific_days = []
+        flexible = True
+
+        for regex, day_numbers, days in self.schedule_patterns:
+            if regex.search(query_lower):
+                for day_num in day_numbers:
+                    mask[day_num] = 1.0
+                nights_per_week = len(days)
+                specific_days = list(days)
+                flexible = False
+                break
+
+        nights_match = self.nights_regex.search(query_lower)
+        if nights_match:
+            nights_per_week = int(nights_match.group(1))
+
+        mentioned = [(day_num, day) for prefix, day_num, day in self.day_prefixes if prefix in query_lower]
+        if mentioned:
+            for day_num, _ in mentioned:
+                mask[day_num] = 1.0
+            specific_days = [day for _, day in mentioned]
+            if not nights_per_week:
+                nights_per_week = len(specific_days)
+            flexible = False
+
+        if self.flexible_regex.search(query_lower):
+            flexible = True
+            mask = [1.0] * 7
+            if not nights_per_week:
+                nights_per_week = 7
+
+        schedule = {
+            'weekday_mask': np.array(mask),
+            'nights_per_week': nights_per_week,
+            'specific_days': specific_days,
+            'flexible': flexible
+        }
+
+        # encode_schedule() in plain Python (the inputs are 7 floats)
+        active = [i for i in range(7) if mask[i] == 1]
+        features = np.array(mask + [
+            nights_per_week or 7,
+            sum(mask[:5]) / max(sum(mask), 1),
+            float(len(active) > 1 and active[-1] - active[0] == len(active) - 1),
+            float(flexible)
+        ])
+        return schedule, features
+
+    def parse(self, query_text: str) -> Dict:
+        """
+        Extract every query component
+
+        Args:
+            query_text: User's natural language search query
+
+        Returns:
+            Dict with budget, duration, location, schedule (parse_user_schedule
+            format) and schedule_features (encode_user_schedule format)
+        """
+        query_lower = query_text.lower()
+        schedule, schedule_features = self.parse_schedule(query_lower)
+
+        return {
+            'budget': self.parse_budget(query_lower),
+            'duration': self.parse_duration(query_lower),
+            'location': self.parse_location(query_lower),
+            'schedule': schedule,
+            'schedule_features': schedule_features
+        }
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    from query_processor import QueryProcessor
+
+    print("=== Compiled Query Parser Testing ===\n")
+
+    for query in ["Need Mon-Thu in Brooklyn under $150/night",
+                  "Looking for a place around $120 for 7 nights near Penn Station",
+                  "Weekend in downtown Manhattan, $90 to $140, 3 nights per week"]:
+        parsed = QueryProcessor.PARSER.parse(query)
+        print(f"Query: '{query}'")
+        print(f"  Budget: {parsed['budget']}")
+        print(f"  Duration: {parsed['duration']}")
+        print(f"  Location: {parsed['location']}")
+        print(f"  Schedule: {parsed['schedule']['specific_days']}, "
+              f"nights/week={parsed['schedule']['nights_per_week']}\n")
+
+    print(f"Location keywords overlap: {_keywords_overlap(list(QueryProcessor.LOCATION_KEYWORDS))}")
+    print(f"Overlap detected for ['ab', 'bc']: {_keywords_overlap(['ab', 'bc'])}")
+
+    print("\n✅ Compiled query parser tests passed!")
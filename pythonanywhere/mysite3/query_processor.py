@@ -5,9 +5,11 @@ Extracts structured features and schedule from natural language queries
 """
 
 import re
+import time
+import threading
 import numpy as np
 from typing import Dict, Optional, Tuple
-from temporal_encoder import TemporalEncoder
+from query_parser import CompiledQueryParser
 
 
 class QueryProcessor:
@@ -50,31 +52,73 @@ class QueryProcessor:
         'times square': {'lat': 40.7580, 'lng': -73.9855, 'radius': 2.0},
     }
 
+    # All of the above, precompiled (used by process_query; the extract_*
+    # methods below are the per-pattern reference versions)
+    PARSER = CompiledQueryParser(BUDGET_PATTERNS, DURATION_PATTERNS, LOCATION_KEYWORDS)
+
+    # Borough table cache (zat_geo_borough_toplevel rarely changes)
+    BOROUGH_CACHE_TTL_SECONDS = 3600
+    _boroughs = None
+    _boroughs_loaded_at = 0.0
+    _boroughs_lock = threading.Lock()
+
+    @classmethod
+    def load_boroughs(cls, store) -> list:
+        """
+        Borough rows (_id, "Display Borough"), fetched at most once per TTL
+
+        If a refresh fails, the previously loaded table keeps being served.
+
+        Args:
+            store: data_access.ListingStore to read zat_geo_borough_toplevel from
+
+        Returns:
+            List of borough dicts
+
+        Raises:
+            Exception: If the table cannot be fetched and nothing is cached yet
+        """
+        now = time.monotonic()
+        if cls._boroughs is not None and now - cls._boroughs_loaded_at < cls.BOROUGH_CACHE_TTL_SECONDS:
+            return cls._boroughs
+
+        with cls._boroughs_lock:
+            if cls._boroughs is not None and now - cls._boroughs_loaded_at < cls.BOROUGH_CACHE_TTL_SECONDS:
+                return cls._boroughs
+
+            try:
+                cls._boroughs = store.boroughs()
+            except Exception as e:
+                if cls._boroughs is None:
+                    raise
+                print(f"Warning: Borough table refresh failed, serving cached copy: {e}")
+
+            cls._boroughs_loaded_at = now
+            return cls._boroughs
+
     @classmethod
-    def extract_borough(cls, query_text: str, supabase_client) -> Optional[Dict]:
+    def extract_borough(cls, query_text: str, store) -> Optional[Dict]:
         """
         Extract borough from query by looking up zat_geo_borough_toplevel table
 
         Args:
             query_text: User's natural language search query
-            supabase_client: Supabase client instance for database queries
+            store: data_access.ListingStore for the borough table
 
         Returns:
             Dictionary with 'id' and 'name' keys, or None if no borough found
         """
-        if not supabase_client:
+        if not store:
             return None
 
         query_lower = query_text.lower()
 
         try:
-            # Fetch all boroughs from database
-            response = supabase_client.table('zat_geo_borough_toplevel')\
-                .select('_id, "Display Borough"')\
-                .execute()
+            # Borough table (cached, refreshed every BOROUGH_CACHE_TTL_SECONDS)
+            boroughs = cls.load_boroughs(store)
 
             # Check if query mentions any borough
-            for borough in response.data:
+            for borough in boroughs:
                 borough_name = borough.get('Display Borough', '').lower()
                 if borough_name in query_lower:
                     return {
@@ -166,13 +210,13 @@ class QueryProcessor:
         return None
 
     @classmethod
-    def process_query(cls, query_text: str, supabase_client=None) -> Dict:
+    def process_query(cls, query_text: str, store=None) -> Dict:
         """
         Main processing function: Extract all features from query
 
         Args:
             query_text: User's natural language search query
-            supabase_client: Optional Supabase client for borough lookup
+            store: Optional data_access.ListingStore for borough lookup
 
         Returns:
             Dictionary containing:
@@ -181,12 +225,13 @@ class QueryProcessor:
             - schedule_features: np.array (11,) for model
             - parsed: Dict with extracted components (for debugging)
         """
-        # Extract components
-        budget = cls.extract_budget(query_text)
-        duration = cls.extract_duration(query_text)
-        location = cls.extract_location(query_text)
-        schedule = TemporalEncoder.parse_user_schedule(query_text)
-        borough = cls.extract_borough(query_text, supabase_client)
+        # Extract components (one compiled pass over the query)
+        parsed = cls.PARSER.parse(query_text)
+        budget = parsed['budget']
+        duration = parsed['duration']
+        location = parsed['location']
+        schedule = parsed['schedule']
+        borough = cls.extract_borough(query_text, store)
 
         # Build structured features array (12 dimensions)
         # [0:2] Budget (min, max)
@@ -219,8 +264,8 @@ class QueryProcessor:
             0.0, 0.0, 0.0
         ], dtype=np.float32)
 
-        # Build schedule features array (11 dimensions)
-        schedule_features = TemporalEncoder.encode_user_schedule(query_text)
+        # Schedule features array (11 dimensions, encode_user_schedule format)
+        schedule_features = parsed['schedule_features']
 
         return {
             'query_text': query_text,
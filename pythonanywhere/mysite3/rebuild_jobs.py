@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Background Rebuild Jobs
+Runs the fetch → preprocess → encode → publish pipeline off the request thread
+
+POST /rebuild submits a job and returns its id immediately; the job runs
+in a background thread of the worker that accepted it. Its state is
+written to <jobs_dir>/<id>.json after every step, so GET /rebuild/<id>
+answers from any worker process. An exclusive file lock (held for the
+whole run) keeps a second rebuild from starting in any process; shorter
+index writes (/index/upsert) take the same lock through hold().
+"""
+
+import os
+import json
+import time
+import uuid
+import fcntl
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+# Rough peak memory per listing while a batch goes through USE and the
+# listing tower (input strings, encoder activations, 512-d + 128-d outputs
+# and the numpy copies around them)
+BYTES_PER_LISTING_ESTIMATE = 512 * 1024
+
+# Share of the available memory an encoding batch may use
+DEFAULT_MEMORY_FRACTION = 0.25
+
+MIN_BATCH_SIZE = 16
+MAX_BATCH_SIZE = 512
+
+# Finished job files kept on disk
+KEEP_JOBS = 20
+
+# How long hold() waits for another short index write before giving up
+HOLD_TIMEOUT_SECONDS = 30.0
+HOLD_POLL_SECONDS = 0.05
+
+
+class RebuildInProgress(RuntimeError):
+    """Another rebuild holds the lock"""
+
+    def __init__(self, job_id: Optional[str] = None):
+        super().__init__(f"Rebuild {job_id or '(other process)'} is already running")
+        self.job_id = job_id
+
+
+# ============================================================
+# BATCH SIZING
+# ============================================================
+
+def available_memory_bytes() -> Optional[int]:
+    """
+    Memory the process can still use: MemAvailable from /proc/meminfo,
+    capped by the cgroup limit when one is set (None if unknown)
+    """
+    available = None
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError):
+        pass
+
+    if available is None:
+        try:
+            available = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (ValueError, OSError, AttributeError):
+            return None
+
+    # Containers: the cgroup limit minus current usage can be far below host memory
+    for limit_path, usage_path in (('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+                                   ('/sys/fs/cgroup/memory/memory.limit_in_bytes',
+                                    '/sys/fs/cgroup/memory/memory.usage_in_bytes')):
+        try:
+            with open(limit_path) as f:
+                limit = f.read().strip()
+            with open(usage_path) as f:
+                usage = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit():
+            available = min(available, max(int(limit) - usage, 0))
+        break
+
+    return available
+
+
+def encoding_batch_size(available_bytes: Optional[int] = None,
+                        memory_fraction: float = DEFAULT_MEMORY_FRACTION,
+                        min_size: int = MIN_BATCH_SIZE,
+                        max_size: int = MAX_BATCH_SIZE) -> int:
+    """
+    Listings per encoder call that fit in a share of the available memory
+
+    Args:
+        available_bytes: Free memory (default: available_memory_bytes())
+        memory_fraction: Share of it one batch may use
+        min_size: Lower bound (also used when free memory is unknown)
+        max_size: Upper bound (larger batches stop paying off on CPU)
+
+    Returns:
+        Batch size for EmbeddingIndexBuilder.build_index_streaming()
+    """
+    if available_bytes is None:
+        available_bytes = available_memory_bytes()
+    if not available_bytes:
+        return min_size
+
+    fitting = int(available_bytes * memory_fraction) // BYTES_PER_LISTING_ESTIMATE
+    return max(min_size, min(max_size, fitting))
+
+
+# ============================================================
+# JOBS
+# ============================================================
+
+class RebuildJob:
+    """
+    State of one rebuild, written to <jobs_dir>/<id>.json on every change
+
+    The pipeline reports through stage() and progress(); throughput is the
+    number of listings encoded per second since the encode stage started.
+    """
+
+    def __init__(self, job_id: str, jobs_dir: str):
+        self.job_id = job_id
+        self.path = os.path.join(jobs_dir, f"{job_id}.json")
+        self.state = {
+            'job_id': job_id,
+            'status': 'queued',
+            'stage': 'queued',
+            'processed': 0,
+            'total': None,
+            'percent': None,
+            'listings_per_second': None,
+            'elapsed_seconds': 0.0,
+            'stages_seconds': {},
+            'details': {},
+            'pid': os.getpid(),
+            'submitted_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+        self._start = None
+        self._stage_start = None
+        self._encode_start = None
+
+    def stage(self, name: str, total: Optional[int] = None, **details):
+        """Enter a pipeline stage (closes the timing of the previous one)"""
+        now = time.perf_counter()
+        if self._stage_start is not None:
+            self.state['stages_seconds'][self.state['stage']] = round(now - self._stage_start, 3)
+        self._stage_start = now
+        if name == 'encode' and self._encode_start is None:
+            self._encode_start = now
+
+        self.state['stage'] = name
+        if total is not None:
+            self.state['total'] = total
+        self.state['details'].update(details)
+        self._write()
+
+    def progress(self, stage: str, processed: int, total: Optional[int] = None, **details):
+        """
+        Progress callback for build_index_streaming (stage, processed, total)
+
+        Switches stage when the builder moves on (e.g. encode → vector_index).
+        """
+        if stage != self.state['stage']:
+            self.stage(stage)
+
+        self.state['processed'] = int(processed)
+        if total:
+            self.state['total'] = int(total)
+            self.state['percent'] = round(100.0 * processed / total, 1)
+        if self._encode_start is not None and stage == 'encode':
+            elapsed = time.perf_counter() - self._encode_start
+            self.state['listings_per_second'] = round(processed / elapsed, 1) if elapsed > 0 else None
+        self.state['details'].update(details)
+        self._write()
+
+    def run(self, run_fn: Callable[['RebuildJob'], Dict]):
+        self._start = time.perf_counter()
+        self.state['status'] = 'running'
+        self.state['started_at'] = datetime.now().isoformat()
+        self._write()
+
+        try:
+            self.state['result'] = run_fn(self)
+            self.state['status'] = 'succeeded'
+        except Exception as e:
+            self.state['status'] = 'failed'
+            self.state['error'] = f"{type(e).__name__}: {e}"
+            print(f"❌ Rebuild {self.job_id} failed: {self.state['error']}")
+        finally:
+            self.stage('done')
+            self.state['finished_at'] = datetime.now().isoformat()
+            self._write()
+
+    def as_dict(self) -> Dict:
+        return json.loads(json.dumps(self.state))
+
+    def _write(self):
+        if self._start is not None:
+            self.state['elapsed_seconds'] = round(time.perf_counter() - self._start, 3)
+        tmp_path = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, default=str)
+        os.replace(tmp_path, self.path)
+
+
+class RebuildJobRunner:
+    """
+    Runs at most one rebuild at a time across all worker processes
+
+    submit() takes an exclusive, non-blocking flock on lock_path and hands
+    it to a daemon thread, which releases it when the job finishes. The
+    kernel drops the lock if the process dies, so a crashed rebuild never
+    blocks the next one; its job file is then reported as 'interrupted'.
+    """
+
+    def __init__(self, jobs_dir: str, lock_path: Optional[str] = None,
+                 keep_jobs: int = KEEP_JOBS):
+        """
+        Args:
+            jobs_dir: Directory for the job state files
+            lock_path: Lock file shared by every worker (default: <jobs_dir>/rebuild.lock)
+            keep_jobs: Finished job files kept on disk
+        """
+        self.jobs_dir = jobs_dir
+        self.lock_path = lock_path or os.path.join(jobs_dir, 'rebuild.lock')
+        self.keep_jobs = keep_jobs
+        self._threads = {}
+
+    def submit(self, run_fn: Callable[[RebuildJob], Dict]) -> Dict:
+        """
+        Start run_fn(job) in a background thread
+
+        Args:
+            run_fn: The rebuild pipeline; reports through job.stage()/job.progress()
+                    and returns the job result
+
+        Returns:
+            Initial job state
+
+        Raises:
+            RebuildInProgress: If a rebuild is running in any process
+        """
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        lock_file = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.seek(0)
+            running = lock_file.read().strip() or None
+            lock_file.close()
+            raise RebuildInProgress(running)
+
+        job = RebuildJob(uuid.uuid4().hex, self.jobs_dir)
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(job.job_id)
+        lock_file.flush()
+        job._write()
+
+        def run():
+            try:
+                job.run(run_fn)
+            finally:
+                self._threads.pop(job.job_id, None)
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+                self.prune()
+
+        thread = threading.Thread(target=run, name=f"rebuild-{job.job_id[:8]}", daemon=True)
+        self._threads[job.job_id] = thread
+        state = job.as_dict()
+        thread.start()
+        return state
+
+    @contextmanager
+    def hold(self, timeout: float = HOLD_TIMEOUT_SECONDS):
+        """
+        Hold the lock for a synchronous index write (e.g. an upsert)
+
+        Waits up to timeout for another hold() in any process to finish, but
+        not for a rebuild: the rebuild publishes a fresh index anyway, so the
+        caller should retry once it is done.
+
+        Raises:
+            RebuildInProgress: If a rebuild holds the lock, or the lock stays
+                               taken for longer than timeout
+        """
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        lock_file = open(self.lock_path, 'a+')
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    # submit() writes its job id into the lock file; hold() leaves it empty
+                    lock_file.seek(0)
+                    running = lock_file.read().strip() or None
+                    if running or time.monotonic() >= deadline:
+                        raise RebuildInProgress(running)
+                    time.sleep(HOLD_POLL_SECONDS)
+
+            lock_file.seek(0)
+            lock_file.truncate()
+            lock_file.flush()
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """State of a job from its file (None if unknown)"""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.jobs_dir, f"{job_id}.json")) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if state['status'] in ('queued', 'running') and not self.is_locked():
+            state['status'] = 'interrupted'
+        return state
+
+    def is_locked(self) -> bool:
+        """True while a rebuild holds the lock (in this or another process)"""
+        try:
+            with open(self.lock_path, 'a+') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Taken by hold() (empty lock file) is not a rebuild
+                    f.seek(0)
+                    return bool(f.read().strip())
+                fcntl.flock(f, fcntl.LOCK_UN)
+                return False
+        except FileNotFoundError:
+            return False
+
+    def wait(self, job_id: str, timeout: Optional[float] = None):
+        """Block until a job started by this process finishes (tests, CLI)"""
+        thread = self._threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+
+    def prune(self) -> int:
+        """Remove all but the newest keep_jobs finished job files"""
+        try:
+            names = [n for n in os.listdir(self.jobs_dir) if n.endswith('.json')]
+        except FileNotFoundError:
+            return 0
+
+        paths = sorted((os.path.join(self.jobs_dir, n) for n in names), key=os.path.getmtime, reverse=True)
+        removed = 0
+        for path in paths[self.keep_jobs:]:
+            job_id = os.path.basename(path)[:-len('.json')]
+            if job_id in self._threads:
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def stats(self) -> Dict:
+        return {
+            'running': self.is_locked(),
+            'jobs_dir': self.jobs_dir
+        }
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    import tempfile
+
+    print("=== Rebuild Jobs Testing ===\n")
+
+    available = available_memory_bytes()
+    print(f"Available memory: {available / 1e9:.1f} GB" if available else "Available memory: unknown")
+    print(f"Encoding batch size: {encoding_batch_size()}")
+    print(f"Batch size with 256 MB free: {encoding_batch_size(256 * 1024 * 1024)}\n")
+
+    runner = RebuildJobRunner(tempfile.mkdtemp())
+
+    def pipeline(job):
+        job.stage('fetch')
+        job.stage('encode', total=300)
+        for n in (100, 200, 300):
+            time.sleep(0.05)
+            job.progress('encode', n, 300)
+        job.stage('publish')
+        return {'listings_indexed': 300}
+
+    job = runner.submit(pipeline)
+    print(f"Submitted {job['job_id']} ({job['status']})")
+
+    try:
+        runner.submit(pipeline)
+    except RebuildInProgress as e:
+        print(f"Second submit refused: {e}")
+
+    runner.wait(job['job_id'])
+    state = runner.get(job['job_id'])
+    print(f"Finished: {state['status']}, {state['processed']}/{state['total']} listings, "
+          f"{state['listings_per_second']} listings/s")
+    print(f"Stage timings: {state['stages_seconds']}")
+
+    print("\n✅ Rebuild jobs tests passed!")
@@ -9,6 +9,14 @@ import re
 from typing import List, Dict, Optional
 
 
+def _is_contiguous_run(mask: int) -> bool:
+    """True if the set bits of mask are adjacent (e.g. 0b0111000)"""
+    if mask == 0:
+        return False
+    run = mask // (mask & -mask)  # shift out trailing zeros
+    return run & (run + 1) == 0
+
+
 class TemporalEncoder:
     """
     Encodes temporal availability patterns (days/nights per week)
@@ -28,6 +36,17 @@ class TemporalEncoder:
     WEEKDAYS = {'monday', 'tuesday', 'wednesday', 'thursday', 'friday'}
     WEEKENDS = {'saturday', 'sunday'}
 
+    DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+    # User query schedule patterns, tried in order (first match wins)
+    SCHEDULE_PATTERNS = [
+        (r'(mon|monday).*(thu|thursday)', DAY_NAMES[:4]),            # Mon-Thu
+        (r'(mon|monday).*(fri|friday)', DAY_NAMES[:5]),              # Mon-Fri
+        (r'(weekend|fri.*sun|friday.*sunday)', DAY_NAMES[5:]),       # Weekend
+    ]
+    NIGHTS_PER_WEEK_PATTERN = r'(\d+)\s*(night|day)s?\s*(?:per|a|/|each)\s*week'
+    FLEXIBLE_KEYWORDS = ['flexible', 'any day', 'anytime', 'all week']
+
     @classmethod
     def encode_days_available(cls, days_json: List[str]) -> np.ndarray:
         """
@@ -99,6 +118,83 @@ class TemporalEncoder:
             [float(is_flexible)]     # [1 dim]
         ])  # Total: 11 dimensions
 
+    # ------------------------------------------------------------
+    # BATCH ENCODING
+    # ------------------------------------------------------------
+
+    # Every WEEKDAY_MAP spelling gets a token id; per token: day number and
+    # whether it counts as a weekday in the weekday ratio (full names only,
+    # matching the substring test in encode_days_available)
+    TOKENS = list(WEEKDAY_MAP)
+    TOKEN_IDS = dict(zip(TOKENS, range(len(TOKENS))))
+    TOKEN_DAY = np.array(list(map(WEEKDAY_MAP.get, TOKENS)), dtype=np.int64)
+    TOKEN_IS_WEEKDAY = np.isin(TOKENS, sorted(WEEKDAYS)).astype(np.float64)
+
+    # 128-entry lookup tables over 7-bit day masks (bit d = weekday d):
+    # the one-hot day mask, and whether the set days form one contiguous run
+    MASK_BITS = ((np.arange(128)[:, None] >> np.arange(7)) & 1).astype(np.float64)
+    MASK_IS_RUN = np.array(list(map(_is_contiguous_run, range(128))), dtype=bool)
+
+    @classmethod
+    def encode_days_available_batch(cls, days_lists: List[List[str]]) -> np.ndarray:
+        """
+        encode_days_available() for many listings at once
+
+        Every distinct day spelling is normalized to a token id once;
+        the per-listing features are then computed with array operations:
+        a (N, n_tokens) presence matrix gives the distinct-day count, the
+        7-bit day mask indexes the lookup tables for the one-hot mask and
+        consecutiveness, and bincounts give the weekday ratio. The result
+        is identical to calling encode_days_available() per listing.
+
+        Args:
+            days_lists: N day lists (None / non-list entries encode as neutral)
+
+        Returns:
+            numpy array of shape (N, 11)
+        """
+        n = len(days_lists)
+        lists = [d if isinstance(d, list) else [] for d in days_lists]
+        lengths = np.fromiter((len(d) for d in lists), dtype=np.int64, count=n)
+
+        # Intern each distinct spelling, then normalize it once
+        spellings = {}
+        codes = np.fromiter(
+            (spellings.setdefault(day if type(day) is str else str(day), len(spellings))
+             for d in lists for day in d),
+            dtype=np.int64, count=int(lengths.sum())
+        )
+        spelling_tokens = np.array(
+            [cls.TOKEN_IDS.get(s.lower().strip(), -1) for s in spellings], dtype=np.int64
+        )
+        tokens = spelling_tokens[codes]
+        owner = np.repeat(np.arange(n), lengths)
+
+        valid = tokens >= 0
+        owner, tokens = owner[valid], tokens[valid]
+
+        # Token counts with duplicates, distinct tokens, weekday tokens
+        n_days = np.bincount(owner, minlength=n)
+        present = np.zeros((n, len(cls.TOKENS)), dtype=bool)
+        present[owner, tokens] = True
+        days_per_week = present.sum(axis=1)
+        weekday_count = np.bincount(owner, weights=cls.TOKEN_IS_WEEKDAY[tokens], minlength=n)
+
+        # 7-bit day mask → one-hot mask and consecutiveness via lookup tables
+        day_bits = np.zeros((n, 7), dtype=bool)
+        day_bits[owner, cls.TOKEN_DAY[tokens]] = True
+        day_mask = day_bits @ (1 << np.arange(7))
+
+        has_days = n_days > 0
+        encoded = np.zeros((n, 11), dtype=np.float64)
+        encoded[:, :7] = cls.MASK_BITS[day_mask]
+        encoded[:, 7] = days_per_week
+        encoded[:, 8] = np.where(has_days, weekday_count / np.maximum(n_days, 1), 0.5)
+        encoded[:, 9] = (n_days > 1) & cls.MASK_IS_RUN[day_mask]
+        encoded[:, 10] = days_per_week >= 5
+
+        return encoded
+
     @classmethod
     def parse_user_schedule(cls, query_text: str) -> Dict:
         """
@@ -123,35 +219,23 @@ class TemporalEncoder:
             'flexible': True
         }
 
-        # Pattern 1: Mon-Thu / Monday-Thursday (weekday commuter)
-        if re.search(r'(mon|monday).*(thu|thursday)', query_lower):
-            result['weekday_mask'][[0, 1, 2, 3]] = 1  # Mon-Thu
-            result['nights_per_week'] = 4
-            result['specific_days'] = ['monday', 'tuesday', 'wednesday', 'thursday']
-            result['flexible'] = False
-
-        # Pattern 2: Mon-Fri (full work week)
-        elif re.search(r'(mon|monday).*(fri|friday)', query_lower):
-            result['weekday_mask'][[0, 1, 2, 3, 4]] = 1  # Mon-Fri
-            result['nights_per_week'] = 5
-            result['specific_days'] = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
-            result['flexible'] = False
-
-        # Pattern 3: Weekend only
-        elif re.search(r'(weekend|fri.*sun|friday.*sunday)', query_lower):
-            result['weekday_mask'][[5, 6]] = 1  # Sat-Sun
-            result['nights_per_week'] = 2
-            result['specific_days'] = ['saturday', 'sunday']
-            result['flexible'] = False
+        # Patterns 1-3: Mon-Thu (weekday commuter), Mon-Fri (full work week), weekend only
+        for pattern, days in cls.SCHEDULE_PATTERNS:
+            if re.search(pattern, query_lower):
+                result['weekday_mask'][[cls.WEEKDAY_MAP[d] for d in days]] = 1
+                result['nights_per_week'] = len(days)
+                result['specific_days'] = list(days)
+                result['flexible'] = False
+                break
 
         # Pattern 4: "X nights per week" or "X days/week"
-        nights_match = re.search(r'(\d+)\s*(night|day)s?\s*(?:per|a|/|each)\s*week', query_lower)
+        nights_match = re.search(cls.NIGHTS_PER_WEEK_PATTERN, query_lower)
         if nights_match:
             result['nights_per_week'] = int(nights_match.group(1))
 
         # Pattern 5: Specific days mentioned
         specific_days = []
-        for day_name in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']:
+        for day_name in cls.DAY_NAMES:
             if day_name in query_lower or day_name[:3] in query_lower:
                 day_num = cls.WEEKDAY_MAP[day_name]
                 result['weekday_mask'][day_num] = 1
@@ -164,7 +248,7 @@ class TemporalEncoder:
             result['flexible'] = False
 
         # Pattern 6: Keywords suggesting flexibility
-        if any(kw in query_lower for kw in ['flexible', 'any day', 'anytime', 'all week']):
+        if any(kw in query_lower for kw in cls.FLEXIBLE_KEYWORDS):
             result['flexible'] = True
             result['weekday_mask'] = np.ones(7)  # All days
             if not result['nights_per_week']:
@@ -265,6 +349,45 @@ class TemporalEncoder:
 
         return float(compatibility)
 
+    @classmethod
+    def calculate_schedule_compatibility_batch(cls, listing_schedules: np.ndarray,
+                                               user_schedule: np.ndarray) -> np.ndarray:
+        """
+        calculate_schedule_compatibility() for many listings against one user
+
+        Args:
+            listing_schedules: (M, 11) encodings from encode_days_available()
+            user_schedule: 11-dim encoding from encode_user_schedule()
+
+        Returns:
+            (M,) compatibility scores in [0, 1]
+        """
+        listing_schedules = np.asarray(listing_schedules, dtype=np.float64).reshape(-1, 11)
+        user_schedule = np.asarray(user_schedule, dtype=np.float64)
+
+        user_mask = user_schedule[:7]
+        user_nights = user_schedule[7]
+        user_required_days = user_mask.sum()
+
+        # Component 1: Day overlap (40% weight)
+        if user_required_days > 0:
+            day_overlap_score = (listing_schedules[:, :7] @ user_mask) / user_required_days
+        else:
+            day_overlap_score = np.ones(len(listing_schedules))
+
+        # Component 2: Nights per week match (30% weight)
+        listing_nights = listing_schedules[:, 7]
+        nights_score = np.where(
+            (user_nights > 0) & (listing_nights > 0),
+            np.maximum(0, 1 - np.abs(listing_nights - user_nights) / 7),
+            1.0
+        )
+
+        # Component 3: Flexibility bonus (30% weight)
+        flexibility_score = np.where((listing_schedules[:, 10] != 0) | (user_schedule[10] != 0), 1.0, 0.5)
+
+        return 0.40 * day_overlap_score + 0.30 * nights_score + 0.30 * flexibility_score
+
 
 # ============================================================
 # TESTING & EXAMPLES
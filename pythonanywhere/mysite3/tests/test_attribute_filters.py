@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Tests for the attribute columns and hard filter expressions"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attribute_filters import (AttributeFilter, FilterError, attribute_columns,
+                               combine_filters, days_bitmask)
+
+
+def random_index(n, seed=0):
+    rng = np.random.default_rng(seed)
+    index = {
+        'prices': rng.integers(40, 400, n).astype(np.float32),
+        'bedrooms': rng.integers(0, 4, n).astype(np.float32),
+        'bathrooms': rng.integers(1, 3, n).astype(np.float32),
+        'guests': rng.integers(1, 6, n).astype(np.float32),
+        'active': rng.integers(-1, 2, n).astype(np.int8),
+        'days_mask': rng.integers(0, 128, n).astype(np.uint8)
+    }
+    index['prices'][::11] = 0
+    index['bedrooms'][::7] = np.nan
+    return index
+
+
+def test_expressions_match_direct_comparisons():
+    index = random_index(5000)
+    prices, bedrooms, days = index['prices'], index['bedrooms'], index['days_mask']
+    known_price = prices > 0
+
+    cases = [
+        ({'price': {'min': 100, 'max': 150}}, known_price & (prices >= 100) & (prices <= 150)),
+        ({'price': {'lt': 100}}, known_price & (prices < 100)),
+        ({'bedrooms': 2}, bedrooms == 2),
+        ({'bedrooms': {'ne': 2}}, ~np.isnan(bedrooms) & (bedrooms != 2)),
+        ({'guests': {'in': [1, 5]}, 'active': True}, np.isin(index['guests'], [1, 5]) & (index['active'] == 1)),
+        ({'active': False}, index['active'] == 0),
+        ({'days': ['mon', 'Friday']}, (days & 0b10001) == 0b10001),
+        ({'days': {'any': ['saturday', 'sun']}}, (days & 0b1100000) != 0),
+        ({'or': [{'bedrooms': {'gte': 3}}, {'price': {'max': 60}}]},
+         (bedrooms >= 3) | (known_price & (prices <= 60))),
+        ({'not': {'bathrooms': 1}, 'price': {'gt': 300}},
+         (index['bathrooms'] != 1) & known_price & (prices > 300))
+    ]
+    for spec, expected in cases:
+        mask = AttributeFilter.parse(spec).mask(index)
+        assert mask.dtype == bool and np.array_equal(mask, expected), spec
+
+    # Parsed budget: only the max is a hard limit
+    budget = AttributeFilter.budget({'min': 75, 'max': 150})
+    assert np.array_equal(budget.mask(index), known_price & (prices <= 150))
+    assert AttributeFilter.budget(None) is None and AttributeFilter.parse({}) is None
+
+    both = combine_filters(budget, None, AttributeFilter.parse({'bedrooms': 1}))
+    assert np.array_equal(both.mask(index), known_price & (prices <= 150) & (bedrooms == 1))
+
+    # Indexes built before the attribute arrays are not filtered
+    del index['guests']
+    assert AttributeFilter.parse({'guests': 2}).mask(index) is None
+
+
+def test_negation_keeps_unknown_values_out():
+    index = random_index(5000, seed=1)
+    prices, bedrooms = index['prices'], index['bedrooms']
+    known_price, known_bedrooms = prices > 0, ~np.isnan(bedrooms)
+
+    cases = [
+        ({'not': {'bedrooms': 2}}, known_bedrooms & (bedrooms != 2)),
+        ({'not': {'price': {'lt': 100}}}, known_price & (prices >= 100)),
+        ({'not': {'or': [{'bedrooms': {'gte': 3}}, {'price': {'max': 60}}]}},
+         known_bedrooms & (bedrooms < 3) & known_price & (prices > 60)),
+        # not (A and B) holds when either part is known to fail, even if the other is unknown
+        ({'not': {'bedrooms': 2, 'price': {'gt': 300}}},
+         (known_bedrooms & (bedrooms != 2)) | (known_price & (prices <= 300))),
+        ({'not': {'not': {'bedrooms': {'lte': 1}}}}, known_bedrooms & (bedrooms <= 1)),
+        ({'not': {'days': ['monday']}}, (index['days_mask'] & 1) == 0)
+    ]
+    for spec, expected in cases:
+        assert np.array_equal(AttributeFilter.parse(spec).mask(index), expected), spec
+
+    # Unknown active flag (-1) is neither active nor inactive
+    active = np.array([-1, 0, 1], dtype=np.int8)
+    flags = {'active': active}
+    assert AttributeFilter.parse({'not': {'active': True}}).mask(flags).tolist() == [False, True, False]
+    assert AttributeFilter.parse({'not': {'active': False}}).mask(flags).tolist() == [False, False, True]
+    assert AttributeFilter.parse({'active': True}).mask(flags).tolist() == [False, False, True]
+    assert np.array_equal(AttributeFilter.parse({'not': {'active': True}}).mask(index), index['active'] == 0)
+
+    unknown = ~known_bedrooms | ~known_price
+    assert not AttributeFilter.parse({'not': {'bedrooms': 2}}).mask(index)[~known_bedrooms].any()
+    assert not AttributeFilter.parse({'not': {'price': {'lt': 100}}}).mask(index)[~known_price].any()
+    assert unknown.any()
+
+
+def test_rejects_malformed_filters():
+    for spec in [{'sqft': 300}, {'price': {'around': 100}}, {'price': '100'}, {'bedrooms': {}},
+                 {'active': 1}, {'days': ['someday']}, {'days': {'most': ['monday']}},
+                 {'or': []}, {'not': {}}, ['price']]:
+        try:
+            AttributeFilter.parse(spec)
+            assert False, f"{spec} should be rejected"
+        except FilterError:
+            pass
+
+
+def test_attribute_columns_from_listing_rows():
+    rows = [
+        {'Features - Qty Bedrooms': 2, 'Features - Qty Bathrooms': '1.5', 'Features - Qty Guests': 4,
+         'Active': True, 'Days Available (List of Days)': ['monday', 'Tuesday', 'sunday', 'x']},
+        {'Features - Qty Bedrooms': None, 'Active': False, 'Days Available (List of Days)': 'monday'},
+        None
+    ]
+    columns = attribute_columns([{'raw_data': r, 'temporal_features': np.zeros(11)} for r in rows])
+
+    assert columns['bedrooms'][0] == 2 and np.isnan(columns['bedrooms'][1:]).all()
+    assert columns['bathrooms'][0] == 1.5 and columns['guests'][0] == 4
+    assert columns['active'].tolist() == [1, 0, -1]
+    assert columns['days_mask'].tolist() == [0b1000011, 0, 0]
+    assert days_bitmask({'Days Available (List of Days)': ['sat']}) == 1 << 5
+
+
+if __name__ == '__main__':
+    print("🧪 Attribute filters")
+    for test in [test_expressions_match_direct_comparisons,
+                 test_negation_keeps_unknown_values_out,
+                 test_rejects_malformed_filters,
+                 test_attribute_columns_from_listing_rows]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All attribute filter tests passed!")
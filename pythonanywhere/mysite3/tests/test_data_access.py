@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Tests for the pluggable listing stores (data_access.py)"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_access import InMemoryListingStore, ListingStore, create_store, write_fixtures
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures')
+
+
+def test_memory_store_matches_its_source():
+    synthetic = create_store('synthetic')
+    directory = tempfile.mkdtemp()
+    assert write_fixtures(synthetic, directory, limit=300, page_size=128) == 300
+    memory = InMemoryListingStore.from_fixtures(directory)
+
+    select = '_id, "Location - Borough", "Modified Date"'
+    last_id, pages = None, 0
+    while True:
+        page = memory.listing_page(select, 128, after_id=last_id)
+        if not page:
+            break
+        assert page == synthetic.listing_page(select, len(page), after_id=last_id)
+        last_id, pages = page[-1]['_id'], pages + 1
+    assert pages == 3
+
+    ids = [row['_id'] for row in memory.listing_page('_id', 5)]
+    assert [r['_id'] for r in memory.get_listings(ids[::-1] + ['missing'])] == ids
+    assert memory.get_listing('missing') is None
+    assert synthetic.get_listing('missing') is None
+    assert memory.get_listing(ids[2]) == synthetic.get_listing(ids[2])
+
+    borough = memory.boroughs()[1]
+    in_borough = memory.borough_listing_ids(borough['_id'])
+    assert 0 < len(in_borough) < 300
+    assert set(in_borough) == {lid for lid in synthetic.borough_listing_ids(borough['_id'])
+                               if lid <= last_id}
+    assert memory.count_listings() == 300
+    assert memory.count_listings('2999-01-01') == 0
+    assert memory.ping() == 'connected'
+
+
+def test_shipped_fixtures_feed_preprocessor_and_borough_lookup():
+    from listing_preprocessor import ListingPreprocessor
+    from query_processor import QueryProcessor
+
+    store = create_store('memory')
+    assert store.backend == 'memory' and store.count_listings() > 0
+
+    preprocessor = ListingPreprocessor(store=store)
+    chunks = list(preprocessor.iter_preprocessed_chunks(page_size=64))
+    assert sum(len(c) for c in chunks) == store.count_listings()
+    assert all(listing['text'] for chunk in chunks for listing in chunk)
+
+    QueryProcessor._boroughs = None
+    borough = QueryProcessor.extract_borough('quiet room in brooklyn mon-thu', store)
+    assert borough == {'id': 'borough-brooklyn', 'name': 'Brooklyn'}
+
+
+def test_store_interface_is_abstract():
+    assert ListingStore.__abstractmethods__ == {
+        'listing_page', 'count_listings', 'get_listings', 'borough_listing_ids', 'boroughs'
+    }
+
+    class PartialStore(ListingStore):
+        def listing_page(self, select, page_size, after_id=None, listing_ids=None, modified_since=None):
+            return []
+
+    for store_class in (ListingStore, PartialStore):
+        try:
+            store_class()
+            assert False, f"{store_class.__name__} should not be instantiable"
+        except TypeError as e:
+            assert 'abstract' in str(e)
+
+
+def test_unknown_backend():
+    try:
+        create_store('mysql')
+        assert False, "unknown backends should be rejected"
+    except ValueError as e:
+        assert 'mysql' in str(e)
+
+
+if __name__ == '__main__':
+    print("🧪 Data access")
+    for test in [test_memory_store_matches_its_source,
+                 test_shipped_fixtures_feed_preprocessor_and_borough_lookup,
+                 test_store_interface_is_abstract,
+                 test_unknown_backend]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All data access tests passed!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Tests for the offline Supabase stand-in used by benchmark_match_offline.py"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_supabase import make_fake_supabase
+
+
+def test_keyset_pagination_covers_corpus():
+    client = make_fake_supabase(2500, seed=3)
+    seen, last_id = [], None
+    while True:
+        query = client.table('listing').select('_id, "Name"').order('_id').limit(1000)
+        if last_id is not None:
+            query = query.gt('_id', last_id)
+        page = query.execute().data
+        if not page:
+            break
+        seen.extend(row['_id'] for row in page)
+        last_id = page[-1]['_id']
+
+    assert len(seen) == 2500
+    assert seen == sorted(set(seen))
+    assert client.table('listing').select('_id', count='exact').limit(1).execute().count == 2500
+
+
+def test_filters_and_single():
+    client = make_fake_supabase(500, seed=1)
+    table = client.tables['listing']
+
+    first = table.row(7)
+    assert first == make_fake_supabase(500, seed=1).tables['listing'].row(7)   # deterministic
+
+    fetched = client.table('listing').select('*').eq('_id', first['_id']).single().execute().data
+    assert fetched['_id'] == first['_id']
+
+    ids = [table.listing_id(i) for i in (3, 11, 400)] + ['missing']
+    rows = client.table('listing').select('_id').in_('_id', ids).execute().data
+    assert [r['_id'] for r in rows] == sorted(ids[:3])
+
+    borough = first['Location - Borough']
+    matches = client.table('listing').select('_id').eq('"Location - Borough"', borough).execute().data
+    assert 0 < len(matches) < 500
+    assert client.requests == 3
+
+    try:
+        client.table('listing').select('_id').eq('_id', 'missing').single().execute()
+        assert False, "single() should fail without exactly one row"
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    print("🧪 Fake Supabase")
+    for test in [test_keyset_pagination_covers_corpus, test_filters_and_single]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All fake Supabase tests passed!")
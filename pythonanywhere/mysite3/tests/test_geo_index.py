@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Tests for the geospatial grid pre-filter"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo_index import GeoGridIndex, haversine_km, listing_coordinates
+
+
+def random_coordinates(n, seed=0):
+    rng = np.random.default_rng(seed)
+    coordinates = np.column_stack([rng.normal(40.72, 0.1, n), rng.normal(-73.95, 0.12, n)])
+    coordinates[::17] = np.nan
+    return coordinates.astype(np.float32)
+
+
+def test_matches_full_haversine_scan():
+    coordinates = random_coordinates(20000)
+    lats, lngs = coordinates[:, 0].astype(np.float64), coordinates[:, 1].astype(np.float64)
+
+    for cell_km in (0.5, 1.0, 5.0):
+        geo = GeoGridIndex.build(coordinates, cell_km=cell_km)
+        assert geo.stats()['located'] == 20000 - len(range(0, 20000, 17))
+
+        for lat, lng, radius in [(40.7081, -73.9571, 2.0), (40.6782, -73.9442, 6.0),
+                                 (40.72, -73.95, 300.0), (51.5, -0.12, 10.0)]:
+            expected = np.flatnonzero(haversine_km(lat, lng, lats, lngs) <= radius)
+            rows = geo.rows_within(lat, lng, radius)
+            assert np.array_equal(rows, expected), (cell_km, lat, lng, radius)
+
+            mask = geo.mask_within(lat, lng, radius)
+            assert mask.shape == (20000,) and np.array_equal(np.flatnonzero(mask), expected)
+
+    # Candidate cells cover the circle (and a little more)
+    geo = GeoGridIndex.build(coordinates)
+    candidates = geo.candidate_rows(40.7081, -73.9571, 2.0)
+    assert set(geo.rows_within(40.7081, -73.9571, 2.0)) <= set(candidates.tolist())
+    assert len(candidates) < 20000 / 4
+
+
+def test_extended_matches_full_build():
+    coordinates = random_coordinates(20000)
+    appended = random_coordinates(300, seed=1)
+    combined = np.concatenate([coordinates, appended])
+
+    extended = GeoGridIndex.build(coordinates).extended(combined)
+    rebuilt = GeoGridIndex.build(combined)
+    assert extended.stats()['listings'] == 20300 and extended.stats()['appended'] == 300
+
+    for lat, lng, radius in [(40.7081, -73.9571, 2.0), (40.72, -73.95, 300.0), (51.5, -0.12, 10.0)]:
+        assert np.array_equal(extended.rows_within(lat, lng, radius), rebuilt.rows_within(lat, lng, radius))
+        assert np.array_equal(extended.mask_within(lat, lng, radius), rebuilt.mask_within(lat, lng, radius))
+
+    # Extending again replaces the appended rows rather than adding to them
+    again = extended.extended(combined[:20100])
+    assert np.array_equal(again.mask_within(40.72, -73.95, 300.0),
+                          GeoGridIndex.build(combined[:20100]).mask_within(40.72, -73.95, 300.0))
+
+
+def test_listing_coordinates():
+    assert listing_coordinates({'Location - Address': {'lat': '40.7', 'lng': -73.9}}) == (40.7, -73.9)
+    for raw in (None, {}, {'Location - Address': 'Brooklyn'},
+                {'Location - Address': {'lat': 0, 'lng': 0}},
+                {'Location - Address': {'lat': 'x', 'lng': 1}}):
+        assert np.isnan(listing_coordinates(raw)).all()
+
+    geo = GeoGridIndex.build(np.full((3, 2), np.nan, dtype=np.float32))
+    assert geo.stats()['cells'] == 0
+    assert not geo.mask_within(40.7, -73.9, 5.0).any()
+
+
+if __name__ == '__main__':
+    print("🧪 Geo grid index")
+    for test in [test_matches_full_haversine_scan, test_extended_matches_full_build,
+                 test_listing_coordinates]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All geo index tests passed!")
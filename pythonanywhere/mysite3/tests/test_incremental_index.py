@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Tests for incremental index updates: upsert/delete, delta persistence and the overlay"""
+import os
+import sys
+import tempfile
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import index_versions
+from data_access import create_store
+from geo_index import GeoGridIndex
+from fake_model import HashingTextModel, make_index_builder
+from listing_preprocessor import ListingPreprocessor
+from index_overlay import StackedRows
+from listing_metadata import decode_metadata
+from rebuild_jobs import RebuildJobRunner
+
+
+def fixture_listings():
+    preprocessor = ListingPreprocessor(store=create_store('memory'))
+    return preprocessor.preprocess_all(preprocessor.fetch_all_listings())
+
+
+def make_builder():
+    model = HashingTextModel()
+    return make_index_builder(model, model)
+
+
+def changed_listings(listings):
+    """Base listings, then the upserts (3 edited + 5 new) and deletes applied on top"""
+    base, new = listings[:-5], listings[-5:]
+    edited = [dict(l, text=l['text'] + ' Newly renovated with a rooftop garden.') for l in base[10:13]]
+    deleted = [base[0]['listing_id'], base[20]['listing_id']]
+    return base, edited + new, deleted
+
+
+def expected_listings(base, upserts, deleted):
+    by_id = {l['listing_id']: l for l in base}
+    by_id.update({l['listing_id']: l for l in upserts})
+    return [l for lid, l in by_id.items() if lid not in deleted]
+
+
+def app_module():
+    """app module on the in-memory store (search_embeddings is the serving search path)"""
+    # app.py imports TensorFlow for the user tower; the index itself does not need it
+    pytest.importorskip('tensorflow')
+    os.environ.setdefault('DATA_BACKEND', 'memory')
+    os.environ.setdefault('INDEX_WATCH_INTERVAL_SECONDS', '0')
+    os.environ.setdefault('REBUILD_JOBS_DIR', tempfile.mkdtemp())
+    import app
+    return app
+
+
+def search(builder, index, query, k=10):
+    return app_module().search_embeddings(index, builder.model.embed_texts([query])[0], k, exact=True)
+
+
+def assert_same_listings(builder, index, rebuilt):
+    live = builder.live_rows(index)
+    assert set(live) == set(rebuilt['listing_ids'])
+    assert builder.n_listings(index) == len(rebuilt['listing_ids'])
+
+    rows = np.array([live[lid] for lid in rebuilt['listing_ids']])
+    np.testing.assert_allclose(builder.row_embeddings(index, rows), rebuilt['embeddings'], atol=1e-6)
+    for name in builder.ROW_ARRAYS:
+        if name == 'listing_metadata':
+            assert decode_metadata(index[name], rows) == decode_metadata(rebuilt[name], range(len(rows)))
+            continue
+        expected = np.asarray(rebuilt[name])
+        assert np.array_equal(index[name][rows], expected, equal_nan=expected.dtype.kind == 'f'), name
+
+
+def assert_same_search(builder, index, rebuilt):
+    for query in ['Quiet room in Brooklyn', 'rooftop garden', 'studio near the park']:
+        rows, scores = search(builder, index, query)
+        expected_rows, expected_scores = search(builder, rebuilt, query)
+        np.testing.assert_allclose(scores, expected_scores, atol=1e-5)
+
+        # Fixture texts repeat, so only results scoring above the k-th are order-free of ties
+        cutoff = expected_scores[-1] + 1e-5
+        assert ({index['listing_ids'][r] for r, s in zip(rows, scores) if s > cutoff} ==
+                {rebuilt['listing_ids'][r] for r, s in zip(expected_rows, expected_scores) if s > cutoff})
+
+
+def test_upsert_delete_round_trip_matches_full_rebuild():
+    builder = make_builder()
+    base, upserts, deleted = changed_listings(fixture_listings())
+    dirpath = os.path.join(tempfile.mkdtemp(), 'index')
+
+    builder.save_index(builder.build_index(base, build_vector_index=False), dirpath)
+    loaded = builder.load_index(dirpath)
+
+    index, stats = builder.upsert(loaded, upserts)
+    index, n_deleted = builder.delete(index, deleted + ['no-such-listing'])
+    assert (stats['inserted'], stats['updated'], n_deleted) == (5, 3, 2)
+
+    # Base arrays are shared with the loaded (memory-mapped) index, not copied
+    assert index['embeddings'] is loaded['embeddings']
+    assert isinstance(index['embeddings'], np.memmap)
+    assert isinstance(index['prices'], StackedRows) and index['prices'].base is loaded['prices']
+    assert index['overlay'].n_segment == 8
+
+    rebuilt = builder.build_index(expected_listings(base, upserts, deleted), build_vector_index=False)
+    assert_same_listings(builder, index, rebuilt)
+
+    assert builder.save_incremental(index, dirpath) == 'delta'
+    reloaded = builder.load_index(dirpath)
+    assert isinstance(reloaded['embeddings'], np.memmap)
+    assert_same_listings(builder, reloaded, rebuilt)
+
+    compacted = builder.compact(reloaded)
+    assert compacted.get('overlay') is None
+    assert_same_listings(builder, compacted, rebuilt)
+
+
+def test_overlay_search_matches_full_rebuild():
+    builder = make_builder()
+    base, upserts, deleted = changed_listings(fixture_listings())
+    index, _ = builder.upsert(builder.build_index(base, build_vector_index=False), upserts)
+    index, _ = builder.delete(index, deleted)
+
+    rebuilt = builder.build_index(expected_listings(base, upserts, deleted), build_vector_index=False)
+    assert_same_search(builder, index, rebuilt)
+    assert_same_search(builder, builder.compact(index), rebuilt)
+
+
+def test_upserts_from_two_workers_both_survive():
+    base, upserts, deleted = changed_listings(fixture_listings())
+    root = tempfile.mkdtemp()
+    first, second = make_builder(), make_builder()
+    first.publish_version(root, first.build_index(base, build_vector_index=False))
+
+    # Two workers serving the same version; neither reloads between the upserts
+    served_first = first.load_index(index_versions.resolve(root))
+    served_second = second.load_index(index_versions.resolve(root))
+    runner = RebuildJobRunner(tempfile.mkdtemp())
+
+    with runner.hold():
+        served_first, persisted = first.update_persisted(
+            root, served_first, lambda index: first.upsert(index, upserts[:4])[0])
+    assert persisted == 'delta'
+
+    with runner.hold():
+        served_second, persisted = second.update_persisted(
+            root, served_second, lambda index: second.delete(second.upsert(index, upserts[4:])[0], deleted)[0])
+    assert persisted == 'delta'
+
+    rebuilt = first.build_index(expected_listings(base, upserts, deleted), build_vector_index=False)
+    assert_same_listings(second, served_second, rebuilt)
+    assert_same_listings(first, first.load_index(index_versions.resolve(root)), rebuilt)
+
+    # Unchanged index: nothing written, the current in-memory index is reused
+    assert second.update_persisted(root, served_second, lambda index: index) == (served_second, None)
+
+
+def test_upsert_of_deleted_listing_reinserts_it():
+    builder = make_builder()
+    base, _, _ = changed_listings(fixture_listings())
+    index = builder.build_index(base, build_vector_index=False)
+
+    index, _ = builder.delete(index, [base[5]['listing_id']])
+    index, stats = builder.upsert(index, [base[5]])
+
+    assert stats['inserted'] == 1
+    assert builder.n_listings(index) == len(base)
+    rows, _ = search(builder, index, base[5]['text'], k=1)
+    assert index['listing_ids'][rows[0]] == base[5]['listing_id']
+
+
+def test_overlay_search_through_quantized_and_ivf_base():
+    builder = make_builder()
+    base, upserts, deleted = changed_listings(fixture_listings())
+    index = builder.build_index(base, build_vector_index=True, quantization='int8')
+    index, _ = builder.upsert(index, upserts)
+    index, _ = builder.delete(index, deleted)
+
+    app = app_module()
+    for listing in upserts:
+        query = builder.model.embed_texts([listing['text']])[0]
+        for exact in (False, True):
+            rows, _ = app.search_embeddings(index, query, 5, exact=exact)
+            ids = [index['listing_ids'][r] for r in rows]
+            assert ids[0] == listing['listing_id']
+            assert not set(ids) & set(deleted)
+            assert all(index['overlay'].live[rows])
+
+    compacted = builder.compact(index)
+    assert len(compacted['quantized']) == len(compacted['listing_ids']) == builder.n_listings(index)
+
+
+def test_geo_index_kept_current_with_the_overlay():
+    builder = make_builder()
+    base, upserts, deleted = changed_listings(fixture_listings())
+    index = builder.build_index(base)
+    base_geo = index['geo_index']
+    index, _ = builder.upsert(index, upserts)
+    index, _ = builder.delete(index, deleted)
+
+    # Built with the merged index (not lazily on the first request), grid shared with the base
+    geo = index['geo_index']
+    assert geo is not None and geo.n_listings == builder.n_listings(index) + index['overlay'].n_dead
+    assert geo.cell_rows is base_geo.cell_rows
+
+    rebuilt = GeoGridIndex.build(np.asarray(index['coordinates']))
+    for lat, lng, radius in [(40.7081, -73.9571, 2.0), (40.6782, -73.9442, 6.0), (40.72, -73.95, 300.0)]:
+        assert np.array_equal(geo.mask_within(lat, lng, radius), rebuilt.mask_within(lat, lng, radius))
+
+    assert builder.compact(index)['geo_index'].n_listings == builder.n_listings(index)
+
+
+if __name__ == '__main__':
+    print("🧪 Incremental index updates")
+    for test in [test_upsert_delete_round_trip_matches_full_rebuild,
+                 test_overlay_search_matches_full_rebuild,
+                 test_upserts_from_two_workers_both_survive,
+                 test_upsert_of_deleted_listing_reinserts_it,
+                 test_overlay_search_through_quantized_and_ivf_base,
+                 test_geo_index_kept_current_with_the_overlay]:
+        try:
+            test()
+        except pytest.skip.Exception as e:
+            print(f"  ⏭️  {test.__name__}: {e}")
+            continue
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All incremental index tests passed!")
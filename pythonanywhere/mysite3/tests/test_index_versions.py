@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Tests for versioned index directories and the hot-swap watcher"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import index_store
+import index_versions
+from index_versions import IndexWatcher
+
+
+def saver(n):
+    return lambda path: index_store.save_index_dir(path, {
+        'listing_ids': index_store.encode_ids([f"id{i}" for i in range(n)]),
+        'embeddings': np.zeros((n, 4), dtype=np.float32)
+    })
+
+
+def load(path):
+    arrays, _ = index_store.load_index_dir(path)
+    return {'listing_ids': index_store.decode_ids(arrays['listing_ids'])}
+
+
+def test_publish_and_prune():
+    root = os.path.join(tempfile.mkdtemp(), 'listing_embeddings')
+    saver(2)(root)                      # pre-versioning index directory
+    assert index_versions.resolve(root) == root
+
+    paths = [index_versions.write_version(root, saver(n), keep=1) for n in (3, 4, 5)]
+    assert index_versions.resolve(root) == paths[-1]
+    assert sorted(os.listdir(root)) == ['CURRENT', 'versions']
+    assert sorted(os.listdir(os.path.join(root, 'versions'))) == sorted(os.path.basename(p) for p in paths[1:])
+    assert len(load(index_versions.resolve(root))['listing_ids']) == 5
+
+
+def test_prune_leaves_staging_directories_of_running_writers():
+    root = os.path.join(tempfile.mkdtemp(), 'listing_embeddings')
+    index_versions.write_version(root, saver(3))
+    versions_dir = os.path.join(root, 'versions')
+
+    # A concurrent writer (this process) halfway through its new version
+    writing = f"{index_versions.new_version_name()}.tmp-{os.getpid()}"
+    saver(4)(os.path.join(versions_dir, writing))
+
+    # ...and one left behind by a writer that crashed
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    crashed = f"{index_versions.new_version_name()}.tmp-{dead.pid}"
+    os.makedirs(os.path.join(versions_dir, crashed))
+
+    latest = index_versions.write_version(root, saver(5), keep=0)
+    assert sorted(os.listdir(versions_dir)) == sorted([os.path.basename(latest), writing])
+    assert len(load(os.path.join(versions_dir, writing))['listing_ids']) == 4
+
+
+def test_reads_during_an_in_place_rewrite_see_one_whole_index():
+    path = os.path.join(tempfile.mkdtemp(), 'listing_embeddings')
+    saver(1)(path)
+    stop = threading.Event()
+
+    def rewrite():
+        n = 1
+        while not stop.is_set():
+            n = n % 6 + 1
+            saver(n)(path)
+
+    writer = threading.Thread(target=rewrite)
+    writer.start()
+    try:
+        for _ in range(300):
+            arrays, manifest = index_store.load_index_dir(path, mmap=False)
+            n = manifest['n_listings']
+            assert len(arrays['listing_ids']) == n and arrays['embeddings'].shape == (n, 4)
+    finally:
+        stop.set()
+        writer.join()
+
+
+def test_watcher_swaps_on_change():
+    root = os.path.join(tempfile.mkdtemp(), 'listing_embeddings')
+    served = {}
+    watcher = IndexWatcher(root, load, lambda index: served.update(index=index), interval_seconds=0)
+
+    index_versions.write_version(root, saver(3))
+    served['index'] = watcher.load()
+    assert not watcher.check()
+
+    index_versions.write_version(root, saver(7))
+    assert watcher.check()
+    assert len(served['index']['listing_ids']) == 7
+
+    # A rewritten delta segment of the current version also counts as a change
+    with open(os.path.join(index_versions.resolve(root), index_versions.DELTA_FILE), 'wb') as f:
+        np.savez(f, listing_ids=index_store.encode_ids([]))
+    assert watcher.check()
+
+    watcher.mark_current()
+    assert not watcher.check()
+    assert watcher.stats()['swaps'] == 2
+
+
+def test_watcher_without_index():
+    root = os.path.join(tempfile.mkdtemp(), 'listing_embeddings')
+    watcher = IndexWatcher(root, load, lambda index: None, interval_seconds=0)
+    watcher.mark_current()
+    assert not watcher.check()          # nothing published yet: no reload attempts
+
+
+if __name__ == '__main__':
+    print("🧪 Index versions")
+    for test in [test_publish_and_prune, test_prune_leaves_staging_directories_of_running_writers,
+                 test_reads_during_an_in_place_rewrite_see_one_whole_index,
+                 test_watcher_swaps_on_change, test_watcher_without_index]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All index version tests passed!")
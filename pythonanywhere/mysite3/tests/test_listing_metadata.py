@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests for the per-listing metadata stored with the embedding index"""
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listing_metadata import (DESCRIPTION_PREVIEW_CHARS, METADATA_FIELDS, MetadataTable,
+                              decode_metadata, encode_metadata, metadata_record)
+
+
+RAW_LISTINGS = [
+    {
+        '_id': 'a1',
+        'Name': 'Chambre ensoleillée à Williamsburg ☀️',
+        'Description': 'Près du métro — 日本語も話せます. ' * 20,
+        'Location - City': 'Brooklyn',
+        'Location - Hood': 'Williamsburg',
+        'Price number (for map)': np.float64(140.0),
+        'Features - Qty Bedrooms': np.int64(1),
+        'Features - Qty Bathrooms': float('nan'),
+        'Days Available (List of Days)': np.array(['Monday', 'Tuesday']),
+        'Location - Address': {'lat': np.float32(40.71), 'lng': -73.96, 'address': 'hidden'},
+        'Kitchen Type': 'Full'
+    },
+    None,
+    {'_id': 'a3', 'Name': 'Ünïcödé loft'},
+    {},
+    {'_id': 'a5', 'Description': '', 'Location - Address': 'not a dict'}
+]
+
+
+def test_round_trip_with_unicode_and_missing_fields():
+    records = [metadata_record(raw) for raw in RAW_LISTINGS]
+    decoded = decode_metadata(encode_metadata(records), range(len(records)))
+
+    first = decoded[0]
+    assert first['Name'] == RAW_LISTINGS[0]['Name']
+    assert first['Description'] == RAW_LISTINGS[0]['Description'][:DESCRIPTION_PREVIEW_CHARS]
+    assert first['Price number (for map)'] == 140.0
+    assert first['Features - Qty Bedrooms'] == 1
+    assert first['Features - Qty Bathrooms'] is None
+    assert first['Days Available (List of Days)'] == ['Monday', 'Tuesday']
+    assert first['Location - Address'] == {'lat': float(np.float32(40.71)), 'lng': -73.96}
+    assert 'Kitchen Type' not in first
+
+    # No row / empty row → None; fields missing from a row → None, address only when a dict
+    assert decoded[1] is None and decoded[3] is None
+    assert decoded[2] == {**{field: None for field in METADATA_FIELDS}, '_id': 'a3', 'Name': 'Ünïcödé loft'}
+    assert decoded[4]['Description'] == '' and 'Location - Address' not in decoded[4]
+
+
+def test_decode_selected_rows_in_any_order():
+    records = [metadata_record({'_id': f"id{i}", 'Name': f"Listing {i} ✓"}) for i in range(50)]
+    table = encode_metadata(records)
+
+    rows = [49, 0, 17, 17, 3]
+    assert [r['_id'] for r in decode_metadata(table, rows)] == [f"id{i}" for i in rows]
+    assert decode_metadata(table, np.array([], dtype=np.int64)) == []
+    assert decode_metadata(encode_metadata([]), []) == []
+
+
+def test_table_is_unpadded_and_persists():
+    records = [metadata_record(raw) for raw in RAW_LISTINGS] * 20
+    table = encode_metadata(records)
+    encoded = [len(json_bytes) for json_bytes in (table.raw(row) for row in range(len(table)))]
+
+    # One buffer of exactly the encoded bytes, no padding to the longest record
+    assert table.data.dtype == np.uint8 and table.offsets.dtype == np.int64
+    assert len(table.data) == sum(encoded) < max(encoded) * len(table)
+
+    restored = MetadataTable.from_arrays(table.to_arrays())
+    assert restored.records() == table.records()
+    assert MetadataTable.has_arrays(table.to_arrays()) and not MetadataTable.has_arrays({})
+
+
+def test_gather_and_concatenate():
+    first = encode_metadata([{'_id': 'a'}, None, {'_id': 'ç'}])
+    second = encode_metadata([{'_id': 'd'}])
+    combined = MetadataTable.concatenate([first, second])
+
+    assert [r and r['_id'] for r in combined.records()] == ['a', None, 'ç', 'd']
+    assert combined[np.array([True, False, True, True])].records() == [{'_id': 'a'}, {'_id': 'ç'}, {'_id': 'd'}]
+    assert combined[1:3].records() == [None, {'_id': 'ç'}]
+    assert combined[2] == '{"_id":"ç"}'.encode('utf-8') and combined[1] == b''
+    assert MetadataTable.concatenate([combined[[3, 0]], first[[]]]).records() == [{'_id': 'd'}, {'_id': 'a'}]
+
+
+def test_fixed_width_tables_convert():
+    records = [{'_id': 'a', 'Name': 'Café'}, None, {'_id': 'b'}]
+    legacy = np.array([json.dumps(r, ensure_ascii=False).encode('utf-8') if r else b'' for r in records], dtype='S64')
+    assert MetadataTable.from_fixed_width(legacy).records() == records
+
+
+if __name__ == '__main__':
+    print("🧪 Listing metadata")
+    for test in [test_round_trip_with_unicode_and_missing_fields, test_decode_selected_rows_in_any_order,
+                 test_table_is_unpadded_and_persists, test_gather_and_concatenate,
+                 test_fixed_width_tables_convert]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All listing metadata tests passed!")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Tests for the per-row and columnar listing preprocessing paths"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listing_preprocessor import ListingPreprocessor
+from data_access import InMemoryListingStore, SupabaseListingStore, create_store
+from fake_supabase import make_fake_supabase
+
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday',
+        'mon', 'tues', 'thurs', 'sun', 'Holiday']
+
+
+def listing_table(n, seed=0):
+    """Listing rows keyed like PostgREST responses, with None/NaN/''/bad-number gaps"""
+    rng = np.random.default_rng(seed)
+
+    def sometimes(values, p_missing=0.15, missing=None):
+        return [missing if rng.random() < p_missing else v for v in values]
+
+    def days():
+        return None if rng.random() < 0.1 else list(rng.choice(DAYS, size=rng.integers(0, 8)))
+
+    prices = sometimes([str(int(p)) for p in rng.integers(60, 400, n)])
+    prices[3] = 'call us'  # unparseable → dropped by both paths
+    return pd.DataFrame({
+        '_id': [f"{i:04d}x{rng.integers(10**6)}" for i in range(n)],
+        'Name': sometimes([f"Room {i} near the park" for i in range(n)]),
+        'Description': sometimes(['Bright room. ' * int(rng.integers(1, 5)) for _ in range(n)], missing=''),
+        'Description - Neighborhood': sometimes(['Quiet street'] * n, 0.5),
+        'Location - Hood': sometimes(rng.choice(['Williamsburg', 'Astoria'], n).tolist(), 0.3),
+        'Location - City': sometimes(rng.choice(['Brooklyn', 'Queens'], n).tolist(), 0.2),
+        'Features - Type of Space': sometimes(['Private Room'] * n, 0.3),
+        'Kitchen Type': sometimes(['Full Kitchen'] * n, 0.3),
+        'rental type': sometimes(['Nightly'] * n, 0.3),
+        'Location - Address': sometimes([{'lat': float(40 + rng.random()), 'lng': float(-74 + rng.random())}
+                                         for _ in range(n)]),
+        'Price number (for map)': prices,
+        'Features - Qty Bedrooms': sometimes(rng.integers(0, 4, n).tolist()),
+        'Features - Qty Bathrooms': sometimes(rng.integers(1, 3, n).astype(float).tolist(), missing=np.nan),
+        'Features - Qty Guests': sometimes(rng.integers(1, 6, n).tolist()),
+        'Features - SQFT Area': sometimes(rng.integers(200, 1500, n).tolist()),
+        'Minimum Nights': sometimes(rng.integers(1, 30, n).tolist()),
+        'Maximum Nights': sometimes(rng.integers(30, 365, n).tolist()),
+        'Days Available (List of Days)': [days() for _ in range(n)],
+        'Location - Borough': sometimes([f"borough{b}" for b in rng.integers(0, 5, n)]),
+        'Active': rng.random(n) < 0.8
+    })
+
+
+def test_columnar_matches_per_row_path():
+    listings_df = listing_table(400)
+    preprocessor = ListingPreprocessor(store=create_store('memory'))
+
+    rows = preprocessor.preprocess_all(listings_df)
+    adapted = ListingPreprocessor.columns_to_listings(preprocessor.preprocess_columnar(listings_df))
+
+    assert len(rows) == len(adapted) == 399
+    for expected, actual in zip(rows, adapted):
+        assert expected['listing_id'] == actual['listing_id']
+        assert expected['text'] == actual['text']
+        assert expected['structured_features'].dtype == actual['structured_features'].dtype
+        assert np.array_equal(expected['structured_features'], actual['structured_features'], equal_nan=True)
+        assert np.array_equal(expected['temporal_features'], actual['temporal_features'])
+        assert expected['borough_id'] == actual['borough_id']
+
+
+def test_features_come_from_the_listing_columns():
+    store = create_store('memory')
+    page = store.listing_page(ListingPreprocessor(store=store)._select_fields(), 50)
+    listings = ListingPreprocessor.columns_to_listings(
+        ListingPreprocessor(store=store).preprocess_columnar(pd.DataFrame(page))
+    )
+
+    first, row = listings[0], page[0]
+    assert first['structured_features'][0] == float(row['Price number (for map)'])
+    assert first['structured_features'][4] == np.float32(row['Location - Address']['lat'])
+    assert first['structured_features'][6] == float(row['Features - Qty Bedrooms'])
+    assert first['temporal_features'][7] == len(set(d.lower() for d in row['Days Available (List of Days)']))
+
+    # Listings no longer all share the default feature vectors
+    assert len({l['structured_features'].tobytes() for l in listings}) > 1
+    assert len({l['temporal_features'].tobytes() for l in listings}) > 1
+
+
+def paged_ids(preprocessor, page_size, **filters):
+    pages = [page['_id'].tolist() for page in preprocessor.iter_listing_pages(page_size, **filters)]
+    assert all(0 < len(page) <= page_size for page in pages)
+    return [lid for page in pages for lid in page]
+
+
+def test_keyset_pagination_returns_every_row_once():
+    stores = [create_store('memory'), SupabaseListingStore(client=make_fake_supabase(250, seed=4))]
+    for store in stores:
+        preprocessor = ListingPreprocessor(store=store)
+        all_ids = sorted(row['_id'] for row in store.listing_page('_id', 10**6))
+
+        # Page sizes that split the table unevenly, exactly, or not at all
+        for page_size in [1, 7, 50, len(all_ids), len(all_ids) + 1]:
+            assert paged_ids(preprocessor, page_size) == all_ids, page_size
+        assert preprocessor.fetch_progress['rows'] == len(all_ids)
+
+        wanted = all_ids[::9] + ['missing']
+        assert paged_ids(preprocessor, 4, listing_ids=wanted) == all_ids[::9]
+
+
+def test_keyset_pagination_with_rows_inserted_mid_scan():
+    class GrowingStore(InMemoryListingStore):
+        """Inserts listings before and after the cursor once the first page was read"""
+        def listing_page(self, select, page_size, after_id=None, **filters):
+            if after_id is not None and not self.grown:
+                self.grown = True
+                self.__init__(self._listings + [{'_id': '0000-early'}, {'_id': 'zzzz-late'}], self._boroughs)
+            return super().listing_page(select, page_size, after_id=after_id, **filters)
+
+    source = create_store('memory')
+    store = GrowingStore(source.listing_page('*', 10**6))
+    store.grown = False
+    seen = paged_ids(ListingPreprocessor(store=store), 16)
+
+    # Rows behind the cursor are not revisited, rows ahead of it are picked up
+    assert len(seen) == len(set(seen)) == len(store._ids) - 1
+    assert '0000-early' not in seen and seen[-1] == 'zzzz-late'
+
+
+if __name__ == '__main__':
+    print("🧪 Listing preprocessing")
+    for test in [test_columnar_matches_per_row_path, test_features_come_from_the_listing_columns,
+                 test_keyset_pagination_returns_every_row_once,
+                 test_keyset_pagination_with_rows_inserted_mid_scan]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All listing preprocessing tests passed!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Tests for POST /match/batch and /match (fixture listings, hashing model)"""
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.py imports TensorFlow (user tower) at module level
+pytest.importorskip('tensorflow')
+
+_api = None
+
+
+def serving_app():
+    """app module serving an index over the shipped fixtures (built once)"""
+    global _api
+    if _api is None:
+        os.environ.update(DATA_BACKEND='memory', INDEX_WATCH_INTERVAL_SECONDS='0',
+                          REBUILD_JOBS_DIR=tempfile.mkdtemp())
+        import app as api
+        from fake_model import HashingTextModel, make_index_builder
+        from listing_preprocessor import ListingPreprocessor
+
+        model = HashingTextModel()
+        builder = make_index_builder(model, model)
+        index = builder.build_index_streaming(
+            ListingPreprocessor(store=api.store).iter_preprocessed_chunks(64), build_vector_index=False
+        )
+        api.model = model
+        api._initialization_attempted = True
+        api.swap_index(index)
+        _api = api
+    return _api
+
+
+QUERIES = ['Quiet room in Brooklyn Mon-Thu', 'Entire place in Manhattan on weekends under $200',
+           'Private room in Queens', 'Furnished studio weekdays only']
+
+
+def match_ids(response):
+    return [m['listing_id'] for m in response['matches']]
+
+
+def test_batch_matches_single_queries():
+    client = serving_app().app.test_client()
+
+    batch = client.post('/match/batch', json={
+        'queries': QUERIES[:3] + [{'query': QUERIES[3], 'top_k': 3}], 'top_k': 5
+    })
+    assert batch.status_code == 200
+    results = batch.get_json()['results']
+    assert [r['query'] for r in results] == QUERIES
+    assert [r['count'] for r in results] == [5, 5, 5, 3]
+
+    for query, result in zip(QUERIES, results):
+        single = client.post('/match', json={'query': query, 'top_k': result['count']}).get_json()
+        assert match_ids(single) == match_ids(result), query
+
+
+def test_concurrent_match_calls_share_the_batcher():
+    api = serving_app()
+    before = api.QUERY_BATCHER.stats()['items']
+    queries = [f"room number {i} in Brooklyn" for i in range(12)]
+    responses = [None] * len(queries)
+
+    def worker(i):
+        responses[i] = api.app.test_client().post('/match', json={'query': queries[i], 'top_k': 3})
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(queries))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(r.status_code == 200 and r.get_json()['count'] == 3 for r in responses)
+    assert api.QUERY_BATCHER.stats()['items'] - before == len(queries)
+
+
+def test_malformed_batches_are_rejected():
+    client = serving_app().app.test_client()
+
+    for body, expected in [
+        ({'queries': [5]}, 'queries[0]'),
+        ({'queries': ['ok', None]}, 'queries[1]'),
+        ({'queries': ['ok', {'query': ''}]}, 'queries[1]'),
+        ({'queries': [{'query': 7}]}, 'queries[0]'),
+        ({'queries': [{'query': 'ok', 'top_k': 'ten'}]}, 'queries[0]'),
+        ({'queries': ['ok'], 'n_probe': 0}, 'n_probe'),
+        ({'queries': 'Quiet room'}, 'list'),
+        ({'queries': []}, 'required'),
+        (['Quiet room'], 'JSON object'),
+    ]:
+        response = client.post('/match/batch', json=body)
+        assert response.status_code == 400, body
+        assert expected in response.get_json()['error'], body
+
+
+def test_match_rejects_bad_n_probe():
+    client = serving_app().app.test_client()
+
+    for n_probe in [0, -3, 'eight', 2.5, True]:
+        response = client.post('/match', json={'query': QUERIES[0], 'n_probe': n_probe})
+        assert response.status_code == 400, n_probe
+        assert 'n_probe' in response.get_json()['error'], n_probe
+
+    assert client.post('/match', json={'query': QUERIES[0], 'n_probe': 4}).status_code == 200
+
+
+def test_match_rejects_bad_top_k():
+    client = serving_app().app.test_client()
+
+    for top_k in [0, -1, 'ten', 2.5, False, None]:
+        response = client.post('/match', json={'query': QUERIES[0], 'top_k': top_k})
+        assert response.status_code == 400, top_k
+        assert 'top_k' in response.get_json()['error'], top_k
+
+
+if __name__ == '__main__':
+    print("🧪 /match/batch")
+    for test in [test_batch_matches_single_queries,
+                 test_concurrent_match_calls_share_the_batcher,
+                 test_malformed_batches_are_rejected,
+                 test_match_rejects_bad_n_probe,
+                 test_match_rejects_bad_top_k]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All /match/batch tests passed!")
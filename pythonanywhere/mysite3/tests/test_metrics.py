@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Tests for per-stage latency metrics and the Prometheus exposition"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import StageMetrics
+
+
+def test_histogram_and_percentiles():
+    metrics = StageMetrics(buckets=(0.001, 0.01, 0.1), window=100)
+    for ms in range(1, 101):
+        metrics.observe('similarity', ms / 1000)
+
+    stage = metrics.snapshot()['stages']['similarity']
+    assert stage['count'] == 100
+    assert abs(stage['mean_ms'] - 50.5) < 1e-6
+    assert abs(stage['p50_ms'] - 50.5) < 1e-6
+    assert 95 <= stage['p95_ms'] <= 96
+    assert 99 <= stage['p99_ms'] <= 100
+
+    text = metrics.prometheus_text()
+    assert 'mysite3_stage_duration_seconds_bucket{stage="similarity",le="0.001"} 1' in text
+    assert 'mysite3_stage_duration_seconds_bucket{stage="similarity",le="0.01"} 10' in text
+    assert 'mysite3_stage_duration_seconds_bucket{stage="similarity",le="+Inf"} 100' in text
+    assert 'mysite3_stage_duration_seconds_count{stage="similarity"} 100' in text
+
+
+def test_per_request_timings():
+    metrics = StageMetrics()
+    timings = {}
+    with metrics.stage('top_k', timings):
+        pass
+    metrics.observe('top_k', 0.002, timings)
+    metrics.observe('rerank', 0.001)
+
+    assert set(timings) == {'top_k'}
+    assert timings['top_k'] >= 2.0          # ms, summed over both calls
+    assert metrics.snapshot()['stages']['top_k']['count'] == 2
+
+
+def test_counters_and_gauges():
+    metrics = StageMetrics()
+    metrics.inc('http_requests_total', endpoint='/match', status='200')
+    metrics.inc('http_requests_total', endpoint='/match', status='200')
+    metrics.inc('http_requests_total', endpoint='/match', status='503')
+
+    text = metrics.prometheus_text(gauges={'index_listings': 42, 'skipped': None},
+                                   counters={'query_cache_hits_total': 7})
+    assert '# TYPE mysite3_http_requests_total counter' in text
+    assert 'mysite3_http_requests_total{endpoint="/match",status="200"} 2' in text
+    assert 'mysite3_http_requests_total{endpoint="/match",status="503"} 1' in text
+    assert 'mysite3_index_listings 42' in text
+    assert 'mysite3_query_cache_hits_total 7' in text
+    assert 'skipped' not in text
+
+
+if __name__ == '__main__':
+    print("🧪 Stage metrics")
+    for test in [test_histogram_and_percentiles, test_per_request_timings, test_counters_and_gauges]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All metrics tests passed!")
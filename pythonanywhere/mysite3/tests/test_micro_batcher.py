@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Tests for the micro-batcher that coalesces concurrent /match encodes"""
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from micro_batcher import MicroBatcher
+
+
+def submit_concurrently(batcher, items):
+    results, errors = [None] * len(items), [None] * len(items)
+    start = threading.Barrier(len(items))
+
+    def worker(i):
+        start.wait()
+        try:
+            results[i] = batcher.submit(items[i], timeout=10)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(items))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_submits_are_coalesced():
+    seen_batches = []
+
+    def square(items):
+        seen_batches.append(list(items))
+        time.sleep(0.02)  # fixed per-batch cost, like a forward pass
+        return [x * x for x in items]
+
+    batcher = MicroBatcher(square, max_batch_size=8, max_wait_ms=50)
+    results, errors = submit_concurrently(batcher, list(range(32)))
+
+    assert results == [i * i for i in range(32)] and not any(errors)
+    assert sorted(x for batch in seen_batches for x in batch) == list(range(32))
+    assert max(len(batch) for batch in seen_batches) <= 8
+
+    stats = batcher.stats()
+    assert stats['items'] == 32 and stats['batches'] == len(seen_batches)
+    assert stats['batches'] < 32 and stats['max_batch_size_seen'] > 1
+
+
+def test_lone_item_does_not_wait_without_max_wait():
+    batcher = MicroBatcher(lambda items: [x + 1 for x in items], max_batch_size=8, max_wait_ms=0)
+    start = time.perf_counter()
+    assert batcher.submit(1) == 2
+    assert time.perf_counter() - start < 1.0
+    assert batcher.stats()['max_batch_size_seen'] == 1
+
+
+def test_batch_errors_reach_every_caller():
+    def fail(items):
+        time.sleep(0.01)
+        raise RuntimeError('tower failed')
+
+    batcher = MicroBatcher(fail, max_batch_size=4, max_wait_ms=20)
+    results, errors = submit_concurrently(batcher, [1, 2, 3])
+    assert results == [None] * 3
+    assert all(isinstance(e, RuntimeError) and str(e) == 'tower failed' for e in errors)
+
+    # The worker survives a failed batch
+    batcher.batch_fn = lambda items: list(items)
+    assert batcher.submit('ok') == 'ok'
+
+
+def test_short_result_list_fails_the_whole_batch():
+    def drop_last(items):
+        time.sleep(0.01)
+        return [x * 10 for x in items][:-1]
+
+    batcher = MicroBatcher(drop_last, max_batch_size=4, max_wait_ms=20)
+    results, errors = submit_concurrently(batcher, [1, 2, 3])
+    assert results == [None] * 3
+    assert all(isinstance(e, ValueError) and 'results for' in str(e) for e in errors)
+
+
+if __name__ == '__main__':
+    print("🧪 Micro-batcher")
+    for test in [test_concurrent_submits_are_coalesced,
+                 test_lone_item_does_not_wait_without_max_wait,
+                 test_batch_errors_reach_every_caller,
+                 test_short_result_list_fails_the_whole_batch]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All micro-batcher tests passed!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests for model directory checksums, local encoder resolution and boot timings"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_artifacts
+from model_artifacts import (ArtifactChecksumError, BootProfile, resolve_text_encoder,
+                             verify_checksum, write_checksum)
+
+
+def make_model_dir():
+    dirpath = tempfile.mkdtemp()
+    os.makedirs(os.path.join(dirpath, 'variables'))
+    with open(os.path.join(dirpath, 'saved_model.pb'), 'wb') as f:
+        f.write(b'graph')
+    with open(os.path.join(dirpath, 'variables', 'variables.data-00000-of-00001'), 'wb') as f:
+        f.write(b'\x00' * 4096)
+    return dirpath
+
+
+def test_checksum_roundtrip():
+    dirpath = make_model_dir()
+    assert verify_checksum(dirpath) == 'unverified'
+
+    record = write_checksum(dirpath, source='test')
+    assert verify_checksum(dirpath) == 'fingerprint'
+    assert verify_checksum(dirpath, full=True) == 'sha256'
+    assert verify_checksum(dirpath, expected_sha256=record['sha256']) == 'fingerprint'
+
+
+def test_checksum_detects_changes():
+    dirpath = make_model_dir()
+    write_checksum(dirpath)
+
+    with open(os.path.join(dirpath, 'variables', 'variables.data-00000-of-00001'), 'r+b') as f:
+        f.write(b'\x01')
+    try:
+        verify_checksum(dirpath)
+        assert False, "corrupted file not detected"
+    except ArtifactChecksumError:
+        pass
+
+    # Pinned hash that does not match the recorded one
+    write_checksum(dirpath)
+    try:
+        verify_checksum(dirpath, expected_sha256='0' * 64)
+        assert False, "pinned hash not enforced"
+    except ArtifactChecksumError:
+        pass
+
+
+def test_resolve_text_encoder():
+    url = 'https://tfhub.dev/google/universal-sentence-encoder/4'
+    dirpath = make_model_dir()
+    write_checksum(dirpath, source=url)
+
+    os.environ['USE_MODEL_DIR'] = dirpath
+    try:
+        assert resolve_text_encoder(url) == dirpath
+        assert model_artifacts.BOOT_PROFILE.as_dict()['text_encoder']['source'] == 'local'
+
+        os.environ['USE_MODEL_SHA256'] = '0' * 64
+        assert resolve_text_encoder(url) == url   # corrupt/mismatched copy → network
+
+        del os.environ['USE_MODEL_SHA256']
+        os.environ['USE_MODEL_DIR'] = tempfile.mkdtemp()
+        assert resolve_text_encoder(url) == url   # empty directory → network
+    finally:
+        os.environ.pop('USE_MODEL_DIR', None)
+        os.environ.pop('USE_MODEL_SHA256', None)
+
+    assert resolve_text_encoder(url) == url
+
+
+def test_boot_profile():
+    profile = BootProfile()
+    with profile.stage('tf_import'):
+        pass
+    profile.record('index_load', 0.25)
+    profile.record('tf_import', 1.5)   # re-recorded stage keeps the latest duration
+    profile.note('model', source='saved_model')
+
+    report = profile.as_dict()
+    assert list(report['stages_ms']) == ['index_load', 'tf_import']
+    assert report['stages_ms']['tf_import'] == 1500.0
+    assert report['total_ms'] == 1750.0
+    assert report['model'] == {'source': 'saved_model'}
+
+
+if __name__ == '__main__':
+    print("🧪 Model artifact manager")
+    for test in [test_checksum_roundtrip, test_checksum_detects_changes,
+                 test_resolve_text_encoder, test_boot_profile]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All model artifact tests passed!")
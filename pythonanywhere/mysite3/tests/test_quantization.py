@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Tests for quantized (int8/float16) search agreeing with float32 search"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantization import QuantizedEmbeddings
+
+TOP_K = 20
+
+
+def corpus(n=20000, n_queries=50):
+    """Clustered normalized embeddings and perturbed-listing queries"""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((64, 128)).astype(np.float32)
+    embeddings = centers[rng.integers(0, 64, n)] + 0.5 * rng.standard_normal((n, 128)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    queries = embeddings[rng.integers(0, n, n_queries)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return embeddings, queries
+
+
+def float32_top_k(embeddings, query, rows=None):
+    rows = np.arange(len(embeddings)) if rows is None else rows
+    return rows[np.argsort(-(embeddings[rows] @ query), kind='stable')[:TOP_K]]
+
+
+def overlap(quantized, embeddings, queries, **search_args):
+    hits = 0
+    for query in queries:
+        rows, _ = quantized.search(query, TOP_K, **search_args)
+        hits += len(set(rows.tolist()) & set(float32_top_k(embeddings, query, search_args.get('rows')).tolist()))
+    return hits / (len(queries) * TOP_K)
+
+
+def test_quantized_top_k_agrees_with_float32():
+    embeddings, queries = corpus()
+    for mode, minimum in [('float16', 0.99), ('int8', 0.95)]:
+        quantized = QuantizedEmbeddings.quantize(embeddings, mode)
+        assert len(quantized) == len(embeddings)
+        assert overlap(quantized, embeddings, queries) >= minimum, mode
+
+
+def test_rescoring_returns_the_float32_top_k():
+    embeddings, queries = corpus()
+    for mode in ('float16', 'int8'):
+        quantized = QuantizedEmbeddings.quantize(embeddings, mode)
+        for query in queries:
+            rows, scores = quantized.search(query, TOP_K, rescore_embeddings=embeddings, rescore_factor=4)
+            assert rows.tolist() == float32_top_k(embeddings, query).tolist(), mode
+            np.testing.assert_allclose(scores, embeddings[rows] @ query, rtol=1e-6)
+
+
+def test_quantized_search_stays_within_candidate_rows():
+    embeddings, queries = corpus()
+    rows = np.flatnonzero(np.random.default_rng(3).random(len(embeddings)) < 0.2)
+    quantized = QuantizedEmbeddings.quantize(embeddings, 'int8')
+
+    assert overlap(quantized, embeddings, queries, rows=rows, rescore_embeddings=embeddings) == 1.0
+    for query in queries[:5]:
+        found, _ = quantized.search(query, TOP_K, rows=rows)
+        assert set(found.tolist()) <= set(rows.tolist())
+
+
+def test_quantized_scores_stay_close_to_float32():
+    embeddings, queries = corpus(n=2000)
+    for mode, tolerance in [('float16', 1e-3), ('int8', 2e-2)]:
+        restored = QuantizedEmbeddings.from_arrays(QuantizedEmbeddings.quantize(embeddings, mode).to_arrays())
+        for query in queries[:5]:
+            np.testing.assert_allclose(restored.score(query), embeddings @ query, atol=tolerance)
+
+
+if __name__ == '__main__':
+    print("🧪 Quantized embeddings")
+    for test in [test_quantized_top_k_agrees_with_float32,
+                 test_rescoring_returns_the_float32_top_k,
+                 test_quantized_search_stays_within_candidate_rows,
+                 test_quantized_scores_stay_close_to_float32]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All quantization tests passed!")
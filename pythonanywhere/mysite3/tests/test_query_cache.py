@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Tests for the LRU/TTL query cache"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import query_cache
+from query_cache import QueryCache
+
+
+class FakeClock:
+    """Stands in for the time module inside query_cache (monotonic() only)"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def with_fake_clock(test):
+    def run():
+        clock, real_time = FakeClock(), query_cache.time
+        query_cache.time = clock
+        try:
+            test(clock)
+        finally:
+            query_cache.time = real_time
+    run.__name__ = test.__name__
+    return run
+
+
+def test_lru_evicts_least_recently_used():
+    cache = QueryCache(max_entries=3, ttl_seconds=0)
+    for query in ['a', 'b', 'c']:
+        cache.put(query, query.upper())
+
+    assert cache.get('a') == 'A'          # a is now most recent: order b, c, a
+    cache.put('d', 'D')                   # evicts b
+    assert cache.get('b') is None
+    cache.put('c', 'C2')                  # re-put refreshes c: order a, d, c
+    cache.put('e', 'E')                   # evicts a
+    assert cache.get('a') is None
+    assert [cache.get(q) for q in ['c', 'd', 'e']] == ['C2', 'D', 'E']
+    assert len(cache) == 3
+    assert cache.stats()['evictions'] == 2
+
+
+@with_fake_clock
+def test_ttl_expiry(clock):
+    cache = QueryCache(max_entries=10, ttl_seconds=60)
+    cache.put('room in queens', 1)
+
+    clock.now += 60
+    assert cache.get('room in queens') == 1    # expires strictly after ttl
+
+    cache.put('loft in brooklyn', 2)
+    clock.now += 0.5
+    assert cache.get('room in queens') is None
+    assert cache.get('loft in brooklyn') == 2
+    assert len(cache) == 1
+
+    # A hit does not extend the lifetime; a put does
+    clock.now += 59.6
+    assert cache.get('loft in brooklyn') is None
+    cache.put('loft in brooklyn', 3)
+    clock.now += 59
+    assert cache.get('loft in brooklyn') == 3
+
+    stats = cache.stats()
+    assert (stats['expirations'], stats['hits'], stats['misses']) == (2, 3, 2)
+
+
+@with_fake_clock
+def test_zero_ttl_never_expires_and_zero_size_disables(clock):
+    cache = QueryCache(max_entries=2, ttl_seconds=0)
+    cache.put('q', 1)
+    clock.now += 10 ** 9
+    assert cache.get('q') == 1
+
+    disabled = QueryCache(max_entries=0)
+    disabled.put('q', 1)
+    assert disabled.get('q') is None and len(disabled) == 0
+
+
+def test_keys_are_case_folded_and_whitespace_normalized():
+    cache = QueryCache(max_entries=10, ttl_seconds=0)
+    cache.put('  Mon-Thu in   Brooklyn\t', 'value')
+
+    for variant in ['mon-thu in brooklyn', 'MON-THU IN BROOKLYN', 'Mon-Thu\nin Brooklyn ']:
+        assert cache.get(variant) == 'value'
+    assert cache.get('mon-thu in brooklyn!') is None
+
+    cache.put('MON-THU IN BROOKLYN', 'newer')
+    assert len(cache) == 1 and cache.get('mon-thu in brooklyn') == 'newer'
+    assert QueryCache.normalize(' A  b ') == 'a b'
+
+
+def test_concurrent_puts_stay_bounded():
+    cache = QueryCache(max_entries=50, ttl_seconds=0)
+
+    def worker(offset):
+        for i in range(200):
+            cache.put(f"query {offset} {i}", i)
+            cache.get(f"query {offset} {i // 2}")
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(cache) == 50
+    assert cache.stats()['evictions'] == 8 * 200 - 50
+
+
+if __name__ == '__main__':
+    print("🧪 Query cache")
+    for test in [test_lru_evicts_least_recently_used, test_ttl_expiry,
+                 test_zero_ttl_never_expires_and_zero_size_disables,
+                 test_keys_are_case_folded_and_whitespace_normalized,
+                 test_concurrent_puts_stay_bounded]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All query cache tests passed!")
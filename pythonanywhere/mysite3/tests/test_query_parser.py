@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Parity tests: CompiledQueryParser vs the per-pattern QueryProcessor/TemporalEncoder extractors"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_processor import QueryProcessor
+from query_parser import CompiledQueryParser, _keywords_overlap
+from temporal_encoder import TemporalEncoder
+
+
+FRAGMENTS = [
+    "Need a place", "Looking for a furnished room", "Hybrid worker,", "Consultant",
+    "Mon-Thu", "Monday-Thursday nights", "mon to fri", "weekend", "Fri-Sun",
+    "tuesday and wednesday", "3 nights per week", "2 days/week", "4 nights a week",
+    "in Brooklyn", "near Penn Station", "around Times Square", "in the financial district",
+    "FiDi", "downtown Boston", "Cambridge", "Williamsburg", "Queens", "Manhattan",
+    "under $150/night", "$100-130/night", "between $90 and $140", "around $120",
+    "$200 budget", "120 dollars per night", "$95 per night", "$80 to $110",
+    "for 7 nights", "2 weeks", "3 months", "10 days", "flexible", "any day works",
+    "anytime", "all week", "quiet with good wifi", "must have desk space", "no pets",
+]
+
+
+def random_queries(n_queries, seed=0):
+    """Random combinations of common search phrases, with case variants and noise"""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(n_queries):
+        parts = list(rng.choice(FRAGMENTS, size=rng.integers(1, 7), replace=False))
+        if rng.random() < 0.2:
+            parts.append(''.join(rng.choice(list('abcdefghimnorstuw $-/0123456789'), size=30)))
+        if rng.random() < 0.5:
+            parts = [p.upper() if rng.random() < 0.3 else p for p in parts]
+        queries.append(' '.join(parts))
+    return queries
+
+
+def parse_per_pattern(query_text):
+    """Reference result: the per-pattern QueryProcessor/TemporalEncoder extractors"""
+    return {
+        'budget': QueryProcessor.extract_budget(query_text),
+        'duration': QueryProcessor.extract_duration(query_text),
+        'location': QueryProcessor.extract_location(query_text),
+        'schedule': TemporalEncoder.parse_user_schedule(query_text),
+        'schedule_features': TemporalEncoder.encode_user_schedule(query_text)
+    }
+
+
+def assert_same_parse(expected, actual, query_text):
+    for key in ('budget', 'duration', 'location'):
+        assert expected[key] == actual[key], (query_text, key, expected[key], actual[key])
+    for key in ('nights_per_week', 'specific_days', 'flexible'):
+        assert expected['schedule'][key] == actual['schedule'][key], (query_text, key)
+    assert np.array_equal(expected['schedule']['weekday_mask'], actual['schedule']['weekday_mask']), query_text
+    assert np.array_equal(expected['schedule_features'], actual['schedule_features']), query_text
+
+
+def assert_parity(queries, parser=QueryProcessor.PARSER):
+    for query in queries:
+        assert_same_parse(parse_per_pattern(query), parser.parse(query), query)
+
+
+def test_edge_cases():
+    """Pattern priority, overlapping keywords and the encoders' quirks"""
+    assert_parity([
+        "", "   ", "no constraints at all",
+        "$100-150", "$100 to 150", "between $90 and $140", "under $150", "around $100",
+        "$100 budget", "$120/night", "120 dollars per night", "UNDER $80 around $100",
+        "around $100 but $90-120 is fine",            # earlier pattern wins, not leftmost
+        "3 weeks or 10 nights", "2 months", "1 day",
+        "brooklyn downtown", "times square or fidi",  # table order wins, not leftmost
+        "financial districtimes square",              # overlapping keyword occurrences
+        "Mon-Thu", "monday to friday", "fri-sun", "weekend", "friday\nsunday",
+        "mon\nthu",                                   # '.' does not cross newlines
+        "saturday only", "sat", "sun and sat", "tuesday wednesday",
+        "3 nights per week", "2 days/week", "4 nights a week, flexible",
+        "any day", "anytime", "all week", "Mon-Thu but flexible",
+        "monthly stay",                               # 'mon' prefix counts as Monday
+    ])
+
+
+def test_random_queries():
+    """Random combinations of common search phrases, case variants and noise"""
+    assert_parity(random_queries(5000, seed=1))
+
+
+def test_parse_schedule_returns_schedule_and_features():
+    schedule, features = QueryProcessor.PARSER.parse_schedule("need mon-thu in brooklyn")
+    assert schedule['specific_days'] == TemporalEncoder.parse_user_schedule("need mon-thu in brooklyn")['specific_days']
+    assert isinstance(features, np.ndarray) and features.shape == (11,)
+
+
+def test_custom_tables():
+    """The parser follows the tables it is built from"""
+    parser = CompiledQueryParser(
+        QueryProcessor.BUDGET_PATTERNS,
+        QueryProcessor.DURATION_PATTERNS,
+        {'ab': {'lat': 1.0}, 'bc': {'lat': 2.0}, 'c': {'lat': 3.0}}
+    )
+    assert parser.parse_location('xabcx') == {'lat': 1.0}
+    assert parser.parse_location('xbcx') == {'lat': 2.0}
+    assert parser.parse_location('xcx') == {'lat': 3.0}
+    assert parser.parse_location('xyz') is None
+
+
+def test_keywords_overlap():
+    assert _keywords_overlap(['ab', 'bc'])
+    assert _keywords_overlap(['ab', 'xaby'])
+    assert not _keywords_overlap(['brooklyn', 'queens'])
+
+
+if __name__ == '__main__':
+    print("🧪 Compiled query parser parity")
+    for test in [test_edge_cases, test_random_queries, test_parse_schedule_returns_schedule_and_features,
+                 test_custom_tables, test_keywords_overlap]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All parity tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Tests for top-k selection and the hybrid re-ranker"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking import HybridReranker, WORKSPACE, top_k
+from listing_preprocessor import ListingPreprocessor
+from temporal_encoder import TemporalEncoder
+
+
+def assert_matches_argsort(scores, k, rows=None):
+    """top_k() agrees with a full descending argsort (any order among tied scores)"""
+    indices, values = top_k(scores, k, rows)
+    expected = np.argsort(-scores, kind='stable')[:k]
+    labels = np.arange(len(scores)) if rows is None else np.asarray(rows)
+
+    assert len(indices) == len(expected) == min(max(k, 0), len(scores))
+    assert values.tolist() == scores[expected].tolist()
+    assert len(set(indices.tolist())) == len(indices)
+    position = {label: i for i, label in enumerate(labels.tolist())}
+    assert all(scores[position[label]] == value for label, value in zip(indices.tolist(), values.tolist()))
+
+    # Ties at the cut-off may pick either row; everything above it must match
+    if len(expected):
+        cutoff = scores[expected[-1]]
+        assert ({label for label, value in zip(indices.tolist(), values.tolist()) if value > cutoff} ==
+                set(labels[expected[scores[expected] > cutoff]].tolist()))
+
+
+def test_top_k_matches_full_argsort():
+    rng = np.random.default_rng(0)
+    scores = rng.standard_normal(1000).astype(np.float32)
+    for k in [1, 5, 20, 999, 1000, 1500]:
+        assert_matches_argsort(scores, k)
+
+    # k >= n returns every row, in exactly the stable argsort order
+    indices, _ = top_k(scores, 5000)
+    assert indices.tolist() == np.argsort(-scores, kind='stable').tolist()
+
+
+def test_top_k_with_ties_and_row_ids():
+    rng = np.random.default_rng(1)
+    scores = rng.integers(0, 5, 300).astype(np.float32)  # heavy ties
+    rows = rng.permutation(10000)[:300]
+    for k in [1, 7, 60, 299, 300, 301]:
+        assert_matches_argsort(scores, k)
+        assert_matches_argsort(scores, k, rows)
+
+    assert_matches_argsort(np.ones(10, dtype=np.float32), 3)
+
+
+def test_top_k_empty_results():
+    for scores, k in [(np.array([0.3, 0.1], dtype=np.float32), 0),
+                      (np.array([0.3, 0.1], dtype=np.float32), -2),
+                      (np.empty(0, dtype=np.float32), 5)]:
+        indices, values = top_k(scores, k)
+        assert len(indices) == len(values) == 0
+
+
+def test_workspace_search_matches_argsort():
+    rng = np.random.default_rng(2)
+    embeddings = rng.standard_normal((500, 16)).astype(np.float32)
+    query = rng.standard_normal(16).astype(np.float32)
+    rows = np.sort(rng.choice(500, 120, replace=False))
+
+    found, scores = WORKSPACE.search(embeddings, query, 10, rows)
+    expected = rows[np.argsort(-(embeddings[rows] @ query))[:10]]
+    assert found.tolist() == expected.tolist()
+    np.testing.assert_allclose(scores, embeddings[expected] @ query, rtol=1e-6)
+
+
+def test_schedule_breaks_similarity_ties():
+    # Rows as the store returns them; schedule features come from the preprocessor
+    listings_df = pd.DataFrame([
+        {'_id': 'weekend', 'Name': 'Room', 'Days Available (List of Days)': ['Friday', 'Saturday', 'Sunday']},
+        {'_id': 'weekdays', 'Name': 'Room', 'Days Available (List of Days)': ['Monday', 'Tuesday', 'Wednesday', 'Thursday']}
+    ])
+    preprocessor = ListingPreprocessor.__new__(ListingPreprocessor)
+    schedules = preprocessor.preprocess_columnar(listings_df)['temporal_features']
+    assert not np.array_equal(schedules[0], schedules[1])
+
+    reranker = HybridReranker(similarity_weight=0.8, schedule_weight=0.2, budget_weight=0.0)
+    rows, similarities = np.array([0, 1]), np.array([0.5, 0.5])
+
+    for query, expected in [("Need Mon-Thu near work", [1, 0]), ("weekend getaway", [0, 1])]:
+        order, _, blended = reranker.rerank(
+            rows, similarities, 2,
+            listing_schedules=schedules, user_schedule=TemporalEncoder.encode_user_schedule(query)
+        )
+        assert order.tolist() == expected, query
+        assert blended[0] > blended[1]
+
+
+if __name__ == '__main__':
+    print("🧪 Ranking")
+    for test in [test_top_k_matches_full_argsort,
+                 test_top_k_with_ties_and_row_ids,
+                 test_top_k_empty_results,
+                 test_workspace_search_matches_argsort,
+                 test_schedule_breaks_similarity_ties]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All ranking tests passed!")
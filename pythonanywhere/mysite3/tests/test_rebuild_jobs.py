@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests for the background rebuild runner and memory-sized encoding batches"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rebuild_jobs
+from rebuild_jobs import RebuildJobRunner, RebuildInProgress, encoding_batch_size
+
+
+def test_job_reports_progress_and_result():
+    runner = RebuildJobRunner(tempfile.mkdtemp())
+
+    def pipeline(job):
+        job.stage('encode', total=200)
+        job.progress('encode', 100, 200)
+        job.progress('encode', 200, 200)
+        job.progress('vector_index', 200, 200)
+        return {'listings_indexed': 200}
+
+    job = runner.submit(pipeline)
+    runner.wait(job['job_id'])
+
+    state = runner.get(job['job_id'])
+    assert state['status'] == 'succeeded'
+    assert state['stage'] == 'done'
+    assert (state['processed'], state['total'], state['percent']) == (200, 200, 100.0)
+    assert state['listings_per_second'] > 0
+    assert set(state['stages_seconds']) == {'encode', 'vector_index'}
+    assert state['result'] == {'listings_indexed': 200}
+    assert not runner.is_locked()
+
+
+def test_concurrent_rebuild_is_refused():
+    jobs_dir = tempfile.mkdtemp()
+    runner = RebuildJobRunner(jobs_dir)
+    release = threading.Event()
+
+    job = runner.submit(lambda job: release.wait(5))
+    try:
+        # Another worker process sees the same lock file
+        RebuildJobRunner(jobs_dir).submit(lambda job: None)
+        assert False, 'second rebuild should be refused'
+    except RebuildInProgress as e:
+        assert e.job_id == job['job_id']
+    finally:
+        release.set()
+        runner.wait(job['job_id'])
+
+    assert runner.get(job['job_id'])['status'] == 'succeeded'
+    runner.wait(runner.submit(lambda job: None)['job_id'])   # lock released
+
+
+def test_hold_serializes_index_writes_and_refuses_during_a_rebuild():
+    jobs_dir = tempfile.mkdtemp()
+    runner = RebuildJobRunner(jobs_dir)
+    order = []
+
+    def writer(name):
+        # Another worker process sees the same lock file
+        with RebuildJobRunner(jobs_dir).hold(timeout=5):
+            order.append(f"{name} start")
+            time.sleep(0.05)
+            order.append(f"{name} end")
+
+    threads = [threading.Thread(target=writer, args=(name,)) for name in 'ab']
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert order in (['a start', 'a end', 'b start', 'b end'], ['b start', 'b end', 'a start', 'a end'])
+
+    # A short write is not a rebuild, and does not let one start
+    with runner.hold():
+        assert not runner.is_locked()
+        try:
+            runner.submit(lambda job: None)
+            assert False, 'rebuild should wait for the index write'
+        except RebuildInProgress as e:
+            assert e.job_id is None
+
+    release = threading.Event()
+    job = runner.submit(lambda job: release.wait(5))
+    try:
+        start = time.monotonic()
+        with runner.hold(timeout=5):
+            assert False, 'index writes should be refused during a rebuild'
+    except RebuildInProgress as e:
+        assert e.job_id == job['job_id'] and time.monotonic() - start < 1
+    finally:
+        release.set()
+        runner.wait(job['job_id'])
+
+    with runner.hold(timeout=0):
+        pass
+
+
+def test_failed_and_unknown_jobs():
+    runner = RebuildJobRunner(tempfile.mkdtemp())
+
+    def pipeline(job):
+        raise ValueError('supabase down')
+
+    job = runner.submit(pipeline)
+    runner.wait(job['job_id'])
+    state = runner.get(job['job_id'])
+    assert state['status'] == 'failed'
+    assert state['error'] == 'ValueError: supabase down'
+
+    assert runner.get('does-not-exist') is None
+    assert runner.get('../etc/passwd') is None
+
+
+def test_batch_size_follows_available_memory():
+    per_listing = rebuild_jobs.BYTES_PER_LISTING_ESTIMATE
+    assert encoding_batch_size(64 * per_listing, memory_fraction=0.5) == 32
+    assert encoding_batch_size(1, memory_fraction=0.5) == rebuild_jobs.MIN_BATCH_SIZE
+    assert encoding_batch_size(10 ** 15) == rebuild_jobs.MAX_BATCH_SIZE
+    assert encoding_batch_size(0) == rebuild_jobs.MIN_BATCH_SIZE
+
+
+if __name__ == '__main__':
+    print("🧪 Rebuild jobs")
+    for test in [test_job_reports_progress_and_result, test_concurrent_rebuild_is_refused,
+                 test_hold_serializes_index_writes_and_refuses_during_a_rebuild,
+                 test_failed_and_unknown_jobs, test_batch_size_follows_available_memory]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All rebuild job tests passed!")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Parity tests: TemporalEncoder batch APIs vs the per-listing versions"""
+import os
+import sys
+import itertools
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from temporal_encoder import TemporalEncoder
+
+
+def assert_parity(days_lists):
+    batch = TemporalEncoder.encode_days_available_batch(days_lists)
+    assert batch.shape == (len(days_lists), 11)
+
+    for days, row in zip(days_lists, batch):
+        expected = TemporalEncoder.encode_days_available(days)
+        assert np.array_equal(row, expected), f"{days!r}: {row} != {expected}"
+
+
+def test_edge_cases():
+    """Empty / missing / malformed inputs and the encoder's quirks"""
+    assert_parity([
+        None, [], 'monday', ('monday',), {'monday': 1},
+        ['holiday'], ['', '  '], [None], [1, 2],
+        ['monday'], ['Monday '], ['  SUNDAY'],
+        ['mon', 'monday'],                 # same day twice: 2 distinct strings, "consecutive"
+        ['monday', 'monday'],              # duplicate string
+        ['sat'],                           # WEEKDAY_MAP maps 'sat' to 6
+        ['saturday', 'sat'],
+        ['thur', 'thurs', 'thursday', 'thu'],
+        ['friday', 'saturday', 'sunday'],
+        ['monday', 'wednesday'],
+        ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'],
+        ['mon', 'tue', 'wed', 'thu', 'fri'],
+        ['monday', 'holiday', 'tuesday'],
+    ])
+
+
+def test_every_day_combination():
+    """All 128 combinations of full day names, in both orders"""
+    names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+    combos = [list(c) for r in range(8) for c in itertools.combinations(names, r)]
+    assert_parity(combos + [c[::-1] for c in combos])
+
+
+def test_random_token_lists():
+    """Random mixes of every WEEKDAY_MAP spelling, case/whitespace variants and junk"""
+    rng = np.random.default_rng(0)
+    vocabulary = TemporalEncoder.TOKENS + ['Monday', ' FRI ', 'Sat.', 'weekend', 'noon']
+
+    days_lists = [
+        list(rng.choice(vocabulary, size=rng.integers(0, 10)))
+        for _ in range(5000)
+    ]
+    assert_parity(days_lists)
+
+
+def test_schedule_compatibility_batch():
+    """Vectorized compatibility equals the per-pair score"""
+    rng = np.random.default_rng(1)
+    names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+    listings = TemporalEncoder.encode_days_available_batch(
+        [list(rng.choice(names, size=rng.integers(0, 8), replace=False)) for _ in range(500)]
+    )
+
+    for query in ["Need Mon-Thu in Brooklyn", "weekend place", "flexible, any day",
+                  "3 nights per week", "something quiet", "tuesday and friday"]:
+        user = TemporalEncoder.encode_user_schedule(query)
+        batch = TemporalEncoder.calculate_schedule_compatibility_batch(listings, user)
+        expected = [TemporalEncoder.calculate_schedule_compatibility(l, user) for l in listings]
+        assert np.allclose(batch, expected, rtol=0, atol=1e-12), query
+
+
+def test_empty_batch():
+    assert TemporalEncoder.encode_days_available_batch([]).shape == (0, 11)
+
+
+if __name__ == '__main__':
+    print("🧪 Temporal encoder batch parity")
+    for test in [test_edge_cases, test_every_day_combination, test_random_token_lists,
+                 test_schedule_compatibility_batch, test_empty_batch]:
+        test()
+        print(f"  ✅ {test.__name__}")
+    print("\n✅ All parity tests passed!")
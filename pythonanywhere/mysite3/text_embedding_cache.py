@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Persistent Text Embedding Cache
+SQLite store of 512-dim Universal Sentence Encoder outputs keyed by content hash
+"""
+
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from typing import Callable, Dict, List
+
+
+class TextEmbeddingCache:
+    """
+    Caches USE text embeddings across index rebuilds
+
+    Keys are SHA-1 hashes of (encoder id + exact text), so an unchanged
+    listing description is never pushed through the text encoder twice and
+    switching encoder versions cannot return stale vectors. SQLite keeps the
+    cache in one file that several processes (web workers, build script)
+    can share safely.
+    """
+
+    EMBEDDING_DIM = 512
+
+    # SQLite caps bound parameters per statement (999 on older builds)
+    LOOKUP_CHUNK = 900
+
+    def __init__(self, path: str, encoder_id: str = ''):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            encoder_id: Encoder identity mixed into every key (e.g. the USE URL)
+        """
+        self.path = path
+        self.encoder_id = encoder_id
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS text_embeddings ('
+            '  key TEXT PRIMARY KEY,'
+            '  embedding BLOB NOT NULL'
+            ')'
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.encoder_id}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_or_compute(self, texts: List[str],
+                       encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Look up embeddings for texts, encoding (and storing) only the misses
+
+        Args:
+            texts: Texts to embed
+            encode_fn: Called once with the list of distinct missing texts,
+                       must return an (n_missing, 512) array
+
+        Returns:
+            float32 array of shape (len(texts), 512) in input order
+        """
+        keys = [self.key(t) for t in texts]
+        found = self._lookup(set(keys))
+
+        missing = {}
+        for k, text in zip(keys, texts):
+            if k not in found and k not in missing:
+                missing[k] = text
+
+        if missing:
+            start = time.perf_counter()
+            encoded = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            elapsed = time.perf_counter() - start
+
+            new_entries = dict(zip(missing.keys(), encoded))
+            self._store(new_entries)
+            found.update(new_entries)
+
+            with self._lock:
+                self.encode_seconds += elapsed
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        return np.stack([found[k] for k in keys]) if keys else np.zeros((0, self.EMBEDDING_DIM), dtype=np.float32)
+
+    def _lookup(self, keys: set) -> Dict[str, np.ndarray]:
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self.LOOKUP_CHUNK):
+                chunk = keys[start:start + self.LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, embedding FROM text_embeddings "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for k, blob in rows:
+                    found[k] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _store(self, entries: Dict[str, np.ndarray]):
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO text_embeddings (key, embedding) VALUES (?, ?)',
+                [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in entries.items()]
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM text_embeddings').fetchone()[0]
+
+    def stats(self) -> Dict:
+        """
+        Hit-rate counters since this cache object was created
+
+        estimated_seconds_saved extrapolates the measured encoder time per
+        miss to every hit.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            per_text = self.encode_seconds / self.misses if self.misses else 0.0
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'encode_seconds': round(self.encode_seconds, 3),
+                'estimated_seconds_saved': round(self.hits * per_text, 3)
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+
+    print("=== Text Embedding Cache Testing ===\n")
+
+    calls = []
+
+    def fake_encoder(texts):
+        calls.append(len(texts))
+        return np.random.default_rng(len(texts)).standard_normal((len(texts), 512))
+
+    path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite')
+    cache = TextEmbeddingCache(path, encoder_id='test')
+
+    first = cache.get_or_compute(['a', 'b', 'a'], fake_encoder)
+    second = cache.get_or_compute(['a', 'b', 'c'], fake_encoder)
+
+    print(f"Encoder calls (distinct misses per call): {calls} (expected [2, 1])")
+    print(f"Cached vectors identical: {np.allclose(first[:2], second[:2])}")
+    print(f"Stats: {cache.stats()}")
+
+    print("\n✅ Text embedding cache tests passed!")
@@ -8,8 +8,18 @@ import tensorflow as tf
 import tensorflow_hub as hub
 from tensorflow import keras
 from tensorflow.keras import layers
+import os
+import json
+import time
+import shutil
+from datetime import datetime
 import numpy as np
-from typing import Dict, Tuple, Optional
+from typing import Dict, Optional
+
+import index_store
+from quantization import QuantizedEmbeddings
+from text_embedding_cache import TextEmbeddingCache
+from model_artifacts import BOOT_PROFILE, resolve_text_encoder, verify_checksum, write_checksum
 
 
 class ListingMatchingModel:
@@ -25,27 +35,76 @@ class ListingMatchingModel:
     # Universal Sentence Encoder model URL
     USE_MODEL_URL = "https://tfhub.dev/google/universal-sentence-encoder/4"
 
-    def __init__(self, use_cached_encoder: bool = True):
+    # User-tower inference modes:
+    # - 'eager': op-by-op execution (no tracing)
+    # - 'compiled': tf.function graphs (USE, dense layers) with fixed input
+    #   signatures (traced once, any batch size)
+    # - 'xla': 'compiled' + XLA jit_compile for the dense layers (USE string
+    #   ops stay outside XLA); batches are padded to power-of-two sizes so
+    #   XLA compiles a bounded set of shapes
+    USER_TOWER_MODES = ('eager', 'compiled', 'xla')
+
+    USER_TOWER_SIGNATURE = [
+        tf.TensorSpec(shape=[None], dtype=tf.string, name='query_text'),
+        tf.TensorSpec(shape=[None, 12], dtype=tf.float32, name='structured_features'),
+        tf.TensorSpec(shape=[None, 11], dtype=tf.float32, name='schedule_features')
+    ]
+
+    LISTING_TOWER_SIGNATURE = [
+        tf.TensorSpec(shape=[None], dtype=tf.string, name='listing_text'),
+        tf.TensorSpec(shape=[None, 12], dtype=tf.float32, name='structured_features'),
+        tf.TensorSpec(shape=[None, 11], dtype=tf.float32, name='temporal_features')
+    ]
+
+    TEXT_EMBEDDING_SIGNATURE = tf.TensorSpec(shape=[None, 512], dtype=tf.float32, name='text_embedding')
+
+    # Written next to the SavedModel files by export()
+    EXPORT_INFO_FILE = 'model_info.json'
+
+    def __init__(self, use_cached_encoder: bool = True,
+                 text_cache: Optional[TextEmbeddingCache] = None,
+                 saved_model_dir: Optional[str] = None):
         """
         Initialize the two-tower model
 
         Args:
             use_cached_encoder: If True, load pre-trained USE from TF Hub (recommended)
+            text_cache: Optional persistent cache of listing text embeddings;
+                        encode_listing() then runs USE only on cache misses
+            saved_model_dir: Load USE and both towers from a directory written
+                             by export() instead of TF Hub + fresh weights
         """
+        self.text_cache = text_cache
+
+        # Eager until compile_user_tower() is called
+        self.user_tower_mode = 'eager'
+        self._compiled_text_encoder = None
+        self._compiled_user_dense = None
+        self.warmup_ms = {}
+
+        if saved_model_dir:
+            self._load_saved_model(saved_model_dir)
+            return
+
         print("🏗️  Building TensorFlow two-tower model...")
+        self.saved_model_dir = None
 
         # Load Universal Sentence Encoder (512-dim output)
-        print("  Loading Universal Sentence Encoder from TF Hub...")
-        self.text_encoder = hub.KerasLayer(
-            self.USE_MODEL_URL,
-            trainable=False,  # Keep pre-trained weights frozen
-            name="universal_sentence_encoder"
-        )
+        # from USE_MODEL_DIR when configured, else TF Hub
+        handle = resolve_text_encoder(self.USE_MODEL_URL)
+        print(f"  Loading Universal Sentence Encoder from {handle}...")
+        with BOOT_PROFILE.stage('use_load'):
+            self.text_encoder = hub.KerasLayer(
+                handle,
+                trainable=False,  # Keep pre-trained weights frozen
+                name="universal_sentence_encoder"
+            )
         print("  ✅ Text encoder loaded (512-dim embeddings)")
 
         # Build model components
-        self._build_user_tower()
-        self._build_listing_tower()
+        with BOOT_PROFILE.stage('tower_build'):
+            self._build_user_tower()
+            self._build_listing_tower()
 
         print("✅ Model architecture built successfully\n")
 
@@ -128,16 +187,243 @@ class ListingMatchingModel:
         # Text embedding (512-dim)
         text_emb = self.text_encoder(query_text)
 
+        return self._user_dense(text_emb, structured_features, schedule_features)
+
+    def _user_dense(self, text_emb: tf.Tensor,
+                    structured_features: tf.Tensor,
+                    schedule_features: tf.Tensor) -> tf.Tensor:
+        """Dense part of the user tower: (text 512, structured 12, schedule 11) → 128"""
         # Structured + schedule features (23-dim → 64-dim)
         combined_features = tf.concat([structured_features, schedule_features], axis=1)
-        struct_emb = self.user_structured_encoder(combined_features)
+        struct_emb = self.user_structured_encoder(combined_features, training=False)
 
         # Fuse text + structured (512 + 64 → 128-dim)
         combined = tf.concat([text_emb, struct_emb], axis=1)
-        user_embedding = self.user_fusion(combined)
+        user_embedding = self.user_fusion(combined, training=False)
 
         return user_embedding
 
+    # ============================================================
+    # SAVEDMODEL EXPORT / LOAD
+    # ============================================================
+
+    def export(self, export_dir: str) -> Dict:
+        """
+        Save USE and both towers (with their current weights) as one SavedModel
+
+        The tower weights are randomly initialized when the model is built,
+        so the listing embeddings of an index only match user embeddings from
+        the same weights: export once, then build the index and serve queries
+        from the exported directory.
+
+        Serving signatures:
+            encode_user(query_text, structured_features, schedule_features) → user_embedding
+            encode_listing(listing_text, structured_features, temporal_features) → listing_embedding
+
+        The directory is written under a temporary name and moved into place
+        with index_store.replace_dir(), as index directories are; loading
+        goes through index_store.read_dir().
+
+        Args:
+            export_dir: Target directory (e.g. listing_model)
+
+        Returns:
+            The export info written to model_info.json
+        """
+        if getattr(self, 'saved_model', None) is not None:
+            raise ValueError(f"Model was loaded from {self.saved_model_dir}; copy that directory instead")
+
+        export_dir = os.path.abspath(export_dir)
+        print(f"💾 Exporting model to {export_dir}...")
+
+        # Create every variable before tracing
+        self.encode_user_query(*self._dummy_user_batch(1))
+        self._listing_dense(
+            self.text_encoder(tf.constant([''])),
+            tf.zeros((1, 12), dtype=tf.float32),
+            tf.zeros((1, 11), dtype=tf.float32)
+        )
+
+        module = tf.Module()
+        module.text_encoder = self.text_encoder
+        module.user_structured_encoder = self.user_structured_encoder
+        module.user_fusion = self.user_fusion
+        module.listing_structured_encoder = self.listing_structured_encoder
+        module.listing_temporal_encoder = self.listing_temporal_encoder
+        module.listing_fusion = self.listing_fusion
+
+        # Building blocks used by the Python API (text cache, compiled user tower)
+        module.embed_text = tf.function(
+            lambda text: self.text_encoder(text),
+            input_signature=[self.USER_TOWER_SIGNATURE[0]]
+        )
+        module.user_dense = tf.function(
+            self._user_dense,
+            input_signature=[self.TEXT_EMBEDDING_SIGNATURE, *self.USER_TOWER_SIGNATURE[1:]]
+        )
+        module.listing_dense = tf.function(
+            self._listing_dense,
+            input_signature=[self.TEXT_EMBEDDING_SIGNATURE, *self.LISTING_TOWER_SIGNATURE[1:]]
+        )
+
+        # Serving signatures
+        module.encode_user = tf.function(
+            lambda query_text, structured_features, schedule_features: {
+                'user_embedding': module.user_dense(
+                    module.embed_text(query_text), structured_features, schedule_features
+                )
+            },
+            input_signature=self.USER_TOWER_SIGNATURE
+        )
+        module.encode_listing = tf.function(
+            lambda listing_text, structured_features, temporal_features: {
+                'listing_embedding': module.listing_dense(
+                    module.embed_text(listing_text), structured_features, temporal_features
+                )
+            },
+            input_signature=self.LISTING_TOWER_SIGNATURE
+        )
+
+        tmp_dir = f"{export_dir}.tmp-{os.getpid()}"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+
+        tf.saved_model.save(module, tmp_dir, signatures={
+            'encode_user': module.encode_user.get_concrete_function(),
+            'encode_listing': module.encode_listing.get_concrete_function()
+        })
+
+        info = {
+            'exported_at': datetime.now().isoformat(),
+            'text_encoder': self.USE_MODEL_URL,
+            'tensorflow_version': tf.__version__,
+            'signatures': ['encode_user', 'encode_listing']
+        }
+        with open(os.path.join(tmp_dir, self.EXPORT_INFO_FILE), 'w') as f:
+            json.dump(info, f, indent=2)
+        info['sha256'] = write_checksum(tmp_dir, source='export')['sha256']
+
+        index_store.replace_dir(tmp_dir, export_dir)
+
+        self.saved_model_dir = export_dir
+        print("✅ Model exported (signatures: encode_user, encode_listing)")
+        return info
+
+    @classmethod
+    def is_saved_model_dir(cls, path: str) -> bool:
+        """True if path holds a model written by export()"""
+        return bool(path) and os.path.isfile(os.path.join(path, cls.EXPORT_INFO_FILE))
+
+    def _load_saved_model(self, saved_model_dir: str):
+        """Restore the text encoder and tower functions from an export() directory"""
+        print(f"📦 Loading two-tower model from {saved_model_dir}...")
+        start = time.perf_counter()
+
+        def load(path):
+            # Refuse a corrupted/partially copied export (ArtifactChecksumError)
+            with BOOT_PROFILE.stage('model_verify'):
+                verified = verify_checksum(path, full=os.getenv('USE_MODEL_VERIFY', '').lower() == 'full')
+            with BOOT_PROFILE.stage('model_load'):
+                return verified, tf.saved_model.load(path)
+
+        # Checksum and graph of the same export, even if export() is replacing the directory.
+        # Keep a reference: the restored functions live as long as this object
+        verified, self.saved_model = index_store.read_dir(saved_model_dir, load)
+        BOOT_PROFILE.note('model', source='saved_model', handle=os.path.abspath(saved_model_dir),
+                          verified=verified)
+        self.saved_model_dir = os.path.abspath(saved_model_dir)
+
+        # Instance attributes shadow the methods, so encode_user_query(),
+        # encode_listing(), embed_listing_text() and compile_user_tower()
+        # run the restored graphs unchanged
+        self.text_encoder = self.saved_model.embed_text
+        self._user_dense = self.saved_model.user_dense
+        self._listing_dense = self.saved_model.listing_dense
+
+        print(f"✅ Model loaded from disk in {time.perf_counter() - start:.1f}s")
+
+    # ============================================================
+    # COMPILED USER TOWER
+    # ============================================================
+
+    def compile_user_tower(self, mode: str = 'compiled'):
+        """
+        Switch user-query encoding to a graph-compiled function
+
+        Variables are created with one eager call first, so the traced
+        functions only read them. Call warmup() afterwards to trace (and, in
+        'xla' mode, compile) before the first request arrives.
+
+        Args:
+            mode: One of USER_TOWER_MODES
+        """
+        if mode not in self.USER_TOWER_MODES:
+            raise ValueError(f"Unknown user tower mode {mode!r} (expected one of {self.USER_TOWER_MODES})")
+
+        self.user_tower_mode = mode
+        self.warmup_ms = {}
+        if mode == 'eager':
+            self._compiled_text_encoder = None
+            self._compiled_user_dense = None
+            return
+
+        self.encode_user_query(*self._dummy_user_batch(1))
+
+        # Two graphs instead of one so USE and the dense layers can be timed
+        # separately (encode_queries timings); USE stays outside XLA either way
+        self._compiled_text_encoder = tf.function(
+            lambda query_text: self.text_encoder(query_text),
+            input_signature=self.USER_TOWER_SIGNATURE[:1]
+        )
+        self._compiled_user_dense = tf.function(
+            self._user_dense,
+            input_signature=[
+                tf.TensorSpec(shape=[None, 512], dtype=tf.float32, name='text_embedding'),
+                *self.USER_TOWER_SIGNATURE[1:]
+            ],
+            jit_compile=(mode == 'xla')
+        )
+
+    def warmup(self, max_batch_size: int = 1) -> Dict[int, float]:
+        """
+        Run the user tower once per batch size it will be called with
+
+        The first call pays for tracing/XLA compilation (and USE's own
+        lazy initialization); doing it here keeps that off the first request.
+
+        Args:
+            max_batch_size: Largest batch expected (micro-batcher / /match/batch)
+
+        Returns:
+            Dict of batch size → milliseconds of its first call
+        """
+        if self.user_tower_mode == 'xla':
+            batch_sizes = sorted({self._batch_bucket(n) for n in range(1, max(max_batch_size, 1) + 1)})
+        else:
+            # One trace serves every batch size
+            batch_sizes = [1]
+
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            self.encode_queries(*self._dummy_user_batch(batch_size, as_tensors=False))
+            self.warmup_ms[batch_size] = round((time.perf_counter() - start) * 1000, 2)
+
+        return dict(self.warmup_ms)
+
+    @staticmethod
+    def _batch_bucket(batch_size: int) -> int:
+        """Smallest power of two >= batch_size"""
+        return 1 << max(batch_size - 1, 0).bit_length()
+
+    @staticmethod
+    def _dummy_user_batch(batch_size: int, as_tensors: bool = True):
+        texts = [''] * batch_size
+        structured = np.zeros((batch_size, 12), dtype=np.float32)
+        schedule = np.zeros((batch_size, 11), dtype=np.float32)
+        if as_tensors:
+            return tf.constant(texts), tf.constant(structured), tf.constant(schedule)
+        return texts, structured, schedule
+
     def encode_listing(self, listing_text: tf.Tensor,
                        structured_features: tf.Tensor,
                        temporal_features: tf.Tensor) -> tf.Tensor:
@@ -152,33 +438,65 @@ class ListingMatchingModel:
         Returns:
             Normalized embedding of shape (batch_size, 128)
         """
-        # Text embedding (512-dim)
-        text_emb = self.text_encoder(listing_text)
+        # Text embedding (512-dim) - from the cache when one is configured
+        text_emb = self.embed_listing_text(listing_text)
+
+        return self._listing_dense(text_emb, structured_features, temporal_features)
 
+    def _listing_dense(self, text_emb: tf.Tensor,
+                       structured_features: tf.Tensor,
+                       temporal_features: tf.Tensor) -> tf.Tensor:
+        """Dense part of the listing tower: (text 512, structured 12, temporal 11) → 128"""
         # Structured features (12-dim → 64-dim)
-        struct_emb = self.listing_structured_encoder(structured_features)
+        struct_emb = self.listing_structured_encoder(structured_features, training=False)
 
         # Temporal features (11-dim → 32-dim)
-        temp_emb = self.listing_temporal_encoder(temporal_features)
+        temp_emb = self.listing_temporal_encoder(temporal_features, training=False)
 
         # Fuse text + structured + temporal (512 + 64 + 32 → 128-dim)
         combined = tf.concat([text_emb, struct_emb, temp_emb], axis=1)
-        listing_embedding = self.listing_fusion(combined)
+        listing_embedding = self.listing_fusion(combined, training=False)
 
         return listing_embedding
 
+    def embed_listing_text(self, listing_text: tf.Tensor) -> tf.Tensor:
+        """
+        USE embeddings for listing texts, served from text_cache when possible
+
+        Args:
+            listing_text: Tensor of shape (batch_size,) containing listing descriptions
+
+        Returns:
+            Tensor of shape (batch_size, 512)
+        """
+        if self.text_cache is None:
+            return self.text_encoder(listing_text)
+
+        texts = [t.decode('utf-8') for t in listing_text.numpy()]
+        embeddings = self.text_cache.get_or_compute(
+            texts,
+            lambda missing: self.text_encoder(tf.constant(missing)).numpy()
+        )
+        return tf.constant(embeddings, dtype=tf.float32)
+
     def compute_similarity(self, user_embedding: tf.Tensor,
-                          listing_embeddings: tf.Tensor) -> tf.Tensor:
+                          listing_embeddings) -> tf.Tensor:
         """
         Compute cosine similarity between user and listings
 
         Args:
             user_embedding: Tensor of shape (1, 128) - single user query
-            listing_embeddings: Tensor of shape (n_listings, 128) - all listings
+            listing_embeddings: Tensor of shape (n_listings, 128) - all listings,
+                                or QuantizedEmbeddings (float16/int8 scoring path)
 
         Returns:
             Similarity scores of shape (n_listings,) ranging from -1 to 1
         """
+        if isinstance(listing_embeddings, QuantizedEmbeddings):
+            # Approximate scores straight from the quantized matrix
+            query = np.asarray(user_embedding, dtype=np.float32)[0]
+            return tf.constant(listing_embeddings.score(query))
+
         # Cosine similarity = dot product of L2-normalized vectors
         # user_embedding: (1, 128)
         # listing_embeddings: (n_listings, 128)
@@ -190,7 +508,9 @@ class ListingMatchingModel:
     def match(self, query_text: str,
               user_structured: np.ndarray,
               user_schedule: np.ndarray,
-              listing_embeddings: np.ndarray) -> np.ndarray:
+              listing_embeddings,
+              rescore_embeddings: Optional[np.ndarray] = None,
+              rescore_top: int = 0) -> np.ndarray:
         """
         Main matching function: Find top listings for a user query
 
@@ -199,135 +519,128 @@ class ListingMatchingModel:
             user_structured: User features (12,) - budget, location, etc.
             user_schedule: User schedule (11,) - days/nights needed
             listing_embeddings: Pre-computed listing embeddings (n_listings, 128)
+                                or QuantizedEmbeddings
+            rescore_embeddings: float32 embeddings used to re-score the best
+                                quantized candidates (quantized input only)
+            rescore_top: Number of best candidates to re-score in float32
 
         Returns:
             Similarity scores (n_listings,) - higher is better
         """
-        # Convert inputs to tensors
-        query_tensor = tf.constant([query_text])
-        struct_tensor = tf.constant([user_structured], dtype=tf.float32)
-        sched_tensor = tf.constant([user_schedule], dtype=tf.float32)
-
         # Encode user query
-        user_emb = self.encode_user_query(query_tensor, struct_tensor, sched_tensor)
-
-        # Compute similarities
-        listing_emb_tensor = tf.constant(listing_embeddings, dtype=tf.float32)
-        similarities = self.compute_similarity(user_emb, listing_emb_tensor)
-
-        return similarities.numpy()
+        user_emb = self.encode_query(query_text, user_structured, user_schedule)
 
+        if not isinstance(listing_embeddings, QuantizedEmbeddings):
+            listing_embeddings = tf.constant(listing_embeddings, dtype=tf.float32)
 
-# ============================================================
-# EMBEDDING INDEX BUILDER
-# ============================================================
+        # Compute similarities
+        similarities = self.compute_similarity(
+            tf.constant([user_emb]), listing_embeddings
+        ).numpy()
 
-class EmbeddingIndexBuilder:
-    """
-    Builds and saves embedding index for all listings
-    """
+        # Replace approximate scores of the best candidates with exact ones
+        if rescore_embeddings is not None and rescore_top > 0:
+            rescore_top = min(rescore_top, len(similarities))
+            top = np.argpartition(-similarities, rescore_top - 1)[:rescore_top]
+            similarities[top] = np.asarray(rescore_embeddings[top], dtype=np.float32) @ user_emb
 
-    def __init__(self, model: ListingMatchingModel):
-        self.model = model
+        return similarities
 
-    def build_index(self, processed_listings: list,
-                    batch_size: int = 32) -> Dict:
+    def encode_query(self, query_text: str,
+                     user_structured: np.ndarray,
+                     user_schedule: np.ndarray) -> np.ndarray:
         """
-        Generate embeddings for all listings
+        Encode a single user query into a 128-dim numpy vector
 
         Args:
-            processed_listings: List of dicts from ListingPreprocessor.preprocess_all()
-            batch_size: Batch size for processing (larger = faster but more memory)
+            query_text: User's search query string
+            user_structured: User features (12,) - budget, location, etc.
+            user_schedule: User schedule (11,) - days/nights needed
 
         Returns:
-            Dictionary containing:
-            - listing_ids: List of listing IDs
-            - embeddings: np.array of shape (n_listings, 128)
-            - metadata: Original processed listings
+            Normalized user embedding of shape (128,)
         """
-        print(f"\n🔮 Generating embeddings for {len(processed_listings)} listings...")
-
-        listing_ids = []
-        all_embeddings = []
-
-        # Process in batches for efficiency
-        for i in range(0, len(processed_listings), batch_size):
-            batch = processed_listings[i:i+batch_size]
+        return self.encode_queries([query_text], [user_structured], [user_schedule])[0]
 
-            # Extract batch data
-            texts = [l['text'] for l in batch]
-            structured = np.array([l['structured_features'] for l in batch])
-            temporal = np.array([l['temporal_features'] for l in batch])
-
-            # Convert to tensors
-            text_tensor = tf.constant(texts)
-            struct_tensor = tf.constant(structured, dtype=tf.float32)
-            temp_tensor = tf.constant(temporal, dtype=tf.float32)
-
-            # Generate embeddings
-            embeddings = self.model.encode_listing(
-                text_tensor, struct_tensor, temp_tensor
-            )
-
-            # Collect results
-            listing_ids.extend([l['listing_id'] for l in batch])
-            all_embeddings.append(embeddings.numpy())
-
-            if (i + batch_size) % 100 == 0:
-                print(f"  Processed {min(i + batch_size, len(processed_listings))}/{len(processed_listings)} listings...")
-
-        # Combine all batches
-        all_embeddings = np.vstack(all_embeddings)
-
-        print(f"✅ Generated {len(all_embeddings)} embeddings (shape: {all_embeddings.shape})\n")
-
-        return {
-            'listing_ids': listing_ids,
-            'embeddings': all_embeddings,
-            'metadata': processed_listings
-        }
-
-    def save_index(self, index: Dict, filepath: str = 'listing_embeddings.npz'):
+    def encode_queries(self, query_texts: list,
+                       user_structured: np.ndarray,
+                       user_schedule: np.ndarray,
+                       timings: Optional[Dict[str, float]] = None) -> np.ndarray:
         """
-        Save embedding index to disk
+        Encode a batch of user queries in one user-tower forward pass
 
         Args:
-            index: Output from build_index()
-            filepath: Where to save (default: listing_embeddings.npz)
-        """
-        print(f"💾 Saving embedding index to {filepath}...")
-
-        np.savez_compressed(
-            filepath,
-            listing_ids=index['listing_ids'],
-            embeddings=index['embeddings']
-        )
-
-        print(f"✅ Index saved successfully ({len(index['listing_ids'])} listings)\n")
+            query_texts: B query strings
+            user_structured: (B, 12) user features
+            user_schedule: (B, 11) user schedules
+            timings: Optional dict that receives the seconds spent in USE
+                     ('use_encode') and the dense layers ('tower_forward')
 
-    @staticmethod
-    def load_index(filepath: str = 'listing_embeddings.npz') -> Dict:
+        Returns:
+            Normalized user embeddings of shape (B, 128)
+        """
+        query_texts = list(query_texts)
+        user_structured = np.asarray(user_structured, dtype=np.float32).reshape(-1, 12)
+        user_schedule = np.asarray(user_schedule, dtype=np.float32).reshape(-1, 11)
+        batch_size = len(query_texts)
+
+        if self._compiled_user_dense is None:
+            text_encoder, user_dense = self.text_encoder, self._user_dense
+        else:
+            text_encoder, user_dense = self._compiled_text_encoder, self._compiled_user_dense
+
+            # XLA compiles per input shape: pad to the warmed-up bucket sizes
+            if self.user_tower_mode == 'xla':
+                padding = self._batch_bucket(batch_size) - batch_size
+                if padding:
+                    query_texts = query_texts + [''] * padding
+                    user_structured = np.pad(user_structured, ((0, padding), (0, 0)))
+                    user_schedule = np.pad(user_schedule, ((0, padding), (0, 0)))
+
+        start = time.perf_counter()
+        text_emb = text_encoder(tf.constant(query_texts))
+        encoded = time.perf_counter()
+        user_emb = user_dense(
+            text_emb,
+            tf.constant(user_structured),
+            tf.constant(user_schedule)
+        ).numpy()[:batch_size]
+
+        if timings is not None:
+            timings['use_encode'] = encoded - start
+            timings['tower_forward'] = time.perf_counter() - encoded
+
+        return user_emb
+
+    def match_batch(self, query_texts: list,
+                    user_structured: np.ndarray,
+                    user_schedule: np.ndarray,
+                    listing_embeddings: np.ndarray) -> np.ndarray:
         """
-        Load embedding index from disk
+        Score many queries against all listings with a single matmul
 
         Args:
-            filepath: Path to saved index
+            query_texts: B query strings
+            user_structured: (B, 12) user features
+            user_schedule: (B, 11) user schedules
+            listing_embeddings: Pre-computed listing embeddings (n_listings, 128)
 
         Returns:
-            Dictionary with listing_ids and embeddings
+            Similarity scores of shape (B, n_listings)
         """
-        print(f"📂 Loading embedding index from {filepath}...")
+        user_emb = self.encode_queries(query_texts, user_structured, user_schedule)
 
-        data = np.load(filepath, allow_pickle=True)
+        # (B × 128) · (128 × N)
+        return user_emb @ np.asarray(listing_embeddings, dtype=np.float32).T
 
-        index = {
-            'listing_ids': data['listing_ids'].tolist(),
-            'embeddings': data['embeddings']
-        }
 
-        print(f"✅ Loaded {len(index['listing_ids'])} listings\n")
+# ============================================================
+# TEXT EMBEDDING CACHE
+# ============================================================
 
-        return index
+def open_text_cache(path: str) -> TextEmbeddingCache:
+    """Text embedding cache bound to the current USE model version"""
+    return TextEmbeddingCache(path, encoder_id=ListingMatchingModel.USE_MODEL_URL)
 
 
 # ============================================================
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Approximate Nearest-Neighbour Vector Index
+Pure NumPy IVF-flat index over the L2-normalized listing embeddings
+"""
+
+import os
+import numpy as np
+from typing import Dict, Optional, Tuple
+from ranking import WORKSPACE
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file (IVF-flat) index for inner-product search
+
+    Listings are clustered around n_lists spherical k-means centroids.
+    A query is scored against the centroids first and then only scans the
+    listings stored in the n_probe closest lists, instead of the whole matrix.
+
+    Recall/latency knob:
+    - n_probe = 1        → fastest, lowest recall
+    - n_probe = n_lists  → exact search (every list is scanned)
+    """
+
+    DEFAULT_N_PROBE = 8
+
+    # Below this many candidate rows a plain exact scan is cheaper than probing
+    EXACT_SCAN_THRESHOLD = 2048
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray,
+                 list_rows: np.ndarray, embeddings: np.ndarray,
+                 n_probe: Optional[int] = None):
+        """
+        Args:
+            centroids: (n_lists, dim) normalized cluster centroids
+            list_offsets: (n_lists + 1,) start offset of each list in list_rows
+            list_rows: (n_listings,) embedding row numbers grouped by list
+            embeddings: (n_listings, dim) listing embeddings the rows point into
+            n_probe: Default number of lists scanned per query
+        """
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        self.list_rows = np.asarray(list_rows, dtype=np.int64)
+        self.embeddings = embeddings
+        self.n_probe = int(n_probe or self.DEFAULT_N_PROBE)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    # ------------------------------------------------------------
+    # TRAINING
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def default_n_lists(n_listings: int) -> int:
+        """Rule of thumb: about sqrt(N) lists, capped to a sane range"""
+        return int(np.clip(np.sqrt(max(n_listings, 1)), 1, 4096))
+
+    @classmethod
+    def train(cls, embeddings: np.ndarray, n_lists: Optional[int] = None,
+              n_iter: int = 20, max_train_points: int = 256,
+              n_probe: Optional[int] = None, seed: int = 0) -> 'IVFFlatIndex':
+        """
+        Cluster embeddings with spherical k-means and build the inverted lists
+
+        Args:
+            embeddings: (n_listings, dim) L2-normalized embeddings
+            n_lists: Number of clusters (default: ~sqrt(n_listings))
+            n_iter: k-means iterations
+            max_train_points: Training sample size per list (caps k-means cost)
+            n_probe: Default lists scanned per query
+            seed: Random seed for reproducible builds
+
+        Returns:
+            Trained IVFFlatIndex
+        """
+        data = np.asarray(embeddings, dtype=np.float32)
+        n_listings = len(data)
+        n_lists = min(n_lists or cls.default_n_lists(n_listings), max(n_listings, 1))
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample - k-means cost is linear in the sample size
+        sample_size = min(n_listings, n_lists * max_train_points)
+        sample = data[rng.choice(n_listings, sample_size, replace=False)] if sample_size < n_listings else data
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignments = cls._assign(sample, centroids)
+
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            # Re-seed empty clusters with random sample points
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        list_offsets, list_rows = cls._build_lists(cls._assign(data, centroids), n_lists)
+
+        return cls(centroids, list_offsets, list_rows, embeddings, n_probe=n_probe)
+
+    @staticmethod
+    def _assign(data: np.ndarray, centroids: np.ndarray,
+                chunk_size: int = 65536) -> np.ndarray:
+        """Nearest centroid (max inner product) for every row, computed in chunks"""
+        assignments = np.empty(len(data), dtype=np.int64)
+        for start in range(0, len(data), chunk_size):
+            chunk = np.asarray(data[start:start + chunk_size], dtype=np.float32)
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+    @staticmethod
+    def _build_lists(assignments: np.ndarray, n_lists: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Group row numbers by list (CSR layout: offsets + rows)"""
+        list_rows = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)])
+        return list_offsets, list_rows
+
+    # ------------------------------------------------------------
+    # INCREMENTAL UPDATES
+    # ------------------------------------------------------------
+
+    def assignments(self) -> np.ndarray:
+        """List id of every embedding row (inverse of the CSR layout)"""
+        assignments = np.empty(len(self.list_rows), dtype=np.int64)
+        assignments[self.list_rows] = np.repeat(np.arange(self.n_lists), np.diff(self.list_offsets))
+        return assignments
+
+    def updated(self, embeddings: np.ndarray, changed_rows: np.ndarray) -> 'IVFFlatIndex':
+        """
+        New index over an updated embedding matrix, keeping the trained centroids
+
+        Args:
+            embeddings: Updated (n_listings, dim) matrix; rows beyond the
+                        current size are treated as appended
+            changed_rows: Rows whose embedding changed or was appended
+
+        Returns:
+            IVFFlatIndex with changed rows re-assigned to their nearest list
+        """
+        assignments = np.full(len(embeddings), -1, dtype=np.int64)
+        assignments[:len(self.list_rows)] = self.assignments()[:len(embeddings)]
+
+        changed_rows = np.asarray(changed_rows, dtype=np.int64)
+        if len(changed_rows):
+            assignments[changed_rows] = self._assign(
+                np.asarray(embeddings[changed_rows], dtype=np.float32), self.centroids
+            )
+
+        list_offsets, list_rows = self._build_lists(assignments, self.n_lists)
+        return IVFFlatIndex(self.centroids, list_offsets, list_rows, embeddings, n_probe=self.n_probe)
+
+    def compacted(self, embeddings: np.ndarray, keep_mask: np.ndarray) -> 'IVFFlatIndex':
+        """
+        New index after dropping rows (keep_mask=False), renumbering the rest
+
+        Args:
+            embeddings: Embedding matrix with the dropped rows already removed
+            keep_mask: (current n_listings,) boolean mask of surviving rows
+        """
+        assignments = self.assignments()[np.asarray(keep_mask, dtype=bool)]
+        list_offsets, list_rows = self._build_lists(assignments, self.n_lists)
+        return IVFFlatIndex(self.centroids, list_offsets, list_rows, embeddings, n_probe=self.n_probe)
+
+    # ------------------------------------------------------------
+    # SEARCH
+    # ------------------------------------------------------------
+
+    def search(self, query_vec: np.ndarray, k: int,
+               candidate_mask: Optional[np.ndarray] = None,
+               n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k listings with the highest inner product to query_vec
+
+        Args:
+            query_vec: (dim,) normalized user embedding
+            k: Number of results
+            candidate_mask: Optional (n_listings,) boolean mask - only rows
+                            where the mask is True may be returned
+            n_probe: Lists to scan (overrides the index default)
+
+        Returns:
+            Tuple of (row indices, scores), both sorted by descending score
+        """
+        query = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+        n_probe = min(int(n_probe or self.n_probe), self.n_lists)
+
+        if candidate_mask is not None:
+            candidate_mask = np.asarray(candidate_mask, dtype=bool)
+            n_candidates = int(candidate_mask.sum())
+        else:
+            n_candidates = len(self.list_rows)
+
+        # Small (or heavily filtered) sets: an exact scan beats probing
+        if n_candidates <= self.EXACT_SCAN_THRESHOLD:
+            rows = np.flatnonzero(candidate_mask) if candidate_mask is not None else np.arange(n_candidates)
+            return self._exact(query, k, rows)
+
+        k = min(k, n_candidates)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Visit lists from closest to farthest centroid. Keep probing past
+        # n_probe until at least k candidates survived the mask.
+        list_order = np.argsort(-(self.centroids @ query))
+        collected = []
+        n_collected = 0
+        for probed, list_id in enumerate(list_order):
+            if probed >= n_probe and n_collected >= k:
+                break
+            rows = self.list_rows[self.list_offsets[list_id]:self.list_offsets[list_id + 1]]
+            if candidate_mask is not None:
+                rows = rows[candidate_mask[rows]]
+            if len(rows):
+                collected.append(rows)
+                n_collected += len(rows)
+
+        return self._exact(query, k, np.concatenate(collected))
+
+    def _exact(self, query: np.ndarray, k: int,
+               rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Score the given rows exactly and return the top-k"""
+        k = min(k, len(rows))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        return WORKSPACE.search(self.embeddings, query, k, rows)
+
+    # ------------------------------------------------------------
+    # PERSISTENCE
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def sidecar_path(index_filepath: str) -> str:
+        """Vector index file stored next to an embedding index file"""
+        base, _ = os.path.splitext(index_filepath)
+        return f"{base}.ivf.npz"
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Centroids and inverted lists as named arrays (embeddings are stored separately)"""
+        return {
+            'ivf_centroids': self.centroids,
+            'ivf_list_offsets': self.list_offsets,
+            'ivf_list_rows': self.list_rows,
+            'ivf_n_probe': np.array(self.n_probe)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray],
+                    embeddings: np.ndarray) -> 'IVFFlatIndex':
+        """
+        Rebuild an index from to_arrays() output and attach it to the embedding matrix
+
+        Raises:
+            ValueError: If the index does not cover the given embeddings
+        """
+        if len(arrays['ivf_list_rows']) != len(embeddings):
+            raise ValueError(
+                f"Vector index covers {len(arrays['ivf_list_rows'])} listings "
+                f"but embedding index has {len(embeddings)}"
+            )
+
+        return cls(
+            arrays['ivf_centroids'],
+            arrays['ivf_list_offsets'],
+            arrays['ivf_list_rows'],
+            embeddings,
+            n_probe=int(arrays['ivf_n_probe'])
+        )
+
+    @staticmethod
+    def has_arrays(arrays: Dict[str, np.ndarray]) -> bool:
+        return 'ivf_centroids' in arrays
+
+    def save(self, filepath: str):
+        """Save centroids and inverted lists to a standalone .npz"""
+        np.savez(filepath, **self.to_arrays())
+
+    @classmethod
+    def load(cls, filepath: str, embeddings: np.ndarray) -> 'IVFFlatIndex':
+        """Load a standalone .npz saved by save()"""
+        return cls.from_arrays(dict(np.load(filepath)), embeddings)
+
+    def stats(self) -> Dict:
+        """List size statistics (useful for tuning n_lists)"""
+        sizes = np.diff(self.list_offsets)
+        return {
+            'n_lists': self.n_lists,
+            'n_probe': self.n_probe,
+            'n_listings': int(sizes.sum()),
+            'list_size_min': int(sizes.min()) if len(sizes) else 0,
+            'list_size_mean': float(sizes.mean()) if len(sizes) else 0.0,
+            'list_size_max': int(sizes.max()) if len(sizes) else 0
+        }
+
+
+# ============================================================
+# TESTING
+# ============================================================
+
+if __name__ == '__main__':
+    print("=== Vector Index Testing ===\n")
+
+    rng = np.random.default_rng(42)
+    embeddings = rng.standard_normal((5000, 128)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    index = IVFFlatIndex.train(embeddings)
+    print(f"Index stats: {index.stats()}")
+
+    query = embeddings[0]
+    rows, scores = index.search(query, 10, n_probe=index.n_lists)
+    print(f"Exact-probe top row: {rows[0]} (score {scores[0]:.4f}, expected row 0)")
+
+    mask = np.zeros(len(embeddings), dtype=bool)
+    mask[::2] = True
+    rows, _ = index.search(query, 10, candidate_mask=mask)
+    print(f"Masked search only returns even rows: {bool(np.all(rows % 2 == 0))}")
+
+    print("\n✅ Vector index tests passed!")
@@ -42,6 +42,7 @@ def main():
         ('listing_preprocessor.py', 'Listing Preprocessor'),
         ('query_processor.py', 'Query Processor'),
         ('tf_model.py', 'TensorFlow Model'),
+        ('embedding_index.py', 'Embedding Index Builder'),
         ('build_embeddings.py', 'Embedding Builder'),
         ('app_tf.py', 'Flask API'),
         ('test_tf_api.py', 'Test Suite'),